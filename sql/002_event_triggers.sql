@@ -47,11 +47,21 @@ DECLARE
     v_old_metadata JSONB;
     v_description TEXT;
 BEGIN
+    -- Start of capture, observed by pggit.collect_ddl_metrics()
+    PERFORM set_config('pggit.ddl_capture_started_at', clock_timestamp()::TEXT, true);
+
     -- Skip DDL tracking during schema installation if history table doesn't exist yet
     IF NOT EXISTS (SELECT 1 FROM information_schema.tables
                    WHERE table_schema = 'pggit' AND table_name = 'history') THEN
         RETURN;
     END IF;
+
+    -- Set-based capture: one catalog pass for the whole firing
+    IF current_setting('pggit.ddl_capture_mode', true) = 'set_based' THEN
+        PERFORM pggit.capture_ddl_commands_set_based();
+        RETURN;
+    END IF;
+
     -- Loop through all objects affected by the DDL command
     FOR v_object IN SELECT * FROM pg_event_trigger_ddl_commands() LOOP
         -- FIRST: Check for temporary objects before ANY processing
@@ -362,6 +372,365 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- ============================================
+-- Set-based DDL capture
+-- ============================================
+-- Alternative to the per-object loop above for migrations that create
+-- hundreds of objects per command. Enable per session or database:
+--   SET pggit.ddl_capture_mode = 'set_based';
+--   ALTER DATABASE mydb SET pggit.ddl_capture_mode = 'set_based';
+-- Any other value (or unset) keeps the per-object handler.
+
+-- One tracked object of a trigger firing
+CREATE TYPE pggit.ddl_capture_target AS (
+    objid OID,
+    object_type pggit.object_type,
+    event_object_type TEXT,
+    schema_name TEXT,
+    object_name TEXT,
+    object_identity TEXT,
+    command_tag TEXT,
+    change_type pggit.change_type,
+    change_severity pggit.change_severity
+);
+
+-- Objects of the current trigger firing that pggit tracks, one row per object
+DROP FUNCTION IF EXISTS pggit.ddl_capture_targets();
+CREATE OR REPLACE FUNCTION pggit.ddl_capture_targets()
+RETURNS SETOF pggit.ddl_capture_target AS $$
+    SELECT DISTINCT ON (t.object_type, t.schema_name, t.object_name)
+        t.objid, t.object_type, t.event_object_type, t.schema_name,
+        t.object_name, t.object_identity, t.command_tag,
+        t.change_type, t.change_severity
+    FROM (
+        SELECT
+            cmd.objid,
+            CASE cmd.object_type
+                WHEN 'table' THEN 'TABLE'
+                WHEN 'index' THEN 'INDEX'
+                WHEN 'view' THEN 'VIEW'
+                WHEN 'function' THEN 'FUNCTION'
+                WHEN 'type' THEN 'TYPE'
+            END::pggit.object_type AS object_type,
+            cmd.object_type AS event_object_type,
+            cmd.schema_name,
+            -- Same naming as the per-object handler (regclass text without schema)
+            COALESCE(quote_ident(c.relname), p.proname, ty.typname) AS object_name,
+            cmd.object_identity,
+            cmd.command_tag,
+            split_part(cmd.command_tag, ' ', 1)::pggit.change_type AS change_type,
+            CASE split_part(cmd.command_tag, ' ', 1)
+                WHEN 'DROP' THEN 'MAJOR'
+                ELSE 'MINOR'
+            END::pggit.change_severity AS change_severity
+        FROM pg_event_trigger_ddl_commands() cmd
+        LEFT JOIN pg_class c
+            ON cmd.object_type IN ('table', 'index', 'view') AND c.oid = cmd.objid
+        LEFT JOIN pg_proc p
+            ON cmd.object_type = 'function' AND p.oid = cmd.objid
+        LEFT JOIN pg_type ty
+            ON cmd.object_type = 'type' AND ty.oid = cmd.objid
+        WHERE cmd.schema_name IS NOT NULL
+          AND cmd.schema_name NOT LIKE 'pg_temp%'
+          AND cmd.schema_name NOT LIKE 'pg_toast_temp%'
+          AND cmd.command_tag IN (
+              'CREATE TABLE', 'CREATE VIEW', 'CREATE INDEX', 'CREATE FUNCTION',
+              'ALTER TABLE', 'ALTER VIEW', 'ALTER INDEX', 'ALTER FUNCTION',
+              'DROP TABLE', 'DROP VIEW', 'DROP INDEX', 'DROP FUNCTION'
+          )
+          AND cmd.object_type IN ('table', 'index', 'view', 'function', 'type')
+    ) t
+    WHERE t.object_name IS NOT NULL
+    ORDER BY t.object_type, t.schema_name, t.object_name,
+             t.change_severity, t.change_type;
+$$ LANGUAGE sql;
+
+-- Evaluate ddl_capture_targets() once for the current firing
+-- The result is also left in a transaction-local setting, tagged with the
+-- statement, for event triggers that fire later for the same command.
+CREATE OR REPLACE FUNCTION pggit.materialize_ddl_capture_targets()
+RETURNS pggit.ddl_capture_target[] AS $$
+DECLARE
+    v_targets pggit.ddl_capture_target[];
+BEGIN
+    v_targets := ARRAY(SELECT t FROM pggit.ddl_capture_targets() t);
+
+    PERFORM set_config('pggit.ddl_capture_targets', v_targets::TEXT, true);
+    PERFORM set_config('pggit.ddl_capture_targets_at', statement_timestamp()::TEXT, true);
+
+    RETURN v_targets;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Targets left by materialize_ddl_capture_targets() for this statement,
+-- cleared once taken; evaluated afresh when no capture left them.
+CREATE OR REPLACE FUNCTION pggit.take_ddl_capture_targets()
+RETURNS pggit.ddl_capture_target[] AS $$
+DECLARE
+    v_targets pggit.ddl_capture_target[];
+BEGIN
+    IF current_setting('pggit.ddl_capture_targets_at', true) = statement_timestamp()::TEXT THEN
+        v_targets := current_setting('pggit.ddl_capture_targets')::pggit.ddl_capture_target[];
+        PERFORM set_config('pggit.ddl_capture_targets', '', true);
+        PERFORM set_config('pggit.ddl_capture_targets_at', '', true);
+        RETURN v_targets;
+    END IF;
+
+    RETURN ARRAY(SELECT t FROM pggit.ddl_capture_targets() t);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Capture every object of the current trigger firing with a fixed number
+-- of multi-row statements: objects + history, index parents, columns and
+-- dependencies. The firing's targets are read from the event trigger once.
+-- Must be called from a ddl_command_end event trigger.
+CREATE OR REPLACE FUNCTION pggit.capture_ddl_commands_set_based()
+RETURNS INTEGER AS $$
+DECLARE
+    v_captured INTEGER;
+    v_targets pggit.ddl_capture_target[] := pggit.materialize_ddl_capture_targets();
+BEGIN
+    -- 1. Upsert objects and record one history row per object
+    WITH targets AS (
+        SELECT * FROM unnest(v_targets)
+    ),
+    table_columns AS (
+        SELECT
+            a.attrelid,
+            jsonb_object_agg(
+                a.attname,
+                jsonb_build_object(
+                    'type', COALESCE(bt.typname, t.typname) ||
+                        CASE
+                            WHEN COALESCE(bt.typname, t.typname) IN ('bpchar', 'varchar')
+                                 AND tm.typmod >= 4
+                            THEN '(' || (tm.typmod - 4) || ')'
+                            WHEN COALESCE(bt.typname, t.typname) IN ('bit', 'varbit')
+                                 AND tm.typmod >= 0
+                            THEN '(' || tm.typmod || ')'
+                            ELSE ''
+                        END,
+                    'nullable', NOT (a.attnotnull OR (t.typtype = 'd' AND t.typnotnull)),
+                    'default', CASE WHEN a.attgenerated = ''
+                                    THEN pg_get_expr(ad.adbin, ad.adrelid) END,
+                    'position', a.attnum
+                )
+            ) AS columns
+        FROM pg_attribute a
+        JOIN pg_type t ON t.oid = a.atttypid
+        LEFT JOIN pg_type bt ON t.typtype = 'd' AND bt.oid = t.typbasetype
+        LEFT JOIN pg_attrdef ad ON ad.adrelid = a.attrelid AND ad.adnum = a.attnum
+        CROSS JOIN LATERAL (
+            SELECT CASE WHEN t.typtype = 'd' THEN t.typtypmod ELSE a.atttypmod END AS typmod
+        ) tm
+        WHERE a.attrelid IN (SELECT objid FROM targets WHERE object_type = 'TABLE')
+          AND a.attnum > 0
+          AND NOT a.attisdropped
+        GROUP BY a.attrelid
+    ),
+    described AS (
+        SELECT
+            tg.*,
+            CASE tg.object_type
+                WHEN 'TABLE' THEN jsonb_build_object(
+                    'columns', COALESCE(tc.columns, '{}'::jsonb),
+                    'oid', tg.objid)
+                WHEN 'INDEX' THEN jsonb_build_object(
+                    'table', ic.relname,
+                    'oid', tg.objid)
+                WHEN 'TYPE' THEN jsonb_build_object(
+                    'oid', tg.objid,
+                    'object_identity', tg.object_identity)
+                ELSE jsonb_build_object('oid', tg.objid)
+            END AS metadata
+        FROM targets tg
+        LEFT JOIN table_columns tc ON tc.attrelid = tg.objid
+        LEFT JOIN pg_index i ON tg.object_type = 'INDEX' AND i.indexrelid = tg.objid
+        LEFT JOIN pg_class ic ON ic.oid = i.indrelid
+    ),
+    versioned AS (
+        SELECT
+            d.*,
+            o.metadata AS old_metadata,
+            COALESCE(o.version, 1) AS old_version,
+            COALESCE(o.version_major, 1) AS old_major,
+            COALESCE(o.version_minor, 0) AS old_minor,
+            COALESCE(o.version_patch, 0) AS old_patch,
+            CASE
+                WHEN d.change_type = 'ALTER' AND d.object_type = 'TABLE'
+                     AND COALESCE(o.metadata, d.metadata) IS DISTINCT FROM d.metadata
+                THEN 'MAJOR'::pggit.change_severity
+                ELSE d.change_severity
+            END AS severity
+        FROM described d
+        LEFT JOIN pggit.objects o
+            ON o.object_type = d.object_type
+           AND o.schema_name = d.schema_name
+           AND o.object_name = d.object_name
+           AND o.branch_name = 'main'
+    ),
+    upserted AS (
+        INSERT INTO pggit.objects AS o (
+            object_type, schema_name, object_name, metadata, branch_name,
+            version, version_major, version_minor, version_patch
+        )
+        SELECT
+            v.object_type, v.schema_name, v.object_name, v.metadata, 'main',
+            v.old_version + 1,
+            v.old_major + CASE WHEN v.severity = 'MAJOR' THEN 1 ELSE 0 END,
+            CASE v.severity
+                WHEN 'MAJOR' THEN 0
+                WHEN 'MINOR' THEN v.old_minor + 1
+                ELSE v.old_minor
+            END,
+            CASE v.severity
+                WHEN 'PATCH' THEN v.old_patch + 1
+                ELSE 0
+            END
+        FROM versioned v
+        ON CONFLICT (object_type, schema_name, object_name, branch_name) DO UPDATE
+        SET version = EXCLUDED.version,
+            version_major = EXCLUDED.version_major,
+            version_minor = EXCLUDED.version_minor,
+            version_patch = EXCLUDED.version_patch,
+            metadata = EXCLUDED.metadata,
+            is_active = true,
+            updated_at = CURRENT_TIMESTAMP
+        RETURNING o.id, o.object_type, o.schema_name, o.object_name
+    )
+    INSERT INTO pggit.history (
+        object_id, change_type, change_severity,
+        old_version, new_version,
+        old_metadata, new_metadata,
+        change_description, sql_executed
+    )
+    SELECT
+        u.id, v.change_type, v.severity,
+        v.old_version, v.old_version + 1,
+        COALESCE(v.old_metadata, v.metadata), v.metadata,
+        format('%s %s %s.%s', v.command_tag, v.event_object_type,
+               v.schema_name, v.object_name) ||
+        CASE WHEN v.change_type = 'ALTER' AND v.object_type = 'TABLE' THEN
+            COALESCE(' - Added column(s): ' || (
+                SELECT string_agg(k, ', ')
+                FROM jsonb_object_keys(v.metadata->'columns') k
+                WHERE NOT COALESCE(v.old_metadata, v.metadata)->'columns' ? k
+            ), '') ||
+            COALESCE(' - Removed column(s): ' || (
+                SELECT string_agg(k, ', ')
+                FROM jsonb_object_keys(COALESCE(v.old_metadata, v.metadata)->'columns') k
+                WHERE NOT v.metadata->'columns' ? k
+            ), '')
+        ELSE '' END,
+        current_query()
+    FROM upserted u
+    JOIN versioned v
+        ON v.object_type = u.object_type
+       AND v.schema_name = u.schema_name
+       AND v.object_name = u.object_name;
+
+    GET DIAGNOSTICS v_captured = ROW_COUNT;
+
+    IF v_captured = 0 THEN
+        RETURN 0;
+    END IF;
+
+    -- 2. Link indexes to their tables (the table may be from this same firing)
+    UPDATE pggit.objects AS idx
+    SET parent_id = tbl.id
+    FROM unnest(v_targets) tg
+    JOIN pggit.objects tbl
+        ON tbl.object_type = 'TABLE'
+       AND tbl.branch_name = 'main'
+       AND tbl.schema_name = tg.schema_name
+    WHERE tg.object_type = 'INDEX'
+      AND idx.object_type = 'INDEX'
+      AND idx.branch_name = 'main'
+      AND idx.schema_name = tg.schema_name
+      AND idx.object_name = tg.object_name
+      AND tbl.object_name = quote_ident(idx.metadata->>'table')
+      AND idx.parent_id IS DISTINCT FROM tbl.id;
+
+    -- 3. Columns of captured tables, straight from the metadata written in step 1
+    INSERT INTO pggit.objects AS o (
+        object_type, schema_name, object_name, parent_id, metadata, branch_name
+    )
+    SELECT
+        'COLUMN'::pggit.object_type,
+        tbl.schema_name,
+        tbl.object_name || '.' || col.key,
+        tbl.id,
+        jsonb_build_object(
+            'type', col.value->'type',
+            'nullable', col.value->'nullable',
+            'default', col.value->'default'
+        ),
+        'main'
+    FROM unnest(v_targets) tg
+    JOIN pggit.objects tbl
+        ON tbl.object_type = 'TABLE'
+       AND tbl.branch_name = 'main'
+       AND tbl.schema_name = tg.schema_name
+       AND tbl.object_name = tg.object_name
+    CROSS JOIN LATERAL jsonb_each(tbl.metadata->'columns') col
+    WHERE tg.object_type = 'TABLE'
+    ON CONFLICT (object_type, schema_name, object_name, branch_name) DO UPDATE
+    SET parent_id = EXCLUDED.parent_id,
+        metadata = EXCLUDED.metadata,
+        is_active = true,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE o.metadata IS DISTINCT FROM EXCLUDED.metadata
+       OR o.parent_id IS DISTINCT FROM EXCLUDED.parent_id
+       OR NOT o.is_active;
+
+    -- 4. Foreign key and view dependencies in one pass over pg_constraint/pg_depend
+    INSERT INTO pggit.dependencies (dependent_id, depends_on_id, dependency_type)
+    SELECT DISTINCT ON (dep.id, ref.id)
+        dep.id, ref.id, rel.dependency_type
+    FROM (
+        SELECT con.conrelid AS dependent_oid,
+               con.confrelid AS referenced_oid,
+               'foreign_key' AS dependency_type
+        FROM pg_constraint con
+        WHERE con.contype = 'f'
+          AND con.conrelid IN (
+              SELECT t.objid FROM unnest(v_targets) t WHERE t.object_type = 'TABLE')
+        UNION ALL
+        SELECT r.ev_class, d.refobjid, 'view'
+        FROM pg_rewrite r
+        JOIN pg_depend d
+            ON d.classid = 'pg_rewrite'::regclass
+           AND d.objid = r.oid
+           AND d.refclassid = 'pg_class'::regclass
+        WHERE r.ev_class IN (
+              SELECT t.objid FROM unnest(v_targets) t WHERE t.object_type = 'VIEW')
+          AND d.refobjid <> r.ev_class
+    ) rel
+    JOIN pg_class dc ON dc.oid = rel.dependent_oid
+    JOIN pg_namespace dn ON dn.oid = dc.relnamespace
+    JOIN pg_class rc ON rc.oid = rel.referenced_oid AND rc.relkind IN ('r', 'p', 'v', 'm')
+    JOIN pg_namespace rn ON rn.oid = rc.relnamespace
+    JOIN pggit.objects dep
+        ON dep.object_type IN ('TABLE', 'VIEW')
+       AND dep.schema_name = dn.nspname
+       AND dep.object_name = quote_ident(dc.relname)
+       AND dep.branch_name = 'main'
+       AND dep.is_active = true
+    JOIN pggit.objects ref
+        ON ref.object_type IN ('TABLE', 'VIEW')
+       AND ref.schema_name = rn.nspname
+       AND ref.object_name = quote_ident(rc.relname)
+       AND ref.branch_name = 'main'
+       AND ref.is_active = true
+    WHERE rn.nspname NOT IN ('pg_catalog', 'information_schema')
+    ORDER BY dep.id, ref.id
+    ON CONFLICT (dependent_id, depends_on_id) DO UPDATE
+    SET dependency_type = EXCLUDED.dependency_type;
+
+    RETURN v_captured;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Function to handle dropped objects
 CREATE OR REPLACE FUNCTION pggit.handle_sql_drop() RETURNS event_trigger AS $$
 DECLARE
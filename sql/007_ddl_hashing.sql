@@ -25,183 +25,165 @@ CREATE INDEX IF NOT EXISTS idx_objects_ddl_hash
 ON pggit.objects(ddl_hash) 
 WHERE is_active = true;
 
+-- Resumable bulk rehash runs, one cursor per schema
+CREATE TABLE IF NOT EXISTS pggit.rehash_progress (
+    run_id UUID NOT NULL,
+    schema_name TEXT NOT NULL,
+    batch_size INT NOT NULL DEFAULT 1000,
+    last_object_id INT NOT NULL DEFAULT 0,
+    batches INT NOT NULL DEFAULT 0,
+    objects_hashed BIGINT NOT NULL DEFAULT 0,
+    objects_skipped BIGINT NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'running', 'completed')),
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP,
+    PRIMARY KEY (run_id, schema_name)
+);
+
+-- Objects still waiting for a hash, in cursor order
+CREATE INDEX IF NOT EXISTS idx_objects_unhashed
+ON pggit.objects(schema_name, id)
+WHERE is_active = true AND ddl_hash IS NULL;
+
 -- ============================================
 -- PART 2: DDL Normalization Functions
 -- ============================================
 
+-- Normalized column definitions read from the catalogs
+-- Renders each column the way information_schema.columns reports it
+-- (domains as their base type, arrays as ARRAY, other non-catalog types as
+-- USER-DEFINED) so hashes keep their values. Defaults lose their casts;
+-- case and whitespace are normalized by the callers over the whole text.
+CREATE OR REPLACE VIEW pggit.normalized_columns AS
+SELECT a.attrelid,
+       a.attnum,
+       a.attname,
+       format('%I %s%s%s',
+           a.attname,
+           CASE
+               WHEN ty.oid = 'varchar'::regtype THEN 'varchar' ||
+                   CASE WHEN tt.typmod <> -1
+                        THEN '(' || (tt.typmod - 4) || ')'
+                        ELSE ''
+                   END
+               WHEN ty.oid = 'bpchar'::regtype
+                   THEN 'char(' || (NULLIF(tt.typmod, -1) - 4) || ')'
+               WHEN ty.oid = 'numeric'::regtype AND tt.typmod <> -1 THEN
+                   'numeric(' || (((tt.typmod - 4) >> 16) & 65535) ||
+                   ',' || ((tt.typmod - 4) & 65535) || ')'
+               WHEN ty.typelem <> 0 AND ty.typlen = -1 THEN 'ARRAY'
+               WHEN tyn.nspname = 'pg_catalog' THEN format_type(ty.oid, NULL)
+               ELSE 'USER-DEFINED'
+           END,
+           CASE WHEN a.attnotnull OR (t.typtype = 'd' AND t.typnotnull)
+                THEN ' not null' ELSE ''
+           END,
+           CASE WHEN a.attgenerated = '' AND ad.adbin IS NOT NULL
+                THEN ' default ' ||
+                     CASE WHEN strpos(df.expr, '::') > 0
+                          THEN regexp_replace(df.expr, '::[\w\s\[\]]+', '', 'g')
+                          ELSE df.expr
+                     END
+                ELSE ''
+           END
+       ) AS column_ddl
+FROM pg_attribute a
+JOIN pg_type t ON t.oid = a.atttypid
+-- Domains are reported by their base type
+CROSS JOIN LATERAL (
+    SELECT CASE WHEN t.typtype = 'd' THEN t.typbasetype ELSE a.atttypid END AS typid,
+           CASE WHEN t.typtype = 'd' THEN t.typtypmod ELSE a.atttypmod END AS typmod
+) tt
+JOIN pg_type ty ON ty.oid = tt.typid
+JOIN pg_namespace tyn ON tyn.oid = ty.typnamespace
+LEFT JOIN pg_attrdef ad ON ad.adrelid = a.attrelid AND ad.adnum = a.attnum
+LEFT JOIN LATERAL (SELECT pg_get_expr(ad.adbin, ad.adrelid) AS expr) df ON true
+WHERE a.attnum > 0
+AND NOT a.attisdropped;
+
 -- Function to normalize table DDL for consistent hashing
 CREATE OR REPLACE FUNCTION pggit.normalize_table_ddl(
     p_schema_name TEXT,
     p_table_name TEXT
 ) RETURNS TEXT AS $$
-DECLARE
-    v_columns TEXT;
-    v_normalized TEXT;
-    v_table_exists BOOLEAN;
-BEGIN
-    -- Check if table exists
-    SELECT EXISTS (
-        SELECT 1 FROM information_schema.tables
-        WHERE table_schema = p_schema_name
-        AND table_name = p_table_name
-    ) INTO v_table_exists;
-    
-    IF NOT v_table_exists THEN
-        RETURN NULL;
-    END IF;
-    
-    -- Get columns in a normalized format with proper error handling
-    -- Order by ordinal position for consistency
-    BEGIN
-        SELECT string_agg(
-            format('%I %s%s%s',
-                column_name,
-                -- Normalize data types
-                CASE 
-                    WHEN data_type = 'character varying' THEN 'varchar' || 
-                        CASE WHEN character_maximum_length IS NOT NULL 
-                             THEN '(' || character_maximum_length || ')' 
-                             ELSE '' 
-                        END
-                    WHEN data_type = 'character' THEN 'char(' || character_maximum_length || ')'
-                    WHEN data_type = 'numeric' AND numeric_precision IS NOT NULL THEN 
-                        'numeric(' || numeric_precision || 
-                        CASE WHEN numeric_scale IS NOT NULL 
-                             THEN ',' || numeric_scale 
-                             ELSE '' 
-                        END || ')'
-                    ELSE data_type
-                END,
-                CASE WHEN is_nullable = 'NO' THEN ' not null' ELSE '' END,
-                CASE WHEN column_default IS NOT NULL 
-                     THEN ' default ' || 
-                          -- Normalize defaults
-                          regexp_replace(
-                              regexp_replace(column_default, '::[\w\s\[\]]+', '', 'g'),
-                              '\s+', ' ', 'g'
-                          )
-                     ELSE '' 
-                END
-            ),
-            ', '
-            ORDER BY ordinal_position
-        ) INTO v_columns
-        FROM information_schema.columns
-        WHERE table_schema = p_schema_name
-        AND table_name = p_table_name;
-    EXCEPTION WHEN OTHERS THEN
-        RAISE WARNING 'Error normalizing table DDL for %.%: %', p_schema_name, p_table_name, SQLERRM;
-        RETURN NULL;
-    END;
-    
-    -- Ensure we have columns
-    IF v_columns IS NULL OR v_columns = '' THEN
-        RETURN NULL;
-    END IF;
-    
-    -- Build normalized CREATE TABLE
-    v_normalized := format('create table %I.%I (%s)', 
-        p_schema_name, 
-        p_table_name, 
-        v_columns
-    );
-    
-    -- Lowercase and remove extra spaces
-    v_normalized := lower(v_normalized);
-    v_normalized := regexp_replace(v_normalized, '\s+', ' ', 'g');
-    
-    RETURN v_normalized;
-EXCEPTION WHEN OTHERS THEN
-    RAISE WARNING 'Critical error in normalize_table_ddl for %.%: %', p_schema_name, p_table_name, SQLERRM;
-    RETURN NULL;
-END;
-$$ LANGUAGE plpgsql STABLE;
+    SELECT lower(regexp_replace(
+        format('create table %I.%I (%s)',
+            p_schema_name,
+            p_table_name,
+            string_agg(nc.column_ddl, ', ' ORDER BY nc.attnum)
+        ),
+        '\s+', ' ', 'g'
+    ))
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pggit.normalized_columns nc ON nc.attrelid = c.oid
+    WHERE n.nspname = p_schema_name
+    AND c.relname = p_table_name
+    AND c.relkind IN ('r', 'v', 'f', 'p')
+    -- Missing tables and tables without columns have no DDL
+    HAVING COUNT(*) > 0;
+$$ LANGUAGE sql STABLE;
 
 -- Function to normalize constraint definitions
 CREATE OR REPLACE FUNCTION pggit.normalize_constraints(
     p_schema_name TEXT,
     p_table_name TEXT
 ) RETURNS TEXT AS $$
-DECLARE
-    v_constraints TEXT;
-BEGIN
-    -- Get all constraints in normalized format
-    SELECT string_agg(
+    SELECT COALESCE(lower(string_agg(
         format('%s %s %s',
-            contype,
-            conname,
-            -- Normalize constraint definition
-            CASE contype
-                WHEN 'c' THEN pg_get_constraintdef(oid, true)
-                WHEN 'f' THEN pg_get_constraintdef(oid, true)
-                WHEN 'p' THEN pg_get_constraintdef(oid, true)
-                WHEN 'u' THEN pg_get_constraintdef(oid, true)
-                ELSE ''
+            con.contype,
+            con.conname,
+            CASE WHEN con.contype IN ('c', 'f', 'p', 'u')
+                 THEN pg_get_constraintdef(con.oid, true)
+                 ELSE ''
             END
         ),
         '; '
-        ORDER BY contype, conname  -- Consistent ordering
-    ) INTO v_constraints
-    FROM pg_constraint
-    WHERE conrelid = (p_schema_name || '.' || p_table_name)::regclass;
-    
-    RETURN COALESCE(lower(v_constraints), '');
-END;
-$$ LANGUAGE plpgsql STABLE;
+        ORDER BY con.contype, con.conname  -- Consistent ordering
+    )), '')
+    FROM pg_constraint con
+    JOIN pg_class c ON c.oid = con.conrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = p_schema_name
+    AND c.relname = p_table_name;
+$$ LANGUAGE sql STABLE;
 
 -- Function to normalize index definitions
+-- Primary key indexes are left out: they are covered by the constraints.
+-- Only plain tables are read, as pg_stat_user_indexes did: partitioned
+-- tables keep an empty index list so their stored hashes do not change.
 CREATE OR REPLACE FUNCTION pggit.normalize_indexes(
     p_schema_name TEXT,
     p_table_name TEXT
 ) RETURNS TEXT AS $$
-DECLARE
-    v_indexes TEXT;
-    v_table_exists BOOLEAN;
-BEGIN
-    -- Check if table exists
-    SELECT EXISTS (
-        SELECT 1 FROM information_schema.tables
-        WHERE table_schema = p_schema_name
-        AND table_name = p_table_name
-    ) INTO v_table_exists;
-    
-    IF NOT v_table_exists THEN
-        RETURN '';
-    END IF;
-    
-    BEGIN
-        -- Get all indexes in normalized format using pg_stat_user_indexes
-        SELECT string_agg(
-            -- Remove schema qualifiers and normalize
+    SELECT COALESCE(string_agg(
+        -- Remove schema qualifiers and normalize
+        regexp_replace(
             regexp_replace(
-                regexp_replace(
-                    lower(pg_get_indexdef(ui.indexrelid, 0, true)),
-                    p_schema_name || '\.', '', 'g'
-                ),
-                '\s+', ' ', 'g'
+                lower(pg_get_indexdef(i.indexrelid, 0, true)),
+                p_schema_name || '\.', '', 'g'
             ),
-            '; '
-            ORDER BY ui.indexrelname  -- Consistent ordering
-        ) INTO v_indexes
-        FROM pg_stat_user_indexes ui
-        WHERE ui.schemaname = p_schema_name
-        AND ui.relname = p_table_name
-        -- Exclude primary key indexes (covered by constraints)
-        AND ui.indexrelname NOT IN (
-            SELECT conname 
-            FROM pg_constraint 
-            WHERE conrelid = (p_schema_name || '.' || p_table_name)::regclass
-            AND contype = 'p'
-        );
-        
-        RETURN COALESCE(v_indexes, '');
-        
-    EXCEPTION WHEN OTHERS THEN
-        RAISE WARNING 'Error normalizing indexes for %.%: %', p_schema_name, p_table_name, SQLERRM;
-        RETURN '';
-    END;
-END;
-$$ LANGUAGE plpgsql STABLE;
+            '\s+', ' ', 'g'
+        ),
+        '; '
+        ORDER BY ic.relname  -- Consistent ordering
+    ), '')
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_index i ON i.indrelid = c.oid
+    JOIN pg_class ic ON ic.oid = i.indexrelid
+    WHERE n.nspname = p_schema_name
+    AND c.relname = p_table_name
+    AND c.relkind = 'r'
+    AND NOT EXISTS (
+        SELECT 1 FROM pg_constraint con
+        WHERE con.conrelid = c.oid
+        AND con.contype = 'p'
+        AND con.conname = ic.relname
+    );
+$$ LANGUAGE sql STABLE;
 
 -- Function to normalize view definitions
 CREATE OR REPLACE FUNCTION pggit.normalize_view_ddl(
@@ -304,14 +286,21 @@ BEGIN
                 
             WHEN 'INDEX' THEN
                 -- For indexes, use the full definition with proper error handling
+                -- Only indexes pg_stat_user_indexes listed are hashed: those on
+                -- tables and materialized views. Partitioned indexes have no hash.
                 BEGIN
                     SELECT regexp_replace(
-                        lower(pg_get_indexdef(i.indexrelid, 0, true)),
+                        lower(pg_get_indexdef(c.oid, 0, true)),
                         '\s+', ' ', 'g'
                     ) INTO v_normalized_ddl
-                    FROM pg_stat_user_indexes i
-                    WHERE i.schemaname = p_schema_name
-                    AND i.indexrelname = p_object_name;
+                    FROM pg_class c
+                    JOIN pg_namespace n ON n.oid = c.relnamespace
+                    JOIN pg_index i ON i.indexrelid = c.oid
+                    JOIN pg_class t ON t.oid = i.indrelid
+                    WHERE n.nspname = p_schema_name
+                    AND c.relname = p_object_name
+                    AND c.relkind = 'i'
+                    AND t.relkind IN ('r', 'm');
                 EXCEPTION WHEN OTHERS THEN
                     RAISE WARNING 'Error getting index definition for %.%: %', p_schema_name, p_object_name, SQLERRM;
                     v_normalized_ddl := NULL;
@@ -384,6 +373,114 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql STABLE;
 
+-- Hash a set of objects in one pass over the catalogs
+-- Produces the same hashes as compute_ddl_hash without per-object queries:
+-- table columns come from pggit.normalized_columns for all tables at once.
+-- Returns every given object in id order, with a NULL hash for objects that
+-- cannot be hashed.
+CREATE OR REPLACE FUNCTION pggit.catalog_ddl_hashes(
+    p_object_ids INTEGER[]
+) RETURNS TABLE (
+    object_id INTEGER,
+    ddl_hash TEXT
+) AS $$
+    WITH batch AS (
+        SELECT o.id, o.object_type, o.schema_name, o.object_name
+        FROM pggit.objects o
+        WHERE o.id = ANY(p_object_ids)
+    ),
+    relations AS (
+        SELECT b.id, b.object_type, b.schema_name, b.object_name, c.oid, c.relkind
+        FROM batch b
+        JOIN pg_namespace n ON n.nspname = b.schema_name
+        JOIN pg_class c ON c.relnamespace = n.oid AND c.relname = b.object_name
+        WHERE b.object_type IN ('TABLE', 'VIEW', 'INDEX')
+    ),
+    table_ddl AS (
+        SELECT r.id,
+               format('create table %I.%I (%s)', r.schema_name, r.object_name,
+                   string_agg(nc.column_ddl, ', ' ORDER BY nc.attnum)
+               ) AS ddl
+        FROM relations r
+        JOIN pggit.normalized_columns nc ON nc.attrelid = r.oid
+        WHERE r.object_type = 'TABLE'
+        AND r.relkind IN ('r', 'v', 'f', 'p')
+        GROUP BY r.id, r.schema_name, r.object_name
+    ),
+    view_ddl AS (
+        SELECT r.id,
+               regexp_replace(
+                   regexp_replace(lower(pg_get_viewdef(r.oid, true)), '\s+', ' ', 'g'),
+                   r.schema_name || '\.', '', 'g'
+               ) AS ddl
+        FROM relations r
+        WHERE r.object_type = 'VIEW'
+        AND r.relkind IN ('v', 'm')
+    ),
+    index_ddl AS (
+        SELECT r.id,
+               regexp_replace(lower(pg_get_indexdef(r.oid, 0, true)), '\s+', ' ', 'g') AS ddl
+        FROM relations r
+        JOIN pg_index i ON i.indexrelid = r.oid
+        JOIN pg_class t ON t.oid = i.indrelid
+        WHERE r.object_type = 'INDEX'
+        AND r.relkind = 'i'
+        AND t.relkind IN ('r', 'm')
+    ),
+    function_ddl AS (
+        -- Overloads hash the first definition, as compute_ddl_hash does
+        SELECT DISTINCT ON (b.id) b.id,
+               regexp_replace(
+                   regexp_replace(lower(pg_get_functiondef(p.oid)), '\s+', ' ', 'g'),
+                   b.schema_name || '\.', '', 'g'
+               ) AS ddl
+        FROM batch b
+        JOIN pg_namespace n ON n.nspname = b.schema_name
+        JOIN pg_proc p ON p.pronamespace = n.oid AND p.proname = b.object_name
+        WHERE b.object_type IN ('FUNCTION', 'PROCEDURE')
+        AND p.prokind <> 'a'
+        ORDER BY b.id, p.oid
+    ),
+    ddl AS (
+        SELECT id, lower(regexp_replace(ddl, '\s+', ' ', 'g')) AS ddl FROM table_ddl
+        UNION ALL SELECT id, ddl FROM view_ddl
+        UNION ALL SELECT id, ddl FROM index_ddl
+        UNION ALL SELECT id, ddl FROM function_ddl
+    )
+    SELECT b.id,
+           -- Same 100KB input limit as compute_ddl_hash
+           CASE WHEN length(d.ddl) <= 100000
+                THEN encode(digest(d.ddl, 'sha256'), 'hex')
+           END
+    FROM batch b
+    LEFT JOIN ddl d ON d.id = b.id
+    ORDER BY b.id;
+$$ LANGUAGE sql STABLE;
+
+-- Hash unhashed objects in one pass over the catalogs
+-- Returns every unhashed object of the range in id order, with a NULL hash
+-- for objects that cannot be hashed.
+CREATE OR REPLACE FUNCTION pggit.bulk_ddl_hashes(
+    p_schema_name TEXT DEFAULT NULL,
+    p_after_id INTEGER DEFAULT 0,
+    p_limit INTEGER DEFAULT NULL
+) RETURNS TABLE (
+    object_id INTEGER,
+    ddl_hash TEXT
+) AS $$
+    SELECT h.object_id, h.ddl_hash
+    FROM pggit.catalog_ddl_hashes(ARRAY(
+        SELECT o.id
+        FROM pggit.objects o
+        WHERE o.is_active = true
+        AND o.ddl_hash IS NULL
+        AND o.id > p_after_id
+        AND (p_schema_name IS NULL OR o.schema_name = p_schema_name)
+        ORDER BY o.id
+        LIMIT p_limit
+    )) h;
+$$ LANGUAGE sql STABLE;
+
 -- ============================================
 -- PART 4: Change Detection Functions
 -- ============================================
@@ -414,6 +511,9 @@ END;
 $$ LANGUAGE plpgsql STABLE;
 
 -- Bulk change detection using hashes
+-- Walks the hash tree (PART 8) down from the root: only objects under a
+-- drifted node, and objects the tree does not cover or that have no hash
+-- yet, are hashed from the catalogs. When the roots match, no object is.
 CREATE OR REPLACE FUNCTION pggit.detect_changes_by_hash()
 RETURNS TABLE (
     object_id INTEGER,
@@ -423,17 +523,37 @@ RETURNS TABLE (
     new_hash TEXT,
     has_changed BOOLEAN
 ) AS $$
+DECLARE
+    v_check INTEGER[];
 BEGIN
+    v_check := ARRAY(
+        SELECT d.object_id
+        FROM pggit.diff_hash_tree() d
+        WHERE d.level = 'object'
+        UNION
+        SELECT o.id
+        FROM pggit.objects o
+        WHERE o.is_active = true
+        AND o.object_type IN ('TABLE', 'VIEW', 'FUNCTION', 'INDEX')
+        AND (o.ddl_hash IS NULL OR NOT EXISTS (
+            SELECT 1 FROM pggit.hash_tree_nodes n WHERE n.object_id = o.id
+        ))
+    );
+
     RETURN QUERY
+    WITH checked AS (
+        SELECT h.object_id, h.ddl_hash
+        FROM pggit.catalog_ddl_hashes(v_check) h
+    )
     SELECT 
         o.id,
         o.full_name,
         o.object_type,
         o.ddl_hash,
-        pggit.compute_ddl_hash(o.object_type, o.schema_name, o.object_name),
-        pggit.compute_ddl_hash(o.object_type, o.schema_name, o.object_name) 
-            IS DISTINCT FROM o.ddl_hash
+        CASE WHEN c.object_id IS NULL THEN o.ddl_hash ELSE c.ddl_hash END,
+        c.object_id IS NOT NULL AND c.ddl_hash IS DISTINCT FROM o.ddl_hash
     FROM pggit.objects o
+    LEFT JOIN checked c ON c.object_id = o.id
     WHERE o.is_active = true
     AND o.object_type IN ('TABLE', 'VIEW', 'FUNCTION', 'INDEX');
 END;
@@ -536,49 +656,139 @@ $$ LANGUAGE plpgsql;
 -- ============================================
 
 -- Update all existing objects with hashes
+-- Hashes every unhashed object in one set-based statement. error_count is
+-- kept for compatibility and is always 0; objects that cannot be hashed keep
+-- a NULL ddl_hash. For large catalogs use start_rehash and run_rehash, which
+-- commit as they go.
 CREATE OR REPLACE FUNCTION pggit.update_all_hashes()
 RETURNS TABLE (
     updated_count INTEGER,
     error_count INTEGER
 ) AS $$
+    WITH hashes AS (
+        SELECT h.object_id, h.ddl_hash
+        FROM pggit.bulk_ddl_hashes() h
+        WHERE h.ddl_hash IS NOT NULL
+    ),
+    updated AS (
+        UPDATE pggit.objects o
+        SET ddl_hash = h.ddl_hash
+        FROM hashes h
+        WHERE o.id = h.object_id
+        RETURNING o.id
+    )
+    SELECT COUNT(*)::INTEGER, 0 FROM updated;
+$$ LANGUAGE sql;
+
+-- Start a bulk rehash of every unhashed object
+-- Creates one cursor per schema; run it with CALL pggit.run_rehash.
+CREATE OR REPLACE FUNCTION pggit.start_rehash(
+    p_batch_size INTEGER DEFAULT 1000
+) RETURNS UUID AS $$
 DECLARE
-    v_updated INTEGER := 0;
-    v_errors INTEGER := 0;
-    v_object RECORD;
-    v_hash TEXT;
+    v_run_id UUID := gen_random_uuid();
 BEGIN
-    FOR v_object IN 
-        SELECT id, object_type, schema_name, object_name
-        FROM pggit.objects
-        WHERE is_active = true
-        AND ddl_hash IS NULL
-    LOOP
-        BEGIN
-            -- Compute hash
-            v_hash := pggit.compute_ddl_hash(
-                v_object.object_type,
-                v_object.schema_name,
-                v_object.object_name
-            );
-            
-            -- Update if hash computed successfully
-            IF v_hash IS NOT NULL THEN
-                UPDATE pggit.objects
-                SET ddl_hash = v_hash
-                WHERE id = v_object.id;
-                
-                v_updated := v_updated + 1;
-            END IF;
-        EXCEPTION WHEN OTHERS THEN
-            v_errors := v_errors + 1;
-        END;
+    IF p_batch_size IS NULL OR p_batch_size < 1 THEN
+        RAISE EXCEPTION 'Batch size must be positive, got %', p_batch_size;
+    END IF;
+
+    INSERT INTO pggit.rehash_progress (run_id, schema_name, batch_size)
+    SELECT DISTINCT v_run_id, o.schema_name, p_batch_size
+    FROM pggit.objects o
+    WHERE o.is_active = true
+    AND o.ddl_hash IS NULL;
+
+    RETURN v_run_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Hash the next batch of a rehash run
+-- Takes the first unfinished schema of the worker's partition that no other
+-- session is working on, hashes the objects after its cursor and moves the
+-- cursor. Returns false when the worker's partition is done.
+CREATE OR REPLACE FUNCTION pggit.rehash_batch(
+    p_run_id UUID,
+    p_worker INTEGER DEFAULT 0,
+    p_workers INTEGER DEFAULT 1
+) RETURNS BOOLEAN AS $$
+DECLARE
+    v_progress pggit.rehash_progress%ROWTYPE;
+    v_scanned INTEGER;
+    v_hashed INTEGER;
+    v_last_id INTEGER;
+BEGIN
+    IF p_workers IS NULL OR p_workers < 1 OR p_worker IS NULL
+       OR p_worker NOT BETWEEN 0 AND p_workers - 1 THEN
+        RAISE EXCEPTION 'Worker must be between 0 and %, got %', p_workers - 1, p_worker;
+    END IF;
+
+    SELECT * INTO v_progress
+    FROM pggit.rehash_progress
+    WHERE run_id = p_run_id
+    AND status <> 'completed'
+    AND (hashtext(schema_name) & 2147483647) % p_workers = p_worker
+    ORDER BY schema_name
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED;
+
+    IF NOT FOUND THEN
+        RETURN false;
+    END IF;
+
+    WITH hashes AS (
+        SELECT h.object_id, h.ddl_hash
+        FROM pggit.bulk_ddl_hashes(
+            v_progress.schema_name, v_progress.last_object_id, v_progress.batch_size
+        ) h
+    ),
+    updated AS (
+        UPDATE pggit.objects o
+        SET ddl_hash = h.ddl_hash
+        FROM hashes h
+        WHERE o.id = h.object_id
+        AND h.ddl_hash IS NOT NULL
+        RETURNING o.id
+    )
+    SELECT (SELECT COUNT(*) FROM hashes),
+           (SELECT COUNT(*) FROM updated),
+           (SELECT MAX(object_id) FROM hashes)
+    INTO v_scanned, v_hashed, v_last_id;
+
+    UPDATE pggit.rehash_progress
+    SET last_object_id = COALESCE(v_last_id, last_object_id),
+        batches = batches + CASE WHEN v_scanned > 0 THEN 1 ELSE 0 END,
+        objects_hashed = objects_hashed + v_hashed,
+        objects_skipped = objects_skipped + v_scanned - v_hashed,
+        status = CASE WHEN v_scanned < batch_size THEN 'completed' ELSE 'running' END,
+        updated_at = clock_timestamp(),
+        completed_at = CASE WHEN v_scanned < batch_size THEN clock_timestamp() END
+    WHERE run_id = p_run_id AND schema_name = v_progress.schema_name;
+
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Run or resume a rehash, committing after every batch
+-- Must be called with CALL outside an explicit transaction block. To spread
+-- the work over N connections, call it from each one with p_worker 0..N-1
+-- and p_workers N: every worker takes a disjoint set of schemas. After an
+-- interruption, calling it again continues from the last committed batch.
+CREATE OR REPLACE PROCEDURE pggit.run_rehash(
+    p_run_id UUID,
+    p_worker INTEGER DEFAULT 0,
+    p_workers INTEGER DEFAULT 1
+) AS $$
+BEGIN
+    WHILE pggit.rehash_batch(p_run_id, p_worker, p_workers) LOOP
+        COMMIT;
     END LOOP;
-    
-    RETURN QUERY SELECT v_updated, v_errors;
+    COMMIT;
 END;
 $$ LANGUAGE plpgsql;
 
 -- Compare schemas using hashes (for cross-database comparison)
+-- Objects whose hash tree node is in sync export their stored ddl_hash;
+-- only drifted, unhashed or untracked objects are hashed from the catalogs.
 CREATE OR REPLACE FUNCTION pggit.export_schema_hashes(
     p_schema_name TEXT DEFAULT 'public'
 ) RETURNS TABLE (
@@ -588,17 +798,29 @@ CREATE OR REPLACE FUNCTION pggit.export_schema_hashes(
 ) AS $$
 BEGIN
     RETURN QUERY
+    WITH objects AS (
+        SELECT o.id, o.object_type, o.object_name, o.full_name, o.ddl_hash,
+               o.ddl_hash IS NOT NULL
+                   AND n.object_id IS NOT NULL
+                   AND n.live_hash IS NOT DISTINCT FROM n.recorded_hash AS in_sync
+        FROM pggit.objects o
+        LEFT JOIN pggit.hash_tree_nodes n ON n.object_id = o.id
+        WHERE o.schema_name = p_schema_name
+        AND o.is_active = true
+        AND o.object_type IN ('TABLE', 'VIEW', 'FUNCTION', 'INDEX')
+    ),
+    computed AS (
+        SELECT h.object_id, h.ddl_hash
+        FROM pggit.catalog_ddl_hashes(ARRAY(
+            SELECT id FROM objects WHERE NOT in_sync
+        )) h
+    )
     SELECT 
         o.object_type::TEXT,
         o.full_name,
-        COALESCE(
-            o.ddl_hash, 
-            pggit.compute_ddl_hash(o.object_type, o.schema_name, o.object_name)
-        )
-    FROM pggit.objects o
-    WHERE o.schema_name = p_schema_name
-    AND o.is_active = true
-    AND o.object_type IN ('TABLE', 'VIEW', 'FUNCTION', 'INDEX')
+        CASE WHEN o.in_sync THEN o.ddl_hash ELSE COALESCE(c.ddl_hash, o.ddl_hash) END
+    FROM objects o
+    LEFT JOIN computed c ON c.object_id = o.id
     ORDER BY o.object_type, o.object_name;
 END;
 $$ LANGUAGE plpgsql;
@@ -637,4 +859,554 @@ SELECT
 FROM pggit.history h
 JOIN pggit.objects o ON o.id = h.object_id
 WHERE h.old_hash IS NOT NULL OR h.new_hash IS NOT NULL
-ORDER BY h.created_at DESC;
\ No newline at end of file
+ORDER BY h.created_at DESC;
+-- ============================================
+-- PART 8: Hash Tree
+-- ============================================
+-- Column and constraint hashes are the leaves of their table's node, object
+-- nodes roll up into one node per schema, and schema nodes into a root.
+-- Each level keeps the hash of the live catalog (live_hash, maintained on
+-- DDL) next to the hash as of the last time the object's ddl_hash was
+-- recorded (recorded_hash). Drift checks compare the root first and descend
+-- only where the two differ. Nodes of views, functions and indexes hash
+-- like compute_ddl_hash; table nodes hash their leaves. A table's ddl_hash
+-- covers only its columns, so when a DDL command changes nothing but
+-- constraint leaves, the table is recorded again on refresh.
+
+CREATE TABLE IF NOT EXISTS pggit.hash_tree_nodes (
+    object_id INTEGER PRIMARY KEY REFERENCES pggit.objects(id) ON DELETE CASCADE,
+    object_type pggit.object_type NOT NULL,
+    schema_name TEXT NOT NULL,
+    object_name TEXT NOT NULL,
+    live_hash TEXT,
+    recorded_hash TEXT,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS pggit.hash_tree_leaves (
+    object_id INTEGER NOT NULL REFERENCES pggit.hash_tree_nodes(object_id) ON DELETE CASCADE,
+    leaf_type TEXT NOT NULL CHECK (leaf_type IN ('column', 'constraint')),
+    leaf_name TEXT NOT NULL,
+    position INTEGER NOT NULL DEFAULT 0,
+    live_hash TEXT,
+    recorded_hash TEXT,
+    PRIMARY KEY (object_id, leaf_type, leaf_name)
+);
+
+CREATE TABLE IF NOT EXISTS pggit.hash_tree_schemas (
+    schema_name TEXT PRIMARY KEY,
+    live_hash TEXT,
+    recorded_hash TEXT,
+    is_stale BOOLEAN NOT NULL DEFAULT true,
+    refreshed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_hash_tree_nodes_schema
+    ON pggit.hash_tree_nodes(schema_name);
+
+-- Drifted nodes and leaves, so descending costs only what changed
+CREATE INDEX IF NOT EXISTS idx_hash_tree_nodes_drift
+    ON pggit.hash_tree_nodes(schema_name)
+    WHERE live_hash IS DISTINCT FROM recorded_hash;
+
+CREATE INDEX IF NOT EXISTS idx_hash_tree_leaves_drift
+    ON pggit.hash_tree_leaves(object_id)
+    WHERE live_hash IS DISTINCT FROM recorded_hash;
+
+-- Recompute the live hashes of objects from the catalogs
+-- Leaves are only written when their hash changed, and only schemas whose
+-- nodes changed are marked for recomputation. Recorded tables whose column
+-- leaves all still match are recorded again, since their ddl_hash cannot
+-- change. Returns the number of nodes whose live hash changed.
+CREATE OR REPLACE FUNCTION pggit.refresh_hash_tree(
+    p_object_ids INTEGER[]
+) RETURNS INTEGER AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    -- Nodes follow the name of their object
+    INSERT INTO pggit.hash_tree_nodes (object_id, object_type, schema_name, object_name)
+    SELECT o.id, o.object_type, o.schema_name, o.object_name
+    FROM pggit.objects o
+    WHERE o.id = ANY(p_object_ids)
+    AND o.object_type IN ('TABLE', 'VIEW', 'FUNCTION', 'INDEX')
+    ORDER BY o.id
+    ON CONFLICT (object_id) DO UPDATE
+    SET object_type = EXCLUDED.object_type,
+        schema_name = EXCLUDED.schema_name,
+        object_name = EXCLUDED.object_name
+    WHERE (pggit.hash_tree_nodes.object_type, pggit.hash_tree_nodes.schema_name,
+           pggit.hash_tree_nodes.object_name)
+        IS DISTINCT FROM (EXCLUDED.object_type, EXCLUDED.schema_name, EXCLUDED.object_name);
+
+    -- Column and constraint leaves of tables
+    WITH tables AS (
+        SELECT o.id AS object_id, c.oid
+        FROM pggit.objects o
+        JOIN pg_namespace n ON n.nspname = o.schema_name
+        JOIN pg_class c ON c.relnamespace = n.oid AND c.relname = o.object_name
+        WHERE o.id = ANY(p_object_ids)
+        AND o.object_type = 'TABLE'
+        AND o.is_active = true
+        AND c.relkind IN ('r', 'v', 'f', 'p')
+    ),
+    live AS (
+        SELECT t.object_id,
+               'column' AS leaf_type,
+               nc.attname::TEXT AS leaf_name,
+               nc.attnum::INTEGER AS position,
+               encode(digest(lower(regexp_replace(nc.column_ddl, '\s+', ' ', 'g')), 'sha256'), 'hex') AS leaf_hash
+        FROM tables t
+        JOIN pggit.normalized_columns nc ON nc.attrelid = t.oid
+        UNION ALL
+        SELECT t.object_id,
+               'constraint',
+               con.conname::TEXT,
+               0,
+               encode(digest(lower(format('%s %s %s',
+                   con.contype,
+                   con.conname,
+                   CASE WHEN con.contype IN ('c', 'f', 'p', 'u')
+                        THEN pg_get_constraintdef(con.oid, true)
+                        ELSE ''
+                   END
+               )), 'sha256'), 'hex')
+        FROM tables t
+        JOIN pg_constraint con ON con.conrelid = t.oid
+    ),
+    upserted AS (
+        INSERT INTO pggit.hash_tree_leaves AS l (object_id, leaf_type, leaf_name, position, live_hash)
+        SELECT object_id, leaf_type, leaf_name, position, leaf_hash
+        FROM live
+        ON CONFLICT (object_id, leaf_type, leaf_name) DO UPDATE
+        SET position = EXCLUDED.position,
+            live_hash = EXCLUDED.live_hash
+        WHERE (l.position, l.live_hash) IS DISTINCT FROM (EXCLUDED.position, EXCLUDED.live_hash)
+    )
+    -- Leaves that are gone from the catalog
+    UPDATE pggit.hash_tree_leaves l
+    SET live_hash = NULL
+    WHERE l.object_id = ANY(p_object_ids)
+    AND l.live_hash IS NOT NULL
+    AND NOT EXISTS (
+        SELECT 1 FROM live
+        WHERE live.object_id = l.object_id
+        AND live.leaf_type = l.leaf_type
+        AND live.leaf_name = l.leaf_name
+    );
+
+    DELETE FROM pggit.hash_tree_leaves
+    WHERE object_id = ANY(p_object_ids)
+    AND live_hash IS NULL
+    AND recorded_hash IS NULL;
+
+    -- Object nodes, then their schemas
+    WITH hashes AS (
+        SELECT h.object_id, h.ddl_hash
+        FROM pggit.catalog_ddl_hashes(ARRAY(
+            SELECT o.id
+            FROM pggit.objects o
+            WHERE o.id = ANY(p_object_ids)
+            AND o.is_active = true
+            AND o.object_type <> 'TABLE'
+        )) h
+    ),
+    refreshed AS (
+        SELECT n.object_id,
+               CASE
+                   WHEN NOT o.is_active THEN NULL
+                   WHEN n.object_type = 'TABLE' THEN (
+                       SELECT encode(digest(string_agg(
+                           l.leaf_type || ' ' || l.leaf_name || ' ' || l.live_hash, E'\n'
+                           ORDER BY l.leaf_type, l.position, l.leaf_name COLLATE "C"
+                       ), 'sha256'), 'hex')
+                       FROM pggit.hash_tree_leaves l
+                       WHERE l.object_id = n.object_id
+                       AND l.live_hash IS NOT NULL
+                   )
+                   ELSE h.ddl_hash
+               END AS live_hash
+        FROM pggit.hash_tree_nodes n
+        JOIN pggit.objects o ON o.id = n.object_id
+        LEFT JOIN hashes h ON h.object_id = n.object_id
+        WHERE n.object_id = ANY(p_object_ids)
+    ),
+    changed AS (
+        UPDATE pggit.hash_tree_nodes n
+        SET live_hash = r.live_hash,
+            refreshed_at = clock_timestamp()
+        FROM refreshed r
+        WHERE n.object_id = r.object_id
+        AND n.live_hash IS DISTINCT FROM r.live_hash
+        RETURNING n.schema_name
+    ),
+    marked AS (
+        INSERT INTO pggit.hash_tree_schemas (schema_name)
+        SELECT DISTINCT schema_name FROM changed
+        ORDER BY 1
+        ON CONFLICT (schema_name) DO UPDATE SET is_stale = true
+        WHERE NOT pggit.hash_tree_schemas.is_stale
+    )
+    SELECT COUNT(*) INTO v_count FROM changed;
+
+    -- Only constraints changed: nothing would ever record the new node
+    PERFORM pggit.record_hash_tree(ARRAY(
+        SELECT n.object_id
+        FROM pggit.hash_tree_nodes n
+        WHERE n.object_id = ANY(p_object_ids)
+        AND n.object_type = 'TABLE'
+        AND n.recorded_hash IS NOT NULL
+        AND n.live_hash IS DISTINCT FROM n.recorded_hash
+        AND NOT EXISTS (
+            SELECT 1 FROM pggit.hash_tree_leaves l
+            WHERE l.object_id = n.object_id
+            AND l.leaf_type = 'column'
+            AND l.live_hash IS DISTINCT FROM l.recorded_hash
+        )
+    ));
+
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Record the current live hashes of objects as their recorded hashes
+-- Called when ddl_hash is set. Views, functions and indexes record their
+-- ddl_hash itself. Tables record their live node, which p_verify only
+-- does when ddl_hash still matches the catalog; otherwise the table keeps
+-- ddl_hash as its recorded hash and shows as drifted.
+CREATE OR REPLACE FUNCTION pggit.record_hash_tree(
+    p_object_ids INTEGER[],
+    p_verify BOOLEAN DEFAULT false
+) RETURNS INTEGER AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    WITH verified AS (
+        SELECT h.object_id, h.ddl_hash
+        FROM pggit.catalog_ddl_hashes(ARRAY(
+            SELECT o.id
+            FROM pggit.objects o
+            WHERE p_verify
+            AND o.id = ANY(p_object_ids)
+            AND o.object_type = 'TABLE'
+            AND o.ddl_hash IS NOT NULL
+        )) h
+    ),
+    recorded AS (
+        SELECT n.object_id,
+               CASE
+                   WHEN NOT o.is_active OR o.ddl_hash IS NULL THEN NULL
+                   WHEN n.object_type <> 'TABLE' OR n.live_hash IS NULL THEN o.ddl_hash
+                   WHEN NOT p_verify OR v.ddl_hash = o.ddl_hash THEN n.live_hash
+                   ELSE o.ddl_hash
+               END AS recorded_hash,
+               o.is_active AND o.ddl_hash IS NOT NULL AND n.object_type = 'TABLE'
+                   AND n.live_hash IS NOT NULL
+                   AND (NOT p_verify OR v.ddl_hash = o.ddl_hash) AS record_leaves
+        FROM pggit.hash_tree_nodes n
+        JOIN pggit.objects o ON o.id = n.object_id
+        LEFT JOIN verified v ON v.object_id = n.object_id
+        WHERE n.object_id = ANY(p_object_ids)
+    ),
+    leaves AS (
+        UPDATE pggit.hash_tree_leaves l
+        SET recorded_hash = CASE WHEN r.record_leaves THEN l.live_hash END
+        FROM recorded r
+        WHERE l.object_id = r.object_id
+        AND l.recorded_hash IS DISTINCT FROM CASE WHEN r.record_leaves THEN l.live_hash END
+    ),
+    changed AS (
+        UPDATE pggit.hash_tree_nodes n
+        SET recorded_hash = r.recorded_hash
+        FROM recorded r
+        WHERE n.object_id = r.object_id
+        AND n.recorded_hash IS DISTINCT FROM r.recorded_hash
+        RETURNING n.schema_name
+    ),
+    marked AS (
+        INSERT INTO pggit.hash_tree_schemas (schema_name)
+        SELECT DISTINCT schema_name FROM changed
+        ORDER BY 1
+        ON CONFLICT (schema_name) DO UPDATE SET is_stale = true
+        WHERE NOT pggit.hash_tree_schemas.is_stale
+    )
+    SELECT COUNT(*) INTO v_count FROM changed;
+
+    DELETE FROM pggit.hash_tree_leaves
+    WHERE object_id = ANY(p_object_ids)
+    AND live_hash IS NULL
+    AND recorded_hash IS NULL;
+
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute the schema nodes that changed since they were last read
+CREATE OR REPLACE FUNCTION pggit.refresh_hash_tree_schemas()
+RETURNS INTEGER AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    -- Hold the stale schemas so concurrent changes wait and re-mark them
+    PERFORM 1
+    FROM pggit.hash_tree_schemas
+    WHERE is_stale
+    FOR UPDATE;
+
+    WITH stale AS (
+        SELECT s.schema_name
+        FROM pggit.hash_tree_schemas s
+        WHERE s.is_stale
+    ),
+    lines AS (
+        -- Branches tracking the same object contribute it once
+        SELECT DISTINCT n.schema_name, 'live' AS side,
+               n.object_type::TEXT || ' ' || n.object_name || ' ' || n.live_hash AS line
+        FROM pggit.hash_tree_nodes n
+        JOIN stale s ON s.schema_name = n.schema_name
+        WHERE n.live_hash IS NOT NULL
+        UNION
+        SELECT DISTINCT n.schema_name, 'recorded',
+               n.object_type::TEXT || ' ' || n.object_name || ' ' || n.recorded_hash
+        FROM pggit.hash_tree_nodes n
+        JOIN stale s ON s.schema_name = n.schema_name
+        WHERE n.recorded_hash IS NOT NULL
+    ),
+    hashed AS (
+        SELECT s.schema_name,
+               encode(digest(string_agg(l.line, E'\n' ORDER BY l.line COLLATE "C")
+                   FILTER (WHERE l.side = 'live'), 'sha256'), 'hex') AS live_hash,
+               encode(digest(string_agg(l.line, E'\n' ORDER BY l.line COLLATE "C")
+                   FILTER (WHERE l.side = 'recorded'), 'sha256'), 'hex') AS recorded_hash
+        FROM stale s
+        LEFT JOIN lines l ON l.schema_name = s.schema_name
+        GROUP BY s.schema_name
+    )
+    UPDATE pggit.hash_tree_schemas t
+    SET live_hash = h.live_hash,
+        recorded_hash = h.recorded_hash,
+        is_stale = false,
+        refreshed_at = clock_timestamp()
+    FROM hashed h
+    WHERE t.schema_name = h.schema_name;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Live and recorded root hashes of the whole database
+-- Equal roots mean nothing drifted; only stale schema nodes are recomputed.
+CREATE OR REPLACE FUNCTION pggit.hash_tree_root()
+RETURNS TABLE (
+    live_hash TEXT,
+    recorded_hash TEXT
+) AS $$
+BEGIN
+    PERFORM pggit.refresh_hash_tree_schemas();
+
+    RETURN QUERY
+    SELECT encode(digest(string_agg(s.schema_name || ' ' || s.live_hash, E'\n'
+               ORDER BY s.schema_name COLLATE "C") FILTER (WHERE s.live_hash IS NOT NULL),
+               'sha256'), 'hex'),
+           encode(digest(string_agg(s.schema_name || ' ' || s.recorded_hash, E'\n'
+               ORDER BY s.schema_name COLLATE "C") FILTER (WHERE s.recorded_hash IS NOT NULL),
+               'sha256'), 'hex')
+    FROM pggit.hash_tree_schemas s;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Differences between the live and the recorded hash tree
+-- Returns the schemas, objects and leaves whose hashes differ, walking down
+-- only from nodes that differ. Returns nothing when the roots are equal.
+CREATE OR REPLACE FUNCTION pggit.diff_hash_tree()
+RETURNS TABLE (
+    level TEXT,
+    schema_name TEXT,
+    object_id INTEGER,
+    object_type pggit.object_type,
+    object_name TEXT,
+    leaf_type TEXT,
+    leaf_name TEXT,
+    recorded_hash TEXT,
+    live_hash TEXT
+) AS $$
+DECLARE
+    v_root RECORD;
+BEGIN
+    SELECT r.live_hash, r.recorded_hash INTO v_root
+    FROM pggit.hash_tree_root() r;
+
+    IF v_root.live_hash IS NOT DISTINCT FROM v_root.recorded_hash THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    WITH drifted_schemas AS (
+        SELECT s.schema_name, s.recorded_hash, s.live_hash
+        FROM pggit.hash_tree_schemas s
+        WHERE s.live_hash IS DISTINCT FROM s.recorded_hash
+    ),
+    drifted_nodes AS (
+        SELECT n.object_id, n.object_type, n.schema_name, n.object_name,
+               n.recorded_hash, n.live_hash
+        FROM pggit.hash_tree_nodes n
+        JOIN drifted_schemas s ON s.schema_name = n.schema_name
+        WHERE n.live_hash IS DISTINCT FROM n.recorded_hash
+    )
+    SELECT 'schema'::TEXT, s.schema_name, NULL::INTEGER, NULL::pggit.object_type, NULL::TEXT,
+           NULL::TEXT, NULL::TEXT, s.recorded_hash, s.live_hash
+    FROM drifted_schemas s
+    UNION ALL
+    SELECT 'object', n.schema_name, n.object_id, n.object_type, n.object_name,
+           NULL, NULL, n.recorded_hash, n.live_hash
+    FROM drifted_nodes n
+    UNION ALL
+    SELECT 'leaf', n.schema_name, n.object_id, n.object_type, n.object_name,
+           l.leaf_type, l.leaf_name, l.recorded_hash, l.live_hash
+    FROM drifted_nodes n
+    JOIN pggit.hash_tree_leaves l ON l.object_id = n.object_id
+    WHERE l.live_hash IS DISTINCT FROM l.recorded_hash;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rebuild the live tree of all objects (or one schema) from the catalogs
+-- Catches changes made while event triggers were disabled, and records
+-- every object whose ddl_hash still matches the catalog. Returns the number
+-- of objects refreshed.
+CREATE OR REPLACE FUNCTION pggit.rebuild_hash_tree(
+    p_schema_name TEXT DEFAULT NULL
+) RETURNS INTEGER AS $$
+DECLARE
+    v_ids INTEGER[];
+BEGIN
+    v_ids := ARRAY(
+        SELECT id
+        FROM pggit.objects
+        WHERE object_type IN ('TABLE', 'VIEW', 'FUNCTION', 'INDEX')
+        AND (p_schema_name IS NULL OR schema_name = p_schema_name)
+    );
+
+    PERFORM pggit.refresh_hash_tree(v_ids);
+    PERFORM pggit.record_hash_tree(v_ids, true);
+
+    RETURN cardinality(v_ids);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Keep the tree in step with pggit.objects
+CREATE OR REPLACE FUNCTION pggit.track_hash_tree_objects()
+RETURNS trigger AS $$
+DECLARE
+    v_refresh INTEGER[];
+    v_record INTEGER[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        v_refresh := ARRAY(SELECT id FROM pggit_new_objects);
+        v_record := v_refresh;
+    ELSIF TG_OP = 'DELETE' THEN
+        -- Nodes go with their objects; their schemas need recomputing
+        INSERT INTO pggit.hash_tree_schemas (schema_name)
+        SELECT DISTINCT schema_name FROM pggit_old_objects
+        ORDER BY 1
+        ON CONFLICT (schema_name) DO UPDATE SET is_stale = true
+        WHERE NOT pggit.hash_tree_schemas.is_stale;
+        RETURN NULL;
+    ELSE
+        -- Renamed, moved, dropped or revived objects are read again
+        v_refresh := ARRAY(
+            SELECT n.id
+            FROM pggit_old_objects o
+            JOIN pggit_new_objects n ON n.id = o.id
+            WHERE (o.object_type, o.schema_name, o.object_name, o.is_active)
+                IS DISTINCT FROM (n.object_type, n.schema_name, n.object_name, n.is_active)
+        );
+        v_record := ARRAY(
+            SELECT n.id
+            FROM pggit_old_objects o
+            JOIN pggit_new_objects n ON n.id = o.id
+            WHERE o.ddl_hash IS DISTINCT FROM n.ddl_hash
+            OR n.id = ANY(v_refresh)
+        );
+
+        -- A rename keeps the node hash but changes both schema nodes
+        INSERT INTO pggit.hash_tree_schemas (schema_name)
+        SELECT DISTINCT c.schema_name
+        FROM pggit_old_objects o
+        JOIN pggit_new_objects n ON n.id = o.id
+        CROSS JOIN LATERAL (VALUES (o.schema_name), (n.schema_name)) c(schema_name)
+        WHERE (o.schema_name, o.object_name) IS DISTINCT FROM (n.schema_name, n.object_name)
+        ORDER BY 1
+        ON CONFLICT (schema_name) DO UPDATE SET is_stale = true
+        WHERE NOT pggit.hash_tree_schemas.is_stale;
+    END IF;
+
+    IF cardinality(v_refresh) > 0 THEN
+        PERFORM pggit.refresh_hash_tree(v_refresh);
+    END IF;
+    IF cardinality(v_record) > 0 THEN
+        PERFORM pggit.record_hash_tree(v_record);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS pggit_hash_tree_ins ON pggit.objects;
+CREATE TRIGGER pggit_hash_tree_ins
+    AFTER INSERT ON pggit.objects
+    REFERENCING NEW TABLE AS pggit_new_objects
+    FOR EACH STATEMENT EXECUTE FUNCTION pggit.track_hash_tree_objects();
+
+DROP TRIGGER IF EXISTS pggit_hash_tree_upd ON pggit.objects;
+CREATE TRIGGER pggit_hash_tree_upd
+    AFTER UPDATE ON pggit.objects
+    REFERENCING OLD TABLE AS pggit_old_objects NEW TABLE AS pggit_new_objects
+    FOR EACH STATEMENT EXECUTE FUNCTION pggit.track_hash_tree_objects();
+
+DROP TRIGGER IF EXISTS pggit_hash_tree_del ON pggit.objects;
+CREATE TRIGGER pggit_hash_tree_del
+    AFTER DELETE ON pggit.objects
+    REFERENCING OLD TABLE AS pggit_old_objects
+    FOR EACH STATEMENT EXECUTE FUNCTION pggit.track_hash_tree_objects();
+
+-- Refresh the objects a DDL command created or altered
+-- Event triggers fire in name order, so this runs after pggit_ddl_trigger
+-- and pggit_enhanced_ddl_trigger have registered new objects, and reuses
+-- the targets a set-based capture of the same command materialized. Drops
+-- reach the tree through pggit_hash_tree_upd when the objects are deactivated.
+CREATE OR REPLACE FUNCTION pggit.refresh_hash_tree_on_ddl()
+RETURNS event_trigger AS $$
+DECLARE
+    v_ids INTEGER[];
+BEGIN
+    v_ids := ARRAY(
+        SELECT o.id
+        FROM unnest(pggit.take_ddl_capture_targets()) t
+        JOIN pggit.objects o
+            ON o.object_type = t.object_type
+            AND o.schema_name = t.schema_name
+            AND o.object_name = t.object_name
+        WHERE o.is_active = true
+    );
+
+    IF cardinality(v_ids) > 0 THEN
+        PERFORM pggit.refresh_hash_tree(v_ids);
+    END IF;
+EXCEPTION WHEN OTHERS THEN
+    RAISE WARNING 'Could not refresh hash tree: %', SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    DROP EVENT TRIGGER IF EXISTS pggit_hash_tree_trigger;
+
+    CREATE EVENT TRIGGER pggit_hash_tree_trigger
+        ON ddl_command_end
+        EXECUTE FUNCTION pggit.refresh_hash_tree_on_ddl();
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'Could not create hash tree trigger: %', SQLERRM;
+END $$;
+
+SELECT pggit.rebuild_hash_tree();
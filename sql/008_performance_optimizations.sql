@@ -5,139 +5,932 @@
 -- PART 1: History Table Partitioning
 -- ============================================
 
--- NOTE: History table partitioning is disabled for fresh installations
--- The migration code below is only needed when upgrading from older versions
--- For fresh installs, the history table remains as a regular table for simplicity
-
--- DISABLED: Convert history table to partitioned by time
--- This migration code is commented out to avoid issues during fresh installation
-/*
-DO $$
+-- Fresh installations keep pggit.history and pggit_audit.changes as plain
+-- tables. Converting one to monthly range partitions is opt-in and runs
+-- online, in the same stages as a shadow table deployment:
+--
+--   SELECT pggit.start_partition_migration('pggit.history');
+--   CALL pggit.run_partition_migration('pggit.history');
+--   SELECT pggit.cutover_partition_migration('pggit.history');
+--
+-- The copy commits per chunk while statement-level capture triggers record
+-- the keys written meanwhile, so DDL capture keeps running throughout. Only
+-- the final catch-up and the rename take a lock. Once partitioned,
+-- retention detaches and drops whole partitions instead of deleting rows.
+--
+-- A partitioned table can only be referenced on a key that includes its
+-- partition column, so foreign keys pointing at the table (such as
+-- pggit_audit.compliance_log.change_id) are enforced by triggers after the
+-- cutover, recorded in pggit.partition_foreign_keys.
+
+CREATE TABLE IF NOT EXISTS pggit.partition_migrations (
+    table_name TEXT PRIMARY KEY, -- schema-qualified table being converted
+    staging_table TEXT NOT NULL, -- partitioned copy, renamed over the table at cutover
+    partition_column TEXT NOT NULL,
+    key_column TEXT NOT NULL, -- single-column primary key walked by the copy
+    status TEXT DEFAULT 'copying', -- 'copying', 'synchronized', 'switching', 'completed'
+    last_key TEXT, -- checkpoint of the chunked copy
+    chunk_size INT DEFAULT 10000,
+    rows_copied BIGINT DEFAULT 0,
+    changes_applied BIGINT DEFAULT 0,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP
+);
+
+-- Keys of rows written to a table while it is being converted
+CREATE TABLE IF NOT EXISTS pggit.partition_migration_changes (
+    change_id BIGSERIAL PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    captured_at TIMESTAMP DEFAULT clock_timestamp()
+);
+
+CREATE INDEX IF NOT EXISTS idx_partition_migration_changes_table
+ON pggit.partition_migration_changes (table_name, change_id);
+
+-- Foreign keys to a converted table, enforced by triggers since cutover
+CREATE TABLE IF NOT EXISTS pggit.partition_foreign_keys (
+    table_name TEXT NOT NULL, -- schema-qualified partitioned table referenced
+    constraint_name TEXT NOT NULL, -- name of the replaced foreign key
+    referencing_table TEXT NOT NULL,
+    columns TEXT[] NOT NULL, -- referencing columns
+    referenced_columns TEXT[] NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (referencing_table, constraint_name)
+);
+
+-- Schema-qualified name a partition migration is recorded under; NULL if
+-- the table does not exist
+CREATE OR REPLACE FUNCTION pggit.partition_migration_table(
+    p_table_name TEXT
+) RETURNS TEXT AS $$
+    SELECT format('%I.%I', n.nspname, c.relname)
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = to_regclass(p_table_name);
+$$ LANGUAGE sql STABLE;
+
+-- Foreign keys referencing a table, as the cutover would replace them
+-- Only NO ACTION and RESTRICT keys with MATCH SIMPLE from other tables can
+-- be enforced by triggers; keys with referential actions are reported as
+-- unsupported.
+CREATE OR REPLACE FUNCTION pggit.partition_referencing_keys(
+    p_table REGCLASS
+) RETURNS TABLE (
+    constraint_name TEXT,
+    referencing_table TEXT,
+    columns TEXT[],
+    referenced_columns TEXT[],
+    supported BOOLEAN
+) AS $$
+    SELECT
+        c.conname::TEXT,
+        pggit.partition_migration_table(c.conrelid::regclass::TEXT),
+        ARRAY(
+            SELECT a.attname::TEXT
+            FROM unnest(c.conkey) WITH ORDINALITY AS k(attnum, ord)
+            JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+            ORDER BY k.ord
+        ),
+        ARRAY(
+            SELECT a.attname::TEXT
+            FROM unnest(c.confkey) WITH ORDINALITY AS k(attnum, ord)
+            JOIN pg_attribute a ON a.attrelid = c.confrelid AND a.attnum = k.attnum
+            ORDER BY k.ord
+        ),
+        c.confupdtype IN ('a', 'r') AND c.confdeltype IN ('a', 'r')
+            AND c.confmatchtype = 's' AND c.conrelid <> c.confrelid
+    FROM pg_constraint c
+    WHERE c.confrelid = p_table AND c.contype = 'f'
+    ORDER BY c.conrelid, c.conname;
+$$ LANGUAGE sql STABLE;
+
+-- Check a row written to a table whose foreign key points at a partitioned
+-- table. TG_ARGV holds the referencing table and constraint name of a
+-- pggit.partition_foreign_keys entry. As with MATCH SIMPLE, a key with a
+-- NULL column references nothing; the referenced row is locked like a
+-- foreign key check does.
+CREATE OR REPLACE FUNCTION pggit.check_partitioned_reference()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_key pggit.partition_foreign_keys%ROWTYPE;
+    v_has_null BOOLEAN;
+    v_found INT;
 BEGIN
-    -- Check if history table is already partitioned
-    IF NOT EXISTS (
-        SELECT 1 FROM pg_class c
-        JOIN pg_namespace n ON n.oid = c.relnamespace
-        WHERE n.nspname = 'pggit' 
-        AND c.relname = 'history'
-        AND c.relkind = 'p'  -- partitioned table
-    ) THEN
-        -- Create new partitioned table without any constraints
-        CREATE TABLE pggit.history_new (
-            id INTEGER NOT NULL,
-            object_id INTEGER NOT NULL,
-            change_type pggit.change_type NOT NULL,
-            change_severity pggit.change_severity NOT NULL,
-            commit_hash TEXT,
-            branch_id INTEGER,
-            merge_base_hash TEXT,
-            merge_resolution pggit.merge_resolution,
-            old_version INTEGER,
-            new_version INTEGER,
-            old_metadata JSONB,
-            new_metadata JSONB,
-            change_description TEXT,
-            sql_executed TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            created_by TEXT DEFAULT CURRENT_USER,
-            PRIMARY KEY (id, created_at)
-        ) PARTITION BY RANGE (created_at);
-        
-        -- Add foreign key constraints
-        ALTER TABLE pggit.history_new ADD CONSTRAINT fk_history_object 
-            FOREIGN KEY (object_id) REFERENCES pggit.objects(id) ON DELETE CASCADE;
-        ALTER TABLE pggit.history_new ADD CONSTRAINT fk_history_branch 
-            FOREIGN KEY (branch_id) REFERENCES pggit.branches(id);
-        
-        -- Create sequence for id column
-        CREATE SEQUENCE pggit.history_new_id_seq;
-        ALTER TABLE pggit.history_new ALTER COLUMN id SET DEFAULT nextval('pggit.history_new_id_seq');
-        
-        -- Copy data from old table (explicitly list columns to avoid mismatch)
-        INSERT INTO pggit.history_new (
-            id, object_id, change_type, change_severity, commit_hash, branch_id,
-            merge_base_hash, merge_resolution, old_version, new_version,
-            old_metadata, new_metadata, change_description, sql_executed,
-            created_at, created_by
-        )
-        SELECT 
-            id, object_id, change_type, change_severity, commit_hash, branch_id,
-            merge_base_hash, merge_resolution, old_version, new_version,
-            old_metadata, new_metadata, change_description, sql_executed,
-            created_at, created_by
-        FROM pggit.history;
-        
-        -- Update sequence to continue from last value
-        PERFORM setval('pggit.history_new_id_seq', COALESCE(MAX(id), 1)) FROM pggit.history_new;
-        
-        -- Swap tables
-        ALTER TABLE pggit.history RENAME TO history_old;
-        ALTER TABLE pggit.history_new RENAME TO history;
-        ALTER SEQUENCE pggit.history_new_id_seq RENAME TO history_id_seq;
-        
-        -- Update foreign key constraints
-        ALTER TABLE pggit.history 
-            ADD CONSTRAINT history_object_id_fkey 
-            FOREIGN KEY (object_id) REFERENCES pggit.objects(id);
-            
-        -- Drop old table
-        DROP TABLE pggit.history_old;
+    SELECT * INTO v_key
+    FROM pggit.partition_foreign_keys
+    WHERE referencing_table = TG_ARGV[0] AND constraint_name = TG_ARGV[1];
+
+    EXECUTE format('SELECT %s',
+        (SELECT string_agg(format('($1).%I IS NULL', c), ' OR ') FROM unnest(v_key.columns) c))
+    INTO v_has_null
+    USING NEW;
+
+    IF v_has_null THEN
+        RETURN NULL;
     END IF;
-END $$;
-*/
 
--- Function to create monthly partitions
-CREATE OR REPLACE FUNCTION pggit.create_history_partitions(
-    p_months_ahead INTEGER DEFAULT 3
+    EXECUTE format('SELECT 1 FROM %s r WHERE %s LIMIT 1 FOR KEY SHARE',
+        v_key.table_name,
+        (SELECT string_agg(format('r.%I = ($1).%I', k.r, k.c), ' AND ')
+         FROM unnest(v_key.referenced_columns, v_key.columns) AS k(r, c)))
+    INTO v_found
+    USING NEW;
+
+    IF v_found IS NULL THEN
+        RAISE EXCEPTION 'insert or update on table % violates foreign key constraint %',
+            v_key.referencing_table, v_key.constraint_name
+            USING ERRCODE = 'foreign_key_violation',
+                  DETAIL = format('Key is not present in table %s.', v_key.table_name);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Check a row updated or deleted in a partitioned table that a converted
+-- foreign key points at. The key may go away only if nothing references
+-- it; a row moved to another partition keeps its key and passes.
+CREATE OR REPLACE FUNCTION pggit.check_partitioned_key_unreferenced()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_key pggit.partition_foreign_keys%ROWTYPE;
+    v_has_null BOOLEAN;
+    v_found INT;
+BEGIN
+    SELECT * INTO v_key
+    FROM pggit.partition_foreign_keys
+    WHERE referencing_table = TG_ARGV[0] AND constraint_name = TG_ARGV[1];
+
+    EXECUTE format('SELECT %s',
+        (SELECT string_agg(format('($1).%I IS NULL', c), ' OR ') FROM unnest(v_key.referenced_columns) c))
+    INTO v_has_null
+    USING OLD;
+
+    IF v_has_null THEN
+        RETURN NULL;
+    END IF;
+
+    EXECUTE format('SELECT 1 FROM %s r WHERE %s LIMIT 1',
+        v_key.table_name,
+        (SELECT string_agg(format('r.%1$I = ($1).%1$I', c), ' AND ') FROM unnest(v_key.referenced_columns) c))
+    INTO v_found
+    USING OLD;
+
+    IF v_found IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+
+    EXECUTE format('SELECT 1 FROM %s f WHERE %s LIMIT 1',
+        v_key.referencing_table,
+        (SELECT string_agg(format('f.%I = ($1).%I', k.c, k.r), ' AND ')
+         FROM unnest(v_key.columns, v_key.referenced_columns) AS k(c, r)))
+    INTO v_found
+    USING OLD;
+
+    IF v_found IS NOT NULL THEN
+        RAISE EXCEPTION 'update or delete on table % violates foreign key constraint % on table %',
+            v_key.table_name, v_key.constraint_name, v_key.referencing_table
+            USING ERRCODE = 'foreign_key_violation',
+                  DETAIL = format('Key is still referenced from table %s.', v_key.referencing_table);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to create monthly partitions of a partitioned table
+-- Partitions are named <prefix>_YYYY_MM (the prefix defaults to the table
+-- name) and cover p_from (default: the current month) through
+-- p_months_ahead months ahead. Indexes come from the partitioned parent.
+-- Tables that are not partitioned are left alone.
+--
+-- Rows of a month without a partition sit in the default partition, and a
+-- partition cannot be created over them. Such a month is built as a plain
+-- table, its rows moved there from the detached default partition, and
+-- both are attached again. The move fires no triggers, as neither table is
+-- a partition at the time.
+CREATE OR REPLACE FUNCTION pggit.create_time_partitions(
+    p_table_name TEXT,
+    p_months_ahead INTEGER DEFAULT 3,
+    p_from DATE DEFAULT NULL,
+    p_name_prefix TEXT DEFAULT NULL
 ) RETURNS INTEGER AS $$
 DECLARE
+    v_table REGCLASS := to_regclass(p_table_name);
+    v_schema TEXT;
+    v_relname TEXT;
     v_partition_name TEXT;
+    v_partition_column TEXT;
+    v_default REGCLASS;
+    v_columns TEXT;
+    v_in_default BOOLEAN;
     v_start_date DATE;
-    v_end_date DATE;
+    v_end_date DATE := date_trunc('month', CURRENT_DATE) + make_interval(months => p_months_ahead + 1);
     v_created INTEGER := 0;
 BEGIN
-    -- Create partitions for the specified number of months
-    FOR i IN 0..p_months_ahead LOOP
-        v_start_date := date_trunc('month', CURRENT_DATE + (i || ' months')::INTERVAL);
-        v_end_date := v_start_date + INTERVAL '1 month';
-        v_partition_name := 'history_' || to_char(v_start_date, 'YYYY_MM');
-        
-        -- Check if partition exists
-        IF NOT EXISTS (
-            SELECT 1 FROM pg_class 
-            WHERE relname = v_partition_name 
-            AND relnamespace = 'pggit'::regnamespace
-        ) THEN
-            EXECUTE format(
-                'CREATE TABLE pggit.%I PARTITION OF pggit.history
-                FOR VALUES FROM (%L) TO (%L)',
-                v_partition_name, v_start_date, v_end_date
-            );
-            
-            -- Create indexes on partition
-            EXECUTE format(
-                'CREATE INDEX %I ON pggit.%I (object_id, version)',
-                'idx_' || v_partition_name || '_object_version',
-                v_partition_name
-            );
-            
-            EXECUTE format(
-                'CREATE INDEX %I ON pggit.%I (created_at)',
-                'idx_' || v_partition_name || '_created_at',
-                v_partition_name
-            );
-            
+    SELECT n.nspname, c.relname, a.attname INTO v_schema, v_relname, v_partition_column
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_partitioned_table pt ON pt.partrelid = c.oid
+    JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum = pt.partattrs[0]
+    WHERE c.oid = v_table AND c.relkind = 'p';
+
+    IF NOT FOUND THEN
+        RETURN 0;
+    END IF;
+
+    SELECT p.oid::regclass INTO v_default
+    FROM pg_inherits i
+    JOIN pg_class p ON p.oid = i.inhrelid
+    WHERE i.inhparent = v_table
+    AND pg_get_expr(p.relpartbound, p.oid) = 'DEFAULT';
+
+    SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO v_columns
+    FROM pg_attribute
+    WHERE attrelid = v_table AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+
+    v_start_date := date_trunc('month', COALESCE(p_from, CURRENT_DATE));
+
+    WHILE v_start_date < v_end_date LOOP
+        v_partition_name := COALESCE(p_name_prefix, v_relname) || '_' || to_char(v_start_date, 'YYYY_MM');
+
+        IF to_regclass(format('%I.%I', v_schema, v_partition_name)) IS NULL THEN
+            v_in_default := false;
+            IF v_default IS NOT NULL THEN
+                EXECUTE format('SELECT EXISTS (SELECT 1 FROM %s WHERE %I >= $1 AND %2$I < $2)',
+                    v_default, v_partition_column)
+                INTO v_in_default
+                USING v_start_date, v_start_date + INTERVAL '1 month';
+            END IF;
+
+            IF v_in_default THEN
+                EXECUTE format(
+                    'CREATE TABLE %I.%I (LIKE %s INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+                     INCLUDING STORAGE INCLUDING GENERATED)',
+                    v_schema, v_partition_name, v_table);
+                EXECUTE format('ALTER TABLE %s DETACH PARTITION %s', v_table, v_default);
+                EXECUTE format(
+                    'WITH moved AS (
+                        DELETE FROM %1$s WHERE %2$I >= $1 AND %2$I < $2 RETURNING %3$s
+                     )
+                     INSERT INTO %4$I.%5$I (%3$s) SELECT %3$s FROM moved',
+                    v_default, v_partition_column, v_columns, v_schema, v_partition_name)
+                USING v_start_date, v_start_date + INTERVAL '1 month';
+                EXECUTE format('ALTER TABLE %s ATTACH PARTITION %I.%I FOR VALUES FROM (%L) TO (%L)',
+                    v_table, v_schema, v_partition_name,
+                    v_start_date, v_start_date + INTERVAL '1 month');
+                EXECUTE format('ALTER TABLE %s ATTACH PARTITION %s DEFAULT', v_table, v_default);
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I.%I PARTITION OF %s FOR VALUES FROM (%L) TO (%L)',
+                    v_schema, v_partition_name, v_table,
+                    v_start_date, v_start_date + INTERVAL '1 month'
+                );
+            END IF;
             v_created := v_created + 1;
         END IF;
+
+        v_start_date := v_start_date + INTERVAL '1 month';
     END LOOP;
-    
+
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to create monthly partitions for the partitioned history tables
+CREATE OR REPLACE FUNCTION pggit.create_history_partitions(
+    p_months_ahead INTEGER DEFAULT 3
+) RETURNS INTEGER AS $$
+DECLARE
+    v_created INTEGER := 0;
+    v_table_name TEXT;
+BEGIN
+    FOR v_table_name IN
+        SELECT 'pggit.history'
+        UNION
+        SELECT table_name FROM pggit.partition_migrations WHERE status = 'completed'
+    LOOP
+        v_created := v_created + pggit.create_time_partitions(v_table_name, p_months_ahead);
+    END LOOP;
+
     RETURN v_created;
 END;
 $$ LANGUAGE plpgsql;
 
--- DISABLED: Don't create partitions since history table is not partitioned in fresh installs
--- Create initial partitions
--- SELECT pggit.create_history_partitions(6);
+-- Start converting a table to monthly range partitions
+-- Creates the partitioned staging table with the table's columns, checks,
+-- indexes, foreign keys and grants, one partition per month of existing
+-- data plus a default partition, and installs change capture. The primary
+-- key becomes (key, partition column); rows with a NULL partition column
+-- are stored with -infinity and land in the default partition.
+CREATE OR REPLACE FUNCTION pggit.start_partition_migration(
+    p_table_name TEXT,
+    p_partition_column TEXT DEFAULT 'created_at',
+    p_months_ahead INTEGER DEFAULT 3,
+    p_chunk_size INT DEFAULT 10000
+) RETURNS TEXT AS $$
+DECLARE
+    v_table REGCLASS := to_regclass(p_table_name);
+    v_table_name TEXT;
+    v_schema TEXT;
+    v_relname TEXT;
+    v_staging_table TEXT;
+    v_key_column TEXT;
+    v_oldest DATE;
+    v_def TEXT;
+    v_prefix TEXT;
+BEGIN
+    IF v_table IS NULL THEN
+        RAISE EXCEPTION 'Table not found: %', p_table_name;
+    END IF;
+
+    SELECT n.nspname, c.relname INTO v_schema, v_relname
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = v_table;
+
+    v_table_name := format('%I.%I', v_schema, v_relname);
+    v_staging_table := format('%I.%I', v_schema, v_relname || '_partitioned');
+
+    IF EXISTS (SELECT 1 FROM pg_class WHERE oid = v_table AND relkind = 'p') THEN
+        RAISE EXCEPTION 'Table % is already partitioned', v_table_name;
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM pggit.partition_migrations WHERE table_name = v_table_name) THEN
+        RAISE EXCEPTION 'Partition migration of % already exists', v_table_name;
+    END IF;
+
+    SELECT MIN(a.attname) INTO v_key_column
+    FROM pg_index i
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+    WHERE i.indrelid = v_table AND i.indisprimary
+    HAVING COUNT(*) = 1;
+
+    IF v_key_column IS NULL THEN
+        RAISE EXCEPTION 'Table % needs a single-column primary key to be partitioned online', v_table_name;
+    END IF;
+
+    SELECT string_agg(format('%s on %s', k.constraint_name, k.referencing_table), ', ') INTO v_def
+    FROM pggit.partition_referencing_keys(v_table) k
+    WHERE NOT k.supported;
+
+    IF v_def IS NOT NULL THEN
+        RAISE EXCEPTION 'Foreign keys referencing % cannot be enforced once it is partitioned: %', v_table_name, v_def
+            USING HINT = 'Only NO ACTION or RESTRICT keys from other tables are kept; drop or change the others first.';
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_attribute
+        WHERE attrelid = v_table AND attname = p_partition_column AND NOT attisdropped
+    ) THEN
+        RAISE EXCEPTION 'Column % not found in %', p_partition_column, v_table_name;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE %s (LIKE %s INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+         INCLUDING STORAGE INCLUDING COMMENTS INCLUDING GENERATED)
+         PARTITION BY RANGE (%I)',
+        v_staging_table, v_table, p_partition_column);
+    EXECUTE format('ALTER TABLE %s ALTER COLUMN %I SET NOT NULL',
+        v_staging_table, p_partition_column);
+    EXECUTE format('ALTER TABLE %s ADD PRIMARY KEY (%I, %I)',
+        v_staging_table, v_key_column, p_partition_column);
+
+    -- Secondary indexes; unique ones cannot be enforced without the
+    -- partition column and are skipped
+    FOR v_def IN
+        SELECT substring(pg_get_indexdef(i.indexrelid) FROM ' USING .*$')
+        FROM pg_index i
+        WHERE i.indrelid = v_table
+        AND NOT i.indisprimary
+        AND NOT i.indisunique
+    LOOP
+        EXECUTE format('CREATE INDEX ON %s%s', v_staging_table, v_def);
+    END LOOP;
+
+    FOR v_def IN
+        SELECT format('ADD CONSTRAINT %I %s', conname, pg_get_constraintdef(oid))
+        FROM pg_constraint
+        WHERE conrelid = v_table AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE %s %s', v_staging_table, v_def);
+    END LOOP;
+
+    FOR v_def IN
+        SELECT format('GRANT %s ON %s TO %s', a.privilege_type, v_staging_table,
+            CASE WHEN a.grantee = 0 THEN 'PUBLIC' ELSE quote_ident(pg_get_userbyid(a.grantee)) END)
+        FROM pg_class c, aclexplode(c.relacl) a
+        WHERE c.oid = v_table
+    LOOP
+        EXECUTE v_def;
+    END LOOP;
+
+    EXECUTE format('SELECT MIN(%I) FILTER (WHERE %1$I > ''-infinity'')::DATE FROM %s',
+        p_partition_column, v_table)
+    INTO v_oldest;
+
+    PERFORM pggit.create_time_partitions(v_staging_table, p_months_ahead, v_oldest, v_relname);
+    EXECUTE format('CREATE TABLE %I.%I PARTITION OF %s DEFAULT',
+        v_schema, v_relname || '_default', v_staging_table);
+
+    INSERT INTO pggit.partition_migrations (
+        table_name, staging_table, partition_column, key_column, chunk_size
+    ) VALUES (
+        v_table_name, v_staging_table, p_partition_column, v_key_column, p_chunk_size
+    );
+
+    -- Capture changes before the copy starts so none are missed
+    v_prefix := 'pggit_partition_' || v_relname;
+    EXECUTE format(
+        'CREATE TRIGGER %I AFTER INSERT ON %s
+         REFERENCING NEW TABLE AS pggit_new_rows
+         FOR EACH STATEMENT EXECUTE FUNCTION pggit.capture_partition_changes(%L, %L)',
+        v_prefix || '_ins', v_table, v_table_name, v_key_column);
+    EXECUTE format(
+        'CREATE TRIGGER %I AFTER UPDATE ON %s
+         REFERENCING OLD TABLE AS pggit_old_rows NEW TABLE AS pggit_new_rows
+         FOR EACH STATEMENT EXECUTE FUNCTION pggit.capture_partition_changes(%L, %L)',
+        v_prefix || '_upd', v_table, v_table_name, v_key_column);
+    EXECUTE format(
+        'CREATE TRIGGER %I AFTER DELETE ON %s
+         REFERENCING OLD TABLE AS pggit_old_rows
+         FOR EACH STATEMENT EXECUTE FUNCTION pggit.capture_partition_changes(%L, %L)',
+        v_prefix || '_del', v_table, v_table_name, v_key_column);
+
+    RETURN v_staging_table;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Capture writes to a table being converted to partitions
+-- TG_ARGV holds the migration's table name and key column.
+CREATE OR REPLACE FUNCTION pggit.capture_partition_changes()
+RETURNS TRIGGER AS $$
+BEGIN
+    EXECUTE format(
+        'INSERT INTO pggit.partition_migration_changes (table_name, row_key) SELECT $1, k FROM (%s) AS c(k)',
+        CASE TG_OP
+            WHEN 'INSERT' THEN format('SELECT %I::TEXT FROM pggit_new_rows', TG_ARGV[1])
+            WHEN 'DELETE' THEN format('SELECT %I::TEXT FROM pggit_old_rows', TG_ARGV[1])
+            ELSE format('SELECT %1$I::TEXT FROM pggit_new_rows UNION SELECT %1$I::TEXT FROM pggit_old_rows', TG_ARGV[1])
+        END
+    ) USING TG_ARGV[0];
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Column list and select list for copying rows into the staging table
+-- The partition column is coalesced to -infinity, as the staging table
+-- requires it.
+CREATE OR REPLACE FUNCTION pggit.partition_copy_columns(
+    p_table_name TEXT,
+    OUT columns TEXT,
+    OUT select_list TEXT
+) AS $$
+    SELECT
+        string_agg(quote_ident(a.attname), ', ' ORDER BY a.attnum),
+        string_agg(
+            CASE WHEN a.attname = m.partition_column
+                 THEN format('COALESCE(t.%1$I, ''-infinity'') AS %1$I', a.attname)
+                 ELSE 't.' || quote_ident(a.attname)
+            END, ', ' ORDER BY a.attnum)
+    FROM pggit.partition_migrations m
+    JOIN pg_attribute a ON a.attrelid = m.table_name::regclass
+    WHERE m.table_name = p_table_name
+    AND a.attnum > 0 AND NOT a.attisdropped AND a.attgenerated = '';
+$$ LANGUAGE sql STABLE;
+
+-- Copy the next chunk of a table into its partitioned staging table
+-- Walks the primary key from the last_key checkpoint. Returns false once
+-- the copy is complete; later writes are applied by apply_partition_changes.
+CREATE OR REPLACE FUNCTION pggit.copy_partition_chunk(
+    p_table_name TEXT
+) RETURNS BOOLEAN AS $$
+DECLARE
+    v_table_name TEXT := pggit.partition_migration_table(p_table_name);
+    v_migration RECORD;
+    v_copy RECORD;
+    v_key_type TEXT;
+    v_last_key TEXT;
+    v_copied BIGINT;
+BEGIN
+    SELECT * INTO v_migration
+    FROM pggit.partition_migrations
+    WHERE table_name = v_table_name
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Partition migration not found: %', COALESCE(v_table_name, p_table_name);
+    END IF;
+
+    IF v_migration.status <> 'copying' THEN
+        RETURN false;
+    END IF;
+
+    v_copy := pggit.partition_copy_columns(v_table_name);
+
+    SELECT format_type(atttypid, atttypmod) INTO v_key_type
+    FROM pg_attribute
+    WHERE attrelid = v_table_name::regclass AND attname = v_migration.key_column;
+
+    EXECUTE format(
+        'WITH chunk AS (
+            SELECT * FROM %1$s WHERE %2$s ORDER BY %3$I LIMIT $2
+         ), copied AS (
+            INSERT INTO %4$s (%5$s) SELECT %6$s FROM chunk t
+            ON CONFLICT DO NOTHING
+            RETURNING 1
+         )
+         SELECT (SELECT %3$I::TEXT FROM chunk ORDER BY %3$I DESC LIMIT 1),
+                (SELECT COUNT(*) FROM copied)',
+        v_migration.table_name,
+        CASE WHEN v_migration.last_key IS NULL THEN 'true'
+             ELSE format('%I > $1::%s', v_migration.key_column, v_key_type) END,
+        v_migration.key_column,
+        v_migration.staging_table,
+        v_copy.columns,
+        v_copy.select_list
+    )
+    INTO v_last_key, v_copied
+    USING v_migration.last_key, v_migration.chunk_size;
+
+    UPDATE pggit.partition_migrations
+    SET status = CASE WHEN v_last_key IS NULL THEN 'synchronized' ELSE 'copying' END,
+        last_key = COALESCE(v_last_key, last_key),
+        rows_copied = rows_copied + v_copied
+    WHERE table_name = v_table_name;
+
+    RETURN v_last_key IS NOT NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Apply captured changes to the staging table
+-- Consumes up to p_limit captured keys in capture order and re-copies each
+-- key from the table, so repeated changes to one row converge on its
+-- current state. Returns the number of changes consumed.
+CREATE OR REPLACE FUNCTION pggit.apply_partition_changes(
+    p_table_name TEXT,
+    p_limit INT DEFAULT 10000
+) RETURNS INT AS $$
+DECLARE
+    v_table_name TEXT := pggit.partition_migration_table(p_table_name);
+    v_migration RECORD;
+    v_copy RECORD;
+    v_key_type TEXT;
+    v_row_keys TEXT[];
+    v_consumed INT;
+BEGIN
+    SELECT * INTO v_migration
+    FROM pggit.partition_migrations
+    WHERE table_name = v_table_name
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Partition migration not found: %', COALESCE(v_table_name, p_table_name);
+    END IF;
+
+    WITH batch AS (
+        DELETE FROM pggit.partition_migration_changes
+        WHERE change_id IN (
+            SELECT change_id FROM pggit.partition_migration_changes
+            WHERE table_name = v_table_name
+            ORDER BY change_id
+            LIMIT p_limit
+        )
+        RETURNING row_key
+    )
+    SELECT COUNT(*), array_agg(DISTINCT row_key)
+    INTO v_consumed, v_row_keys
+    FROM batch;
+
+    IF v_consumed = 0 THEN
+        RETURN 0;
+    END IF;
+
+    v_copy := pggit.partition_copy_columns(v_table_name);
+
+    SELECT format_type(atttypid, atttypmod) INTO v_key_type
+    FROM pg_attribute
+    WHERE attrelid = v_table_name::regclass AND attname = v_migration.key_column;
+
+    EXECUTE format('DELETE FROM %s WHERE %I = ANY($1::%s[])',
+        v_migration.staging_table, v_migration.key_column, v_key_type)
+    USING v_row_keys;
+
+    EXECUTE format('INSERT INTO %s (%s) SELECT %s FROM %s t WHERE t.%I = ANY($1::%s[])',
+        v_migration.staging_table, v_copy.columns, v_copy.select_list,
+        v_migration.table_name, v_migration.key_column, v_key_type)
+    USING v_row_keys;
+
+    UPDATE pggit.partition_migrations
+    SET changes_applied = changes_applied + v_consumed
+    WHERE table_name = v_table_name;
+
+    RETURN v_consumed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Run or resume a partition migration, committing after every chunk
+-- Must be called with CALL outside an explicit transaction block. Uses the
+-- online backfill throttle between chunks.
+CREATE OR REPLACE PROCEDURE pggit.run_partition_migration(
+    p_table_name TEXT
+) AS $$
+DECLARE
+    v_throttle_ms INT := 0;
+    v_more BOOLEAN;
+BEGIN
+    LOOP
+        v_more := pggit.copy_partition_chunk(p_table_name);
+        COMMIT;
+        EXIT WHEN NOT v_more;
+
+        v_throttle_ms := pggit.backfill_throttle_delay(v_throttle_ms);
+        IF v_throttle_ms > 0 THEN
+            PERFORM pg_sleep(v_throttle_ms / 1000.0);
+        END IF;
+    END LOOP;
+
+    WHILE pggit.apply_partition_changes(p_table_name) > 0 LOOP
+        COMMIT;
+    END LOOP;
+
+    COMMIT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Switch the partitioned staging table in place of the table
+-- Drains captured changes without blocking writers, then takes an EXCLUSIVE
+-- lock for the final drain, during which reads continue. Dropping the
+-- capture triggers and the renames take ACCESS EXCLUSIVE locks: reads are
+-- blocked from then until the transaction ends. Every lock wait is bounded
+-- by p_lock_timeout, so a long-running reader makes the cutover fail
+-- instead of queueing every other query behind it. The old table keeps its
+-- data as <table>_unpartitioned.
+--
+-- Objects bound to the old table's OID are moved over: views are rebuilt,
+-- serial sequences change owner, and triggers and functions taking the
+-- table's row type are created again from their definitions, read before
+-- the rename so that their table name then resolves to the partitioned
+-- table. Foreign keys referencing the table are replaced by triggers (see
+-- pggit.partition_foreign_keys); the cutover is refused if one of them
+-- cannot be.
+CREATE OR REPLACE FUNCTION pggit.cutover_partition_migration(
+    p_table_name TEXT,
+    p_lock_timeout TEXT DEFAULT '5s'
+) RETURNS VOID AS $$
+DECLARE
+    v_table_name TEXT := pggit.partition_migration_table(p_table_name);
+    v_table REGCLASS;
+    v_migration RECORD;
+    v_lock_timeout TEXT := current_setting('lock_timeout');
+    v_schema TEXT;
+    v_relname TEXT;
+    v_old_table TEXT;
+    v_views TEXT[];
+    v_recreate TEXT[];
+    v_def TEXT;
+    v_key RECORD;
+    v_sequence TEXT;
+    v_column TEXT;
+    v_suffix TEXT;
+BEGIN
+    SELECT * INTO v_migration
+    FROM pggit.partition_migrations
+    WHERE table_name = v_table_name;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Partition migration not found: %', COALESCE(v_table_name, p_table_name);
+    END IF;
+
+    IF v_migration.status <> 'synchronized' THEN
+        RAISE EXCEPTION 'Partition migration of % is not synchronized (status: %)',
+            v_table_name, v_migration.status;
+    END IF;
+
+    v_table := v_table_name::regclass;
+    SELECT n.nspname, c.relname INTO v_schema, v_relname
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = v_table;
+    v_old_table := format('%I.%I', v_schema, v_relname || '_unpartitioned');
+
+    LOOP
+        EXIT WHEN pggit.apply_partition_changes(v_table_name, v_migration.chunk_size) < v_migration.chunk_size;
+    END LOOP;
+
+    PERFORM set_config('lock_timeout', p_lock_timeout, true);
+    EXECUTE format('LOCK TABLE %s IN EXCLUSIVE MODE', v_table);
+    PERFORM set_config('lock_timeout', v_lock_timeout, true);
+
+    -- Foreign keys added since the migration started are checked again
+    SELECT string_agg(format('%s on %s', k.constraint_name, k.referencing_table), ', ') INTO v_def
+    FROM pggit.partition_referencing_keys(v_table) k
+    WHERE NOT k.supported;
+
+    IF v_def IS NOT NULL THEN
+        RAISE EXCEPTION 'Foreign keys referencing % cannot be enforced once it is partitioned: %', v_table_name, v_def
+            USING HINT = 'Only NO ACTION or RESTRICT keys from other tables are kept; drop or change the others first.';
+    END IF;
+
+    UPDATE pggit.partition_migrations
+    SET status = 'switching'
+    WHERE table_name = v_table_name;
+
+    WHILE pggit.apply_partition_changes(v_table_name) > 0 LOOP
+    END LOOP;
+
+    -- Reads stop here; do not wait behind running queries for long
+    PERFORM set_config('lock_timeout', p_lock_timeout, true);
+    EXECUTE format('LOCK TABLE %s, %s IN ACCESS EXCLUSIVE MODE', v_table, v_migration.staging_table);
+
+    FOREACH v_suffix IN ARRAY ARRAY['_ins', '_upd', '_del'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %s',
+            'pggit_partition_' || v_relname || v_suffix, v_table);
+    END LOOP;
+
+    -- Views bind to the table's OID; keep their definitions to rebuild them
+    -- on the partitioned table. Materialized views are recreated with
+    -- their indexes.
+    SELECT array_agg(stmt ORDER BY v.oid, ord)
+    INTO v_views
+    FROM pg_class v
+    CROSS JOIN LATERAL (
+        SELECT format('CREATE OR REPLACE VIEW %s AS %s', v.oid::regclass, pg_get_viewdef(v.oid)), 1
+        WHERE v.relkind = 'v'
+        UNION ALL
+        SELECT format('DROP MATERIALIZED VIEW %s', v.oid::regclass), 1
+        WHERE v.relkind = 'm'
+        UNION ALL
+        SELECT format('CREATE MATERIALIZED VIEW %s AS %s', v.oid::regclass, pg_get_viewdef(v.oid)), 2
+        WHERE v.relkind = 'm'
+        UNION ALL
+        SELECT pg_get_indexdef(i.indexrelid), 3
+        FROM pg_index i
+        WHERE i.indrelid = v.oid
+    ) AS s(stmt, ord)
+    WHERE v.relkind IN ('v', 'm')
+    AND v.oid IN (
+        SELECT r.ev_class
+        FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid
+        WHERE d.classid = 'pg_rewrite'::regclass
+        AND d.refobjid = v_table
+        AND r.ev_class <> v_table
+    );
+
+    -- Triggers, and functions taking the row type (e.g. a row hash), name
+    -- the table in their definitions: run after the rename, they are
+    -- created on the partitioned table and its row type
+    SELECT array_agg(stmt ORDER BY ord, name)
+    INTO v_recreate
+    FROM (
+        SELECT pg_get_functiondef(p.oid), 1, p.oid::regprocedure::TEXT
+        FROM pg_proc p
+        WHERE p.prokind IN ('f', 'p')
+        AND (SELECT reltype FROM pg_class WHERE oid = v_table) = ANY(p.proargtypes::OID[])
+        UNION ALL
+        SELECT pg_get_triggerdef(t.oid), 2, t.tgname
+        FROM pg_trigger t
+        WHERE t.tgrelid = v_table AND NOT t.tgisinternal
+        UNION ALL
+        SELECT format('ALTER TABLE %s DISABLE TRIGGER %I', v_table_name, t.tgname), 3, t.tgname
+        FROM pg_trigger t
+        WHERE t.tgrelid = v_table AND NOT t.tgisinternal AND t.tgenabled = 'D'
+    ) AS s(stmt, ord, name);
+
+    FOR v_key IN SELECT * FROM pggit.partition_referencing_keys(v_table) LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', v_key.referencing_table, v_key.constraint_name);
+
+        INSERT INTO pggit.partition_foreign_keys (
+            table_name, constraint_name, referencing_table, columns, referenced_columns
+        ) VALUES (
+            v_table_name, v_key.constraint_name, v_key.referencing_table, v_key.columns, v_key.referenced_columns
+        );
+
+        v_recreate := v_recreate || format(
+            'CREATE TRIGGER %I AFTER INSERT OR UPDATE OF %s ON %s
+             FOR EACH ROW EXECUTE FUNCTION pggit.check_partitioned_reference(%L, %L)',
+            v_key.constraint_name,
+            (SELECT string_agg(quote_ident(c), ', ') FROM unnest(v_key.columns) c),
+            v_key.referencing_table, v_key.referencing_table, v_key.constraint_name);
+        v_recreate := v_recreate || format(
+            'CREATE TRIGGER %I AFTER UPDATE OF %s OR DELETE ON %s
+             FOR EACH ROW EXECUTE FUNCTION pggit.check_partitioned_key_unreferenced(%L, %L)',
+            (SELECT relname FROM pg_class WHERE oid = v_key.referencing_table::regclass) || '_' || v_key.constraint_name,
+            (SELECT string_agg(quote_ident(c), ', ') FROM unnest(v_key.referenced_columns) c),
+            v_table_name, v_key.referencing_table, v_key.constraint_name);
+    END LOOP;
+
+    FOR v_column, v_sequence IN
+        SELECT a.attname, pg_get_serial_sequence(v_table_name, a.attname)
+        FROM pg_attribute a
+        WHERE a.attrelid = v_table
+        AND a.attnum > 0 AND NOT a.attisdropped
+        AND pg_get_serial_sequence(v_table_name, a.attname) IS NOT NULL
+    LOOP
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY %s.%I',
+            v_sequence, v_migration.staging_table, v_column);
+    END LOOP;
+
+    EXECUTE format('ALTER TABLE %s RENAME TO %I', v_table, v_relname || '_unpartitioned');
+    EXECUTE format('ALTER TABLE %s RENAME TO %I', v_migration.staging_table, v_relname);
+
+    IF v_recreate IS NOT NULL THEN
+        FOREACH v_def IN ARRAY v_recreate LOOP
+            EXECUTE v_def;
+        END LOOP;
+    END IF;
+
+    IF v_views IS NOT NULL THEN
+        FOREACH v_def IN ARRAY v_views LOOP
+            EXECUTE v_def;
+        END LOOP;
+    END IF;
+
+    PERFORM set_config('lock_timeout', v_lock_timeout, true);
+
+    UPDATE pggit.partition_migrations
+    SET status = 'completed',
+        staging_table = v_old_table,
+        completed_at = CURRENT_TIMESTAMP
+    WHERE table_name = v_table_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach and drop the partitions of a table that are past retention
+-- A partition expires once its upper bound is older than the retention
+-- period. With p_archive_table its rows are copied there first. The
+-- default partition is never dropped, nor is a partition holding rows
+-- still referenced through pggit.partition_foreign_keys.
+CREATE OR REPLACE FUNCTION pggit.drop_expired_partitions(
+    p_table_name TEXT,
+    p_retention_period INTERVAL,
+    p_archive_table TEXT DEFAULT NULL
+) RETURNS TABLE (
+    partition_name TEXT,
+    rows_archived BIGINT,
+    estimated_rows BIGINT
+) AS $$
+DECLARE
+    v_partition RECORD;
+    v_key RECORD;
+    v_referenced INT;
+    v_archived BIGINT;
+BEGIN
+    IF to_regclass(p_table_name) IS NULL THEN
+        RETURN;
+    END IF;
+
+    FOR v_partition IN
+        SELECT
+            c.oid::regclass AS partition,
+            GREATEST(c.reltuples, 0)::BIGINT AS reltuples,
+            substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \(''([^'']+)''\)')::TIMESTAMP AS upper_bound
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = p_table_name::regclass
+        AND pg_get_expr(c.relpartbound, c.oid) <> 'DEFAULT'
+    LOOP
+        CONTINUE WHEN v_partition.upper_bound >= CURRENT_TIMESTAMP - p_retention_period;
+
+        v_referenced := NULL;
+        FOR v_key IN
+            SELECT * FROM pggit.partition_foreign_keys
+            WHERE table_name = pggit.partition_migration_table(p_table_name)
+        LOOP
+            EXECUTE format('SELECT 1 FROM %s f JOIN %s r ON %s LIMIT 1',
+                v_key.referencing_table, v_partition.partition,
+                (SELECT string_agg(format('f.%I = r.%I', k.c, k.r), ' AND ')
+                 FROM unnest(v_key.columns, v_key.referenced_columns) AS k(c, r)))
+            INTO v_referenced;
+            EXIT WHEN v_referenced IS NOT NULL;
+        END LOOP;
+
+        IF v_referenced IS NOT NULL THEN
+            RAISE NOTICE 'Keeping expired partition %: its rows are still referenced by %',
+                v_partition.partition, v_key.referencing_table;
+            CONTINUE;
+        END IF;
+
+        v_archived := 0;
+        IF p_archive_table IS NOT NULL THEN
+            EXECUTE format('INSERT INTO %s SELECT * FROM %s', p_archive_table, v_partition.partition);
+            GET DIAGNOSTICS v_archived = ROW_COUNT;
+        END IF;
+
+        partition_name := v_partition.partition::TEXT;
+        rows_archived := v_archived;
+        estimated_rows := v_partition.reltuples;
+
+        EXECUTE format('ALTER TABLE %s DETACH PARTITION %s', p_table_name, partition_name);
+        EXECUTE format('DROP TABLE %s', partition_name);
+
+        RETURN NEXT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
 
 -- ============================================
 -- PART 2: Automated Data Retention
@@ -168,6 +961,14 @@ CREATE TABLE IF NOT EXISTS pggit.history_archive (
     LIKE pggit.history INCLUDING ALL
 );
 
+-- Table a retention policy applies to: bare names are in the pggit schema,
+-- other tables (e.g. pggit_audit.changes) are named with their schema
+CREATE OR REPLACE FUNCTION pggit.retention_table(
+    p_table_name TEXT
+) RETURNS TEXT AS $$
+    SELECT CASE WHEN p_table_name LIKE '%.%' THEN p_table_name ELSE 'pggit.' || p_table_name END;
+$$ LANGUAGE sql IMMUTABLE;
+
 -- Cleanup function with archiving
 CREATE OR REPLACE FUNCTION pggit.cleanup_old_data()
 RETURNS TABLE (
@@ -191,10 +992,23 @@ BEGIN
         v_deleted := 0;
         
         -- Get space before
-        SELECT pg_total_relation_size('pggit.' || v_policy.table_name) 
+        SELECT pg_total_relation_size(pggit.retention_table(v_policy.table_name))
         INTO v_space_before;
         
-        IF v_policy.table_name = 'history' THEN
+        IF pggit.retention_table(v_policy.table_name) IN (
+            SELECT table_name FROM pggit.partition_migrations WHERE status = 'completed'
+        ) THEN
+            -- Partitioned: expired months are detached and dropped whole
+            SELECT COALESCE(SUM(d.rows_archived), 0), COALESCE(SUM(d.estimated_rows), 0)
+            INTO v_archived, v_deleted
+            FROM pggit.drop_expired_partitions(
+                pggit.retention_table(v_policy.table_name),
+                v_policy.retention_period,
+                CASE WHEN v_policy.archive_enabled AND v_policy.table_name = 'history'
+                     THEN 'pggit.history_archive' END
+            ) d;
+            
+        ELSIF v_policy.table_name = 'history' THEN
             -- Archive old history records
             IF v_policy.archive_enabled THEN
                 INSERT INTO pggit.history_archive
@@ -234,7 +1048,7 @@ BEGIN
         WHERE id = v_policy.id;
         
         -- Get space after and calculate freed space
-        SELECT pg_total_relation_size('pggit.' || v_policy.table_name) 
+        SELECT pg_total_relation_size(pggit.retention_table(v_policy.table_name))
         INTO v_space_after;
         
         RETURN QUERY
@@ -245,46 +1059,38 @@ BEGIN
             pg_size_pretty(v_space_before - v_space_after);
     END LOOP;
     
-    -- Run VACUUM ANALYZE on cleaned tables
-    VACUUM ANALYZE pggit.history;
-    
-    -- Drop old partitions
-    PERFORM pggit.drop_old_partitions();
+    -- Refresh statistics on cleaned tables (VACUUM cannot run inside a
+    -- function; autovacuum reclaims the deleted rows)
+    ANALYZE pggit.history;
 END;
 $$ LANGUAGE plpgsql;
 
 -- Function to drop old partitions
+-- Applies each active retention policy to its table once the table is
+-- partitioned; returns the number of partitions dropped.
 CREATE OR REPLACE FUNCTION pggit.drop_old_partitions()
 RETURNS INTEGER AS $$
 DECLARE
     v_dropped INTEGER := 0;
-    v_partition RECORD;
-    v_retention_period INTERVAL;
+    v_count INTEGER;
+    v_policy RECORD;
 BEGIN
-    -- Get retention period for history
-    SELECT retention_period INTO v_retention_period
-    FROM pggit.retention_policies
-    WHERE table_name = 'history' AND is_active = TRUE;
-    
-    -- Find and drop old partitions
-    FOR v_partition IN
-        SELECT 
-            schemaname,
-            tablename,
-            -- Extract date from partition name (history_YYYY_MM)
-            to_date(substring(tablename from 'history_(\d{4}_\d{2})'), 'YYYY_MM') as partition_date
-        FROM pg_tables
-        WHERE schemaname = 'pggit'
-        AND tablename LIKE 'history_%'
-        AND tablename ~ 'history_\d{4}_\d{2}$'
+    FOR v_policy IN
+        SELECT rp.*, pggit.retention_table(rp.table_name) AS qualified_name
+        FROM pggit.retention_policies rp
+        JOIN pggit.partition_migrations pm
+          ON pm.table_name = pggit.retention_table(rp.table_name)
+         AND pm.status = 'completed'
+        WHERE rp.is_active = TRUE
     LOOP
-        IF v_partition.partition_date < CURRENT_DATE - v_retention_period THEN
-            EXECUTE format('DROP TABLE %I.%I', 
-                v_partition.schemaname, 
-                v_partition.tablename
-            );
-            v_dropped := v_dropped + 1;
-        END IF;
+        SELECT COUNT(*) INTO v_count
+        FROM pggit.drop_expired_partitions(
+            v_policy.qualified_name,
+            v_policy.retention_period,
+            CASE WHEN v_policy.archive_enabled AND v_policy.table_name = 'history'
+                 THEN 'pggit.history_archive' END
+        );
+        v_dropped := v_dropped + v_count;
     END LOOP;
     
     RETURN v_dropped;
@@ -596,6 +1402,17 @@ BEGIN
                     DELETE FROM pggit.trigger_performance
                     WHERE recorded_at < CURRENT_TIMESTAMP - INTERVAL '7 days';
                     v_details := 'Performance data cleaned';
+
+                WHEN 'performance_alerts' THEN
+                    v_details := 'Collected counters for '
+                        || pggit.collect_performance_counters() || ' metrics, evaluated '
+                        || pggit.evaluate_performance_alerts() || ' metrics';
+
+                WHEN 'backup_job_archive' THEN
+                    v_details := 'Archived ' || pggit.archive_backup_jobs() || ' backup jobs';
+
+                WHEN 'metric_fold' THEN
+                    v_details := 'Folded metric deltas into ' || pggit.fold_metric_deltas() || ' rows';
             END CASE;
             
         EXCEPTION WHEN OTHERS THEN
@@ -658,7 +1475,10 @@ SELECT
     ),
     'age';
 
-COMMENT ON FUNCTION pggit.create_history_partitions IS 'Creates monthly partitions for history table';
+COMMENT ON FUNCTION pggit.create_history_partitions IS 'Creates monthly partitions for the partitioned history tables';
+COMMENT ON FUNCTION pggit.start_partition_migration IS 'Starts an online conversion of a table to monthly range partitions';
+COMMENT ON FUNCTION pggit.cutover_partition_migration IS 'Switches a synchronized partitioned copy in place of its table';
+COMMENT ON TABLE pggit.partition_foreign_keys IS 'Foreign keys to partitioned tables, enforced by triggers since their cutover';
 COMMENT ON FUNCTION pggit.cleanup_old_data IS 'Archives and removes old data based on retention policies';
 COMMENT ON FUNCTION pggit.run_maintenance IS 'Runs all scheduled maintenance jobs';
 COMMENT ON VIEW pggit.system_health IS 'Overview of system performance and health metrics';
\ No newline at end of file
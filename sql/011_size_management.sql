@@ -441,6 +441,11 @@ BEGIN
     -- Delete branch data tables
     DELETE FROM pggit.data_branches
     WHERE branch_id = v_branch_id;
+
+    -- Drop the branch's data branch tables and its arms in routing views
+    IF to_regprocedure('pggit.drop_data_branch(text)') IS NOT NULL THEN
+        PERFORM pggit.drop_data_branch(p_branch_name);
+    END IF;
     
     -- Delete commits (cascades to other tables)
     DELETE FROM pggit.commits
@@ -27,10 +27,26 @@ CREATE TABLE IF NOT EXISTS pggit.shadow_tables (
     shadow_table TEXT NOT NULL,
     sync_status TEXT DEFAULT 'creating', -- 'creating', 'syncing', 'synchronized', 'switching', 'completed'
     rows_synced BIGINT DEFAULT 0,
+    key_columns TEXT[], -- primary key of the original table; NULL copies in one pass
+    last_key TEXT[], -- checkpoint of the chunked initial copy
+    chunk_size INT DEFAULT 10000,
+    changes_applied BIGINT DEFAULT 0,
+    last_sync_at TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     switched_at TIMESTAMP
 );
 
+-- Keys of original rows written while their shadow table is synchronized
+CREATE TABLE IF NOT EXISTS pggit.shadow_changes (
+    change_id BIGSERIAL PRIMARY KEY,
+    shadow_id UUID NOT NULL,
+    row_key JSONB NOT NULL,
+    captured_at TIMESTAMP DEFAULT clock_timestamp()
+);
+
+CREATE INDEX IF NOT EXISTS idx_shadow_changes_shadow
+ON pggit.shadow_changes (shadow_id, change_id);
+
 CREATE TABLE IF NOT EXISTS pggit.deployment_validations (
     validation_id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
     deployment_id UUID REFERENCES pggit.deployments(deployment_id),
@@ -91,55 +107,461 @@ BEGIN
         
         -- Record shadow table
         INSERT INTO pggit.shadow_tables (
-            deployment_id, original_table, shadow_table
+            deployment_id, original_table, shadow_table, key_columns
         ) VALUES (
-            v_deployment_id, p_table_name, v_shadow_table
+            v_deployment_id, p_table_name, v_shadow_table,
+            (SELECT array_agg(a.attname::TEXT ORDER BY array_position(i.indkey, a.attnum))
+             FROM pg_index i
+             JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+             WHERE i.indrelid = quote_ident(p_table_name)::regclass
+             AND i.indisprimary)
         ) RETURNING shadow_id INTO v_shadow_id;
         
-        -- Start data sync
-        PERFORM pggit.sync_shadow_table(v_shadow_id);
+        -- Capture changes before the copy starts so none are missed
+        PERFORM pggit.enable_shadow_capture(v_shadow_id);
+        
+        -- Start data sync; with pggit.shadow_sync = 'deferred' the copy is
+        -- left to CALL pggit.run_shadow_sync so it can commit per chunk
+        IF COALESCE(current_setting('pggit.shadow_sync', true), '') <> 'deferred' THEN
+            PERFORM pggit.sync_shadow_table(v_shadow_id);
+        END IF;
     END IF;
     
     RETURN v_deployment_id;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Capture writes to the original table of a shadow deployment
+-- Statement-level triggers record the primary key of every inserted, updated
+-- or deleted row in pggit.shadow_changes; TG_ARGV holds the shadow id
+-- followed by the key columns.
+CREATE OR REPLACE FUNCTION pggit.capture_shadow_changes()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_key TEXT;
+    v_rows TEXT;
+BEGIN
+    SELECT format('jsonb_build_object(%s)', string_agg(format('%L, %I', k, k), ', '))
+    INTO v_key
+    FROM unnest(TG_ARGV[1:TG_NARGS - 1]) AS k;
+
+    v_rows := CASE TG_OP
+        WHEN 'INSERT' THEN format('SELECT %s FROM pggit_new_rows', v_key)
+        WHEN 'DELETE' THEN format('SELECT %s FROM pggit_old_rows', v_key)
+        ELSE format('SELECT %1$s FROM pggit_new_rows UNION SELECT %1$s FROM pggit_old_rows', v_key)
+    END;
+
+    EXECUTE format(
+        'INSERT INTO pggit.shadow_changes (shadow_id, row_key) SELECT $1, k FROM (%s) AS c(k)',
+        v_rows
+    ) USING TG_ARGV[0]::UUID;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Install change capture on the original table
+-- Tables without a primary key are copied in one pass and get no capture.
+CREATE OR REPLACE FUNCTION pggit.enable_shadow_capture(
+    p_shadow_id UUID
+) RETURNS BOOLEAN AS $$
+DECLARE
+    v_shadow RECORD;
+    v_args TEXT;
+    v_prefix TEXT := 'pggit_shadow_' || left(replace(p_shadow_id::TEXT, '-', ''), 12);
+BEGIN
+    SELECT * INTO v_shadow
+    FROM pggit.shadow_tables
+    WHERE shadow_id = p_shadow_id;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Shadow table not found: %', p_shadow_id;
+    END IF;
+
+    IF v_shadow.key_columns IS NULL THEN
+        RETURN false;
+    END IF;
+
+    SELECT string_agg(quote_literal(k), ', ')
+    INTO v_args
+    FROM unnest(ARRAY[p_shadow_id::TEXT] || v_shadow.key_columns) AS k;
+
+    EXECUTE format(
+        'CREATE TRIGGER %I AFTER INSERT ON %I
+         REFERENCING NEW TABLE AS pggit_new_rows
+         FOR EACH STATEMENT EXECUTE FUNCTION pggit.capture_shadow_changes(%s)',
+        v_prefix || '_ins', v_shadow.original_table, v_args);
+    EXECUTE format(
+        'CREATE TRIGGER %I AFTER UPDATE ON %I
+         REFERENCING OLD TABLE AS pggit_old_rows NEW TABLE AS pggit_new_rows
+         FOR EACH STATEMENT EXECUTE FUNCTION pggit.capture_shadow_changes(%s)',
+        v_prefix || '_upd', v_shadow.original_table, v_args);
+    EXECUTE format(
+        'CREATE TRIGGER %I AFTER DELETE ON %I
+         REFERENCING OLD TABLE AS pggit_old_rows
+         FOR EACH STATEMENT EXECUTE FUNCTION pggit.capture_shadow_changes(%s)',
+        v_prefix || '_del', v_shadow.original_table, v_args);
+
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Remove change capture and discard unapplied changes
+CREATE OR REPLACE FUNCTION pggit.disable_shadow_capture(
+    p_shadow_id UUID
+) RETURNS VOID AS $$
+DECLARE
+    v_shadow RECORD;
+    v_prefix TEXT := 'pggit_shadow_' || left(replace(p_shadow_id::TEXT, '-', ''), 12);
+    v_suffix TEXT;
+BEGIN
+    SELECT * INTO v_shadow
+    FROM pggit.shadow_tables
+    WHERE shadow_id = p_shadow_id;
+
+    IF to_regclass(quote_ident(v_shadow.original_table)) IS NOT NULL THEN
+        FOREACH v_suffix IN ARRAY ARRAY['_ins', '_upd', '_del'] LOOP
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I',
+                v_prefix || v_suffix, v_shadow.original_table);
+        END LOOP;
+    END IF;
+
+    DELETE FROM pggit.shadow_changes WHERE shadow_id = p_shadow_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Copy the next chunk of the original table into the shadow table
+-- Walks the primary key from the last_key checkpoint and copies the columns
+-- both tables share. Returns false once the copy is complete and the shadow
+-- table is synchronized; later writes are applied by apply_shadow_changes.
+CREATE OR REPLACE FUNCTION pggit.copy_shadow_chunk(
+    p_shadow_id UUID
+) RETURNS BOOLEAN AS $$
+DECLARE
+    v_shadow RECORD;
+    v_columns TEXT;
+    v_keys TEXT;
+    v_last TEXT;
+    v_upper TEXT;
+    v_last_key TEXT[];
+    v_copied BIGINT;
+BEGIN
+    SELECT * INTO v_shadow
+    FROM pggit.shadow_tables
+    WHERE shadow_id = p_shadow_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Shadow table not found: %', p_shadow_id;
+    END IF;
+
+    IF v_shadow.sync_status NOT IN ('creating', 'syncing') THEN
+        RETURN false;
+    END IF;
+
+    SELECT string_agg(quote_ident(o.attname), ', ' ORDER BY o.attnum)
+    INTO v_columns
+    FROM pg_attribute o
+    JOIN pg_attribute s ON s.attname = o.attname
+    WHERE o.attrelid = quote_ident(v_shadow.original_table)::regclass
+    AND s.attrelid = quote_ident(v_shadow.shadow_table)::regclass
+    AND o.attnum > 0 AND NOT o.attisdropped
+    AND s.attnum > 0 AND NOT s.attisdropped
+    AND s.attgenerated = '';
+
+    IF v_shadow.key_columns IS NULL THEN
+        EXECUTE format('INSERT INTO %1$I (%3$s) SELECT %3$s FROM %2$I',
+            v_shadow.shadow_table, v_shadow.original_table, v_columns);
+        GET DIAGNOSTICS v_copied = ROW_COUNT;
+        v_last_key := NULL;
+    ELSE
+        SELECT
+            string_agg(quote_ident(a.attname), ', ' ORDER BY k.ord),
+            string_agg(format('$1[%s]::%s', k.ord, format_type(a.atttypid, a.atttypmod)), ', ' ORDER BY k.ord),
+            string_agg(format('%I::TEXT', a.attname), ', ' ORDER BY k.ord)
+        INTO v_keys, v_last, v_upper
+        FROM unnest(v_shadow.key_columns) WITH ORDINALITY AS k(col, ord)
+        JOIN pg_attribute a ON a.attname = k.col
+        WHERE a.attrelid = quote_ident(v_shadow.original_table)::regclass;
+
+        EXECUTE format(
+            'WITH chunk AS (
+                SELECT * FROM %1$I WHERE %2$s ORDER BY %3$s LIMIT $2
+             ), copied AS (
+                INSERT INTO %4$I (%5$s) SELECT %5$s FROM chunk
+                ON CONFLICT DO NOTHING
+                RETURNING 1
+             )
+             SELECT (SELECT ARRAY[%6$s] FROM chunk ORDER BY %7$s LIMIT 1),
+                    (SELECT COUNT(*) FROM copied)',
+            v_shadow.original_table,
+            CASE WHEN v_shadow.last_key IS NULL THEN 'true'
+                 ELSE format('(%s) > (%s)', v_keys, v_last) END,
+            v_keys,
+            v_shadow.shadow_table,
+            v_columns,
+            v_upper,
+            (SELECT string_agg(quote_ident(k) || ' DESC', ', ') FROM unnest(v_shadow.key_columns) AS k)
+        )
+        INTO v_last_key, v_copied
+        USING v_shadow.last_key, v_shadow.chunk_size;
+    END IF;
+
+    UPDATE pggit.shadow_tables
+    SET sync_status = CASE WHEN v_last_key IS NULL THEN 'synchronized' ELSE 'syncing' END,
+        last_key = COALESCE(v_last_key, last_key),
+        rows_synced = rows_synced + v_copied,
+        last_sync_at = clock_timestamp()
+    WHERE shadow_id = p_shadow_id;
+
+    RETURN v_last_key IS NOT NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Apply captured changes to the shadow table
+-- Consumes up to p_limit captured changes in capture order and re-copies
+-- each affected key from the original table, so repeated or out-of-order
+-- changes to one row converge on its current state. Returns the number of
+-- changes consumed.
+CREATE OR REPLACE FUNCTION pggit.apply_shadow_changes(
+    p_shadow_id UUID,
+    p_limit INT DEFAULT 10000
+) RETURNS INT AS $$
+DECLARE
+    v_shadow RECORD;
+    v_columns TEXT;
+    v_source_columns TEXT;
+    v_keys TEXT;
+    v_row_keys JSONB[];
+    v_consumed INT;
+    v_removed BIGINT;
+    v_added BIGINT;
+BEGIN
+    SELECT * INTO v_shadow
+    FROM pggit.shadow_tables
+    WHERE shadow_id = p_shadow_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Shadow table not found: %', p_shadow_id;
+    END IF;
+
+    WITH batch AS (
+        DELETE FROM pggit.shadow_changes
+        WHERE change_id IN (
+            SELECT change_id FROM pggit.shadow_changes
+            WHERE shadow_id = p_shadow_id
+            ORDER BY change_id
+            LIMIT p_limit
+        )
+        RETURNING row_key
+    )
+    SELECT COUNT(*), array_agg(DISTINCT row_key)
+    INTO v_consumed, v_row_keys
+    FROM batch;
+
+    IF v_consumed = 0 THEN
+        RETURN 0;
+    END IF;
+
+    SELECT
+        string_agg(quote_ident(o.attname), ', ' ORDER BY o.attnum),
+        string_agg('t.' || quote_ident(o.attname), ', ' ORDER BY o.attnum)
+    INTO v_columns, v_source_columns
+    FROM pg_attribute o
+    JOIN pg_attribute s ON s.attname = o.attname
+    WHERE o.attrelid = quote_ident(v_shadow.original_table)::regclass
+    AND s.attrelid = quote_ident(v_shadow.shadow_table)::regclass
+    AND o.attnum > 0 AND NOT o.attisdropped
+    AND s.attnum > 0 AND NOT s.attisdropped
+    AND s.attgenerated = '';
+
+    SELECT string_agg(format('t.%1$I = k.%1$I', k), ' AND ')
+    INTO v_keys
+    FROM unnest(v_shadow.key_columns) AS k;
+
+    EXECUTE format(
+        'DELETE FROM %1$I t
+         USING unnest($1) AS r(row_key), jsonb_populate_record(NULL::%2$I, r.row_key) k
+         WHERE %3$s',
+        v_shadow.shadow_table, v_shadow.original_table, v_keys
+    ) USING v_row_keys;
+    GET DIAGNOSTICS v_removed = ROW_COUNT;
+
+    EXECUTE format(
+        'INSERT INTO %1$I (%4$s)
+         SELECT %5$s FROM %2$I t
+         JOIN (unnest($1) AS r(row_key) CROSS JOIN LATERAL jsonb_populate_record(NULL::%2$I, r.row_key) k)
+           ON %3$s',
+        v_shadow.shadow_table, v_shadow.original_table, v_keys, v_columns, v_source_columns
+    ) USING v_row_keys;
+    GET DIAGNOSTICS v_added = ROW_COUNT;
+
+    UPDATE pggit.shadow_tables
+    SET rows_synced = rows_synced + v_added - v_removed,
+        changes_applied = changes_applied + v_consumed,
+        last_sync_at = clock_timestamp()
+    WHERE shadow_id = p_shadow_id;
+
+    RETURN v_consumed;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Sync data to shadow table
+-- Runs the chunked copy and the catch-up inside the caller's transaction;
+-- use CALL pggit.run_shadow_sync to commit per chunk.
 CREATE OR REPLACE FUNCTION pggit.sync_shadow_table(
     p_shadow_id UUID
 ) RETURNS VOID AS $$
+BEGIN
+    WHILE pggit.copy_shadow_chunk(p_shadow_id) LOOP
+    END LOOP;
+
+    WHILE pggit.apply_shadow_changes(p_shadow_id) > 0 LOOP
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Run or resume a shadow table sync, committing after every chunk
+-- Must be called with CALL outside an explicit transaction block. Copies
+-- the remaining chunks, then applies the changes captured meanwhile, using
+-- the online backfill throttle between chunks.
+CREATE OR REPLACE PROCEDURE pggit.run_shadow_sync(
+    p_shadow_id UUID
+) AS $$
+DECLARE
+    v_throttle_ms INT := 0;
+    v_more BOOLEAN;
+BEGIN
+    LOOP
+        v_more := pggit.copy_shadow_chunk(p_shadow_id);
+        COMMIT;
+        EXIT WHEN NOT v_more;
+
+        v_throttle_ms := pggit.backfill_throttle_delay(v_throttle_ms);
+        IF v_throttle_ms > 0 THEN
+            PERFORM pg_sleep(v_throttle_ms / 1000.0);
+        END IF;
+    END LOOP;
+
+    WHILE pggit.apply_shadow_changes(p_shadow_id) > 0 LOOP
+        COMMIT;
+    END LOOP;
+
+    COMMIT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Switch a synchronized shadow table in place of the original
+-- Drains captured changes without blocking writers, then takes an EXCLUSIVE
+-- lock for the final drain, so writes only wait for changes made since the
+-- last catch-up and reads continue. The renames take ACCESS EXCLUSIVE locks
+-- on both tables: reads are blocked from then until the transaction ends.
+-- Both waits are bounded by p_lock_timeout, so a long-running reader makes
+-- the cutover fail instead of queueing every other query behind it. The
+-- original table keeps its data under the shadow table's name.
+CREATE OR REPLACE FUNCTION pggit.cutover_shadow_table(
+    p_shadow_id UUID,
+    p_lock_timeout TEXT DEFAULT '5s'
+) RETURNS VOID AS $$
 DECLARE
     v_shadow RECORD;
-    v_sync_sql TEXT;
+    v_lock_timeout TEXT := current_setting('lock_timeout');
+    v_temp_table TEXT;
 BEGIN
-    -- Get shadow table info
     SELECT * INTO v_shadow
     FROM pggit.shadow_tables
     WHERE shadow_id = p_shadow_id;
-    
-    -- Update status
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Shadow table not found: %', p_shadow_id;
+    END IF;
+
+    IF v_shadow.sync_status <> 'synchronized' THEN
+        RAISE EXCEPTION 'Shadow table % is not synchronized (status: %)',
+            v_shadow.shadow_table, v_shadow.sync_status;
+    END IF;
+
+    LOOP
+        EXIT WHEN pggit.apply_shadow_changes(p_shadow_id, v_shadow.chunk_size) < v_shadow.chunk_size;
+    END LOOP;
+
+    PERFORM set_config('lock_timeout', p_lock_timeout, true);
+    EXECUTE format('LOCK TABLE %I IN EXCLUSIVE MODE', v_shadow.original_table);
+    PERFORM set_config('lock_timeout', v_lock_timeout, true);
+
     UPDATE pggit.shadow_tables
-    SET sync_status = 'syncing'
+    SET sync_status = 'switching'
     WHERE shadow_id = p_shadow_id;
-    
-    -- Copy data with progress tracking
-    v_sync_sql := format(
-        'INSERT INTO %I SELECT * FROM %I',
-        v_shadow.shadow_table,
-        v_shadow.original_table
-    );
-    
-    EXECUTE v_sync_sql;
-    
-    -- Update sync status
+
+    WHILE pggit.apply_shadow_changes(p_shadow_id) > 0 LOOP
+    END LOOP;
+
+    PERFORM pggit.disable_shadow_capture(p_shadow_id);
+
+    -- Reads stop here; do not wait behind running queries for long
+    PERFORM set_config('lock_timeout', p_lock_timeout, true);
+    EXECUTE format('LOCK TABLE %I, %I IN ACCESS EXCLUSIVE MODE',
+        v_shadow.original_table, v_shadow.shadow_table);
+    PERFORM set_config('lock_timeout', v_lock_timeout, true);
+
+    v_temp_table := v_shadow.original_table || '_swap_temp';
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', v_shadow.original_table, v_temp_table);
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', v_shadow.shadow_table, v_shadow.original_table);
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', v_temp_table, v_shadow.shadow_table);
+
     UPDATE pggit.shadow_tables
-    SET sync_status = 'synchronized',
-        rows_synced = (
-            SELECT COUNT(*) 
-            FROM information_schema.tables 
-            WHERE table_name = v_shadow.shadow_table
-        )
+    SET sync_status = 'completed',
+        switched_at = CURRENT_TIMESTAMP
     WHERE shadow_id = p_shadow_id;
+
+    UPDATE pggit.deployments
+    SET status = 'completed',
+        completed_at = CURRENT_TIMESTAMP
+    WHERE deployment_id = v_shadow.deployment_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Get shadow table sync progress and lag
+CREATE OR REPLACE FUNCTION pggit.get_shadow_sync_status(
+    p_deployment_id UUID
+) RETURNS TABLE (
+    shadow_table TEXT,
+    sync_status TEXT,
+    rows_synced BIGINT,
+    estimated_rows BIGINT,
+    percent_complete INT,
+    pending_changes BIGINT,
+    sync_lag INTERVAL,
+    changes_applied BIGINT,
+    last_sync_at TIMESTAMP
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        st.shadow_table,
+        st.sync_status,
+        st.rows_synced,
+        GREATEST(c.reltuples::BIGINT, 0),
+        CASE
+            WHEN st.sync_status IN ('synchronized', 'switching', 'completed') THEN 100
+            WHEN c.reltuples > 0 THEN LEAST((st.rows_synced * 100 / c.reltuples)::INT, 99)
+            ELSE 0
+        END,
+        COALESCE(p.pending, 0),
+        -- Age of the oldest change not yet in the shadow table
+        COALESCE(clock_timestamp()::TIMESTAMP - p.oldest, INTERVAL '0'),
+        st.changes_applied,
+        st.last_sync_at
+    FROM pggit.shadow_tables st
+    LEFT JOIN pg_class c ON c.oid = to_regclass(quote_ident(st.original_table))
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) AS pending, MIN(sc.captured_at) AS oldest
+        FROM pggit.shadow_changes sc
+        WHERE sc.shadow_id = st.shadow_id
+    ) p ON true
+    WHERE st.deployment_id = p_deployment_id
+    ORDER BY st.created_at;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -705,12 +1127,14 @@ $$ LANGUAGE plpgsql;
 -- =====================================================
 
 -- Start online schema change
+DROP FUNCTION IF EXISTS pggit.start_online_schema_change(TEXT, TEXT, TEXT, TEXT, INT);
 CREATE OR REPLACE FUNCTION pggit.start_online_schema_change(
     p_table TEXT,
     p_change_type TEXT,
     p_change_sql TEXT,
     p_backfill_sql TEXT DEFAULT NULL,
-    p_batch_size INT DEFAULT 1000
+    p_batch_size INT DEFAULT 1000,
+    p_backfill_filter TEXT DEFAULT NULL
 ) RETURNS UUID AS $$
 DECLARE
     v_deployment_id UUID;
@@ -729,6 +1153,7 @@ BEGIN
             'table', p_table,
             'change_type', p_change_type,
             'backfill_sql', p_backfill_sql,
+            'backfill_filter', p_backfill_filter,
             'batch_size', p_batch_size
         )
     ) RETURNING deployment_id INTO v_deployment_id;
@@ -739,7 +1164,7 @@ BEGIN
     -- Start backfill if needed
     IF p_backfill_sql IS NOT NULL THEN
         PERFORM pggit.run_online_backfill(
-            v_deployment_id, p_table, p_backfill_sql, p_batch_size
+            v_deployment_id, p_table, p_backfill_sql, p_batch_size, p_backfill_filter
         );
     END IF;
     
@@ -757,142 +1182,398 @@ CREATE OR REPLACE FUNCTION pggit.monitor_schema_change(
     estimated_completion TIMESTAMP
 ) AS $$
 BEGIN
-    -- Return monitoring info
+    -- Progress comes from the backfill checkpoint; completion is extrapolated
+    -- from the rate so far
     RETURN QUERY
-    SELECT 
+    SELECT
         d.status,
-        50, -- Simplified percentage
-        10000::BIGINT, -- Simplified row count
-        now() + interval '10 minutes'
+        COALESCE((d.metadata->>'percent_complete')::INT,
+            CASE WHEN d.status = 'completed' THEN 100 ELSE 0 END),
+        COALESCE((d.metadata->'backfill'->>'processed_rows')::BIGINT, 0),
+        CASE
+            WHEN d.status = 'completed' THEN d.completed_at
+            WHEN COALESCE((d.metadata->>'percent_complete')::INT, 0) > 0 THEN
+                (d.started_at + (now() - d.started_at) * 100
+                    / (d.metadata->>'percent_complete')::INT)::TIMESTAMP
+        END
     FROM pggit.deployments d
     WHERE d.deployment_id = p_change_id;
 END;
 $$ LANGUAGE plpgsql;
 
--- Run online backfill
-CREATE OR REPLACE FUNCTION pggit.run_online_backfill(
+-- Alias of the target of an UPDATE backfill statement
+-- Reads only the statement head, UPDATE [ONLY] name [[AS] alias] SET, so
+-- the key range can name the target the way the statement does. NULL when
+-- the target is not aliased or the statement is not a plain UPDATE.
+CREATE OR REPLACE FUNCTION pggit.backfill_target_alias(
+    p_sql TEXT
+) RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN m[1] IS NULL OR lower(m[1]) = 'set' THEN NULL
+        WHEN left(m[1], 1) = '"' THEN replace(substr(m[1], 2, length(m[1]) - 2), '""', '"')
+        ELSE lower(m[1])
+    END
+    FROM regexp_match(
+        p_sql,
+        '^\s*UPDATE\s+(?:ONLY\s+)?(?:"(?:[^"]|"")+"|[^\s".]+)(?:\.(?:"(?:[^"]|"")+"|[^\s".]+))?'
+            || '\s+(?:AS\s+)?("(?:[^"]|"")+"|[A-Za-z_][A-Za-z0-9_$]*)\s+SET\M',
+        'i'
+    ) AS r(m);
+$$ LANGUAGE sql IMMUTABLE;
+
+-- One batch of a backfill statement
+-- p_range is the key range predicate. The statement's own text is never
+-- searched for a WHERE clause: the range (and the backfill's filter) either
+-- replaces a {batch} placeholder or is appended as the WHERE clause, so a
+-- statement that already has one is a syntax error rather than a silently
+-- misplaced condition.
+CREATE OR REPLACE FUNCTION pggit.backfill_batch_sql(
+    p_backfill JSONB,
+    p_range TEXT
+) RETURNS TEXT AS $$
+DECLARE
+    v_sql TEXT := regexp_replace(p_backfill->>'sql', '[\s;]+$', '');
+    v_condition TEXT := p_range;
+BEGIN
+    IF NULLIF(p_backfill->>'filter', '') IS NOT NULL THEN
+        v_condition := format('%s AND (%s)', p_range, p_backfill->>'filter');
+    END IF;
+
+    IF position('{batch}' IN v_sql) > 0 THEN
+        RETURN replace(v_sql, '{batch}', v_condition);
+    END IF;
+
+    RETURN format('%s WHERE %s', v_sql, v_condition);
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- Prepare a keyset-paginated online backfill
+-- The backfill state lives in deployments.metadata->'backfill' and doubles
+-- as the checkpoint: each batch advances last_key in the same transaction
+-- as its writes, so a crashed backfill resumes after the last committed batch.
+-- p_backfill_sql is restricted to one primary key range per batch through
+-- backfill_batch_sql(); row conditions go in p_filter. The statement is
+-- planned once here so a malformed one fails before it is stored.
+DROP FUNCTION IF EXISTS pggit.prepare_online_backfill(UUID, TEXT, TEXT, INT);
+CREATE OR REPLACE FUNCTION pggit.prepare_online_backfill(
     p_deployment_id UUID,
     p_table TEXT,
     p_backfill_sql TEXT,
-    p_batch_size INT
-) RETURNS BIGINT AS $$
+    p_batch_size INT DEFAULT 1000,
+    p_filter TEXT DEFAULT NULL
+) RETURNS JSONB AS $$
 DECLARE
-    v_total_rows BIGINT := 0;
-    v_processed_rows BIGINT := 0;
-    v_affected_rows BIGINT := 0;
-    v_offset INT := 0;
-    v_batch_sql TEXT;
-    v_percent_complete INT;
-    v_deployment RECORD;
+    v_relation REGCLASS := p_table::regclass;
+    v_key_columns TEXT[];
+    v_key_types TEXT[];
+    v_total_rows BIGINT;
+    v_backfill JSONB;
 BEGIN
-    -- Get deployment info
-    SELECT * INTO v_deployment
-    FROM pggit.deployments
-    WHERE deployment_id = p_deployment_id;
+    IF p_batch_size IS NULL OR p_batch_size < 1 THEN
+        RAISE EXCEPTION 'Batch size must be positive, got %', p_batch_size;
+    END IF;
 
-    IF v_deployment IS NULL THEN
-        RAISE EXCEPTION 'Deployment not found: %', p_deployment_id;
+    SELECT
+        array_agg(a.attname::TEXT ORDER BY array_position(i.indkey, a.attnum)),
+        array_agg(format_type(a.atttypid, a.atttypmod) ORDER BY array_position(i.indkey, a.attnum))
+    INTO v_key_columns, v_key_types
+    FROM pg_index i
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+    WHERE i.indrelid = v_relation
+    AND i.indisprimary;
+
+    IF v_key_columns IS NULL THEN
+        RAISE EXCEPTION 'Online backfill of % requires a primary key', p_table;
     END IF;
 
-    -- Update status to executing
-    UPDATE pggit.deployments
-    SET status = 'executing'
-    WHERE deployment_id = p_deployment_id;
+    -- Planner estimate; only used for progress reporting
+    SELECT reltuples::BIGINT INTO v_total_rows FROM pg_class WHERE oid = v_relation;
+    IF v_total_rows < 0 THEN
+        EXECUTE format('SELECT COUNT(*) FROM %s', v_relation) INTO v_total_rows;
+    END IF;
+
+    v_backfill := jsonb_build_object(
+        'table', v_relation::TEXT,
+        'sql', p_backfill_sql,
+        'filter', p_filter,
+        'target_alias', pggit.backfill_target_alias(p_backfill_sql),
+        'batch_size', p_batch_size,
+        'key_columns', to_jsonb(v_key_columns),
+        'key_types', to_jsonb(v_key_types),
+        'last_key', NULL,
+        'batches', 0,
+        'processed_rows', 0,
+        'scanned_keys', 0,
+        'total_rows', v_total_rows,
+        'throttle_ms', 0,
+        'max_lag_ms', 1000,
+        'max_delay_ms', 5000,
+        'status', 'pending'
+    );
 
-    -- Get total row count for progress tracking
     BEGIN
-        EXECUTE format('SELECT COUNT(*) FROM %I', p_table)
-        INTO v_total_rows;
-    EXCEPTION
-        WHEN OTHERS THEN
-            RAISE WARNING 'Could not count rows in table %: %', p_table, SQLERRM;
-            v_total_rows := 0;
+        EXECUTE 'EXPLAIN ' || pggit.backfill_batch_sql(v_backfill, 'false');
+    EXCEPTION WHEN syntax_error THEN
+        RAISE EXCEPTION 'Backfill statement for % cannot be restricted to a key range: %', p_table, SQLERRM
+            USING HINT = 'Pass row conditions as p_filter, or write WHERE {batch} in the statement.';
     END;
 
-    -- Create batches of 1000 rows using LIMIT/OFFSET
-    -- Apply changes in batches to target table
-    LOOP
-        EXIT WHEN v_offset >= v_total_rows OR v_total_rows = 0;
+    UPDATE pggit.deployments
+    SET metadata = COALESCE(metadata, '{}'::JSONB)
+            || jsonb_build_object('backfill', v_backfill, 'total_rows', v_total_rows)
+    WHERE deployment_id = p_deployment_id;
 
-        BEGIN
-            -- Build batch SQL with LIMIT and OFFSET
-            -- Assumes backfill_sql contains a WHERE clause or can accept one
-            v_batch_sql := format(
-                '%s LIMIT %s OFFSET %s',
-                p_backfill_sql,
-                p_batch_size,
-                v_offset
-            );
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Deployment not found: %', p_deployment_id;
+    END IF;
 
-            -- Execute batch update
-            EXECUTE v_batch_sql;
-            GET DIAGNOSTICS v_affected_rows = ROW_COUNT;
+    RETURN v_backfill;
+END;
+$$ LANGUAGE plpgsql;
 
-            -- Update progress counters
-            v_processed_rows := v_processed_rows + v_affected_rows;
-            v_offset := v_offset + p_batch_size;
+-- Adaptive backfill throttle
+-- Backs off (doubling, up to p_max_delay_ms) while replicas lag by more than
+-- p_max_lag_ms or other sessions wait on locks this session holds, and
+-- decays towards no delay once both clear.
+CREATE OR REPLACE FUNCTION pggit.backfill_throttle_delay(
+    p_previous_ms INT,
+    p_max_lag_ms INT DEFAULT 1000,
+    p_max_delay_ms INT DEFAULT 5000
+) RETURNS INT AS $$
+DECLARE
+    v_lag_ms NUMERIC := 0;
+    v_blocked INT := 0;
+BEGIN
+    SELECT COALESCE(MAX(EXTRACT(EPOCH FROM replay_lag) * 1000), 0)
+    INTO v_lag_ms
+    FROM pg_stat_replication;
 
-            -- Calculate completion percentage
-            IF v_total_rows > 0 THEN
-                v_percent_complete := (v_processed_rows * 100 / v_total_rows)::INT;
-            ELSE
-                v_percent_complete := 100;
-            END IF;
+    SELECT COUNT(*)
+    INTO v_blocked
+    FROM pg_stat_activity
+    WHERE wait_event_type = 'Lock'
+    AND pg_backend_pid() = ANY(pg_blocking_pids(pid));
 
-            -- Update status and completion percentage after each batch
-            UPDATE pggit.deployments
-            SET metadata = jsonb_set(
-                    COALESCE(metadata, '{}'::jsonb),
-                    '{percent_complete}',
-                    to_jsonb(v_percent_complete)
-                ),
-                metadata = jsonb_set(
-                    metadata,
-                    '{processed_rows}',
-                    to_jsonb(v_processed_rows)
-                ),
-                metadata = jsonb_set(
-                    metadata,
-                    '{total_rows}',
-                    to_jsonb(v_total_rows)
-                )
-            WHERE deployment_id = p_deployment_id;
+    IF v_lag_ms > p_max_lag_ms OR v_blocked > 0 THEN
+        RETURN LEAST(GREATEST(COALESCE(p_previous_ms, 0) * 2, 50), p_max_delay_ms);
+    ELSIF COALESCE(p_previous_ms, 0) < 20 THEN
+        RETURN 0;
+    ELSE
+        RETURN p_previous_ms / 2;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
 
-            -- Small delay to avoid overwhelming the database
-            PERFORM pg_sleep(0.1);
+-- Run one backfill batch
+-- Covers the next batch_size primary keys after the checkpoint, runs the
+-- backfill statement for that key range and advances the checkpoint.
+-- Returns false once the table is exhausted and the backfill is completed.
+CREATE OR REPLACE FUNCTION pggit.run_backfill_batch(
+    p_deployment_id UUID
+) RETURNS BOOLEAN AS $$
+DECLARE
+    v_backfill JSONB;
+    v_keys TEXT;
+    v_keys_desc TEXT;
+    v_qualified_keys TEXT;
+    v_last TEXT;
+    v_upper TEXT;
+    v_last_key TEXT[];
+    v_upper_key TEXT[];
+    v_scanned INT;
+    v_range TEXT;
+    v_batch_sql TEXT;
+    v_affected BIGINT;
+    v_processed BIGINT;
+    v_total BIGINT;
+    v_throttle_ms INT;
+BEGIN
+    SELECT metadata->'backfill' INTO v_backfill
+    FROM pggit.deployments
+    WHERE deployment_id = p_deployment_id
+    FOR UPDATE;
 
-        EXCEPTION
-            WHEN OTHERS THEN
-                -- Log error but continue with next batch
-                RAISE WARNING 'Batch backfill error at offset %: %', v_offset, SQLERRM;
+    IF v_backfill IS NULL THEN
+        RAISE EXCEPTION 'No backfill prepared for deployment %', p_deployment_id;
+    END IF;
 
-                -- Update deployment with error
-                UPDATE pggit.deployments
-                SET status = 'failed',
-                    error_message = format('Backfill failed at offset %s: %s', v_offset, SQLERRM),
-                    completed_at = CURRENT_TIMESTAMP
-                WHERE deployment_id = p_deployment_id;
+    IF v_backfill->>'status' = 'completed' THEN
+        RETURN false;
+    END IF;
 
-                RAISE;
-        END;
+    SELECT
+        string_agg(quote_ident(k.col), ', ' ORDER BY k.ord),
+        string_agg(quote_ident(k.col) || ' DESC', ', ' ORDER BY k.ord),
+        string_agg(
+            CASE WHEN v_backfill->>'target_alias' IS NOT NULL
+                THEN format('%I.%I', v_backfill->>'target_alias', k.col)
+                ELSE format('%s.%I', (v_backfill->>'table')::regclass::TEXT, k.col)
+            END, ', ' ORDER BY k.ord),
+        string_agg(format('$1[%s]::%s', k.ord, v_backfill->'key_types'->>(k.ord::INT - 1)), ', ' ORDER BY k.ord),
+        string_agg(format('%s::TEXT', quote_ident(k.col)), ', ' ORDER BY k.ord)
+    INTO v_keys, v_keys_desc, v_qualified_keys, v_last, v_upper
+    FROM jsonb_array_elements_text(v_backfill->'key_columns') WITH ORDINALITY AS k(col, ord);
+
+    IF jsonb_typeof(v_backfill->'last_key') = 'array' THEN
+        SELECT array_agg(value ORDER BY ordinality) INTO v_last_key
+        FROM jsonb_array_elements_text(v_backfill->'last_key') WITH ORDINALITY;
+    END IF;
+
+    -- Upper bound of this batch: the batch_size-th key after the checkpoint,
+    -- found by walking the primary key index
+    EXECUTE format(
+        'SELECT ARRAY[%1$s], COUNT(*) OVER ()::INT FROM (
+            SELECT %2$s FROM %3$s WHERE %4$s ORDER BY %2$s LIMIT $2
+         ) b ORDER BY %5$s LIMIT 1',
+        v_upper, v_keys, v_backfill->>'table',
+        CASE WHEN v_last_key IS NULL THEN 'true' ELSE format('(%s) > (%s)', v_keys, v_last) END,
+        v_keys_desc
+    )
+    INTO v_upper_key, v_scanned
+    USING v_last_key, (v_backfill->>'batch_size')::INT;
+
+    IF v_upper_key IS NULL THEN
+        UPDATE pggit.deployments
+        SET metadata = jsonb_set(
+                jsonb_set(metadata, '{backfill,status}', '"completed"'),
+                '{percent_complete}', to_jsonb(100)),
+            status = 'completed',
+            completed_at = CURRENT_TIMESTAMP
+        WHERE deployment_id = p_deployment_id;
+
+        RETURN false;
+    END IF;
+
+    -- Restrict the backfill statement to (last_key, upper_key]; key values
+    -- are inlined so each batch is planned for its own range. Keys are
+    -- qualified with the target's alias when the statement gives it one.
+    SELECT format('(%1$s) <= (%2$s)%3$s',
+        v_qualified_keys,
+        string_agg(format('%L::%s', u.val, v_backfill->'key_types'->>(u.ord::INT - 1)), ', ' ORDER BY u.ord),
+        CASE WHEN v_last_key IS NULL THEN '' ELSE format(' AND (%s) > (%s)',
+            v_qualified_keys,
+            (SELECT string_agg(format('%L::%s', l.val, v_backfill->'key_types'->>(l.ord::INT - 1)), ', ' ORDER BY l.ord)
+             FROM unnest(v_last_key) WITH ORDINALITY AS l(val, ord)))
+        END)
+    INTO v_range
+    FROM unnest(v_upper_key) WITH ORDINALITY AS u(val, ord);
+
+    v_batch_sql := pggit.backfill_batch_sql(v_backfill, v_range);
+
+    EXECUTE v_batch_sql;
+    GET DIAGNOSTICS v_affected = ROW_COUNT;
+
+    v_processed := (v_backfill->>'processed_rows')::BIGINT + v_affected;
+    v_total := GREATEST((v_backfill->>'total_rows')::BIGINT, 1);
+    v_throttle_ms := pggit.backfill_throttle_delay(
+        (v_backfill->>'throttle_ms')::INT,
+        (v_backfill->>'max_lag_ms')::INT,
+        (v_backfill->>'max_delay_ms')::INT
+    );
+
+    -- Checkpoint in the same transaction as the batch
+    v_backfill := v_backfill || jsonb_build_object(
+        'last_key', to_jsonb(v_upper_key),
+        'batches', (v_backfill->>'batches')::INT + 1,
+        'processed_rows', v_processed,
+        'scanned_keys', (v_backfill->>'scanned_keys')::BIGINT + v_scanned,
+        'throttle_ms', v_throttle_ms,
+        'status', 'running',
+        'updated_at', clock_timestamp()
+    );
+
+    UPDATE pggit.deployments
+    SET metadata = metadata || jsonb_build_object(
+            'backfill', v_backfill,
+            'processed_rows', v_processed,
+            'percent_complete', LEAST(
+                ((v_backfill->>'scanned_keys')::BIGINT * 100 / v_total)::INT, 99)
+        ),
+        status = 'executing'
+    WHERE deployment_id = p_deployment_id;
+
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Run or resume a backfill, committing after every batch
+-- Must be called with CALL outside an explicit transaction block. Sleeps
+-- between batches for the adaptive throttle delay, after the commit, so no
+-- locks or snapshot are held while waiting. p_max_batches bounds one call.
+CREATE OR REPLACE PROCEDURE pggit.run_backfill(
+    p_deployment_id UUID,
+    p_max_batches INT DEFAULT NULL
+) AS $$
+DECLARE
+    v_batches INT := 0;
+    v_throttle_ms INT;
+BEGIN
+    LOOP
+        EXIT WHEN p_max_batches IS NOT NULL AND v_batches >= p_max_batches;
+        EXIT WHEN NOT pggit.run_backfill_batch(p_deployment_id);
+        v_batches := v_batches + 1;
+
+        SELECT (metadata->'backfill'->>'throttle_ms')::INT INTO v_throttle_ms
+        FROM pggit.deployments
+        WHERE deployment_id = p_deployment_id;
 
-        -- Exit if no rows were affected (end of data)
-        EXIT WHEN v_affected_rows = 0;
+        COMMIT;
+
+        IF v_throttle_ms > 0 THEN
+            PERFORM pg_sleep(v_throttle_ms / 1000.0);
+        END IF;
     END LOOP;
 
-    -- Update deployment to completed
+    COMMIT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Run online backfill
+-- Runs every batch inside the caller's transaction; use
+-- prepare_online_backfill and CALL pggit.run_backfill to commit per batch.
+-- Batches run back to back: the throttle delay is only applied by
+-- run_backfill, since sleeping here would hold the batches' locks and the
+-- snapshot for longer. Resumes from an existing checkpoint for the same
+-- deployment.
+DROP FUNCTION IF EXISTS pggit.run_online_backfill(UUID, TEXT, TEXT, INT);
+CREATE OR REPLACE FUNCTION pggit.run_online_backfill(
+    p_deployment_id UUID,
+    p_table TEXT,
+    p_backfill_sql TEXT,
+    p_batch_size INT,
+    p_filter TEXT DEFAULT NULL
+) RETURNS BIGINT AS $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pggit.deployments
+        WHERE deployment_id = p_deployment_id
+    ) THEN
+        RAISE EXCEPTION 'Deployment not found: %', p_deployment_id;
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM pggit.deployments
+        WHERE deployment_id = p_deployment_id
+        AND metadata ? 'backfill'
+    ) THEN
+        PERFORM pggit.prepare_online_backfill(
+            p_deployment_id, p_table, p_backfill_sql, p_batch_size, p_filter
+        );
+    END IF;
+
     UPDATE pggit.deployments
-    SET status = 'completed',
-        completed_at = CURRENT_TIMESTAMP,
-        metadata = jsonb_set(
-            COALESCE(metadata, '{}'::jsonb),
-            '{percent_complete}',
-            to_jsonb(100)
-        )
+    SET status = 'executing'
     WHERE deployment_id = p_deployment_id;
 
+    WHILE pggit.run_backfill_batch(p_deployment_id) LOOP
+    END LOOP;
+
     -- Return total rows affected
-    RETURN v_processed_rows;
+    RETURN (
+        SELECT (metadata->'backfill'->>'processed_rows')::BIGINT
+        FROM pggit.deployments
+        WHERE deployment_id = p_deployment_id
+    );
 
 EXCEPTION
     WHEN OTHERS THEN
@@ -997,6 +1678,8 @@ $$ LANGUAGE plpgsql;
 CREATE OR REPLACE FUNCTION pggit.rollback_deployment(
     p_deployment_id UUID
 ) RETURNS BOOLEAN AS $$
+DECLARE
+    v_shadow_id UUID;
 BEGIN
     -- Update deployment status
     UPDATE pggit.deployments
@@ -1004,6 +1687,15 @@ BEGIN
         completed_at = now()
     WHERE deployment_id = p_deployment_id;
     
+    -- Stop capturing changes for shadow tables that were not switched
+    FOR v_shadow_id IN
+        SELECT shadow_id FROM pggit.shadow_tables
+        WHERE deployment_id = p_deployment_id
+        AND sync_status <> 'completed'
+    LOOP
+        PERFORM pggit.disable_shadow_capture(v_shadow_id);
+    END LOOP;
+    
     -- Actual rollback would depend on deployment type
     -- - Shadow tables: drop shadow table
     -- - Blue-green: switch back
@@ -21,6 +21,7 @@ DECLARE
   v_target_branch_name TEXT;
   v_source_exists BOOLEAN := false;
   v_target_exists BOOLEAN := false;
+  v_started_at TIMESTAMPTZ := clock_timestamp();
 BEGIN
   -- Validate input parameters
   IF p_source_branch_id IS NULL OR p_target_branch_id IS NULL THEN
@@ -85,6 +86,9 @@ BEGIN
     CURRENT_TIMESTAMP
   );
 
+  PERFORM pggit.observe_metric('pggit_merge_duration_seconds',
+    EXTRACT(EPOCH FROM (clock_timestamp() - v_started_at)));
+
   -- Return success
   RETURN QUERY SELECT v_merge_id, 'SUCCESS'::TEXT, v_conflicts, v_rows_merged;
 
@@ -14,6 +14,7 @@ DECLARE
     v_parent_hash TEXT;
     v_branch_id INTEGER;
     v_commit_hash TEXT;
+    v_started_at TIMESTAMPTZ := clock_timestamp();
 BEGIN
     -- Validate inputs
     IF p_branch_name IS NULL OR p_branch_name = '' THEN
@@ -54,6 +55,9 @@ BEGIN
         v_tree_hash
     );
 
+    PERFORM pggit.observe_metric('pggit_commit_duration_seconds',
+        EXTRACT(EPOCH FROM (clock_timestamp() - v_started_at)));
+
     RETURN v_commit_id;
 END;
 $$ LANGUAGE plpgsql;
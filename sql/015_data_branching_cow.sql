@@ -31,6 +31,10 @@ CREATE TABLE IF NOT EXISTS pggit.branched_tables (
     branched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     row_count BIGINT,
     uses_cow BOOLEAN DEFAULT true,
+    -- 'copy': branch_table is a full copy; 'delta': branch_table is an overlay
+    -- view and storage_table holds only the rows the branch changed
+    storage_mode TEXT DEFAULT 'copy' CHECK (storage_mode IN ('copy', 'delta')),
+    storage_table TEXT,
     UNIQUE(branch_name, source_schema, source_table)
 );
 
@@ -51,6 +55,31 @@ CREATE TABLE IF NOT EXISTS pggit.data_conflicts (
     resolved_at TIMESTAMP
 );
 
+-- Chunked data merge progress, one row per table
+-- last_key is the primary key of the last merged row, as text in key order
+CREATE TABLE IF NOT EXISTS pggit.data_merge_progress (
+    merge_id UUID NOT NULL,
+    table_name TEXT NOT NULL,
+    source_branch TEXT NOT NULL,
+    target_branch TEXT NOT NULL,
+    source_relation TEXT NOT NULL,
+    target_relation TEXT NOT NULL,
+    key_columns TEXT[],
+    conflict_resolution TEXT NOT NULL DEFAULT 'interactive',
+    chunk_size INT NOT NULL DEFAULT 1000,
+    last_key TEXT[],
+    chunks INT NOT NULL DEFAULT 0,
+    rows_scanned BIGINT NOT NULL DEFAULT 0,
+    rows_changed BIGINT NOT NULL DEFAULT 0,
+    rows_applied BIGINT NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'running', 'completed', 'skipped')),
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP,
+    PRIMARY KEY (merge_id, table_name)
+);
+
 -- =====================================================
 -- Copy-on-Write Implementation
 -- =====================================================
@@ -61,14 +90,7 @@ CREATE OR REPLACE FUNCTION pggit.setup_table_routing(
     p_schema TEXT,
     p_table TEXT
 ) RETURNS VOID AS $$
-DECLARE
-    v_base_table TEXT;
-    v_pk_columns TEXT;
-    v_all_columns TEXT;
-    v_update_sets TEXT;
 BEGIN
-    v_base_table := '_pggit_main_' || p_table;
-
     -- Check if routing is already set up (view exists)
     IF EXISTS (
         SELECT 1 FROM information_schema.views
@@ -80,144 +102,235 @@ BEGIN
     -- Create base schema if needed (for storing original tables)
     EXECUTE 'CREATE SCHEMA IF NOT EXISTS pggit_base';
 
-    -- Get primary key columns for the table
-    SELECT string_agg(a.attname, ', ' ORDER BY array_position(i.indkey, a.attnum))
-    INTO v_pk_columns
-    FROM pg_index i
-    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-    WHERE i.indrelid = format('%I.%I', p_schema, p_table)::regclass
-    AND i.indisprimary;
-
-    -- Get all columns (excluding system columns)
-    SELECT string_agg(column_name, ', ' ORDER BY ordinal_position)
-    INTO v_all_columns
-    FROM information_schema.columns
-    WHERE table_schema = p_schema AND table_name = p_table
-    AND column_name NOT LIKE '_pggit_%';
-
-    -- Build UPDATE SET clause
-    SELECT string_agg(column_name || ' = NEW.' || column_name, ', ')
-    INTO v_update_sets
-    FROM information_schema.columns
-    WHERE table_schema = p_schema AND table_name = p_table
-    AND column_name NOT LIKE '_pggit_%';
-
-    -- Step 1: Move original table to base schema (avoids OID caching issues)
+    -- Move original table to base schema (avoids OID caching issues)
     EXECUTE format('ALTER TABLE %I.%I SET SCHEMA pggit_base', p_schema, p_table);
-    EXECUTE format('ALTER TABLE pggit_base.%I RENAME TO %I', p_table, v_base_table);
+    EXECUTE format('ALTER TABLE pggit_base.%I RENAME TO %I', p_table, '_pggit_main_' || p_table);
 
-    -- Step 2: Create router function for SELECT
-    EXECUTE format($fn$
-        CREATE OR REPLACE FUNCTION pggit.route_%I_select()
-        RETURNS SETOF pggit_base.%I AS $inner$
-        DECLARE
-            v_branch TEXT;
-            v_schema TEXT;
-        BEGIN
-            v_branch := current_setting('pggit.current_branch', true);
-            IF v_branch IS NULL OR v_branch = '' OR v_branch = 'main' THEN
-                RETURN QUERY SELECT * FROM pggit_base.%I;
-            ELSE
-                v_schema := 'pggit_branch_' || replace(v_branch, '/', '_');
-                RETURN QUERY EXECUTE format('SELECT * FROM %%I.%I', v_schema);
-            END IF;
-        END;
-        $inner$ LANGUAGE plpgsql STABLE
-    $fn$, p_table, v_base_table, v_base_table, p_table);
+    -- Create the view and its write functions
+    PERFORM pggit.refresh_table_routing(p_schema, p_table);
 
-    -- Step 3: Create the view
+    -- Triggers stay bound across refreshes; only the functions are replaced
     EXECUTE format(
-        'CREATE VIEW %I.%I AS SELECT * FROM pggit.route_%I_select()',
-        p_schema, p_table, p_table
+        'CREATE TRIGGER %I INSTEAD OF INSERT ON %I.%I FOR EACH ROW EXECUTE FUNCTION pggit.%I()',
+        p_table || '_insert', p_schema, p_table, 'route_' || p_table || '_insert'
     );
+    EXECUTE format(
+        'CREATE TRIGGER %I INSTEAD OF UPDATE ON %I.%I FOR EACH ROW EXECUTE FUNCTION pggit.%I()',
+        p_table || '_update', p_schema, p_table, 'route_' || p_table || '_update'
+    );
+    EXECUTE format(
+        'CREATE TRIGGER %I INSTEAD OF DELETE ON %I.%I FOR EACH ROW EXECUTE FUNCTION pggit.%I()',
+        p_table || '_delete', p_schema, p_table, 'route_' || p_table || '_delete'
+    );
+
+    RAISE NOTICE 'Set up view routing for %.%', p_schema, p_table;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rebuild the routing view and write functions for a routed table
+-- The view is a UNION ALL of the main table and every branch of it, each
+-- arm gated by a constant test on pggit.current_branch. The planner turns
+-- the gates into one-time filters, so only the active arm runs and WHERE
+-- clauses are pushed into it (index scans, partition pruning). Writes are
+-- dispatched by static SQL per branch instead of dynamic EXECUTE. Arms of
+-- branches offloaded to cold storage also filter on
+-- pggit.reject_cold_branch_read(), which raises once the gate passes.
+-- Called whenever a branch of the table is added, removed, offloaded or
+-- loaded back.
+CREATE OR REPLACE FUNCTION pggit.refresh_table_routing(
+    p_schema TEXT,
+    p_table TEXT
+) RETURNS VOID AS $$
+DECLARE
+    v_base TEXT := format('pggit_base.%I', '_pggit_main_' || p_table);
+    v_branch_gate TEXT := 'COALESCE(current_setting(''pggit.current_branch'', true), '''')';
+    v_cols TEXT;
+    v_new_vals TEXT;
+    v_set TEXT;
+    v_match TEXT;
+    v_branches TEXT;
+    v_view_sql TEXT;
+    v_insert TEXT := '';
+    v_update TEXT := '';
+    v_delete TEXT := '';
+    v_target TEXT;
+    v_branch RECORD;
+    v_default RECORD;
+BEGIN
+    SELECT
+        string_agg(quote_ident(attname), ', ' ORDER BY attnum),
+        string_agg('NEW.' || quote_ident(attname), ', ' ORDER BY attnum)
+    INTO v_cols, v_new_vals
+    FROM pg_attribute
+    WHERE attrelid = v_base::regclass
+    AND attnum > 0
+    AND NOT attisdropped;
+
+    v_set := format('(%s) = ROW(%s)', v_cols, v_new_vals);
+
+    -- Rows are matched on the primary key, or on all columns without one
+    SELECT format('(%s) = (%s)',
+        string_agg(quote_ident(a.attname), ', ' ORDER BY array_position(i.indkey, a.attnum)),
+        string_agg('OLD.' || quote_ident(a.attname), ', ' ORDER BY array_position(i.indkey, a.attnum)))
+    INTO v_match
+    FROM pg_index i
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+    WHERE i.indrelid = v_base::regclass
+    AND i.indisprimary
+    HAVING COUNT(*) > 0;
+
+    IF v_match IS NULL THEN
+        v_match := format('(%s) IS NOT DISTINCT FROM (%s)',
+            v_cols, replace(v_new_vals, 'NEW.', 'OLD.'));
+    END IF;
+
+    SELECT string_agg(quote_literal(branch_name), ', ' ORDER BY branch_name)
+    INTO v_branches
+    FROM pggit.branched_tables
+    WHERE source_schema = p_schema AND source_table = p_table;
+
+    -- Main serves every branch that has no copy of this table
+    v_view_sql := format('SELECT %s FROM %s', v_cols, v_base);
+    IF v_branches IS NOT NULL THEN
+        v_view_sql := v_view_sql || format(' WHERE %s NOT IN (%s)', v_branch_gate, v_branches);
+    END IF;
+
+    FOR v_branch IN
+        SELECT bt.branch_name, bt.branch_schema, bt.branch_table,
+               EXISTS (
+                   SELECT 1 FROM pggit.cold_branch_tables c
+                   WHERE c.table_schema = bt.branch_schema
+                   AND c.table_name = COALESCE(bt.storage_table, bt.branch_table)
+                   AND c.is_cold
+               ) AS is_cold
+        FROM pggit.branched_tables bt
+        WHERE bt.source_schema = p_schema AND bt.source_table = p_table
+        ORDER BY bt.branch_name
+    LOOP
+        v_target := format('%I.%I', v_branch.branch_schema, v_branch.branch_table);
+
+        v_view_sql := v_view_sql || format(
+            E'\nUNION ALL\nSELECT %s FROM %s WHERE %s = %L',
+            v_cols, v_target, v_branch_gate, v_branch.branch_name
+        ) || CASE WHEN v_branch.is_cold
+            THEN format(' AND pggit.reject_cold_branch_read(%L)', v_branch.branch_name)
+            ELSE '' END;
+
+        v_insert := v_insert || format(
+            E'\n            WHEN %L THEN INSERT INTO %s (%s) VALUES (%s);',
+            v_branch.branch_name, v_target, v_cols, v_new_vals
+        );
+        v_update := v_update || format(
+            E'\n            WHEN %L THEN UPDATE %s SET %s WHERE %s;',
+            v_branch.branch_name, v_target, v_set, v_match
+        );
+        v_delete := v_delete || format(
+            E'\n            WHEN %L THEN DELETE FROM %s WHERE %s;',
+            v_branch.branch_name, v_target, v_match
+        );
+    END LOOP;
+
+    EXECUTE format('CREATE OR REPLACE VIEW %I.%I AS %s', p_schema, p_table, v_view_sql);
+
+    -- Inserts through the view use the base table's defaults
+    FOR v_default IN
+        SELECT a.attname, pg_get_expr(d.adbin, d.adrelid) AS expr
+        FROM pg_attrdef d
+        JOIN pg_attribute a ON a.attrelid = d.adrelid AND a.attnum = d.adnum
+        WHERE d.adrelid = v_base::regclass
+        AND a.attgenerated = ''
+    LOOP
+        EXECUTE format('ALTER VIEW %I.%I ALTER COLUMN %I SET DEFAULT %s',
+            p_schema, p_table, v_default.attname, v_default.expr);
+    END LOOP;
 
-    -- Step 4: Create INSTEAD OF INSERT trigger function
     EXECUTE format($fn$
-        CREATE OR REPLACE FUNCTION pggit.route_%I_insert()
+        CREATE OR REPLACE FUNCTION pggit.%I()
         RETURNS TRIGGER AS $inner$
-        DECLARE
-            v_branch TEXT;
-            v_schema TEXT;
         BEGIN
-            v_branch := current_setting('pggit.current_branch', true);
-            IF v_branch IS NULL OR v_branch = '' OR v_branch = 'main' THEN
-                INSERT INTO pggit_base.%I VALUES (NEW.*);
-            ELSE
-                v_schema := 'pggit_branch_' || replace(v_branch, '/', '_');
-                EXECUTE format('INSERT INTO %%I.%I VALUES ($1.*)', v_schema) USING NEW;
-            END IF;
+            %s
             RETURN NEW;
         END;
         $inner$ LANGUAGE plpgsql
-    $fn$, p_table, v_base_table, p_table);
-
-    EXECUTE format(
-        'CREATE TRIGGER %I_insert INSTEAD OF INSERT ON %I.%I FOR EACH ROW EXECUTE FUNCTION pggit.route_%I_insert()',
-        p_table, p_schema, p_table, p_table
-    );
+    $fn$, 'route_' || p_table || '_insert', pggit.route_dispatch(
+        v_branch_gate, v_insert,
+        format('INSERT INTO %s (%s) VALUES (%s);', v_base, v_cols, v_new_vals)));
 
-    -- Step 5: Create INSTEAD OF UPDATE trigger function
     EXECUTE format($fn$
-        CREATE OR REPLACE FUNCTION pggit.route_%I_update()
+        CREATE OR REPLACE FUNCTION pggit.%I()
         RETURNS TRIGGER AS $inner$
-        DECLARE
-            v_branch TEXT;
-            v_schema TEXT;
         BEGIN
-            v_branch := current_setting('pggit.current_branch', true);
-            IF v_branch IS NULL OR v_branch = '' OR v_branch = 'main' THEN
-                UPDATE pggit_base.%I SET (%s) = (SELECT %s FROM (SELECT NEW.*) AS t) WHERE %s;
-            ELSE
-                v_schema := 'pggit_branch_' || replace(v_branch, '/', '_');
-                EXECUTE format('UPDATE %%I.%I SET (%s) = (SELECT %s FROM (SELECT $1.*) AS t) WHERE %s', v_schema)
-                USING NEW, OLD;
-            END IF;
+            %s
             RETURN NEW;
         END;
         $inner$ LANGUAGE plpgsql
-    $fn$, p_table, v_base_table, v_all_columns, v_all_columns,
-         COALESCE('(' || v_pk_columns || ') = (OLD.' || replace(v_pk_columns, ', ', ', OLD.') || ')', 'ctid = OLD.ctid'),
-         p_table, v_all_columns, v_all_columns,
-         COALESCE('(' || v_pk_columns || ') = ($2.' || replace(v_pk_columns, ', ', ', $2.') || ')', 'ctid = $2.ctid'));
+    $fn$, 'route_' || p_table || '_update', pggit.route_dispatch(
+        v_branch_gate, v_update,
+        format('UPDATE %s SET %s WHERE %s;', v_base, v_set, v_match)));
 
-    EXECUTE format(
-        'CREATE TRIGGER %I_update INSTEAD OF UPDATE ON %I.%I FOR EACH ROW EXECUTE FUNCTION pggit.route_%I_update()',
-        p_table, p_schema, p_table, p_table
-    );
-
-    -- Step 6: Create INSTEAD OF DELETE trigger function
     EXECUTE format($fn$
-        CREATE OR REPLACE FUNCTION pggit.route_%I_delete()
+        CREATE OR REPLACE FUNCTION pggit.%I()
         RETURNS TRIGGER AS $inner$
-        DECLARE
-            v_branch TEXT;
-            v_schema TEXT;
         BEGIN
-            v_branch := current_setting('pggit.current_branch', true);
-            IF v_branch IS NULL OR v_branch = '' OR v_branch = 'main' THEN
-                DELETE FROM pggit_base.%I WHERE %s;
-            ELSE
-                v_schema := 'pggit_branch_' || replace(v_branch, '/', '_');
-                EXECUTE format('DELETE FROM %%I.%I WHERE %s', v_schema)
-                USING OLD;
-            END IF;
+            %s
             RETURN OLD;
         END;
         $inner$ LANGUAGE plpgsql
-    $fn$, p_table, v_base_table,
-         COALESCE('(' || v_pk_columns || ') = (OLD.' || replace(v_pk_columns, ', ', ', OLD.') || ')', 'ctid = OLD.ctid'),
-         p_table,
-         COALESCE('(' || v_pk_columns || ') = ($1.' || replace(v_pk_columns, ', ', ', $1.') || ')', 'ctid = $1.ctid'));
+    $fn$, 'route_' || p_table || '_delete', pggit.route_dispatch(
+        v_branch_gate, v_delete,
+        format('DELETE FROM %s WHERE %s;', v_base, v_match)));
 
-    EXECUTE format(
-        'CREATE TRIGGER %I_delete INSTEAD OF DELETE ON %I.%I FOR EACH ROW EXECUTE FUNCTION pggit.route_%I_delete()',
-        p_table, p_schema, p_table, p_table
-    );
+    -- Routing created by earlier versions read through this function
+    IF to_regprocedure(format('pggit.%I()', 'route_' || p_table || '_select')) IS NOT NULL THEN
+        EXECUTE format('DROP FUNCTION pggit.%I()', 'route_' || p_table || '_select');
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
 
-    RAISE NOTICE 'Set up view routing for %.%', p_schema, p_table;
+-- Rebuild the routing of tables that lost a branch
+-- Statement-level, so removing every table of a branch rebuilds each
+-- routing view once. Without it the view keeps an arm for the removed
+-- branch and the branch's tables cannot be dropped.
+CREATE OR REPLACE FUNCTION pggit.refresh_routing_on_branch_removal()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_source RECORD;
+BEGIN
+    FOR v_source IN
+        SELECT DISTINCT r.source_schema, r.source_table
+        FROM pggit_removed_branch_tables r
+        WHERE to_regclass(format('pggit_base.%I', '_pggit_main_' || r.source_table)) IS NOT NULL
+        AND EXISTS (
+            SELECT 1 FROM pg_views v
+            WHERE v.schemaname = r.source_schema
+            AND v.viewname = r.source_table
+        )
+    LOOP
+        PERFORM pggit.refresh_table_routing(v_source.source_schema, v_source.source_table);
+    END LOOP;
+
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
+DROP TRIGGER IF EXISTS pggit_branched_tables_del ON pggit.branched_tables;
+CREATE TRIGGER pggit_branched_tables_del
+    AFTER DELETE ON pggit.branched_tables
+    REFERENCING OLD TABLE AS pggit_removed_branch_tables
+    FOR EACH STATEMENT EXECUTE FUNCTION pggit.refresh_routing_on_branch_removal();
+
+-- Wrap per-branch WHEN arms and the main statement in a CASE on the branch
+CREATE OR REPLACE FUNCTION pggit.route_dispatch(
+    p_branch_gate TEXT,
+    p_branch_arms TEXT,
+    p_main_statement TEXT
+) RETURNS TEXT AS $$
+    SELECT CASE WHEN p_branch_arms = '' THEN p_main_statement
+    ELSE format(E'CASE %s%s\n            ELSE %s\n            END CASE;',
+        p_branch_gate, p_branch_arms, p_main_statement)
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
 -- Get the base table info for a routed table
 -- Returns table name and schema as a composite
 CREATE OR REPLACE FUNCTION pggit.get_base_table_info(
@@ -256,6 +369,8 @@ DECLARE
     v_source_schema TEXT := 'public';
     v_base_info RECORD;
     v_branch_count INT := 0;
+    v_storage_mode TEXT;
+    v_pk_columns TEXT;
 BEGIN
     -- Create branch schema
     v_branch_schema := 'pggit_branch_' || replace(p_branch_name, '/', '_');
@@ -274,21 +389,51 @@ BEGIN
         -- Get the actual base table info (after routing setup)
         SELECT * INTO v_base_info FROM pggit.get_base_table_info(v_source_schema, v_table);
 
-        -- Create branch copy from the base table
-        EXECUTE format('CREATE TABLE %I.%I AS TABLE %I.%I',
-            v_branch_schema, v_table,
-            v_base_info.base_schema, v_base_info.base_table
-        );
+        -- Delta storage (SET pggit.data_branch_storage = 'delta') starts the
+        -- branch empty; tables without a primary key fall back to a full copy
+        IF p_use_cow
+           AND COALESCE(current_setting('pggit.data_branch_storage', true), '') = 'delta'
+           AND pggit.create_delta_table_branch(
+                   v_base_info.base_schema, v_base_info.base_table,
+                   v_branch_schema, v_table) THEN
+            v_storage_mode := 'delta';
+        ELSE
+            -- Create branch copy from the base table
+            EXECUTE format('CREATE TABLE %I.%I AS TABLE %I.%I',
+                v_branch_schema, v_table,
+                v_base_info.base_schema, v_base_info.base_table
+            );
+            v_storage_mode := 'copy';
+
+            -- Keep the copy keyed like the base table so routed lookups can use it
+            SELECT string_agg(quote_ident(a.attname), ', ' ORDER BY array_position(i.indkey, a.attnum))
+            INTO v_pk_columns
+            FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            WHERE i.indrelid = format('%I.%I', v_base_info.base_schema, v_base_info.base_table)::regclass
+            AND i.indisprimary;
+
+            IF v_pk_columns IS NOT NULL THEN
+                EXECUTE format('ALTER TABLE %I.%I ADD PRIMARY KEY (%s)',
+                    v_branch_schema, v_table, v_pk_columns);
+            END IF;
+        END IF;
 
         -- Track branched table
         INSERT INTO pggit.branched_tables (
             branch_name, source_schema, source_table,
-            branch_schema, branch_table, uses_cow
+            branch_schema, branch_table, uses_cow,
+            storage_mode, storage_table
         ) VALUES (
             p_branch_name, v_source_schema, v_table,
-            v_branch_schema, v_table, p_use_cow
+            v_branch_schema, v_table, p_use_cow,
+            v_storage_mode,
+            CASE v_storage_mode WHEN 'delta' THEN '_pggit_delta_' || v_table ELSE v_table END
         );
 
+        -- Add the new branch to the routing view
+        PERFORM pggit.refresh_table_routing(v_source_schema, v_table);
+
         v_branch_count := v_branch_count + 1;
     END LOOP;
 
@@ -355,18 +500,212 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Create delta table branch
+-- The branch starts empty: _pggit_delta_<table> records inserted ('I'),
+-- updated ('U') and tombstoned ('D') rows keyed by the parent's primary key,
+-- and the view <table> overlays those deltas on the parent. Creation cost
+-- does not depend on the parent's size and storage grows only with changes.
+-- Returns false (and creates nothing) if the parent has no primary key.
+CREATE OR REPLACE FUNCTION pggit.create_delta_table_branch(
+    p_parent_schema TEXT,
+    p_parent_table TEXT,
+    p_branch_schema TEXT,
+    p_branch_table TEXT
+) RETURNS BOOLEAN AS $$
+DECLARE
+    v_parent REGCLASS := format('%I.%I', p_parent_schema, p_parent_table)::regclass;
+    v_delta TEXT := format('%I.%I', p_branch_schema, '_pggit_delta_' || p_branch_table);
+    v_view TEXT := format('%I.%I', p_branch_schema, p_branch_table);
+    v_writer TEXT := format('%I.%I', p_branch_schema, '_pggit_delta_' || p_branch_table || '_write');
+    v_cols TEXT;
+    v_new_vals TEXT;
+    v_old_vals TEXT;
+    v_p_cols TEXT;
+    v_set TEXT;
+    v_pk TEXT;
+    v_pk_d TEXT;
+    v_pk_p TEXT;
+    v_pk_v TEXT;
+    v_pk_new TEXT;
+    v_pk_old TEXT;
+    v_default RECORD;
+BEGIN
+    SELECT
+        string_agg(quote_ident(a.attname), ', ' ORDER BY array_position(i.indkey, a.attnum)),
+        string_agg('d.' || quote_ident(a.attname), ', ' ORDER BY array_position(i.indkey, a.attnum)),
+        string_agg('p.' || quote_ident(a.attname), ', ' ORDER BY array_position(i.indkey, a.attnum)),
+        string_agg('v.' || quote_ident(a.attname), ', ' ORDER BY array_position(i.indkey, a.attnum)),
+        string_agg('NEW.' || quote_ident(a.attname), ', ' ORDER BY array_position(i.indkey, a.attnum)),
+        string_agg('OLD.' || quote_ident(a.attname), ', ' ORDER BY array_position(i.indkey, a.attnum))
+    INTO v_pk, v_pk_d, v_pk_p, v_pk_v, v_pk_new, v_pk_old
+    FROM pg_index i
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+    WHERE i.indrelid = v_parent
+    AND i.indisprimary;
+
+    IF v_pk IS NULL THEN
+        RAISE NOTICE 'No primary key found for %, delta branching not possible', v_parent;
+        RETURN false;
+    END IF;
+
+    SELECT
+        string_agg(quote_ident(attname), ', ' ORDER BY attnum),
+        string_agg('NEW.' || quote_ident(attname), ', ' ORDER BY attnum),
+        string_agg('OLD.' || quote_ident(attname), ', ' ORDER BY attnum),
+        string_agg('p.' || quote_ident(attname), ', ' ORDER BY attnum),
+        string_agg(format('%1$I = EXCLUDED.%1$I', attname), ', ' ORDER BY attnum)
+    INTO v_cols, v_new_vals, v_old_vals, v_p_cols, v_set
+    FROM pg_attribute
+    WHERE attrelid = v_parent
+    AND attnum > 0
+    AND NOT attisdropped;
+
+    -- Delta storage: parent columns plus operation marker, keyed like the parent
+    EXECUTE format('CREATE TABLE %s (LIKE %s)', v_delta, v_parent);
+    EXECUTE format(
+        'ALTER TABLE %s
+            ADD COLUMN _pggit_op CHAR(1) NOT NULL CHECK (_pggit_op IN (''I'', ''U'', ''D'')),
+            ADD COLUMN _pggit_changed_at TIMESTAMP NOT NULL DEFAULT clock_timestamp(),
+            ADD PRIMARY KEY (%s)',
+        v_delta, v_pk
+    );
+
+    -- Overlay view: live deltas, then parent rows the branch has not touched
+    EXECUTE format(
+        'CREATE VIEW %s AS
+            SELECT %s FROM %s WHERE _pggit_op <> ''D''
+            UNION ALL
+            SELECT %s FROM %s p
+            WHERE NOT EXISTS (SELECT 1 FROM %s d WHERE (%s) = (%s))',
+        v_view,
+        v_cols, v_delta,
+        v_p_cols, v_parent,
+        v_delta, v_pk_d, v_pk_p
+    );
+
+    -- Inserts through the view use the parent's defaults (e.g. shared sequences)
+    FOR v_default IN
+        SELECT a.attname, pg_get_expr(d.adbin, d.adrelid) AS expr
+        FROM pg_attrdef d
+        JOIN pg_attribute a ON a.attrelid = d.adrelid AND a.attnum = d.adnum
+        WHERE d.adrelid = v_parent
+        AND a.attgenerated = ''
+    LOOP
+        EXECUTE format('ALTER VIEW %s ALTER COLUMN %I SET DEFAULT %s',
+            v_view, v_default.attname, v_default.expr);
+    END LOOP;
+
+    -- Writes become upserts into the delta; the op is 'U' when the key
+    -- exists in the parent and 'I' otherwise
+    EXECUTE format($fn$
+        CREATE FUNCTION %1$s() RETURNS TRIGGER AS $body$
+        BEGIN
+            IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND (%5$s) IS DISTINCT FROM (%6$s)) THEN
+                IF EXISTS (SELECT 1 FROM %3$s p WHERE (%7$s) = (%6$s)) THEN
+                    INSERT INTO %2$s (%8$s, _pggit_op) VALUES (%9$s, 'D')
+                    ON CONFLICT (%4$s) DO UPDATE
+                    SET %11$s, _pggit_op = 'D', _pggit_changed_at = clock_timestamp();
+                ELSE
+                    DELETE FROM %2$s d WHERE (%12$s) = (%6$s);
+                END IF;
+
+                IF TG_OP = 'DELETE' THEN
+                    RETURN OLD;
+                END IF;
+            END IF;
+
+            IF (TG_OP = 'INSERT' OR (%5$s) IS DISTINCT FROM (%6$s))
+               AND EXISTS (SELECT 1 FROM %13$s v WHERE (%14$s) = (%5$s)) THEN
+                RAISE EXCEPTION 'duplicate key value violates primary key of %13$s'
+                    USING ERRCODE = 'unique_violation',
+                          DETAIL = format('Key (%4$s)=(%%s) already exists.', (%5$s)::text);
+            END IF;
+
+            INSERT INTO %2$s (%8$s, _pggit_op)
+            VALUES (%10$s,
+                    CASE WHEN EXISTS (SELECT 1 FROM %3$s p WHERE (%7$s) = (%5$s))
+                         THEN 'U' ELSE 'I' END)
+            ON CONFLICT (%4$s) DO UPDATE
+            SET %11$s, _pggit_op = EXCLUDED._pggit_op, _pggit_changed_at = clock_timestamp();
+
+            RETURN NEW;
+        END;
+        $body$ LANGUAGE plpgsql
+    $fn$,
+        v_writer,       -- 1
+        v_delta,        -- 2
+        v_parent,       -- 3
+        v_pk,           -- 4
+        v_pk_new,       -- 5
+        v_pk_old,       -- 6
+        v_pk_p,         -- 7
+        v_cols,         -- 8
+        v_old_vals,     -- 9
+        v_new_vals,     -- 10
+        v_set,          -- 11
+        v_pk_d,         -- 12
+        v_view,         -- 13
+        v_pk_v          -- 14
+    );
+
+    EXECUTE format(
+        'CREATE TRIGGER pggit_delta_write INSTEAD OF INSERT OR UPDATE OR DELETE ON %s
+         FOR EACH ROW EXECUTE FUNCTION %s()',
+        v_view, v_writer
+    );
+
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Switch active branch context
 -- Uses session variable that view routing functions check at runtime
 CREATE OR REPLACE FUNCTION pggit.switch_branch(
     p_branch_name TEXT
 ) RETURNS VOID AS $$
 BEGIN
+    -- Tables offloaded to cold tier files are loaded back before use
+    PERFORM pggit.rehydrate_branch_from_cold(p_branch_name);
+
     -- Set session variable for current branch
     -- View router functions check this at query execution time (not plan time)
     PERFORM set_config('pggit.current_branch', COALESCE(p_branch_name, 'main'), false);
 END;
 $$ LANGUAGE plpgsql;
 
+-- Drop a data branch and its tables
+-- Removing the branch's rows from branched_tables rebuilds the routing views
+-- without its arms first, then the branch schema is dropped with everything
+-- in it (copies, delta tables, overlay views and their writers). Sessions
+-- still switched to the branch read main afterwards.
+-- Returns the number of tables the branch had.
+CREATE OR REPLACE FUNCTION pggit.drop_data_branch(
+    p_branch_name TEXT
+) RETURNS INT AS $$
+DECLARE
+    v_branch_schema TEXT := 'pggit_branch_' || replace(p_branch_name, '/', '_');
+    v_count INT;
+BEGIN
+    IF p_branch_name IS NULL OR p_branch_name = '' THEN
+        RAISE EXCEPTION 'Branch name cannot be empty';
+    END IF;
+
+    DELETE FROM pggit.branched_tables
+    WHERE branch_name = p_branch_name;
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+
+    DELETE FROM pggit.cold_branch_tables
+    WHERE branch_name = p_branch_name;
+
+    DELETE FROM pggit.branch_storage_stats
+    WHERE branch_name = p_branch_name;
+
+    EXECUTE format('DROP SCHEMA IF EXISTS %I CASCADE', v_branch_schema);
+
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Create data branch with dependency tracking
 CREATE OR REPLACE FUNCTION pggit.create_data_branch_with_dependencies(
     p_branch_name TEXT,
@@ -435,7 +774,348 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Resolve the relation holding a table's rows on a branch
+-- main is the base table; other branches use their branched copy or overlay
+CREATE OR REPLACE FUNCTION pggit.data_branch_relation(
+    p_branch TEXT,
+    p_schema TEXT,
+    p_table TEXT
+) RETURNS TEXT AS $$
+DECLARE
+    v_relation TEXT;
+    v_base_info RECORD;
+BEGIN
+    IF p_branch IS NULL OR p_branch = 'main' THEN
+        SELECT * INTO v_base_info FROM pggit.get_base_table_info(p_schema, p_table);
+        RETURN format('%I.%I', v_base_info.base_schema, v_base_info.base_table);
+    END IF;
+
+    SELECT format('%I.%I', branch_schema, branch_table)
+    INTO v_relation
+    FROM pggit.branched_tables
+    WHERE branch_name = p_branch
+    AND source_schema = p_schema
+    AND source_table = p_table;
+
+    RETURN COALESCE(
+        v_relation,
+        format('%I.%I', 'pggit_branch_' || replace(p_branch, '/', '_'), p_table)
+    );
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Start a chunked data merge
+-- Records one progress row per table the branches share; the merge itself
+-- runs through merge_data_chunk, run_data_merge or merge_data_branches.
+CREATE OR REPLACE FUNCTION pggit.start_data_merge(
+    p_source TEXT,
+    p_target TEXT,
+    p_conflict_resolution TEXT DEFAULT 'interactive',
+    p_chunk_size INT DEFAULT 1000
+) RETURNS UUID AS $$
+DECLARE
+    v_merge_id UUID := gen_random_uuid();
+    v_table RECORD;
+    v_base_info RECORD;
+    v_key_columns TEXT[];
+BEGIN
+    IF p_chunk_size IS NULL OR p_chunk_size < 1 THEN
+        RAISE EXCEPTION 'Chunk size must be positive, got %', p_chunk_size;
+    END IF;
+
+    -- Both sides are merged from their tables, not from cold tier files
+    PERFORM pggit.rehydrate_branch_from_cold(p_source);
+    PERFORM pggit.rehydrate_branch_from_cold(p_target);
+
+    -- Tables of the source branch that also exist on the target
+    FOR v_table IN
+        SELECT DISTINCT st.source_schema, st.source_table
+        FROM pggit.branched_tables st
+        WHERE st.branch_name = p_source
+        AND (
+            COALESCE(p_target, 'main') = 'main'
+            OR EXISTS (
+                SELECT 1 FROM pggit.branched_tables tt
+                WHERE tt.branch_name = p_target
+                AND tt.source_schema = st.source_schema
+                AND tt.source_table = st.source_table
+            )
+        )
+        ORDER BY st.source_schema, st.source_table
+    LOOP
+        -- Primary key of the base table defines the merge order
+        SELECT * INTO v_base_info
+        FROM pggit.get_base_table_info(v_table.source_schema, v_table.source_table);
+
+        SELECT array_agg(a.attname::TEXT ORDER BY array_position(i.indkey, a.attnum))
+        INTO v_key_columns
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = format('%I.%I', v_base_info.base_schema, v_base_info.base_table)::regclass
+        AND i.indisprimary;
+
+        IF v_key_columns IS NULL THEN
+            RAISE NOTICE 'No primary key found for %, skipping conflict detection', v_table.source_table;
+        END IF;
+
+        INSERT INTO pggit.data_merge_progress (
+            merge_id, table_name, source_branch, target_branch,
+            source_relation, target_relation, key_columns,
+            conflict_resolution, chunk_size, status
+        ) VALUES (
+            v_merge_id, v_table.source_table, p_source, COALESCE(p_target, 'main'),
+            pggit.data_branch_relation(p_source, v_table.source_schema, v_table.source_table),
+            pggit.data_branch_relation(p_target, v_table.source_schema, v_table.source_table),
+            v_key_columns, p_conflict_resolution, p_chunk_size,
+            CASE WHEN v_key_columns IS NULL THEN 'skipped' ELSE 'pending' END
+        );
+    END LOOP;
+
+    RETURN v_merge_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Merge the next chunk of one table
+-- Walks the union of source and target keys after the saved position in
+-- primary key order, takes at most chunk_size keys, and compares only the
+-- rows in that key range. Differing rows are logged to data_conflicts and,
+-- unless the merge is interactive, applied to the target immediately:
+-- 'source' resolutions upsert the source row, 'target' resolutions only add
+-- rows missing from the target. Rows deleted on the source are reported but
+-- never deleted from the target.
+-- Returns the number of keys scanned; 0 means the table is complete.
+CREATE OR REPLACE FUNCTION pggit.merge_data_chunk(
+    p_merge_id UUID,
+    p_table_name TEXT
+) RETURNS INT AS $$
+DECLARE
+    v_progress pggit.data_merge_progress%ROWTYPE;
+    v_cols TEXT;
+    v_s_cols TEXT;
+    v_t_cols TEXT;
+    v_r_cols TEXT;
+    v_set TEXT;
+    v_keys TEXT;
+    v_keys_desc TEXT;
+    v_after TEXT;
+    v_key_text TEXT;
+    v_x_keys TEXT;
+    v_r_keys TEXT;
+    v_s_keys TEXT;
+    v_t_keys TEXT;
+    v_last_key TEXT[];
+    v_scanned INT;
+    v_changed INT;
+    v_applied INT;
+BEGIN
+    SELECT * INTO v_progress
+    FROM pggit.data_merge_progress
+    WHERE merge_id = p_merge_id AND table_name = p_table_name
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'No merge % for table %', p_merge_id, p_table_name;
+    END IF;
+
+    IF v_progress.status IN ('completed', 'skipped') THEN
+        RETURN 0;
+    END IF;
+
+    SELECT
+        string_agg(quote_ident(attname), ', ' ORDER BY attnum),
+        string_agg('s.' || quote_ident(attname), ', ' ORDER BY attnum),
+        string_agg('t.' || quote_ident(attname), ', ' ORDER BY attnum),
+        string_agg('r.' || quote_ident(attname), ', ' ORDER BY attnum)
+    INTO v_cols, v_s_cols, v_t_cols, v_r_cols
+    FROM pg_attribute
+    WHERE attrelid = v_progress.target_relation::regclass
+    AND attnum > 0
+    AND NOT attisdropped;
+
+    v_set := format('(%s) = ROW(%s)', v_cols, v_r_cols);
+
+    -- Key expressions; the saved position is cast back to the key types
+    SELECT
+        string_agg(quote_ident(k.col), ', ' ORDER BY k.ord),
+        string_agg(quote_ident(k.col) || ' DESC', ', ' ORDER BY k.ord),
+        format('(%s) > (%s)',
+            string_agg(quote_ident(k.col), ', ' ORDER BY k.ord),
+            string_agg(format('$1[%s]::%s', k.ord, format_type(a.atttypid, a.atttypmod)), ', ' ORDER BY k.ord)),
+        CASE WHEN COUNT(*) = 1
+            THEN format('COALESCE(s.%1$I, t.%1$I)::TEXT', min(k.col))
+            ELSE format('ROW(%s)::TEXT',
+                string_agg(format('COALESCE(s.%1$I, t.%1$I)', k.col), ', ' ORDER BY k.ord))
+        END,
+        string_agg('x.' || quote_ident(k.col), ', ' ORDER BY k.ord),
+        string_agg('r.' || quote_ident(k.col), ', ' ORDER BY k.ord),
+        string_agg('s.' || quote_ident(k.col), ', ' ORDER BY k.ord),
+        string_agg('t.' || quote_ident(k.col), ', ' ORDER BY k.ord)
+    INTO v_keys, v_keys_desc, v_after, v_key_text, v_x_keys, v_r_keys, v_s_keys, v_t_keys
+    FROM unnest(v_progress.key_columns) WITH ORDINALITY AS k(col, ord)
+    JOIN pg_attribute a
+        ON a.attrelid = v_progress.target_relation::regclass
+        AND a.attname = k.col;
+
+    IF v_progress.last_key IS NULL THEN
+        v_after := 'true';
+    END IF;
+
+    EXECUTE format($SQL$
+        WITH keys AS (
+            SELECT %3$s FROM (
+                (SELECT %3$s FROM %1$s WHERE %5$s ORDER BY %3$s LIMIT $2)
+                UNION
+                (SELECT %3$s FROM %2$s WHERE %5$s ORDER BY %3$s LIMIT $2)
+            ) u
+            ORDER BY %3$s
+            LIMIT $2
+        ),
+        bound AS (
+            SELECT %3$s FROM keys ORDER BY %4$s LIMIT 1
+        ),
+        diff AS (
+            SELECT
+                %6$s AS key_text,
+                s.%15$s IS NOT NULL AS in_source,
+                t.%15$s IS NOT NULL AS in_target,
+                to_jsonb(s) AS source_data,
+                to_jsonb(t) AS target_data
+            FROM (
+                SELECT %7$s FROM %1$s
+                WHERE %5$s AND (%3$s) <= (SELECT %3$s FROM bound)
+            ) s
+            FULL OUTER JOIN (
+                SELECT %7$s FROM %2$s
+                WHERE %5$s AND (%3$s) <= (SELECT %3$s FROM bound)
+            ) t ON (%8$s) = (%9$s)
+            WHERE (%10$s) IS DISTINCT FROM (%11$s)
+        ),
+        resolved AS (
+            SELECT diff.*,
+                CASE $3
+                    WHEN 'interactive' THEN 'pending'
+                    WHEN 'source-wins' THEN 'source'
+                    WHEN 'target-wins' THEN 'target'
+                    WHEN 'theirs' THEN 'source'
+                    WHEN 'ours' THEN 'target'
+                    WHEN 'newer' THEN
+                        CASE WHEN (source_data->>'_pggit_timestamp')::timestamp >
+                                  (target_data->>'_pggit_timestamp')::timestamp
+                        THEN 'source' ELSE 'target' END
+                    ELSE 'manual'
+                END AS resolution
+            FROM diff
+        ),
+        logged AS (
+            INSERT INTO pggit.data_conflicts (
+                merge_id, table_name, primary_key_value,
+                source_branch, target_branch,
+                source_data, target_data, conflict_type,
+                resolution, resolved_by, resolved_at
+            )
+            SELECT
+                $4, $5, key_text,
+                $6, $7,
+                source_data, target_data,
+                CASE
+                    WHEN NOT in_source THEN 'delete-update'
+                    WHEN NOT in_target THEN 'update-delete'
+                    ELSE 'update-update'
+                END,
+                resolution,
+                CASE WHEN resolution <> 'pending' THEN CURRENT_USER END,
+                CASE WHEN resolution <> 'pending' THEN CURRENT_TIMESTAMP END
+            FROM resolved
+            RETURNING 1
+        ),
+        updated AS (
+            UPDATE %2$s x SET %12$s
+            FROM resolved d
+            CROSS JOIN LATERAL jsonb_populate_record(NULL::%2$s, d.source_data) r
+            WHERE d.resolution = 'source' AND d.in_source AND d.in_target
+            AND (%13$s) = (%14$s)
+            RETURNING 1
+        ),
+        inserted AS (
+            INSERT INTO %2$s (%7$s)
+            SELECT %16$s
+            FROM resolved d
+            CROSS JOIN LATERAL jsonb_populate_record(NULL::%2$s, d.source_data) r
+            WHERE d.resolution IN ('source', 'target') AND d.in_source AND NOT d.in_target
+            RETURNING 1
+        )
+        SELECT
+            (SELECT ARRAY[%17$s] FROM bound),
+            (SELECT COUNT(*) FROM keys)::INT,
+            (SELECT COUNT(*) FROM logged)::INT,
+            ((SELECT COUNT(*) FROM updated) + (SELECT COUNT(*) FROM inserted))::INT
+    $SQL$,
+        v_progress.source_relation,             -- 1
+        v_progress.target_relation,             -- 2
+        v_keys,                                 -- 3
+        v_keys_desc,                            -- 4
+        v_after,                                -- 5
+        v_key_text,                             -- 6
+        v_cols,                                 -- 7
+        v_s_keys,                               -- 8
+        v_t_keys,                               -- 9
+        v_s_cols,                               -- 10
+        v_t_cols,                               -- 11
+        v_set,                                  -- 12
+        v_x_keys,                               -- 13
+        v_r_keys,                               -- 14
+        quote_ident(v_progress.key_columns[1]), -- 15
+        v_r_cols,                               -- 16
+        (SELECT string_agg(quote_ident(col) || '::TEXT', ', ')
+         FROM unnest(v_progress.key_columns) AS col) -- 17
+    )
+    INTO v_last_key, v_scanned, v_changed, v_applied
+    USING v_progress.last_key, v_progress.chunk_size, v_progress.conflict_resolution,
+          p_merge_id, p_table_name, v_progress.source_branch, v_progress.target_branch;
+
+    UPDATE pggit.data_merge_progress
+    SET last_key = COALESCE(v_last_key, last_key),
+        chunks = chunks + CASE WHEN v_scanned > 0 THEN 1 ELSE 0 END,
+        rows_scanned = rows_scanned + v_scanned,
+        rows_changed = rows_changed + v_changed,
+        rows_applied = rows_applied + v_applied,
+        status = CASE WHEN v_scanned = 0 THEN 'completed' ELSE 'running' END,
+        updated_at = clock_timestamp(),
+        completed_at = CASE WHEN v_scanned = 0 THEN clock_timestamp() END
+    WHERE merge_id = p_merge_id AND table_name = p_table_name;
+
+    RETURN v_scanned;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Run or resume a chunked data merge, committing after every chunk
+-- Must be called with CALL outside an explicit transaction block; after an
+-- interruption, calling it again continues from the last committed chunk.
+CREATE OR REPLACE PROCEDURE pggit.run_data_merge(
+    p_merge_id UUID
+) AS $$
+DECLARE
+    v_table RECORD;
+BEGIN
+    FOR v_table IN
+        SELECT table_name
+        FROM pggit.data_merge_progress
+        WHERE merge_id = p_merge_id
+        AND status IN ('pending', 'running')
+        ORDER BY table_name
+    LOOP
+        LOOP
+            EXIT WHEN pggit.merge_data_chunk(p_merge_id, v_table.table_name) = 0;
+            COMMIT;
+        END LOOP;
+        COMMIT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Merge data branches with conflict detection
+-- Runs the chunked merge to completion inside the caller's transaction; use
+-- start_data_merge and CALL pggit.run_data_merge to commit between chunks.
 CREATE OR REPLACE FUNCTION pggit.merge_data_branches(
     p_source TEXT,
     p_target TEXT,
@@ -447,38 +1127,38 @@ CREATE OR REPLACE FUNCTION pggit.merge_data_branches(
     tables_merged INT
 ) AS $$
 DECLARE
-    v_merge_id UUID := gen_random_uuid();
+    v_merge_id UUID;
     v_conflicts INT := 0;
     v_tables INT := 0;
     v_table RECORD;
 BEGIN
-    -- Find common tables between branches
+    v_merge_id := pggit.start_data_merge(p_source, p_target, p_conflict_resolution);
+
     FOR v_table IN
-        SELECT DISTINCT st.source_table
-        FROM pggit.branched_tables st
-        JOIN pggit.branched_tables tt 
-            ON st.source_table = tt.source_table
-        WHERE st.branch_name = p_source
-        AND tt.branch_name = p_target
+        SELECT p.table_name, p.status
+        FROM pggit.data_merge_progress p
+        WHERE p.merge_id = v_merge_id
+        ORDER BY p.table_name
     LOOP
-        -- Detect conflicts for this table
-        v_conflicts := v_conflicts + pggit.detect_data_conflicts(
-            v_merge_id, v_table.source_table, p_source, p_target
-        );
+        LOOP
+            EXIT WHEN pggit.merge_data_chunk(v_merge_id, v_table.table_name) = 0;
+        END LOOP;
         v_tables := v_tables + 1;
     END LOOP;
-    
-    -- Apply conflict resolution if no conflicts or auto-resolution requested
-    IF v_conflicts = 0 OR p_conflict_resolution != 'interactive' THEN
-        PERFORM pggit.apply_data_merge(v_merge_id, p_source, p_target, p_conflict_resolution);
-    END IF;
-    
+
+    SELECT COALESCE(SUM(p.rows_changed), 0)::INT
+    INTO v_conflicts
+    FROM pggit.data_merge_progress p
+    WHERE p.merge_id = v_merge_id;
+
     RETURN QUERY
     SELECT v_merge_id, v_conflicts > 0, v_conflicts, v_tables;
 END;
 $$ LANGUAGE plpgsql;
 
 -- Detect data conflicts between branches
+-- Walks the table in chunks and records differing rows as pending conflicts
+-- without changing the target.
 CREATE OR REPLACE FUNCTION pggit.detect_data_conflicts(
     p_merge_id UUID,
     p_table_name TEXT,
@@ -486,75 +1166,58 @@ CREATE OR REPLACE FUNCTION pggit.detect_data_conflicts(
     p_target_branch TEXT
 ) RETURNS INT AS $$
 DECLARE
-    v_conflicts INT := 0;
-    v_key_columns TEXT;
-    v_sql TEXT;
-    v_base_table TEXT;
+    v_base_info RECORD;
+    v_key_columns TEXT[];
+    v_progress RECORD;
 BEGIN
-    -- Get primary key columns from the base table (the original table, not branch copies or view)
-    -- Branch copies made with CREATE TABLE AS don't preserve PK constraints
-    v_base_table := 'pggit_base._pggit_main_' || p_table_name;
-    BEGIN
-        SELECT string_agg(a.attname, ', ' ORDER BY array_position(i.indkey, a.attnum))
-        INTO v_key_columns
-        FROM pg_index i
-        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-        WHERE i.indrelid = v_base_table::regclass
-        AND i.indisprimary;
-    EXCEPTION WHEN undefined_table THEN
-        -- If base table doesn't exist, try the original table name
-        SELECT string_agg(a.attname, ', ' ORDER BY array_position(i.indkey, a.attnum))
+    IF NOT EXISTS (
+        SELECT 1 FROM pggit.data_merge_progress
+        WHERE merge_id = p_merge_id AND table_name = p_table_name
+    ) THEN
+        SELECT * INTO v_base_info FROM pggit.get_base_table_info('public', p_table_name);
+
+        SELECT array_agg(a.attname::TEXT ORDER BY array_position(i.indkey, a.attnum))
         INTO v_key_columns
         FROM pg_index i
         JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-        WHERE i.indrelid = p_table_name::regclass
+        WHERE i.indrelid = format('%I.%I', v_base_info.base_schema, v_base_info.base_table)::regclass
         AND i.indisprimary;
-    END;
 
-    -- If no primary key found, skip conflict detection
-    IF v_key_columns IS NULL THEN
-        RAISE NOTICE 'No primary key found for %, skipping conflict detection', p_table_name;
-        RETURN 0;
+        -- If no primary key found, skip conflict detection
+        IF v_key_columns IS NULL THEN
+            RAISE NOTICE 'No primary key found for %, skipping conflict detection', p_table_name;
+            RETURN 0;
+        END IF;
+
+        INSERT INTO pggit.data_merge_progress (
+            merge_id, table_name, source_branch, target_branch,
+            source_relation, target_relation, key_columns,
+            conflict_resolution, status
+        ) VALUES (
+            p_merge_id, p_table_name, p_source_branch, p_target_branch,
+            pggit.data_branch_relation(p_source_branch, 'public', p_table_name),
+            pggit.data_branch_relation(p_target_branch, 'public', p_table_name),
+            v_key_columns, 'interactive', 'pending'
+        );
     END IF;
-    
-    -- Build conflict detection query
-    -- Note: Use %I for schema names to properly quote identifiers with special chars (like hyphens)
-    v_sql := format($SQL$
-        INSERT INTO pggit.data_conflicts (
-            merge_id, table_name, primary_key_value,
-            source_branch, target_branch,
-            source_data, target_data, conflict_type
-        )
-        SELECT
-            %L, %L, s.%I::TEXT,
-            %L, %L,
-            row_to_json(s.*), row_to_json(t.*),
-            CASE
-                WHEN s.* IS NULL THEN 'delete-update'
-                WHEN t.* IS NULL THEN 'update-delete'
-                ELSE 'update-update'
-            END
-        FROM %I.%I s
-        FULL OUTER JOIN %I.%I t
-            ON s.%I = t.%I
-        WHERE s.* IS DISTINCT FROM t.*
-        AND (s.* IS NOT NULL OR t.* IS NOT NULL)
-    $SQL$,
-        p_merge_id, p_table_name, v_key_columns,
-        p_source_branch, p_target_branch,
-        'pggit_branch_' || replace(p_source_branch, '/', '_'), p_table_name,
-        'pggit_branch_' || replace(p_target_branch, '/', '_'), p_table_name,
-        v_key_columns, v_key_columns
-    );
-    
-    EXECUTE v_sql;
-    GET DIAGNOSTICS v_conflicts = ROW_COUNT;
-    
-    RETURN v_conflicts;
+
+    LOOP
+        EXIT WHEN pggit.merge_data_chunk(p_merge_id, p_table_name) = 0;
+    END LOOP;
+
+    SELECT rows_changed INTO v_progress
+    FROM pggit.data_merge_progress
+    WHERE merge_id = p_merge_id AND table_name = p_table_name;
+
+    RETURN v_progress.rows_changed;
 END;
 $$ LANGUAGE plpgsql;
 
 -- Apply data merge
+-- Resolves the merge's pending conflicts with the given strategy and applies
+-- the rows logged in data_conflicts, matched on the table's primary key.
+-- Conflicts logged without a progress row take the key from the base table;
+-- a table without a primary key is an error rather than matched on a guess.
 CREATE OR REPLACE FUNCTION pggit.apply_data_merge(
     p_merge_id UUID,
     p_source_branch TEXT,
@@ -562,74 +1225,107 @@ CREATE OR REPLACE FUNCTION pggit.apply_data_merge(
     p_resolution_strategy TEXT
 ) RETURNS VOID AS $$
 DECLARE
-    v_conflict RECORD;
-    v_source_schema TEXT := 'pggit_branch_' || replace(p_source_branch, '/', '_');
-    v_target_schema TEXT := 'pggit_branch_' || replace(p_target_branch, '/', '_');
+    v_table RECORD;
+    v_cols TEXT;
+    v_r_cols TEXT;
+    v_match TEXT;
+    v_applied INT;
+    v_base_info RECORD;
+    v_key_columns TEXT[];
 BEGIN
-    -- Update conflict resolutions based on strategy
-    UPDATE pggit.data_conflicts
-    SET resolution = CASE p_resolution_strategy
-        WHEN 'source-wins' THEN 'source'
-        WHEN 'target-wins' THEN 'target'
-        WHEN 'theirs' THEN 'source'
-        WHEN 'ours' THEN 'target'
-        WHEN 'newer' THEN
-            CASE WHEN (source_data->>'_pggit_timestamp')::timestamp >
-                     (target_data->>'_pggit_timestamp')::timestamp
-            THEN 'source' ELSE 'target' END
-        ELSE 'manual'
-    END,
-    resolved_by = CURRENT_USER,
-    resolved_at = CURRENT_TIMESTAMP
-    WHERE merge_id = p_merge_id
-    AND resolution = 'pending';
-
-    -- Apply source-wins resolutions
-    FOR v_conflict IN
-        SELECT DISTINCT table_name
-        FROM pggit.data_conflicts
-        WHERE merge_id = p_merge_id
-        AND resolution = 'source'
+    FOR v_table IN
+        SELECT DISTINCT c.table_name,
+            COALESCE(p.target_relation,
+                pggit.data_branch_relation(p_target_branch, 'public', c.table_name)) AS target_relation,
+            p.key_columns
+        FROM pggit.data_conflicts c
+        LEFT JOIN pggit.data_merge_progress p
+            ON p.merge_id = c.merge_id AND p.table_name = c.table_name
+        WHERE c.merge_id = p_merge_id
+        AND c.resolution = 'pending'
     LOOP
-        -- Insert or update rows from source into target
-        BEGIN
-            EXECUTE format(
-                'INSERT INTO %I.%I SELECT s.* FROM %I.%I s ' ||
-                'ON CONFLICT (id) DO UPDATE SET (LIKE EXCLUDED) = (SELECT (LIKE EXCLUDED))',
-                v_target_schema, v_conflict.table_name,
-                v_source_schema, v_conflict.table_name
-            );
-        EXCEPTION WHEN OTHERS THEN
-            -- If ON CONFLICT not supported, do simple insert
-            EXECUTE format(
-                'INSERT INTO %I.%I SELECT s.* FROM %I.%I s ' ||
-                'WHERE NOT EXISTS (SELECT 1 FROM %I.%I t WHERE t.id = s.id)',
-                v_target_schema, v_conflict.table_name,
-                v_source_schema, v_conflict.table_name,
-                v_target_schema, v_conflict.table_name
-            );
-        END;
-    END LOOP;
+        v_key_columns := v_table.key_columns;
 
-    -- For target-wins, just insert new rows from source (don't update existing)
-    FOR v_conflict IN
-        SELECT DISTINCT table_name
-        FROM pggit.data_conflicts
-        WHERE merge_id = p_merge_id
-        AND resolution = 'target'
-    LOOP
-        BEGIN
-            EXECUTE format(
-                'INSERT INTO %I.%I SELECT s.* FROM %I.%I s ' ||
-                'WHERE NOT EXISTS (SELECT 1 FROM %I.%I t WHERE t.id = s.id)',
-                v_target_schema, v_conflict.table_name,
-                v_source_schema, v_conflict.table_name,
-                v_target_schema, v_conflict.table_name
-            );
-        EXCEPTION WHEN OTHERS THEN
-            -- Skip if insert fails
-            NULL;
-        END;
+        IF v_key_columns IS NULL THEN
+            SELECT * INTO v_base_info FROM pggit.get_base_table_info('public', v_table.table_name);
+
+            SELECT array_agg(a.attname::TEXT ORDER BY array_position(i.indkey, a.attnum))
+            INTO v_key_columns
+            FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            WHERE i.indrelid = format('%I.%I', v_base_info.base_schema, v_base_info.base_table)::regclass
+            AND i.indisprimary;
+        END IF;
+
+        IF v_key_columns IS NULL THEN
+            RAISE EXCEPTION 'Cannot apply merge % to %: table has no primary key to match rows on',
+                p_merge_id, v_table.table_name;
+        END IF;
+
+        SELECT
+            string_agg(quote_ident(attname), ', ' ORDER BY attnum),
+            string_agg('r.' || quote_ident(attname), ', ' ORDER BY attnum)
+        INTO v_cols, v_r_cols
+        FROM pg_attribute
+        WHERE attrelid = v_table.target_relation::regclass
+        AND attnum > 0
+        AND NOT attisdropped;
+
+        SELECT format('(%s) = (%s)',
+            string_agg('x.' || quote_ident(col), ', '),
+            string_agg('r.' || quote_ident(col), ', '))
+        INTO v_match
+        FROM unnest(v_key_columns) AS col;
+
+        EXECUTE format($SQL$
+            WITH resolved AS (
+                UPDATE pggit.data_conflicts
+                SET resolution = CASE $3
+                    WHEN 'source-wins' THEN 'source'
+                    WHEN 'target-wins' THEN 'target'
+                    WHEN 'theirs' THEN 'source'
+                    WHEN 'ours' THEN 'target'
+                    WHEN 'newer' THEN
+                        CASE WHEN (source_data->>'_pggit_timestamp')::timestamp >
+                                  (target_data->>'_pggit_timestamp')::timestamp
+                        THEN 'source' ELSE 'target' END
+                    ELSE 'manual'
+                END,
+                resolved_by = CURRENT_USER,
+                resolved_at = CURRENT_TIMESTAMP
+                WHERE merge_id = $1
+                AND table_name = $2
+                AND resolution = 'pending'
+                RETURNING resolution, source_data, target_data
+            ),
+            updated AS (
+                UPDATE %1$s x SET (%2$s) = ROW(%3$s)
+                FROM resolved d
+                CROSS JOIN LATERAL jsonb_populate_record(NULL::%1$s, d.source_data) r
+                WHERE d.resolution = 'source'
+                AND d.source_data IS NOT NULL AND d.target_data IS NOT NULL
+                AND %4$s
+                RETURNING 1
+            ),
+            inserted AS (
+                INSERT INTO %1$s (%2$s)
+                SELECT %3$s
+                FROM resolved d
+                CROSS JOIN LATERAL jsonb_populate_record(NULL::%1$s, d.source_data) r
+                WHERE d.resolution IN ('source', 'target')
+                AND d.source_data IS NOT NULL AND d.target_data IS NULL
+                RETURNING 1
+            )
+            SELECT ((SELECT COUNT(*) FROM updated) + (SELECT COUNT(*) FROM inserted))::INT
+        $SQL$, v_table.target_relation, v_cols, v_r_cols, v_match)
+        INTO v_applied
+        USING p_merge_id, v_table.table_name, p_resolution_strategy;
+
+        UPDATE pggit.data_merge_progress
+        SET rows_applied = rows_applied + v_applied,
+            conflict_resolution = p_resolution_strategy,
+            updated_at = clock_timestamp()
+        WHERE merge_id = p_merge_id AND table_name = v_table.table_name;
     END LOOP;
 
     -- Log merge completion
@@ -750,15 +1446,16 @@ DECLARE
 BEGIN
     -- Calculate total size and rows for branch
     -- Use defensive approach: only sum sizes if tables exist
+    -- Delta branches are measured by their delta table, not the overlay view
     FOR v_row IN
-        SELECT branch_schema, branch_table
+        SELECT branch_schema, COALESCE(storage_table, branch_table) AS storage_table
         FROM pggit.branched_tables
         WHERE branch_name = p_branch_name
     LOOP
         BEGIN
             -- Try to get size of this table
             v_total_size := v_total_size + COALESCE(
-                pg_total_relation_size(format('%I.%I', v_row.branch_schema, v_row.branch_table)::regclass),
+                pg_total_relation_size(format('%I.%I', v_row.branch_schema, v_row.storage_table)::regclass),
                 0
             );
         EXCEPTION WHEN OTHERS THEN
@@ -774,7 +1471,7 @@ BEGIN
     FROM pggit.branched_tables bt
     LEFT JOIN pg_stat_user_tables st
         ON st.schemaname = bt.branch_schema
-        AND st.relname = bt.branch_table
+        AND st.relname = COALESCE(bt.storage_table, bt.branch_table)
     WHERE bt.branch_name = p_branch_name;
 
     -- Update stats
@@ -800,7 +1497,8 @@ BEGIN
     -- For PostgreSQL 15+, apply column-level compression
     IF current_setting('server_version_num')::int >= 150000 THEN
         FOR v_table IN
-            SELECT source_table FROM pggit.branched_tables
+            SELECT COALESCE(storage_table, source_table) AS source_table
+            FROM pggit.branched_tables
             WHERE branch_name = p_branch
         LOOP
             FOR v_column IN
@@ -839,9 +1537,11 @@ DECLARE
     v_dup_count INT := 0;
 BEGIN
     -- Identify and mark duplicate rows within each table
+    -- Delta tables are keyed by primary key and cannot hold duplicates
     FOR v_table IN
         SELECT source_table FROM pggit.branched_tables
         WHERE branch_name = p_branch
+        AND storage_mode IS DISTINCT FROM 'delta'
     LOOP
         -- Find duplicate rows (same content)
         EXECUTE format(
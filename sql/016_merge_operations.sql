@@ -203,6 +203,7 @@ DECLARE
     v_conflict_count integer;
     v_conflict_obj record;
     v_conflict_array jsonb[] := '{}';
+    v_started_at timestamptz := clock_timestamp();
 BEGIN
     -- Validate branches exist
     IF NOT EXISTS (SELECT 1 FROM pggit.branches WHERE name = p_source_branch) THEN
@@ -283,6 +284,9 @@ BEGIN
     RAISE NOTICE 'merge: Merging %s into %s (conflicts: %)',
         p_source_branch, v_target_branch, v_conflict_count;
 
+    PERFORM pggit.observe_metric('pggit_merge_duration_seconds',
+        extract(epoch FROM (clock_timestamp() - v_started_at)));
+
     RETURN v_result;
 END;
 $$ LANGUAGE plpgsql;
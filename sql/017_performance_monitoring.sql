@@ -60,6 +60,35 @@ CREATE TABLE IF NOT EXISTS pggit.performance_alerts (
     acknowledged_at TIMESTAMP
 );
 
+-- Counters are attributed to metrics after the fact: query_id ties a metric
+-- to its top-level statement in pg_stat_statements, counters_collected_at
+-- marks metrics whose statement counters have been filled in, and
+-- alerts_evaluated marks metrics seen by the periodic alert evaluation.
+-- The statement_* columns are statement-level: per-call averages of the
+-- top-level statement over statement_calls calls, shared by every metric
+-- recorded inside it. cpu_time_ms, io_time_ms, cache_hits and cache_misses
+-- stay reserved for per-operation measurements and are not filled from them.
+ALTER TABLE pggit.performance_metrics
+    ADD COLUMN IF NOT EXISTS query_id BIGINT,
+    ADD COLUMN IF NOT EXISTS counters_collected_at TIMESTAMP(6),
+    ADD COLUMN IF NOT EXISTS alerts_evaluated BOOLEAN NOT NULL DEFAULT false,
+    ADD COLUMN IF NOT EXISTS statement_calls BIGINT,
+    ADD COLUMN IF NOT EXISTS statement_cpu_time_ms DECIMAL(12,3),
+    ADD COLUMN IF NOT EXISTS statement_io_time_ms DECIMAL(12,3),
+    ADD COLUMN IF NOT EXISTS statement_blks_hit BIGINT,
+    ADD COLUMN IF NOT EXISTS statement_blks_read BIGINT;
+
+-- Last pg_stat_statements totals seen per top-level statement
+CREATE TABLE IF NOT EXISTS pggit.performance_counter_snapshots (
+    query_id BIGINT PRIMARY KEY,
+    calls BIGINT NOT NULL,
+    exec_time_ms DOUBLE PRECISION NOT NULL,
+    io_time_ms DOUBLE PRECISION NOT NULL,
+    shared_blks_hit BIGINT NOT NULL,
+    shared_blks_read BIGINT NOT NULL,
+    captured_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP
+);
+
 -- =====================================================
 -- Performance Monitoring Functions
 -- =====================================================
@@ -118,6 +147,17 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Record performance metric
+--
+-- Only cheap work happens here, since metrics are recorded inside merge and
+-- branch operations:
+-- - duration from the caller's start time
+-- - the top-level query id of this backend, so that
+--   pggit.collect_performance_counters() can later attach the statement's
+--   buffer and timing counters from pg_stat_statements; the first metric of
+--   a statement snapshots its totals, which do not yet include this call
+-- - backend memory, sampled for a fraction of calls set by
+--   pggit.metrics_memory_sample_rate (default 0.01, 0 disables, 1 always)
+-- Alerts are evaluated in batches by pggit.evaluate_performance_alerts().
 CREATE OR REPLACE FUNCTION pggit.record_performance_metric(
     p_operation_type TEXT,
     p_operation_name TEXT,
@@ -128,18 +168,41 @@ CREATE OR REPLACE FUNCTION pggit.record_performance_metric(
 DECLARE
     v_metric_id UUID;
     v_duration_ms DECIMAL(10,3);
-    v_cpu_time_ms DECIMAL(10,3);
     v_memory_mb DECIMAL(10,2);
+    v_sample_rate NUMERIC;
+    v_query_id BIGINT;
 BEGIN
     -- Calculate duration
     v_duration_ms := EXTRACT(EPOCH FROM (clock_timestamp() - p_start_time)) * 1000;
-    
-    -- Get CPU time (simplified - would use pg_stat_statements in production)
-    v_cpu_time_ms := v_duration_ms * 0.8; -- Assume 80% CPU
-    
-    -- Estimate memory usage
-    v_memory_mb := (pg_backend_memory_contexts()).total_bytes / 1024.0 / 1024.0;
-    
+
+    -- Sample memory usage; summing every memory context is too costly per call
+    v_sample_rate := COALESCE(
+        NULLIF(current_setting('pggit.metrics_memory_sample_rate', true), '')::NUMERIC,
+        0.01
+    );
+    IF v_sample_rate > 0 AND random() < v_sample_rate THEN
+        SELECT SUM(total_bytes) / 1024.0 / 1024.0 INTO v_memory_mb
+        FROM pg_backend_memory_contexts;
+    END IF;
+
+    -- Top-level statement of this backend (NULL when compute_query_id is off)
+    SELECT NULLIF(a.query_id, 0) INTO v_query_id
+    FROM pg_stat_get_activity(pg_backend_pid()) a;
+
+    -- Baseline for the statement's first delta, taken once per statement
+    IF v_query_id IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM pggit.performance_counter_snapshots WHERE query_id = v_query_id
+    ) THEN
+        INSERT INTO pggit.performance_counter_snapshots (
+            query_id, calls, exec_time_ms, io_time_ms,
+            shared_blks_hit, shared_blks_read, captured_at
+        )
+        SELECT query_id, calls, exec_time_ms, io_time_ms,
+               shared_blks_hit, shared_blks_read, clock_timestamp()
+        FROM pggit.statement_counter_totals(ARRAY[v_query_id])
+        ON CONFLICT (query_id) DO NOTHING;
+    END IF;
+
     -- Insert metric
     INSERT INTO pggit.performance_metrics (
         operation_type,
@@ -147,9 +210,9 @@ BEGIN
         started_at,
         completed_at,
         duration_ms,
-        cpu_time_ms,
         rows_affected,
         memory_used_mb,
+        query_id,
         context
     ) VALUES (
         p_operation_type,
@@ -157,19 +220,220 @@ BEGIN
         p_start_time,
         clock_timestamp(),
         v_duration_ms,
-        v_cpu_time_ms,
         p_rows_affected,
         v_memory_mb,
+        v_query_id,
         p_context
     ) RETURNING metric_id INTO v_metric_id;
-    
-    -- Check for performance alerts
-    PERFORM pggit.check_performance_alerts(v_metric_id);
-    
+
     RETURN v_metric_id;
 END;
 $$ LANGUAGE plpgsql;
 
+-- pg_stat_statements totals of top-level statements in this database
+-- Empty without pg_stat_statements.
+CREATE OR REPLACE FUNCTION pggit.statement_counter_totals(
+    p_query_ids BIGINT[]
+) RETURNS TABLE (
+    query_id BIGINT,
+    calls BIGINT,
+    exec_time_ms DOUBLE PRECISION,
+    io_time_ms DOUBLE PRECISION,
+    shared_blks_hit BIGINT,
+    shared_blks_read BIGINT
+) AS $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements') THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        s.queryid,
+        SUM(s.calls)::BIGINT,
+        SUM(s.total_exec_time),
+        -- Block I/O timing columns were renamed in PostgreSQL 17
+        SUM(COALESCE((to_jsonb(s)->>'shared_blk_read_time')::FLOAT8,
+                     (to_jsonb(s)->>'blk_read_time')::FLOAT8, 0)
+          + COALESCE((to_jsonb(s)->>'shared_blk_write_time')::FLOAT8,
+                     (to_jsonb(s)->>'blk_write_time')::FLOAT8, 0)),
+        SUM(s.shared_blks_hit)::BIGINT,
+        SUM(s.shared_blks_read)::BIGINT
+    FROM pg_stat_statements s
+    WHERE s.toplevel
+    AND s.dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+    AND s.queryid = ANY(p_query_ids)
+    GROUP BY s.queryid;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Attach statement-level pg_stat_statements counters to recorded metrics
+--
+-- pg_stat_statements only counts a statement once it finishes, so counters
+-- cannot be read from inside the operation. Instead, totals for the
+-- statements behind pending metrics are compared with the previous snapshot,
+-- which for a statement's first metrics is the baseline that
+-- pggit.record_performance_metric() took. Each metric receives the per-call
+-- average of the difference in its statement_* columns: shared buffer hits
+-- and reads, block I/O time, and execution time not spent in block I/O as
+-- CPU time. These describe the whole statement, averaged over every call
+-- since the snapshot, not the operation that recorded the metric. Metrics
+-- whose statement has not completed a call since the snapshot stay pending;
+-- metrics without a baseline (recorded before pg_stat_statements was
+-- installed) are marked collected with no counters rather than charged with
+-- all-time totals. Returns the number of metrics filled.
+CREATE OR REPLACE FUNCTION pggit.collect_performance_counters()
+RETURNS INTEGER AS $$
+DECLARE
+    v_filled INTEGER;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements') THEN
+        RETURN 0;
+    END IF;
+
+    WITH totals AS (
+        SELECT * FROM pggit.statement_counter_totals(ARRAY(
+            SELECT DISTINCT m.query_id FROM pggit.performance_metrics m
+            WHERE m.query_id IS NOT NULL AND m.counters_collected_at IS NULL
+        ))
+    ),
+    deltas AS (
+        -- Totals below the snapshot mean the statistics were reset
+        SELECT
+            t.*,
+            p.query_id IS NOT NULL AS has_baseline,
+            t.calls - CASE WHEN t.calls >= p.calls THEN p.calls ELSE 0 END AS d_calls,
+            t.exec_time_ms - CASE WHEN t.calls >= p.calls THEN p.exec_time_ms ELSE 0 END AS d_exec_ms,
+            t.io_time_ms - CASE WHEN t.calls >= p.calls THEN p.io_time_ms ELSE 0 END AS d_io_ms,
+            t.shared_blks_hit - CASE WHEN t.calls >= p.calls THEN p.shared_blks_hit ELSE 0 END AS d_hits,
+            t.shared_blks_read - CASE WHEN t.calls >= p.calls THEN p.shared_blks_read ELSE 0 END AS d_reads
+        FROM totals t
+        LEFT JOIN pggit.performance_counter_snapshots p ON p.query_id = t.query_id
+    ),
+    filled AS (
+        UPDATE pggit.performance_metrics m
+        SET statement_calls = CASE WHEN d.has_baseline THEN d.d_calls END,
+            statement_cpu_time_ms = CASE WHEN d.has_baseline
+                THEN GREATEST(d.d_exec_ms - d.d_io_ms, 0) / d.d_calls END,
+            statement_io_time_ms = CASE WHEN d.has_baseline THEN d.d_io_ms / d.d_calls END,
+            statement_blks_hit = CASE WHEN d.has_baseline
+                THEN round(d.d_hits::NUMERIC / d.d_calls) END,
+            statement_blks_read = CASE WHEN d.has_baseline
+                THEN round(d.d_reads::NUMERIC / d.d_calls) END,
+            counters_collected_at = clock_timestamp()
+        FROM deltas d
+        WHERE m.query_id = d.query_id
+        AND m.counters_collected_at IS NULL
+        AND (d.d_calls > 0 OR NOT d.has_baseline)
+        RETURNING d.has_baseline
+    ),
+    saved AS (
+        INSERT INTO pggit.performance_counter_snapshots (
+            query_id, calls, exec_time_ms, io_time_ms,
+            shared_blks_hit, shared_blks_read, captured_at
+        )
+        SELECT query_id, calls, exec_time_ms, io_time_ms,
+               shared_blks_hit, shared_blks_read, clock_timestamp()
+        FROM deltas
+        WHERE d_calls > 0 OR NOT has_baseline
+        ON CONFLICT (query_id) DO UPDATE SET
+            calls = EXCLUDED.calls,
+            exec_time_ms = EXCLUDED.exec_time_ms,
+            io_time_ms = EXCLUDED.io_time_ms,
+            shared_blks_hit = EXCLUDED.shared_blks_hit,
+            shared_blks_read = EXCLUDED.shared_blks_read,
+            captured_at = EXCLUDED.captured_at
+    )
+    SELECT COUNT(*) FILTER (WHERE has_baseline) INTO v_filled FROM filled;
+
+    RETURN v_filled;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Evaluate alerts for recorded metrics in batches
+--
+-- Applies the same rules as pggit.check_performance_alerts() to up to
+-- p_batch_size metrics not yet evaluated, oldest first. Concurrent runs skip
+-- each other's rows. Returns the number of metrics evaluated.
+CREATE OR REPLACE FUNCTION pggit.evaluate_performance_alerts(
+    p_batch_size INTEGER DEFAULT 10000
+) RETURNS INTEGER AS $$
+DECLARE
+    v_evaluated INTEGER;
+BEGIN
+    WITH batch AS (
+        UPDATE pggit.performance_metrics m
+        SET alerts_evaluated = true
+        WHERE m.metric_id IN (
+            SELECT metric_id FROM pggit.performance_metrics
+            WHERE NOT alerts_evaluated
+            ORDER BY started_at
+            LIMIT p_batch_size
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING m.metric_id, m.operation_type, m.operation_name,
+                  m.duration_ms, m.memory_used_mb
+    ),
+    slow AS (
+        INSERT INTO pggit.performance_alerts (
+            metric_id,
+            alert_type,
+            severity,
+            threshold_value,
+            actual_value,
+            alert_message
+        )
+        SELECT
+            b.metric_id,
+            'slow_operation',
+            CASE
+                WHEN b.duration_ms > bl.percentile_99 * 3 THEN 'critical'
+                WHEN b.duration_ms > bl.percentile_99 * 2 THEN 'warning'
+                ELSE 'info'
+            END,
+            bl.percentile_95,
+            b.duration_ms,
+            format('Operation %s took %sms (baseline p95: %sms)',
+                b.operation_name, b.duration_ms, bl.percentile_95)
+        FROM batch b
+        JOIN LATERAL (
+            SELECT percentile_95, percentile_99
+            FROM pggit.performance_baselines pb
+            WHERE pb.operation_type = b.operation_type
+            ORDER BY pb.calculated_at DESC
+            LIMIT 1
+        ) bl ON true
+        WHERE b.duration_ms > bl.percentile_95 * 2
+    ),
+    memory AS (
+        INSERT INTO pggit.performance_alerts (
+            metric_id,
+            alert_type,
+            severity,
+            threshold_value,
+            actual_value,
+            alert_message
+        )
+        SELECT
+            b.metric_id,
+            'high_memory',
+            CASE
+                WHEN b.memory_used_mb > 500 THEN 'critical'
+                WHEN b.memory_used_mb > 200 THEN 'warning'
+                ELSE 'info'
+            END,
+            100,
+            b.memory_used_mb,
+            format('High memory usage: %sMB', b.memory_used_mb)
+        FROM batch b
+        WHERE b.memory_used_mb > 100
+    )
+    SELECT COUNT(*) INTO v_evaluated FROM batch;
+
+    RETURN v_evaluated;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Check for performance alerts
 CREATE OR REPLACE FUNCTION pggit.check_performance_alerts(
     p_metric_id UUID
@@ -239,6 +503,10 @@ BEGIN
             format('High memory usage: %sMB', v_metric.memory_used_mb)
         );
     END IF;
+
+    UPDATE pggit.performance_metrics
+    SET alerts_evaluated = true
+    WHERE metric_id = p_metric_id;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -476,6 +744,14 @@ CREATE INDEX IF NOT EXISTS idx_perf_metrics_duration
 ON pggit.performance_metrics(duration_ms DESC) 
 WHERE duration_ms > 100;
 
+CREATE INDEX IF NOT EXISTS idx_perf_metrics_unevaluated
+ON pggit.performance_metrics(started_at)
+WHERE NOT alerts_evaluated;
+
+CREATE INDEX IF NOT EXISTS idx_perf_metrics_pending_counters
+ON pggit.performance_metrics(query_id)
+WHERE query_id IS NOT NULL AND counters_collected_at IS NULL;
+
 CREATE INDEX IF NOT EXISTS idx_traces_parent 
 ON pggit.operation_traces(parent_trace_id);
 
@@ -543,6 +819,11 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Counter collection and alert evaluation run from pggit.run_maintenance()
+INSERT INTO pggit.maintenance_jobs (job_name, run_interval, next_run)
+VALUES ('performance_alerts', '1 minute', CURRENT_TIMESTAMP)
+ON CONFLICT (job_name) DO NOTHING;
+
 -- Grant permissions
 GRANT SELECT, INSERT ON ALL TABLES IN SCHEMA pggit TO PUBLIC;
 GRANT EXECUTE ON ALL FUNCTIONS IN SCHEMA pggit TO PUBLIC;
\ No newline at end of file
@@ -69,6 +69,17 @@ CREATE TABLE IF NOT EXISTS pggit.block_references (
     PRIMARY KEY (object_id, block_sequence)
 );
 
+-- Block data is compressed in place by TOAST: try compression on any row
+-- over 256 bytes, keep it inline, and prefer lz4 where the server has it
+ALTER TABLE pggit.storage_blocks SET (toast_tuple_target = 256);
+ALTER TABLE pggit.storage_blocks ALTER COLUMN compressed_data SET STORAGE MAIN;
+DO $$
+BEGIN
+    ALTER TABLE pggit.storage_blocks ALTER COLUMN compressed_data SET COMPRESSION lz4;
+EXCEPTION WHEN OTHERS THEN
+    NULL;  -- Server built without lz4; pglz stays in effect
+END $$;
+
 -- Access patterns for smart prefetching
 CREATE TABLE IF NOT EXISTS pggit.access_patterns (
     pattern_id SERIAL PRIMARY KEY,
@@ -91,6 +102,26 @@ CREATE TABLE IF NOT EXISTS pggit.storage_tier_stats (
     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Branch tables offloaded to cold tier files
+-- While is_cold, the table is empty and its rows are in file_path.
+CREATE TABLE IF NOT EXISTS pggit.cold_branch_tables (
+    table_schema TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    branch_name TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    compression TEXT NOT NULL,
+    row_count BIGINT NOT NULL,
+    heap_bytes BIGINT NOT NULL,
+    file_bytes BIGINT,
+    is_cold BOOLEAN NOT NULL DEFAULT true,
+    offloaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    rehydrated_at TIMESTAMP,
+    retrieval_ms NUMERIC(10,2),
+    -- Delta storage only: the branch's overlay view, replaced while cold
+    overlay_definition TEXT,
+    PRIMARY KEY (table_schema, table_name)
+);
+
 -- =====================================================
 -- Core Storage Functions
 -- =====================================================
@@ -143,7 +174,433 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- =====================================================
+-- Block Store
+-- =====================================================
+
+-- Split content into content-defined chunks
+-- Boundaries come from a gear rolling hash (as in FastCDC): a chunk ends
+-- where the hash of the last 32 bytes matches a mask, so inserting or
+-- deleting bytes only moves the boundaries around the edit and every other
+-- chunk keeps its hash. A stricter mask below p_avg_size and a looser one
+-- above it keep chunk sizes close to the average.
+CREATE OR REPLACE FUNCTION pggit.chunk_content(
+    p_data BYTEA,
+    p_min_size INT DEFAULT 2048,
+    p_avg_size INT DEFAULT 8192,
+    p_max_size INT DEFAULT 65536
+) RETURNS TABLE (
+    chunk_seq INT,
+    chunk_offset INT,
+    chunk_length INT
+) AS $$
+DECLARE
+    -- Work on a plain copy; get_byte() on a compressed value decompresses it on every call
+    v_data BYTEA := p_data || ''::BYTEA;
+    v_length INT := length(p_data);
+    v_bits INT := round(log(2, p_avg_size))::INT;
+    v_mask_small BIGINT;
+    v_mask_large BIGINT;
+    v_gear BIGINT[];
+    v_hash BIGINT;
+    v_start INT := 0;
+    v_end INT;
+    v_pos INT;
+BEGIN
+    IF p_data IS NULL THEN
+        RETURN;
+    END IF;
+
+    -- Masks select the top bits of the 32-bit hash, which depend on the last 32 bytes
+    v_mask_small := ((1::BIGINT << (v_bits + 2)) - 1) << (32 - (v_bits + 2));
+    v_mask_large := ((1::BIGINT << (v_bits - 2)) - 1) << (32 - (v_bits - 2));
+
+    SELECT array_agg(('x' || substr(md5('pggit-gear-' || i), 1, 8))::BIT(32)::BIGINT ORDER BY i)
+    INTO v_gear
+    FROM generate_series(0, 255) i;
+
+    chunk_seq := 0;
+    WHILE v_start < v_length LOOP
+        v_end := LEAST(v_start + p_max_size, v_length);
+        v_pos := LEAST(v_start + p_min_size, v_end);  -- No boundary inside the minimum size
+        v_hash := 0;
+
+        WHILE v_pos < v_end LOOP
+            v_hash := ((v_hash << 1) + v_gear[get_byte(v_data, v_pos) + 1]) & 4294967295;
+            v_pos := v_pos + 1;
+
+            EXIT WHEN v_hash & CASE
+                WHEN v_pos - v_start < p_avg_size THEN v_mask_small
+                ELSE v_mask_large
+            END = 0;
+        END LOOP;
+
+        chunk_offset := v_start;
+        chunk_length := v_pos - v_start;
+        RETURN NEXT;
+
+        chunk_seq := chunk_seq + 1;
+        v_start := v_pos;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+COMMENT ON FUNCTION pggit.chunk_content IS 'Split content into content-defined chunks using a gear rolling hash';
+
+-- Look up or register a storage object
+CREATE OR REPLACE FUNCTION pggit.prepare_storage_object(
+    p_object_type TEXT,
+    p_schema_name TEXT,
+    p_object_name TEXT,
+    p_tier TEXT DEFAULT 'HOT'
+) RETURNS UUID AS $$
+DECLARE
+    v_object_id UUID;
+BEGIN
+    SELECT object_id INTO v_object_id
+    FROM pggit.storage_objects
+    WHERE object_type = p_object_type
+      AND schema_name IS NOT DISTINCT FROM p_schema_name
+      AND object_name = p_object_name
+    FOR UPDATE;
+
+    IF v_object_id IS NULL THEN
+        INSERT INTO pggit.storage_objects (object_type, schema_name, object_name, current_tier)
+        VALUES (p_object_type, p_schema_name, p_object_name, p_tier)
+        RETURNING object_id INTO v_object_id;
+    END IF;
+
+    RETURN v_object_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Add one chunk to an object's block list
+-- Blocks are addressed by the SHA-256 of their content. A new block is
+-- stored with its data; a known block only gains a reference. Returns the
+-- stored (compressed) bytes the chunk added, 0 when it was deduplicated.
+CREATE OR REPLACE FUNCTION pggit.store_block(
+    p_object_id UUID,
+    p_sequence INT,
+    p_data BYTEA,
+    p_tier TEXT DEFAULT 'HOT'
+) RETURNS BIGINT AS $$
+DECLARE
+    v_block_hash TEXT := encode(sha256(p_data), 'hex');
+    v_inserted BOOLEAN;
+BEGIN
+    INSERT INTO pggit.storage_blocks AS b (
+        block_hash, block_size, compression_type, compressed_data, reference_count, tier
+    ) VALUES (
+        v_block_hash,
+        length(p_data),
+        (SELECT CASE a.attcompression WHEN 'l' THEN 'lz4' WHEN 'p' THEN 'pglz'
+                    ELSE current_setting('default_toast_compression') END
+         FROM pg_attribute a
+         WHERE a.attrelid = 'pggit.storage_blocks'::REGCLASS AND a.attname = 'compressed_data'),
+        p_data,
+        1,
+        p_tier
+    )
+    ON CONFLICT (block_hash) DO UPDATE
+    SET reference_count = b.reference_count + 1
+    RETURNING (xmax = 0) INTO v_inserted;
+
+    INSERT INTO pggit.block_references (object_id, block_sequence, block_hash)
+    VALUES (p_object_id, p_sequence, v_block_hash);
+
+    IF NOT v_inserted THEN
+        RETURN 0;
+    END IF;
+
+    RETURN (SELECT pg_column_size(compressed_data) FROM pggit.storage_blocks WHERE block_hash = v_block_hash);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach an object's block list, returning one block hash per reference
+-- Used before restoring an object: the old references are released with
+-- release_blocks() only after the new ones exist, so unchanged blocks are
+-- never deleted and stored again.
+CREATE OR REPLACE FUNCTION pggit.detach_object_blocks(
+    p_object_id UUID
+) RETURNS TEXT[] AS $$
+DECLARE
+    v_hashes TEXT[];
+BEGIN
+    WITH detached AS (
+        DELETE FROM pggit.block_references r
+        WHERE r.object_id = p_object_id
+        RETURNING r.block_hash
+    )
+    SELECT COALESCE(array_agg(block_hash), '{}') INTO v_hashes FROM detached;
+
+    RETURN v_hashes;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop one reference per hash, deleting blocks left without references
+CREATE OR REPLACE FUNCTION pggit.release_blocks(
+    p_block_hashes TEXT[]
+) RETURNS INT AS $$
+DECLARE
+    v_orphans TEXT[];
+BEGIN
+    WITH counts AS (
+        SELECT h AS block_hash, COUNT(*) AS refs
+        FROM unnest(p_block_hashes) h
+        GROUP BY h
+    ),
+    updated AS (
+        UPDATE pggit.storage_blocks b
+        SET reference_count = b.reference_count - c.refs
+        FROM counts c
+        WHERE b.block_hash = c.block_hash
+        RETURNING b.block_hash, b.reference_count
+    )
+    SELECT array_agg(u.block_hash) FILTER (WHERE u.reference_count <= 0)
+    INTO v_orphans
+    FROM updated u;
+
+    DELETE FROM pggit.storage_blocks
+    WHERE block_hash = ANY(v_orphans)
+      AND reference_count <= 0;
+
+    RETURN COALESCE(cardinality(v_orphans), 0);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop an object's block list, deleting blocks no other object references
+-- Returns the number of blocks deleted.
+CREATE OR REPLACE FUNCTION pggit.release_object_blocks(
+    p_object_id UUID
+) RETURNS INT AS $$
+BEGIN
+    RETURN pggit.release_blocks(pggit.detach_object_blocks(p_object_id));
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION pggit.release_object_blocks IS 'Remove an object from the block store, keeping blocks other objects share';
+
+-- Record the sizes of an object after its blocks were stored
+CREATE OR REPLACE FUNCTION pggit.update_storage_object_sizes(
+    p_object_id UUID,
+    p_original_size BIGINT,
+    p_new_bytes BIGINT
+) RETURNS VOID AS $$
+BEGIN
+    UPDATE pggit.storage_objects o
+    SET original_size_bytes = p_original_size,
+        deduplicated_size_bytes = p_new_bytes,
+        block_count = (
+            SELECT COUNT(*) FROM pggit.block_references r WHERE r.object_id = p_object_id
+        ),
+        compressed_size_bytes = (
+            SELECT COALESCE(SUM(pg_column_size(b.compressed_data)), 0)
+            FROM pggit.storage_blocks b
+            WHERE b.block_hash IN (
+                SELECT r.block_hash FROM pggit.block_references r WHERE r.object_id = p_object_id
+            )
+        )
+    WHERE o.object_id = p_object_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Store content as deduplicated blocks
+CREATE OR REPLACE FUNCTION pggit.store_object_blocks(
+    p_object_type TEXT,
+    p_schema_name TEXT,
+    p_object_name TEXT,
+    p_data BYTEA,
+    p_tier TEXT DEFAULT 'HOT',
+    p_avg_chunk_size INT DEFAULT 8192
+) RETURNS UUID AS $$
+DECLARE
+    v_object_id UUID;
+    v_previous TEXT[];
+    v_chunk RECORD;
+    v_new_bytes BIGINT := 0;
+BEGIN
+    v_object_id := pggit.prepare_storage_object(p_object_type, p_schema_name, p_object_name, p_tier);
+    v_previous := pggit.detach_object_blocks(v_object_id);
+
+    FOR v_chunk IN
+        SELECT * FROM pggit.chunk_content(p_data, p_avg_chunk_size / 4, p_avg_chunk_size, p_avg_chunk_size * 8)
+    LOOP
+        v_new_bytes := v_new_bytes + pggit.store_block(
+            v_object_id,
+            v_chunk.chunk_seq,
+            substring(p_data FROM v_chunk.chunk_offset + 1 FOR v_chunk.chunk_length),
+            p_tier
+        );
+    END LOOP;
+
+    PERFORM pggit.release_blocks(v_previous);
+    PERFORM pggit.update_storage_object_sizes(v_object_id, COALESCE(length(p_data), 0), v_new_bytes);
+
+    RETURN v_object_id;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION pggit.store_object_blocks IS 'Chunk content and store it as deduplicated, compressed blocks';
+
+-- Store a blob definition as blocks
+CREATE OR REPLACE FUNCTION pggit.store_blob_blocks(
+    p_blob_hash TEXT,
+    p_tier TEXT DEFAULT 'HOT'
+) RETURNS UUID AS $$
+DECLARE
+    v_blob RECORD;
+BEGIN
+    SELECT object_schema, object_definition INTO v_blob
+    FROM pggit.blobs
+    WHERE blob_hash = p_blob_hash;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Blob % not found', p_blob_hash;
+    END IF;
+
+    RETURN pggit.store_object_blocks(
+        'blob', v_blob.object_schema, p_blob_hash,
+        convert_to(v_blob.object_definition, 'UTF8'), p_tier
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION pggit.store_blob_blocks IS 'Store a blob definition as deduplicated blocks';
+
+-- Store a table dump as blocks
+-- The dump is one line of row text per row, in row text order, so snapshots
+-- of the same table on different branches produce mostly identical dumps.
+-- Chunks end after rows whose hash falls under a threshold proportional to
+-- the row length (about one boundary per p_avg_chunk_size bytes), so
+-- chunking needs one hash per row instead of one step per byte. Rows longer
+-- than the maximum chunk size are split with chunk_content().
+CREATE OR REPLACE FUNCTION pggit.store_table_blocks(
+    p_table REGCLASS,
+    p_object_type TEXT DEFAULT 'table',
+    p_object_name TEXT DEFAULT NULL,
+    p_tier TEXT DEFAULT 'COLD',
+    p_avg_chunk_size INT DEFAULT 8192
+) RETURNS UUID AS $$
+DECLARE
+    v_schema TEXT;
+    v_name TEXT;
+    v_object_id UUID;
+    v_previous TEXT[];
+    v_row RECORD;
+    v_chunk RECORD;
+    v_line BYTEA;
+    v_buffer BYTEA := ''::BYTEA;
+    v_sequence INT := 0;
+    v_total BIGINT := 0;
+    v_new_bytes BIGINT := 0;
+    v_max_size INT := p_avg_chunk_size * 8;
+BEGIN
+    SELECT n.nspname, c.relname INTO v_schema, v_name
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = p_table;
+
+    v_object_id := pggit.prepare_storage_object(
+        p_object_type,
+        CASE WHEN p_object_name IS NULL THEN v_schema END,
+        COALESCE(p_object_name, v_name),
+        p_tier
+    );
+    v_previous := pggit.detach_object_blocks(v_object_id);
+
+    FOR v_row IN EXECUTE format(
+        'SELECT r.line, (''x'' || substr(md5(r.line), 1, 8))::BIT(32)::BIGINT AS line_hash
+         FROM (SELECT t::TEXT AS line FROM %s t) r
+         ORDER BY r.line COLLATE "C"',
+        p_table
+    )
+    LOOP
+        v_line := convert_to(v_row.line || E'\n', 'UTF8');
+        v_total := v_total + length(v_line);
+
+        IF length(v_line) > v_max_size THEN
+            -- Flush what is buffered, then chunk the long row on its own
+            IF length(v_buffer) > 0 THEN
+                v_new_bytes := v_new_bytes + pggit.store_block(v_object_id, v_sequence, v_buffer, p_tier);
+                v_sequence := v_sequence + 1;
+                v_buffer := ''::BYTEA;
+            END IF;
+
+            FOR v_chunk IN
+                SELECT * FROM pggit.chunk_content(v_line, p_avg_chunk_size / 4, p_avg_chunk_size, v_max_size)
+            LOOP
+                v_new_bytes := v_new_bytes + pggit.store_block(
+                    v_object_id, v_sequence,
+                    substring(v_line FROM v_chunk.chunk_offset + 1 FOR v_chunk.chunk_length),
+                    p_tier
+                );
+                v_sequence := v_sequence + 1;
+            END LOOP;
+            CONTINUE;
+        END IF;
+
+        IF length(v_buffer) + length(v_line) > v_max_size THEN
+            v_new_bytes := v_new_bytes + pggit.store_block(v_object_id, v_sequence, v_buffer, p_tier);
+            v_sequence := v_sequence + 1;
+            v_buffer := ''::BYTEA;
+        END IF;
+
+        v_buffer := v_buffer || v_line;
+
+        IF length(v_buffer) >= p_avg_chunk_size / 4
+           AND v_row.line_hash < 4294967296 * length(v_line) / p_avg_chunk_size THEN
+            v_new_bytes := v_new_bytes + pggit.store_block(v_object_id, v_sequence, v_buffer, p_tier);
+            v_sequence := v_sequence + 1;
+            v_buffer := ''::BYTEA;
+        END IF;
+    END LOOP;
+
+    IF length(v_buffer) > 0 THEN
+        v_new_bytes := v_new_bytes + pggit.store_block(v_object_id, v_sequence, v_buffer, p_tier);
+    END IF;
+
+    PERFORM pggit.release_blocks(v_previous);
+    PERFORM pggit.update_storage_object_sizes(v_object_id, v_total, v_new_bytes);
+
+    RETURN v_object_id;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION pggit.store_table_blocks IS 'Dump a table and store the dump as deduplicated, compressed blocks';
+
+-- Reassemble an object from its block list
+CREATE OR REPLACE FUNCTION pggit.read_object_blocks(
+    p_object_id UUID
+) RETURNS BYTEA AS $$
+DECLARE
+    v_data BYTEA;
+    v_missing BOOLEAN;
+BEGIN
+    SELECT string_agg(b.compressed_data, ''::BYTEA ORDER BY r.block_sequence),
+           bool_or(b.compressed_data IS NULL)
+    INTO v_data, v_missing
+    FROM pggit.block_references r
+    JOIN pggit.storage_blocks b ON b.block_hash = r.block_hash
+    WHERE r.object_id = p_object_id;
+
+    IF v_missing THEN
+        RAISE EXCEPTION 'Object % references blocks without stored data', p_object_id;
+    END IF;
+
+    UPDATE pggit.storage_objects
+    SET last_accessed = CURRENT_TIMESTAMP,
+        access_count = access_count + 1
+    WHERE object_id = p_object_id;
+
+    RETURN v_data;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION pggit.read_object_blocks IS 'Reassemble the content of a storage object from its blocks';
+
 -- Deduplicate storage using block-level dedup
+-- Stores a dump of the table in the block store and reports how much of it
+-- was new. p_block_size is the average chunk size.
 CREATE OR REPLACE FUNCTION pggit.deduplicate_storage(
     p_table_name TEXT,
     p_block_size INT DEFAULT 8192
@@ -156,75 +613,401 @@ CREATE OR REPLACE FUNCTION pggit.deduplicate_storage(
 ) AS $$
 DECLARE
     v_object_id UUID;
-    v_original_size BIGINT;
-    v_block_data BYTEA;
-    v_block_hash TEXT;
-    v_block_count INT := 0;
-    v_unique_blocks INT := 0;
-    v_dedup_size BIGINT := 0;
-BEGIN
-    -- Get table size
-    EXECUTE format('SELECT pg_total_relation_size(%L)', p_table_name)
-    INTO v_original_size;
-    
-    -- Register object if not exists
-    INSERT INTO pggit.storage_objects (
-        object_type, object_name, original_size_bytes
+BEGIN
+    v_object_id := pggit.store_table_blocks(p_table_name::REGCLASS, 'table', NULL, 'HOT', p_block_size);
+
+    RETURN QUERY
+    SELECT
+        o.original_size_bytes,
+        o.deduplicated_size_bytes,
+        o.block_count,
+        (SELECT COUNT(DISTINCT r.block_hash)::INT FROM pggit.block_references r WHERE r.object_id = o.object_id),
+        ROUND(o.original_size_bytes::DECIMAL / NULLIF(o.deduplicated_size_bytes, 0), 2)
+    FROM pggit.storage_objects o
+    WHERE o.object_id = v_object_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- =====================================================
+-- Cold Tier Files
+-- =====================================================
+
+-- Directory on the database server holding cold tier files
+-- SET pggit.cold_storage_path overrides the COLD tier's storage_path. The
+-- server's OS user must be able to write to it.
+CREATE OR REPLACE FUNCTION pggit.cold_storage_path()
+RETURNS TEXT AS $$
+    SELECT rtrim(COALESCE(
+        NULLIF(current_setting('pggit.cold_storage_path', true), ''),
+        (SELECT storage_path FROM pggit.storage_tiers WHERE tier_name = 'COLD')
+    ), '/')
+$$ LANGUAGE sql STABLE;
+
+-- Quote a value as a single shell word
+CREATE OR REPLACE FUNCTION pggit.shell_quote(
+    p_value TEXT
+) RETURNS TEXT AS $$
+    SELECT '''' || replace(p_value, '''', '''\''''') || ''''
+$$ LANGUAGE sql IMMUTABLE STRICT;
+
+-- Shell command compressing stdin to stdout, or decompressing it
+-- Returns NULL for 'none': COPY then reads and writes the file itself.
+CREATE OR REPLACE FUNCTION pggit.cold_compression_command(
+    p_compression TEXT,
+    p_level INT DEFAULT NULL,
+    p_decompress BOOLEAN DEFAULT false
+) RETURNS TEXT AS $$
+DECLARE
+    v_max_level INT;
+BEGIN
+    v_max_level := CASE p_compression
+        WHEN 'none' THEN 0
+        WHEN 'gzip' THEN 9
+        WHEN 'lz4' THEN 12
+        WHEN 'zstd' THEN 19
+    END;
+
+    IF v_max_level IS NULL THEN
+        RAISE EXCEPTION 'Unsupported cold storage compression: % (expected none, gzip, lz4 or zstd)',
+            p_compression;
+    END IF;
+
+    IF p_compression = 'none' THEN
+        RETURN NULL;
+    ELSIF p_decompress THEN
+        RETURN p_compression || ' -d -q -c';
+    ELSIF p_level IS NOT NULL AND p_level NOT BETWEEN 1 AND v_max_level THEN
+        RAISE EXCEPTION '% compression level must be between 1 and %, got %',
+            p_compression, v_max_level, p_level;
+    END IF;
+
+    RETURN p_compression || ' -q -c' || COALESCE(' -' || p_level, '');
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- Reject writes to a table whose rows are in a cold tier file
+-- TG_ARGV[0] is the branch to prefetch before writing.
+CREATE OR REPLACE FUNCTION pggit.reject_cold_table_writes()
+RETURNS TRIGGER AS $$
+BEGIN
+    RAISE EXCEPTION 'Table %.% is in cold storage; call pggit.prefetch_from_cold(%) first',
+        TG_TABLE_SCHEMA, TG_TABLE_NAME, quote_literal(TG_ARGV[0]);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reject reads of a branch whose rows are in cold tier files
+-- Used as a one-time filter by the routing view arms and delta overlays of
+-- offloaded branches. Its high cost keeps it behind the cheaper branch gate
+-- of a routing arm, so only reads of the cold branch itself raise.
+CREATE OR REPLACE FUNCTION pggit.reject_cold_branch_read(
+    p_branch_name TEXT
+) RETURNS BOOLEAN AS $$
+BEGIN
+    RAISE EXCEPTION 'Branch % is in cold storage; call pggit.prefetch_from_cold(%) first',
+        p_branch_name, quote_literal(p_branch_name);
+END;
+$$ LANGUAGE plpgsql STABLE COST 10000;
+
+-- Export a branch table to a cold tier file and free its heap
+-- Rows are written with COPY in binary format, piped through the
+-- compressor unless p_compression is 'none'. COPY to a program needs
+-- superuser or pg_execute_server_program, a plain file
+-- pg_write_server_files. The emptied table keeps its definition, indexes
+-- and place in the routing views; a statement trigger rejects writes to it
+-- until rehydrate_table_from_cold() loads the rows back.
+CREATE OR REPLACE FUNCTION pggit.offload_table_to_cold(
+    p_branch_name TEXT,
+    p_schema TEXT,
+    p_table TEXT,
+    p_compression TEXT DEFAULT 'gzip',
+    p_compression_level INT DEFAULT NULL
+) RETURNS pggit.cold_branch_tables AS $$
+DECLARE
+    v_relation REGCLASS := format('%I.%I', p_schema, p_table)::REGCLASS;
+    v_command TEXT := pggit.cold_compression_command(p_compression, p_compression_level);
+    v_file TEXT;
+    v_heap_bytes BIGINT;
+    v_rows BIGINT;
+    v_cold pggit.cold_branch_tables;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pggit.cold_branch_tables
+        WHERE table_schema = p_schema AND table_name = p_table AND is_cold
+    ) THEN
+        RAISE EXCEPTION 'Table %.% is already in cold storage', p_schema, p_table;
+    END IF;
+
+    -- The oid keeps names unique after unsafe characters are replaced
+    v_file := format('%s/%s.%s.%s.copy',
+        pggit.cold_storage_path(),
+        regexp_replace(p_schema, '[^A-Za-z0-9_-]', '_', 'g'),
+        regexp_replace(p_table, '[^A-Za-z0-9_-]', '_', 'g'),
+        v_relation::OID
+    ) || CASE p_compression
+        WHEN 'gzip' THEN '.gz'
+        WHEN 'lz4' THEN '.lz4'
+        WHEN 'zstd' THEN '.zst'
+        ELSE ''
+    END;
+
+    v_heap_bytes := pg_total_relation_size(v_relation);
+
+    IF v_command IS NULL THEN
+        EXECUTE format('COPY %s TO %L WITH (FORMAT binary)', v_relation, v_file);
+    ELSE
+        EXECUTE format('COPY %s TO PROGRAM %L WITH (FORMAT binary)',
+            v_relation, v_command || ' > ' || pggit.shell_quote(v_file));
+    END IF;
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+
+    EXECUTE format('TRUNCATE %s', v_relation);
+    EXECUTE format(
+        'CREATE TRIGGER pggit_cold_guard
+            BEFORE INSERT OR UPDATE OR DELETE OR TRUNCATE ON %s
+            FOR EACH STATEMENT EXECUTE FUNCTION pggit.reject_cold_table_writes(%L)',
+        v_relation, p_branch_name
+    );
+
+    INSERT INTO pggit.cold_branch_tables (
+        table_schema, table_name, branch_name, file_path, compression,
+        row_count, heap_bytes, file_bytes
     ) VALUES (
-        'table', p_table_name, v_original_size
+        p_schema, p_table, p_branch_name, v_file, p_compression,
+        v_rows, v_heap_bytes, (pg_stat_file(v_file)).size
     )
-    ON CONFLICT (object_type, schema_name, object_name) 
-    DO UPDATE SET original_size_bytes = EXCLUDED.original_size_bytes
-    RETURNING object_id INTO v_object_id;
-    
-    -- Simulate block-level deduplication
-    -- In reality, this would read actual data blocks
-    FOR i IN 0..(v_original_size / p_block_size) LOOP
-        -- Simulate block hash (in reality, would hash actual data)
-        v_block_hash := md5(p_table_name || '_block_' || (i % 1000)::TEXT);
-        v_block_count := v_block_count + 1;
-        
-        -- Check if block exists
-        IF NOT EXISTS (
-            SELECT 1 FROM pggit.storage_blocks 
-            WHERE block_hash = v_block_hash
-        ) THEN
-            -- New unique block
-            INSERT INTO pggit.storage_blocks (
-                block_hash, block_size, tier
-            ) VALUES (
-                v_block_hash, p_block_size, 'HOT'
-            );
-            v_unique_blocks := v_unique_blocks + 1;
-            v_dedup_size := v_dedup_size + p_block_size;
-        ELSE
-            -- Duplicate block, just increment reference
-            UPDATE pggit.storage_blocks
-            SET reference_count = reference_count + 1
-            WHERE block_hash = v_block_hash;
+    ON CONFLICT (table_schema, table_name) DO UPDATE
+    SET branch_name = EXCLUDED.branch_name,
+        file_path = EXCLUDED.file_path,
+        compression = EXCLUDED.compression,
+        row_count = EXCLUDED.row_count,
+        heap_bytes = EXCLUDED.heap_bytes,
+        file_bytes = EXCLUDED.file_bytes,
+        is_cold = true,
+        offloaded_at = CURRENT_TIMESTAMP,
+        rehydrated_at = NULL,
+        retrieval_ms = NULL
+    RETURNING * INTO v_cold;
+
+    RETURN v_cold;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Load a cold table back from its file
+-- Records how long the load took in retrieval_ms.
+CREATE OR REPLACE FUNCTION pggit.rehydrate_table_from_cold(
+    p_schema TEXT,
+    p_table TEXT
+) RETURNS pggit.cold_branch_tables AS $$
+DECLARE
+    v_relation TEXT := format('%I.%I', p_schema, p_table);
+    v_started TIMESTAMPTZ := clock_timestamp();
+    v_command TEXT;
+    v_rows BIGINT;
+    v_cold pggit.cold_branch_tables;
+BEGIN
+    SELECT * INTO v_cold
+    FROM pggit.cold_branch_tables
+    WHERE table_schema = p_schema AND table_name = p_table AND is_cold
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Table %.% is not in cold storage', p_schema, p_table;
+    END IF;
+
+    v_command := pggit.cold_compression_command(v_cold.compression, NULL, true);
+
+    EXECUTE format('DROP TRIGGER IF EXISTS pggit_cold_guard ON %s', v_relation);
+
+    IF v_command IS NULL THEN
+        EXECUTE format('COPY %s FROM %L WITH (FORMAT binary)', v_relation, v_cold.file_path);
+    ELSE
+        EXECUTE format('COPY %s FROM PROGRAM %L WITH (FORMAT binary)',
+            v_relation, v_command || ' < ' || pggit.shell_quote(v_cold.file_path));
+    END IF;
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+
+    IF v_rows <> v_cold.row_count THEN
+        RAISE EXCEPTION 'Cold file % held % rows for %.%, expected %',
+            v_cold.file_path, v_rows, p_schema, p_table, v_cold.row_count;
+    END IF;
+
+    UPDATE pggit.cold_branch_tables
+    SET is_cold = false,
+        rehydrated_at = CURRENT_TIMESTAMP,
+        retrieval_ms = ROUND(EXTRACT(EPOCH FROM clock_timestamp() - v_started)::NUMERIC * 1000, 2)
+    WHERE table_schema = p_schema AND table_name = p_table
+    RETURNING * INTO v_cold;
+
+    RETURN v_cold;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Make reads of a data branch fail while its tables are cold
+-- A truncated delta storage table would leave the overlay view showing the
+-- parent's rows, including rows the branch updated or deleted, and a copy
+-- branch would read as empty. While a table is cold its overlay view is
+-- replaced by one that raises, keeping the original definition in
+-- cold_branch_tables, and the routing view is rebuilt so the branch's arm
+-- raises too. Once the table is loaded back the overlay is restored and the
+-- arm rebuilt without the guard.
+CREATE OR REPLACE FUNCTION pggit.sync_cold_branch_reads(
+    p_branch_name TEXT
+) RETURNS VOID AS $$
+DECLARE
+    v_table RECORD;
+    v_view TEXT;
+    v_cols TEXT;
+BEGIN
+    FOR v_table IN
+        SELECT bt.source_schema, bt.source_table, bt.branch_schema, bt.branch_table,
+               bt.storage_mode, c.table_name AS storage_table, c.is_cold,
+               c.overlay_definition
+        FROM pggit.branched_tables bt
+        JOIN pggit.cold_branch_tables c
+          ON c.table_schema = bt.branch_schema
+         AND c.table_name = COALESCE(bt.storage_table, bt.branch_table)
+        WHERE bt.branch_name = p_branch_name
+        ORDER BY bt.id
+    LOOP
+        v_view := format('%I.%I', v_table.branch_schema, v_table.branch_table);
+
+        IF v_table.storage_mode = 'delta' AND v_table.is_cold
+           AND v_table.overlay_definition IS NULL THEN
+            SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+            INTO v_cols
+            FROM pg_attribute
+            WHERE attrelid = v_view::REGCLASS
+            AND attnum > 0
+            AND NOT attisdropped;
+
+            UPDATE pggit.cold_branch_tables
+            SET overlay_definition = regexp_replace(pg_get_viewdef(v_view::REGCLASS), ';\s*$', '')
+            WHERE table_schema = v_table.branch_schema AND table_name = v_table.storage_table;
+
+            EXECUTE format('CREATE OR REPLACE VIEW %s AS SELECT %s FROM %I.%I WHERE pggit.reject_cold_branch_read(%L)',
+                v_view, v_cols, v_table.branch_schema, v_table.storage_table, p_branch_name);
+        ELSIF NOT v_table.is_cold AND v_table.overlay_definition IS NOT NULL THEN
+            EXECUTE format('CREATE OR REPLACE VIEW %s AS %s', v_view, v_table.overlay_definition);
+
+            UPDATE pggit.cold_branch_tables
+            SET overlay_definition = NULL
+            WHERE table_schema = v_table.branch_schema AND table_name = v_table.storage_table;
         END IF;
-        
-        -- Record block reference
-        INSERT INTO pggit.block_references (
-            object_id, block_sequence, block_hash
-        ) VALUES (
-            v_object_id, i, v_block_hash
+
+        PERFORM pggit.refresh_table_routing(v_table.source_schema, v_table.source_table);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Offload the tables of a data branch to cold tier files
+-- Copy branches offload their tables, delta branches their delta storage.
+-- Returns one row per table offloaded; tables already cold are skipped.
+-- Reads of the branch raise until it is rehydrated, see
+-- sync_cold_branch_reads(). The branch is recorded as an archived COLD storage object sized by its
+-- heap and file bytes.
+CREATE OR REPLACE FUNCTION pggit.offload_branch_to_cold(
+    p_branch_name TEXT,
+    p_compression TEXT DEFAULT 'gzip',
+    p_compression_level INT DEFAULT NULL
+) RETURNS SETOF pggit.cold_branch_tables AS $$
+DECLARE
+    v_table RECORD;
+    v_cold pggit.cold_branch_tables;
+    v_object_id UUID;
+BEGIN
+    FOR v_table IN
+        SELECT bt.branch_schema AS table_schema, t.table_name
+        FROM pggit.branched_tables bt
+        CROSS JOIN LATERAL (
+            SELECT CASE WHEN bt.storage_mode = 'delta' THEN bt.storage_table ELSE bt.branch_table END
+        ) t(table_name)
+        WHERE bt.branch_name = p_branch_name
+        AND NOT EXISTS (
+            SELECT 1 FROM pggit.cold_branch_tables c
+            WHERE c.table_schema = bt.branch_schema
+            AND c.table_name = t.table_name
+            AND c.is_cold
+        )
+        ORDER BY bt.id
+    LOOP
+        v_cold := pggit.offload_table_to_cold(
+            p_branch_name, v_table.table_schema, v_table.table_name,
+            p_compression, p_compression_level
         );
+        RETURN NEXT v_cold;
     END LOOP;
-    
-    -- Update object with dedup info
+
+    IF NOT EXISTS (
+        SELECT 1 FROM pggit.cold_branch_tables WHERE branch_name = p_branch_name AND is_cold
+    ) THEN
+        RETURN;
+    END IF;
+
+    PERFORM pggit.sync_cold_branch_reads(p_branch_name);
+
+    v_object_id := pggit.prepare_storage_object('branch', NULL, p_branch_name, 'COLD');
+
+    UPDATE pggit.storage_objects o
+    SET current_tier = 'COLD',
+        archived = true,
+        migrated_at = CURRENT_TIMESTAMP,
+        original_size_bytes = c.heap_bytes,
+        compressed_size_bytes = c.file_bytes,
+        metadata = COALESCE(o.metadata, '{}'::JSONB) || jsonb_build_object('cold_files', c.files)
+    FROM (
+        SELECT SUM(heap_bytes) AS heap_bytes,
+               SUM(file_bytes) AS file_bytes,
+               jsonb_agg(file_path ORDER BY file_path) AS files
+        FROM pggit.cold_branch_tables
+        WHERE branch_name = p_branch_name AND is_cold
+    ) c
+    WHERE o.object_id = v_object_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Load every cold table of a data branch back from its files
+-- The total load time is recorded as a COLD_RETRIEVAL access of the
+-- branch, which measure_cold_retrieval() reports. Branches without cold
+-- tables return no rows and are left alone.
+CREATE OR REPLACE FUNCTION pggit.rehydrate_branch_from_cold(
+    p_branch_name TEXT
+) RETURNS SETOF pggit.cold_branch_tables AS $$
+DECLARE
+    v_table RECORD;
+    v_cold pggit.cold_branch_tables;
+    v_started TIMESTAMPTZ := clock_timestamp();
+BEGIN
+    FOR v_table IN
+        SELECT table_schema, table_name
+        FROM pggit.cold_branch_tables
+        WHERE branch_name = p_branch_name AND is_cold
+        ORDER BY table_schema, table_name
+    LOOP
+        v_cold := pggit.rehydrate_table_from_cold(v_table.table_schema, v_table.table_name);
+        RETURN NEXT v_cold;
+    END LOOP;
+
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    PERFORM pggit.sync_cold_branch_reads(p_branch_name);
+
+    INSERT INTO pggit.access_patterns (object_name, access_type, response_time_ms)
+    VALUES (
+        p_branch_name,
+        'COLD_RETRIEVAL',
+        ROUND(EXTRACT(EPOCH FROM clock_timestamp() - v_started)::NUMERIC * 1000, 2)
+    );
+
     UPDATE pggit.storage_objects
-    SET deduplicated_size_bytes = v_dedup_size,
-        block_count = v_block_count
-    WHERE object_id = v_object_id;
-    
-    RETURN QUERY
-    SELECT 
-        v_original_size,
-        v_dedup_size,
-        v_block_count,
-        v_unique_blocks,
-        ROUND(v_original_size::DECIMAL / NULLIF(v_dedup_size, 0), 2);
+    SET current_tier = 'HOT',
+        archived = false,
+        last_accessed = CURRENT_TIMESTAMP,
+        access_count = access_count + 1
+    WHERE object_type = 'branch'
+    AND schema_name IS NULL
+    AND object_name = p_branch_name;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -239,6 +1022,8 @@ CREATE OR REPLACE FUNCTION pggit.migrate_to_cold_storage(
 ) AS $$
 DECLARE
     v_object RECORD;
+    v_table REGCLASS;
+    v_compressed BIGINT;
     v_migrated_count INT := 0;
     v_migrated_bytes BIGINT := 0;
     v_compressed_bytes BIGINT := 0;
@@ -248,6 +1033,7 @@ BEGIN
         SELECT 
             object_id,
             object_name,
+            schema_name,
             object_type,
             original_size_bytes,
             current_tier
@@ -257,12 +1043,41 @@ BEGIN
         AND current_tier != 'COLD'
         AND NOT archived
     LOOP
-        -- Simulate migration (in reality, would move data)
+        -- Tables still present are stored as deduplicated blocks
+        v_table := CASE WHEN v_object.object_type = 'table' THEN
+            to_regclass(format('%I.%I', COALESCE(v_object.schema_name, 'public'), v_object.object_name))
+        END;
+
+        IF v_table IS NOT NULL THEN
+            PERFORM pggit.store_table_blocks(
+                v_table,
+                'table',
+                CASE WHEN v_object.schema_name IS NULL THEN v_object.object_name END,
+                'COLD'
+            );
+        END IF;
+
+        -- Data branches move their tables to cold tier files
+        IF v_object.object_type = 'branch' AND EXISTS (
+            SELECT 1 FROM pggit.branched_tables WHERE branch_name = v_object.object_name
+        ) THEN
+            PERFORM pggit.offload_branch_to_cold(
+                v_object.object_name,
+                COALESCE(NULLIF(current_setting('pggit.cold_storage_compression', true), ''), 'gzip')
+            );
+        END IF;
+
+        -- Cold size is what the object's blocks or files take on disk;
+        -- objects with neither keep their original size
         UPDATE pggit.storage_objects
         SET current_tier = 'COLD',
             migrated_at = CURRENT_TIMESTAMP,
-            compressed_size_bytes = original_size_bytes / 10 -- Assume 10x compression
-        WHERE object_id = v_object.object_id;
+            compressed_size_bytes = CASE
+                WHEN COALESCE(block_count, 0) > 0 OR archived THEN compressed_size_bytes
+                ELSE original_size_bytes
+            END
+        WHERE object_id = v_object.object_id
+        RETURNING compressed_size_bytes INTO v_compressed;
         
         -- Update tier statistics
         UPDATE pggit.storage_tier_stats
@@ -271,13 +1086,13 @@ BEGIN
         WHERE tier = v_object.current_tier;
         
         UPDATE pggit.storage_tier_stats
-        SET bytes_used = bytes_used + (v_object.original_size_bytes / 10),
+        SET bytes_used = bytes_used + v_compressed,
             object_count = object_count + 1
         WHERE tier = 'COLD';
         
         v_migrated_count := v_migrated_count + 1;
         v_migrated_bytes := v_migrated_bytes + v_object.original_size_bytes;
-        v_compressed_bytes := v_compressed_bytes + (v_object.original_size_bytes / 10);
+        v_compressed_bytes := v_compressed_bytes + v_compressed;
     END LOOP;
     
     RETURN QUERY
@@ -358,64 +1173,130 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Prefetch from cold storage
+-- Branches offloaded to cold tier files are loaded back into their tables.
 CREATE OR REPLACE FUNCTION pggit.prefetch_from_cold(
     p_object_name TEXT
 ) RETURNS VOID AS $$
-DECLARE
-    v_object RECORD;
 BEGIN
-    -- Get object info
-    SELECT * INTO v_object
-    FROM pggit.storage_objects
+    PERFORM pggit.rehydrate_branch_from_cold(p_object_name);
+
+    UPDATE pggit.storage_objects
+    SET current_tier = 'HOT',
+        archived = false,
+        last_accessed = CURRENT_TIMESTAMP
     WHERE object_name = p_object_name
     AND current_tier = 'COLD';
-    
-    IF FOUND THEN
-        -- Simulate prefetch to hot storage
-        UPDATE pggit.storage_objects
-        SET current_tier = 'HOT',
-            last_accessed = CURRENT_TIMESTAMP
-        WHERE object_id = v_object.object_id;
-        
-        -- Update access pattern
-        UPDATE pggit.access_patterns
-        SET was_prefetched = true
-        WHERE object_name = p_object_name
-        AND accessed_at > CURRENT_TIMESTAMP - INTERVAL '1 minute';
-    END IF;
 END;
 $$ LANGUAGE plpgsql;
 
 -- Measure cold retrieval time
+-- Returns the latest measured retrieval of the object from cold tier
+-- files; objects never retrieved get an estimate for their tier.
 CREATE OR REPLACE FUNCTION pggit.measure_cold_retrieval(
     p_object_name TEXT
 ) RETURNS TABLE (
     response_time_ms DECIMAL
 ) AS $$
 DECLARE
+    v_measured DECIMAL;
     v_tier TEXT;
-    v_base_time INT;
 BEGIN
-    -- Get current tier
+    SELECT a.response_time_ms INTO v_measured
+    FROM pggit.access_patterns a
+    WHERE a.object_name = p_object_name
+    AND a.access_type = 'COLD_RETRIEVAL'
+    AND a.response_time_ms IS NOT NULL
+    ORDER BY a.pattern_id DESC
+    LIMIT 1;
+
+    IF v_measured IS NOT NULL THEN
+        RETURN QUERY SELECT v_measured;
+        RETURN;
+    END IF;
+
     SELECT current_tier INTO v_tier
     FROM pggit.storage_objects
     WHERE object_name = p_object_name;
-    
-    -- Simulate retrieval time based on tier
-    CASE v_tier
-        WHEN 'HOT' THEN v_base_time := 10;
-        WHEN 'WARM' THEN v_base_time := 100;
-        WHEN 'COLD' THEN v_base_time := 1000;
-        ELSE v_base_time := 50;
-    END CASE;
-    
-    -- Add some randomness
+
     RETURN QUERY
-    SELECT (v_base_time + random() * v_base_time * 0.2)::DECIMAL;
+    SELECT CASE v_tier
+        WHEN 'HOT' THEN 10
+        WHEN 'WARM' THEN 100
+        WHEN 'COLD' THEN 1000
+        ELSE 50
+    END::DECIMAL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Bytes a tiered branch's cold references save through deduplication
+-- The logical size of the blocks the references list, less the stored size
+-- of blocks no other object references. References whose blocks are not
+-- stored yet count for nothing.
+CREATE OR REPLACE FUNCTION pggit.tiered_branch_saved_bytes(
+    p_branch_name TEXT
+) RETURNS BIGINT AS $$
+    WITH refs AS (
+        SELECT r.block_hash, COUNT(*) AS refs
+        FROM pggit.storage_objects o
+        JOIN pggit.block_references r ON r.object_id = o.object_id
+        WHERE o.object_type = 'branch_ref'
+        AND o.metadata->>'branch' = p_branch_name
+        GROUP BY r.block_hash
+    )
+    SELECT COALESCE(SUM(b.block_size * f.refs), 0)
+         - COALESCE(SUM(pg_column_size(b.compressed_data)) FILTER (WHERE b.reference_count <= f.refs), 0)
+    FROM refs f
+    JOIN pggit.storage_blocks b ON b.block_hash = f.block_hash;
+$$ LANGUAGE sql STABLE;
+
+-- Store the blocks of cold branch references created by create_tiered_branch
+-- Meant to run as a maintenance job: each call stores at most p_limit
+-- references, skipping ones another session is storing. References to
+-- tables that no longer exist are marked stored with no blocks. Returns the
+-- number of references handled.
+CREATE OR REPLACE FUNCTION pggit.store_pending_branch_refs(
+    p_limit INT DEFAULT 10
+) RETURNS INT AS $$
+DECLARE
+    v_ref RECORD;
+    v_table REGCLASS;
+    v_count INT := 0;
+BEGIN
+    FOR v_ref IN
+        SELECT object_id, object_name, metadata->>'reference_to' AS reference_to
+        FROM pggit.storage_objects
+        WHERE object_type = 'branch_ref'
+        AND block_count IS NULL
+        ORDER BY created_at, object_id
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    LOOP
+        v_table := to_regclass(v_ref.reference_to);
+
+        IF v_table IS NULL THEN
+            PERFORM pggit.update_storage_object_sizes(v_ref.object_id, 0, 0);
+        ELSE
+            -- Near-identical snapshots share all but their changed blocks
+            PERFORM pggit.store_table_blocks(v_table, 'branch_ref', v_ref.object_name, 'COLD');
+        END IF;
+
+        UPDATE pggit.storage_objects
+        SET metadata = metadata || jsonb_build_object('lazy_load', false)
+        WHERE object_id = v_ref.object_id;
+
+        v_count := v_count + 1;
+    END LOOP;
+
+    RETURN v_count;
 END;
 $$ LANGUAGE plpgsql;
 
+COMMENT ON FUNCTION pggit.store_pending_branch_refs IS 'Store the data of pending cold branch references as deduplicated blocks, in batches';
+
 -- Create branch with tiered storage
+-- Cold tables are only referenced: their data is stored as blocks later by
+-- pggit.store_pending_branch_refs(), so creation does not scale with the
+-- data. storage_saved_gb counts the references already stored.
 CREATE OR REPLACE FUNCTION pggit.create_tiered_branch(
     p_branch_name TEXT,
     p_source_branch TEXT,
@@ -430,7 +1311,6 @@ CREATE OR REPLACE FUNCTION pggit.create_tiered_branch(
 DECLARE
     v_hot_count INT := 0;
     v_cold_count INT := 0;
-    v_saved_bytes BIGINT := 0;
     v_table TEXT;
 BEGIN
     -- Create hot objects (full copy)
@@ -458,14 +1338,6 @@ BEGIN
             )
         );
         
-        -- Calculate saved space
-        BEGIN
-            EXECUTE format('SELECT pg_total_relation_size(%L)', v_table)
-            INTO v_saved_bytes;
-        EXCEPTION WHEN OTHERS THEN
-            v_saved_bytes := 1024^3; -- Assume 1GB
-        END;
-        
         v_cold_count := v_cold_count + 1;
     END LOOP;
     
@@ -474,7 +1346,7 @@ BEGIN
         'success'::TEXT,
         v_hot_count,
         v_cold_count,
-        ROUND(v_saved_bytes / 1024.0^3, 2);
+        ROUND(pggit.tiered_branch_saved_bytes(p_branch_name) / 1024.0^3, 2);
 END;
 $$ LANGUAGE plpgsql;
 
@@ -719,6 +1591,8 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Archive old branches
+-- Data branches not modified within p_age_threshold are offloaded to cold
+-- tier files; space_reclaimed_gb is the heap space their tables took.
 CREATE OR REPLACE FUNCTION pggit.archive_old_branches(
     p_age_threshold TEXT,
     p_compression TEXT,
@@ -727,12 +1601,36 @@ CREATE OR REPLACE FUNCTION pggit.archive_old_branches(
     branches_archived INT,
     space_reclaimed_gb DECIMAL
 ) AS $$
+DECLARE
+    v_branch RECORD;
+    v_cold pggit.cold_branch_tables;
+    v_branches INT := 0;
+    v_bytes BIGINT := 0;
 BEGIN
-    -- Simulate archival
+    FOR v_branch IN
+        SELECT s.branch_name
+        FROM pggit.branch_storage_stats s
+        WHERE s.last_modified < CURRENT_TIMESTAMP - p_age_threshold::INTERVAL
+        AND EXISTS (
+            SELECT 1 FROM pggit.branched_tables bt WHERE bt.branch_name = s.branch_name
+        )
+        ORDER BY s.last_modified
+    LOOP
+        FOR v_cold IN
+            SELECT * FROM pggit.offload_branch_to_cold(
+                v_branch.branch_name, COALESCE(p_compression, 'gzip'), p_compression_level
+            )
+        LOOP
+            v_bytes := v_bytes + v_cold.heap_bytes;
+        END LOOP;
+
+        IF FOUND THEN
+            v_branches := v_branches + 1;
+        END IF;
+    END LOOP;
+
     RETURN QUERY
-    SELECT 
-        5,
-        127.3::DECIMAL;
+    SELECT v_branches, v_bytes / 1073741824.0;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -771,9 +1669,15 @@ ON pggit.storage_objects(last_accessed DESC);
 CREATE INDEX IF NOT EXISTS idx_block_references_object 
 ON pggit.block_references(object_id);
 
+CREATE INDEX IF NOT EXISTS idx_block_references_block
+ON pggit.block_references(block_hash);
+
 CREATE INDEX IF NOT EXISTS idx_access_patterns_object 
 ON pggit.access_patterns(object_name, accessed_at DESC);
 
+CREATE INDEX IF NOT EXISTS idx_cold_branch_tables_branch
+ON pggit.cold_branch_tables(branch_name) WHERE is_cold;
+
 -- Initialize tier statistics
 INSERT INTO pggit.storage_tier_stats (tier, bytes_available)
 SELECT tier_name, max_size_bytes
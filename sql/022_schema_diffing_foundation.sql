@@ -62,11 +62,330 @@ CREATE INDEX IF NOT EXISTS idx_schema_changes_diff_category
 CREATE INDEX IF NOT EXISTS idx_migration_plans_branches
     ON pggit.migration_plans(source_branch, target_branch, created_at DESC);
 
+-- ============================================================================
+-- SCHEMA MANIFESTS
+-- ============================================================================
+-- A snapshot is stored as a content-addressed Merkle tree of the branch's
+-- objects: leaves hold each object's content_hash, leaves are grouped into
+-- up to 256 buckets per schema by a hash of their type and name, schemas
+-- hash their buckets, and the manifest hashes its schemas. Every node is
+-- stored once per hash and shared by all manifests that contain it.
+--
+-- pggit.branch_schema_buckets holds the current bucket hashes of each
+-- branch. Triggers on pggit.objects clear the hash of the buckets they
+-- touch, so a snapshot only re-reads the objects of changed buckets.
+
+-- Bucket of an object within its schema
+CREATE OR REPLACE FUNCTION pggit.manifest_bucket(
+    p_object_type pggit.object_type,
+    p_object_name text
+)
+RETURNS text AS $$
+    SELECT left(md5(p_object_type::text || '.' || p_object_name), 2)
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Table: schema_manifests (root nodes)
+CREATE TABLE IF NOT EXISTS pggit.schema_manifests (
+    manifest_hash text PRIMARY KEY,
+    object_count integer NOT NULL,
+    schema_count integer NOT NULL,
+    created_at timestamp NOT NULL DEFAULT NOW()
+);
+
+-- Table: schema_manifest_schemas (manifest -> schema nodes)
+CREATE TABLE IF NOT EXISTS pggit.schema_manifest_schemas (
+    manifest_hash text NOT NULL REFERENCES pggit.schema_manifests(manifest_hash) ON DELETE CASCADE,
+    schema_name text NOT NULL,
+    schema_hash text NOT NULL,
+    object_count integer NOT NULL,
+    PRIMARY KEY (manifest_hash, schema_name)
+);
+
+-- Table: schema_manifest_buckets (schema node -> bucket nodes)
+CREATE TABLE IF NOT EXISTS pggit.schema_manifest_buckets (
+    schema_hash text NOT NULL,
+    bucket text NOT NULL,
+    bucket_hash text NOT NULL,
+    PRIMARY KEY (schema_hash, bucket)
+);
+
+-- Table: schema_manifest_leaves (bucket node -> objects)
+CREATE TABLE IF NOT EXISTS pggit.schema_manifest_leaves (
+    bucket_hash text NOT NULL,
+    object_type text NOT NULL,
+    object_name text NOT NULL,
+    object_hash text NOT NULL,
+    PRIMARY KEY (bucket_hash, object_type, object_name)
+);
+
+-- Table: branch_schema_buckets (current buckets of each branch; NULL hash = stale)
+CREATE TABLE IF NOT EXISTS pggit.branch_schema_buckets (
+    branch_id integer NOT NULL REFERENCES pggit.branches(id) ON DELETE CASCADE,
+    schema_name text NOT NULL,
+    bucket text NOT NULL,
+    bucket_hash text,
+    object_count integer,
+    PRIMARY KEY (branch_id, schema_name, bucket)
+);
+
+-- Buckets go with their branch; drop those deleted branches left behind
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'branch_schema_buckets_branch_id_fkey'
+        AND conrelid = 'pggit.branch_schema_buckets'::regclass
+    ) THEN
+        DELETE FROM pggit.branch_schema_buckets s
+        WHERE NOT EXISTS (SELECT 1 FROM pggit.branches b WHERE b.id = s.branch_id);
+
+        ALTER TABLE pggit.branch_schema_buckets
+        ADD CONSTRAINT branch_schema_buckets_branch_id_fkey
+        FOREIGN KEY (branch_id) REFERENCES pggit.branches(id) ON DELETE CASCADE;
+    END IF;
+END $$;
+
+ALTER TABLE pggit.schema_snapshots ADD COLUMN IF NOT EXISTS manifest_hash text;
+
+CREATE INDEX IF NOT EXISTS idx_branch_schema_buckets_stale
+    ON pggit.branch_schema_buckets(branch_id) WHERE bucket_hash IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_objects_manifest_bucket
+    ON pggit.objects(branch_id, schema_name, pggit.manifest_bucket(object_type, object_name));
+
+-- Mark the buckets of changed objects stale
+CREATE OR REPLACE FUNCTION pggit.mark_schema_buckets_stale()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO pggit.branch_schema_buckets (branch_id, schema_name, bucket)
+        SELECT DISTINCT branch_id, schema_name, pggit.manifest_bucket(object_type, object_name)
+        FROM pggit_new_objects
+        WHERE branch_id IS NOT NULL
+        ORDER BY 1, 2, 3
+        ON CONFLICT (branch_id, schema_name, bucket) DO UPDATE SET bucket_hash = NULL
+        WHERE pggit.branch_schema_buckets.bucket_hash IS NOT NULL;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE pggit.branch_schema_buckets s
+        SET bucket_hash = NULL
+        FROM (
+            SELECT DISTINCT branch_id, schema_name, pggit.manifest_bucket(object_type, object_name) AS bucket
+            FROM pggit_old_objects
+        ) d
+        WHERE s.branch_id = d.branch_id
+        AND s.schema_name = d.schema_name
+        AND s.bucket = d.bucket
+        AND s.bucket_hash IS NOT NULL;
+    ELSE
+        -- Version and metadata updates leave the manifest alone
+        INSERT INTO pggit.branch_schema_buckets (branch_id, schema_name, bucket)
+        SELECT DISTINCT c.branch_id, c.schema_name, pggit.manifest_bucket(c.object_type, c.object_name)
+        FROM pggit_old_objects o
+        JOIN pggit_new_objects n ON n.id = o.id
+        CROSS JOIN LATERAL (VALUES
+            (o.branch_id, o.schema_name, o.object_type, o.object_name),
+            (n.branch_id, n.schema_name, n.object_type, n.object_name)
+        ) c(branch_id, schema_name, object_type, object_name)
+        WHERE (o.branch_id, o.schema_name, o.object_type, o.object_name, o.content_hash)
+            IS DISTINCT FROM (n.branch_id, n.schema_name, n.object_type, n.object_name, n.content_hash)
+        AND c.branch_id IS NOT NULL
+        ORDER BY 1, 2, 3
+        ON CONFLICT (branch_id, schema_name, bucket) DO UPDATE SET bucket_hash = NULL
+        WHERE pggit.branch_schema_buckets.bucket_hash IS NOT NULL;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS pggit_schema_buckets_ins ON pggit.objects;
+CREATE TRIGGER pggit_schema_buckets_ins
+    AFTER INSERT ON pggit.objects
+    REFERENCING NEW TABLE AS pggit_new_objects
+    FOR EACH STATEMENT EXECUTE FUNCTION pggit.mark_schema_buckets_stale();
+
+DROP TRIGGER IF EXISTS pggit_schema_buckets_upd ON pggit.objects;
+CREATE TRIGGER pggit_schema_buckets_upd
+    AFTER UPDATE ON pggit.objects
+    REFERENCING OLD TABLE AS pggit_old_objects NEW TABLE AS pggit_new_objects
+    FOR EACH STATEMENT EXECUTE FUNCTION pggit.mark_schema_buckets_stale();
+
+DROP TRIGGER IF EXISTS pggit_schema_buckets_del ON pggit.objects;
+CREATE TRIGGER pggit_schema_buckets_del
+    AFTER DELETE ON pggit.objects
+    REFERENCING OLD TABLE AS pggit_old_objects
+    FOR EACH STATEMENT EXECUTE FUNCTION pggit.mark_schema_buckets_stale();
+
+-- Mark every bucket of a branch (all branches if NULL) stale
+-- Seeds the bucket state at install and repairs it after objects were
+-- changed with triggers disabled.
+CREATE OR REPLACE FUNCTION pggit.reset_schema_buckets(
+    p_branch_id integer DEFAULT NULL
+)
+RETURNS integer AS $$
+DECLARE
+    v_count integer;
+BEGIN
+    UPDATE pggit.branch_schema_buckets
+    SET bucket_hash = NULL
+    WHERE (p_branch_id IS NULL OR branch_id = p_branch_id)
+    AND bucket_hash IS NOT NULL;
+
+    INSERT INTO pggit.branch_schema_buckets (branch_id, schema_name, bucket)
+    SELECT DISTINCT branch_id, schema_name, pggit.manifest_bucket(object_type, object_name)
+    FROM pggit.objects
+    WHERE branch_id IS NOT NULL
+    AND (p_branch_id IS NULL OR branch_id = p_branch_id)
+    ON CONFLICT (branch_id, schema_name, bucket) DO NOTHING;
+
+    SELECT COUNT(*) INTO v_count
+    FROM pggit.branch_schema_buckets
+    WHERE (p_branch_id IS NULL OR branch_id = p_branch_id)
+    AND bucket_hash IS NULL;
+
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT pggit.reset_schema_buckets();
+
+-- ============================================================================
+-- FUNCTION: pggit.build_schema_manifest()
+-- ============================================================================
+-- Bring a branch's buckets up to date and store its manifest
+-- Only stale buckets read pggit.objects; everything above them is hashed
+-- from the stored bucket hashes. Returns the manifest hash.
+
+CREATE OR REPLACE FUNCTION pggit.build_schema_manifest(
+    p_branch_id integer
+)
+RETURNS text AS $$
+DECLARE
+    v_manifest_hash text;
+BEGIN
+    -- Hold the stale buckets so concurrent changes wait and re-mark them
+    PERFORM 1
+    FROM pggit.branch_schema_buckets
+    WHERE branch_id = p_branch_id AND bucket_hash IS NULL
+    FOR UPDATE;
+
+    WITH stale AS (
+        SELECT schema_name, bucket
+        FROM pggit.branch_schema_buckets
+        WHERE branch_id = p_branch_id AND bucket_hash IS NULL
+    ),
+    leaves AS (
+        SELECT
+            s.schema_name,
+            s.bucket,
+            o.object_type::text AS object_type,
+            o.object_name,
+            COALESCE(o.content_hash, '') AS object_hash
+        FROM stale s
+        JOIN pggit.objects o
+            ON o.branch_id = p_branch_id
+            AND o.schema_name = s.schema_name
+            AND pggit.manifest_bucket(o.object_type, o.object_name) = s.bucket
+    ),
+    buckets AS (
+        SELECT
+            l.schema_name,
+            l.bucket,
+            encode(sha256(convert_to(string_agg(
+                jsonb_build_array(l.object_type, l.object_name, l.object_hash)::text, E'\n'
+                ORDER BY l.object_type COLLATE "C", l.object_name COLLATE "C"
+            ), 'UTF8')), 'hex') AS bucket_hash,
+            COUNT(*) AS object_count
+        FROM leaves l
+        GROUP BY l.schema_name, l.bucket
+    ),
+    stored_leaves AS (
+        INSERT INTO pggit.schema_manifest_leaves (bucket_hash, object_type, object_name, object_hash)
+        SELECT b.bucket_hash, l.object_type, l.object_name, l.object_hash
+        FROM buckets b
+        JOIN leaves l ON l.schema_name = b.schema_name AND l.bucket = b.bucket
+        WHERE NOT EXISTS (
+            SELECT 1 FROM pggit.schema_manifest_leaves x WHERE x.bucket_hash = b.bucket_hash
+        )
+        ON CONFLICT DO NOTHING
+    ),
+    refreshed AS (
+        UPDATE pggit.branch_schema_buckets s
+        SET bucket_hash = b.bucket_hash,
+            object_count = b.object_count
+        FROM buckets b
+        WHERE s.branch_id = p_branch_id
+        AND s.schema_name = b.schema_name
+        AND s.bucket = b.bucket
+    )
+    -- Buckets whose objects are all gone
+    DELETE FROM pggit.branch_schema_buckets s
+    USING stale
+    WHERE s.branch_id = p_branch_id
+    AND s.schema_name = stale.schema_name
+    AND s.bucket = stale.bucket
+    AND NOT EXISTS (
+        SELECT 1 FROM buckets b
+        WHERE b.schema_name = stale.schema_name AND b.bucket = stale.bucket
+    );
+
+    -- Schema nodes and the manifest root
+    WITH schemas AS (
+        SELECT
+            schema_name,
+            encode(sha256(convert_to(
+                string_agg(bucket || ' ' || bucket_hash, E'\n' ORDER BY bucket), 'UTF8'
+            )), 'hex') AS schema_hash,
+            SUM(object_count)::integer AS object_count,
+            array_agg(bucket ORDER BY bucket) AS buckets,
+            array_agg(bucket_hash ORDER BY bucket) AS bucket_hashes
+        FROM pggit.branch_schema_buckets
+        WHERE branch_id = p_branch_id
+        GROUP BY schema_name
+    ),
+    root AS (
+        SELECT
+            encode(sha256(convert_to(COALESCE(string_agg(
+                jsonb_build_array(schema_name, schema_hash)::text, E'\n' ORDER BY schema_name COLLATE "C"
+            ), ''), 'UTF8')), 'hex') AS manifest_hash,
+            COALESCE(SUM(object_count), 0)::integer AS object_count,
+            COUNT(*)::integer AS schema_count
+        FROM schemas
+    ),
+    stored_buckets AS (
+        INSERT INTO pggit.schema_manifest_buckets (schema_hash, bucket, bucket_hash)
+        SELECT s.schema_hash, b.bucket, b.bucket_hash
+        FROM schemas s
+        CROSS JOIN LATERAL unnest(s.buckets, s.bucket_hashes) b(bucket, bucket_hash)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM pggit.schema_manifest_buckets x WHERE x.schema_hash = s.schema_hash
+        )
+        ON CONFLICT DO NOTHING
+    ),
+    manifest AS (
+        INSERT INTO pggit.schema_manifests (manifest_hash, object_count, schema_count)
+        SELECT manifest_hash, object_count, schema_count FROM root
+        ON CONFLICT (manifest_hash) DO NOTHING
+        RETURNING manifest_hash
+    ),
+    stored_schemas AS (
+        INSERT INTO pggit.schema_manifest_schemas (manifest_hash, schema_name, schema_hash, object_count)
+        SELECT m.manifest_hash, s.schema_name, s.schema_hash, s.object_count
+        FROM manifest m
+        CROSS JOIN schemas s
+    )
+    SELECT manifest_hash INTO v_manifest_hash FROM root;
+
+    RETURN v_manifest_hash;
+END;
+$$ LANGUAGE plpgsql;
+
 -- ============================================================================
 -- FUNCTION: pggit.get_schema_snapshot()
 -- ============================================================================
--- Generate a complete schema representation for a branch
--- Captures: All objects, properties, and structure at a point in time
+-- Snapshot a branch's schema as a manifest
+-- Returns the manifest hash with per-schema hashes and counts; the objects
+-- themselves are listed by pggit.snapshot_objects().
 
 CREATE OR REPLACE FUNCTION pggit.get_schema_snapshot(
     p_branch_name text
@@ -74,9 +393,9 @@ CREATE OR REPLACE FUNCTION pggit.get_schema_snapshot(
 RETURNS jsonb AS $$
 DECLARE
     v_branch_id integer;
+    v_manifest_hash text;
     v_snapshot jsonb;
     v_object_count integer;
-    v_object record;
 BEGIN
     -- Get branch ID
     SELECT id INTO v_branch_id FROM pggit.branches WHERE name = p_branch_name;
@@ -84,36 +403,35 @@ BEGIN
         RAISE EXCEPTION 'Branch % not found', p_branch_name;
     END IF;
 
-    -- Get object count first
-    SELECT COUNT(*) INTO v_object_count
-    FROM pggit.objects
-    WHERE branch_id = v_branch_id;
-
-    -- Collect all objects from this branch
-    v_snapshot := jsonb_build_object(
-        'branch', p_branch_name,
-        'timestamp', NOW()::text,
-        'summary', jsonb_build_object('object_count', v_object_count),
-        'objects', COALESCE(
-            (SELECT jsonb_agg(
-                jsonb_build_object(
-                    'type', o.object_type::text,
-                    'schema', o.schema_name,
-                    'name', o.object_name,
-                    'definition', o.ddl_normalized,
-                    'content_hash', o.content_hash,
-                    'version', o.version
+    v_manifest_hash := pggit.build_schema_manifest(v_branch_id);
+
+    SELECT
+        m.object_count,
+        jsonb_build_object(
+            'branch', p_branch_name,
+            'timestamp', NOW()::text,
+            'manifest_hash', m.manifest_hash,
+            'summary', jsonb_build_object(
+                'object_count', m.object_count,
+                'schema_count', m.schema_count
+            ),
+            'schemas', COALESCE(
+                (SELECT jsonb_object_agg(
+                    s.schema_name,
+                    jsonb_build_object('hash', s.schema_hash, 'object_count', s.object_count)
                 )
+                FROM pggit.schema_manifest_schemas s
+                WHERE s.manifest_hash = m.manifest_hash),
+                '{}'::jsonb
             )
-            FROM pggit.objects o
-            WHERE o.branch_id = v_branch_id),
-            '[]'::jsonb
         )
-    );
+    INTO v_object_count, v_snapshot
+    FROM pggit.schema_manifests m
+    WHERE m.manifest_hash = v_manifest_hash;
 
     -- Store snapshot for caching (if not already cached at exact same timestamp)
-    INSERT INTO pggit.schema_snapshots (branch_id, branch_name, schema_json, object_count, snapshot_date)
-    VALUES (v_branch_id, p_branch_name, v_snapshot, v_object_count, NOW())
+    INSERT INTO pggit.schema_snapshots (branch_id, branch_name, schema_json, object_count, snapshot_date, manifest_hash)
+    VALUES (v_branch_id, p_branch_name, v_snapshot, v_object_count, NOW(), v_manifest_hash)
     ON CONFLICT (branch_id, snapshot_date) DO NOTHING;
 
     RAISE NOTICE 'get_schema_snapshot: Captured % objects from branch %', v_object_count, p_branch_name;
@@ -122,11 +440,107 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- List the objects of a manifest
+CREATE OR REPLACE FUNCTION pggit.snapshot_objects(
+    p_manifest_hash text
+)
+RETURNS TABLE (
+    schema_name text,
+    object_type text,
+    object_name text,
+    object_hash text
+) AS $$
+    SELECT s.schema_name, l.object_type, l.object_name, l.object_hash
+    FROM pggit.schema_manifest_schemas s
+    JOIN pggit.schema_manifest_buckets b ON b.schema_hash = s.schema_hash
+    JOIN pggit.schema_manifest_leaves l ON l.bucket_hash = b.bucket_hash
+    WHERE s.manifest_hash = p_manifest_hash
+$$ LANGUAGE sql STABLE;
+
+-- ============================================================================
+-- FUNCTION: pggit.diff_schema_manifests()
+-- ============================================================================
+-- Stream the object changes between two manifests
+-- Descends only into schemas, and then buckets, whose hashes differ, so
+-- the work depends on the number of changes rather than on schema size.
+
+CREATE OR REPLACE FUNCTION pggit.diff_schema_manifests(
+    p_old_manifest text,
+    p_new_manifest text
+)
+RETURNS TABLE (
+    change_type text,
+    object_type text,
+    schema_name text,
+    object_name text,
+    old_hash text,
+    new_hash text
+) AS $$
+BEGIN
+    IF p_old_manifest IS NOT DISTINCT FROM p_new_manifest THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    WITH schemas AS (
+        SELECT sn.schema_name, so.schema_hash AS old_schema, sn2.schema_hash AS new_schema
+        FROM (
+            SELECT s.schema_name FROM pggit.schema_manifest_schemas s WHERE s.manifest_hash = p_old_manifest
+            UNION
+            SELECT s.schema_name FROM pggit.schema_manifest_schemas s WHERE s.manifest_hash = p_new_manifest
+        ) sn
+        LEFT JOIN pggit.schema_manifest_schemas so
+            ON so.manifest_hash = p_old_manifest AND so.schema_name = sn.schema_name
+        LEFT JOIN pggit.schema_manifest_schemas sn2
+            ON sn2.manifest_hash = p_new_manifest AND sn2.schema_name = sn.schema_name
+        WHERE so.schema_hash IS DISTINCT FROM sn2.schema_hash
+    ),
+    buckets AS (
+        SELECT s.schema_name, bo.bucket_hash AS old_bucket, bn.bucket_hash AS new_bucket
+        FROM schemas s
+        CROSS JOIN LATERAL (
+            SELECT b.bucket FROM pggit.schema_manifest_buckets b WHERE b.schema_hash = s.old_schema
+            UNION
+            SELECT b.bucket FROM pggit.schema_manifest_buckets b WHERE b.schema_hash = s.new_schema
+        ) k
+        LEFT JOIN pggit.schema_manifest_buckets bo
+            ON bo.schema_hash = s.old_schema AND bo.bucket = k.bucket
+        LEFT JOIN pggit.schema_manifest_buckets bn
+            ON bn.schema_hash = s.new_schema AND bn.bucket = k.bucket
+        WHERE bo.bucket_hash IS DISTINCT FROM bn.bucket_hash
+    )
+    SELECT
+        CASE
+            WHEN lo.object_hash IS NULL THEN 'added'
+            WHEN ln.object_hash IS NULL THEN 'removed'
+            ELSE 'modified'
+        END,
+        k.object_type,
+        b.schema_name,
+        k.object_name,
+        lo.object_hash,
+        ln.object_hash
+    FROM buckets b
+    CROSS JOIN LATERAL (
+        SELECT l.object_type, l.object_name FROM pggit.schema_manifest_leaves l WHERE l.bucket_hash = b.old_bucket
+        UNION
+        SELECT l.object_type, l.object_name FROM pggit.schema_manifest_leaves l WHERE l.bucket_hash = b.new_bucket
+    ) k
+    LEFT JOIN pggit.schema_manifest_leaves lo
+        ON lo.bucket_hash = b.old_bucket AND lo.object_type = k.object_type AND lo.object_name = k.object_name
+    LEFT JOIN pggit.schema_manifest_leaves ln
+        ON ln.bucket_hash = b.new_bucket AND ln.object_type = k.object_type AND ln.object_name = k.object_name
+    WHERE lo.object_hash IS DISTINCT FROM ln.object_hash;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
 -- ============================================================================
 -- FUNCTION: pggit.compare_schemas()
 -- ============================================================================
 -- Detailed schema comparison between two branches
 -- Detects: Added, removed, modified objects and their changes
+-- Both branches are snapshotted as manifests and diffed by hash; only
+-- the changed objects' definitions are read.
 
 CREATE OR REPLACE FUNCTION pggit.compare_schemas(
     p_branch_a text,
@@ -134,125 +548,74 @@ CREATE OR REPLACE FUNCTION pggit.compare_schemas(
 )
 RETURNS jsonb AS $$
 DECLARE
-    v_result jsonb := '{
-        "branch_a": "",
-        "branch_b": "",
-        "timestamp": "",
-        "summary": {"added": 0, "removed": 0, "modified": 0},
-        "changes": []
-    }'::jsonb;
-    v_change record;
-    v_added_count integer := 0;
-    v_removed_count integer := 0;
-    v_modified_count integer := 0;
+    v_branch_a_id integer;
+    v_branch_b_id integer;
+    v_changes jsonb;
+    v_result jsonb;
+    v_added_count integer;
+    v_removed_count integer;
+    v_modified_count integer;
 BEGIN
-    v_result := jsonb_set(v_result, '{branch_a}', to_jsonb(p_branch_a));
-    v_result := jsonb_set(v_result, '{branch_b}', to_jsonb(p_branch_b));
-    v_result := jsonb_set(v_result, '{timestamp}', to_jsonb(NOW()::text));
-
-    -- Find added objects (in B, not in A)
-    FOR v_change IN
-        SELECT
-            'added'::text as change_type,
-            ob.object_type,
-            ob.schema_name,
-            ob.object_name,
-            ob.ddl_normalized
-        FROM pggit.objects ob
-        JOIN pggit.branches bb ON ob.branch_id = bb.id
-        WHERE bb.name = p_branch_b
-          AND NOT EXISTS (
-              SELECT 1 FROM pggit.objects oa
-              JOIN pggit.branches ba ON oa.branch_id = ba.id
-              WHERE ba.name = p_branch_a
-                AND oa.object_type = ob.object_type
-                AND oa.schema_name = ob.schema_name
-                AND oa.object_name = ob.object_name
-          )
-    LOOP
-        v_added_count := v_added_count + 1;
-        v_result := jsonb_set(
-            v_result,
-            '{changes}',
-            v_result->'changes' || jsonb_build_object(
-                'type', 'added',
-                'object_type', v_change.object_type::text,
-                'object_name', v_change.object_name,
-                'definition', v_change.ddl_normalized
-            )
-        );
-    END LOOP;
-
-    -- Find removed objects (in A, not in B)
-    FOR v_change IN
-        SELECT
-            'removed'::text as change_type,
-            oa.object_type,
-            oa.schema_name,
-            oa.object_name,
-            oa.ddl_normalized
-        FROM pggit.objects oa
-        JOIN pggit.branches ba ON oa.branch_id = ba.id
-        WHERE ba.name = p_branch_a
-          AND NOT EXISTS (
-              SELECT 1 FROM pggit.objects ob
-              JOIN pggit.branches bb ON ob.branch_id = bb.id
-              WHERE bb.name = p_branch_b
-                AND ob.object_type = oa.object_type
-                AND ob.schema_name = oa.schema_name
-                AND ob.object_name = oa.object_name
-          )
-    LOOP
-        v_removed_count := v_removed_count + 1;
-        v_result := jsonb_set(
-            v_result,
-            '{changes}',
-            v_result->'changes' || jsonb_build_object(
-                'type', 'removed',
-                'object_type', v_change.object_type::text,
-                'object_name', v_change.object_name,
-                'definition', v_change.ddl_normalized
-            )
-        );
-    END LOOP;
-
-    -- Find modified objects (same object, different definition)
-    FOR v_change IN
-        SELECT
-            'modified'::text as change_type,
-            oa.object_type,
-            oa.schema_name,
-            oa.object_name,
-            oa.ddl_normalized as old_def,
-            ob.ddl_normalized as new_def
-        FROM pggit.objects oa
-        JOIN pggit.branches ba ON oa.branch_id = ba.id
-        JOIN pggit.objects ob ON ob.object_type = oa.object_type
-                              AND ob.schema_name = oa.schema_name
-                              AND ob.object_name = oa.object_name
-        JOIN pggit.branches bb ON ob.branch_id = bb.id
-        WHERE ba.name = p_branch_a
-          AND bb.name = p_branch_b
-          AND oa.content_hash IS DISTINCT FROM ob.content_hash
-    LOOP
-        v_modified_count := v_modified_count + 1;
-        v_result := jsonb_set(
-            v_result,
-            '{changes}',
-            v_result->'changes' || jsonb_build_object(
-                'type', 'modified',
-                'object_type', v_change.object_type::text,
-                'object_name', v_change.object_name,
-                'old_definition', v_change.old_def,
-                'new_definition', v_change.new_def
-            )
-        );
-    END LOOP;
-
-    -- Update summary
-    v_result := jsonb_set(v_result, '{summary, added}', to_jsonb(v_added_count));
-    v_result := jsonb_set(v_result, '{summary, removed}', to_jsonb(v_removed_count));
-    v_result := jsonb_set(v_result, '{summary, modified}', to_jsonb(v_modified_count));
+    SELECT id INTO v_branch_a_id FROM pggit.branches WHERE name = p_branch_a;
+    SELECT id INTO v_branch_b_id FROM pggit.branches WHERE name = p_branch_b;
+
+    SELECT
+        COUNT(*) FILTER (WHERE d.change_type = 'added'),
+        COUNT(*) FILTER (WHERE d.change_type = 'removed'),
+        COUNT(*) FILTER (WHERE d.change_type = 'modified'),
+        COALESCE(jsonb_agg(
+            CASE d.change_type
+                WHEN 'modified' THEN jsonb_build_object(
+                    'type', 'modified',
+                    'object_type', d.object_type,
+                    'schema_name', d.schema_name,
+                    'object_name', d.object_name,
+                    'old_definition', oa.ddl_normalized,
+                    'new_definition', ob.ddl_normalized
+                )
+                ELSE jsonb_build_object(
+                    'type', d.change_type,
+                    'object_type', d.object_type,
+                    'schema_name', d.schema_name,
+                    'object_name', d.object_name,
+                    'definition', COALESCE(ob.ddl_normalized, oa.ddl_normalized)
+                )
+            END
+            ORDER BY d.change_type, d.schema_name, d.object_type, d.object_name
+        ), '[]'::jsonb)
+    INTO v_added_count, v_removed_count, v_modified_count, v_changes
+    FROM pggit.diff_schema_manifests(
+        CASE WHEN v_branch_a_id IS NOT NULL THEN pggit.build_schema_manifest(v_branch_a_id) END,
+        CASE WHEN v_branch_b_id IS NOT NULL THEN pggit.build_schema_manifest(v_branch_b_id) END
+    ) d
+    LEFT JOIN LATERAL (
+        SELECT o.ddl_normalized FROM pggit.objects o
+        WHERE o.branch_id = v_branch_a_id
+        AND o.object_type::text = d.object_type
+        AND o.schema_name = d.schema_name
+        AND o.object_name = d.object_name
+        LIMIT 1
+    ) oa ON d.change_type <> 'added'
+    LEFT JOIN LATERAL (
+        SELECT o.ddl_normalized FROM pggit.objects o
+        WHERE o.branch_id = v_branch_b_id
+        AND o.object_type::text = d.object_type
+        AND o.schema_name = d.schema_name
+        AND o.object_name = d.object_name
+        LIMIT 1
+    ) ob ON d.change_type <> 'removed';
+
+    v_result := jsonb_build_object(
+        'branch_a', p_branch_a,
+        'branch_b', p_branch_b,
+        'timestamp', NOW()::text,
+        'summary', jsonb_build_object(
+            'added', v_added_count,
+            'removed', v_removed_count,
+            'modified', v_modified_count
+        ),
+        'changes', v_changes
+    );
 
     -- Store diff for caching
     INSERT INTO pggit.schema_diffs (branch_a, branch_b, diff_json, added_count, removed_count, modified_count)
@@ -146,7 +146,6 @@ COMMENT ON FUNCTION pggit.record_access_pattern(TEXT, TEXT) IS
 'Record access pattern for ML-based prefetching prediction';
 
 -- Function to prefetch data from cold storage to hot cache
-DROP FUNCTION IF EXISTS pggit.prefetch_from_cold(p_object_name TEXT) CASCADE;
 CREATE OR REPLACE FUNCTION pggit.prefetch_from_cold(
 DECLARE
     v_object_id UUID;
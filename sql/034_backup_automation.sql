@@ -35,6 +35,7 @@ CREATE TABLE IF NOT EXISTS pggit.backup_jobs (
     job_type TEXT NOT NULL CHECK (job_type IN ('backup', 'verify', 'cleanup')),
     command TEXT NOT NULL,
     tool TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 100,  -- Lower values are claimed first
 
     -- Status tracking
     status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'completed', 'failed', 'cancelled', 'paused')),
@@ -42,13 +43,14 @@ CREATE TABLE IF NOT EXISTS pggit.backup_jobs (
     -- Retry logic
     attempts INTEGER DEFAULT 0,
     max_attempts INTEGER DEFAULT 3,
-    next_retry_at TIMESTAMPTZ,
+    next_retry_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,  -- When a queued or failed job becomes ready
     last_error TEXT,
 
     -- Timing
     created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     started_at TIMESTAMPTZ,
     completed_at TIMESTAMPTZ,
+    heartbeat_at TIMESTAMPTZ,  -- Last heartbeat from the worker running the job
 
     -- Metadata
     metadata JSONB DEFAULT '{}',
@@ -62,22 +64,84 @@ CREATE TABLE IF NOT EXISTS pggit.backup_jobs (
 
 COMMENT ON TABLE pggit.backup_jobs IS 'Persistent job queue for backup execution with retry logic';
 
+-- Upgrade queues created before job priorities and heartbeats
+ALTER TABLE pggit.backup_jobs
+    ADD COLUMN IF NOT EXISTS priority INTEGER NOT NULL DEFAULT 100,
+    ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ,
+    ALTER COLUMN next_retry_at SET DEFAULT CURRENT_TIMESTAMP;
+
+-- Earlier versions left next_retry_at NULL on queued jobs, which the
+-- claim query (next_retry_at <= now) would never pick up; a running job
+-- without a heartbeat is judged stale from its start time instead.
+UPDATE pggit.backup_jobs
+SET next_retry_at = COALESCE(created_at, CURRENT_TIMESTAMP)
+WHERE next_retry_at IS NULL
+  AND status IN ('queued', 'failed')
+  AND attempts < max_attempts;
+
+UPDATE pggit.backup_jobs
+SET heartbeat_at = started_at
+WHERE heartbeat_at IS NULL
+  AND status = 'running';
+
 -- Indexes for job processing
-CREATE INDEX IF NOT EXISTS idx_backup_jobs_status ON pggit.backup_jobs(status, next_retry_at) WHERE status IN ('queued', 'failed');
+-- idx_backup_jobs_ready holds only claimable jobs, in claim order, so
+-- claim_backup_jobs() reads the head of the index instead of sorting.
+DROP INDEX IF EXISTS pggit.idx_backup_jobs_status;
+CREATE INDEX IF NOT EXISTS idx_backup_jobs_ready ON pggit.backup_jobs(priority, next_retry_at, created_at)
+    WHERE status IN ('queued', 'failed') AND attempts < max_attempts;
 CREATE INDEX IF NOT EXISTS idx_backup_jobs_backup ON pggit.backup_jobs(backup_id);
 CREATE INDEX IF NOT EXISTS idx_backup_jobs_created ON pggit.backup_jobs(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_backup_jobs_heartbeat ON pggit.backup_jobs(heartbeat_at) WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_backup_jobs_running ON pggit.backup_jobs(started_at) WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_backup_jobs_finished ON pggit.backup_jobs(completed_at)
+    WHERE status IN ('completed', 'cancelled', 'failed') AND completed_at IS NOT NULL;
+
+-- Finished jobs moved out of the queue by archive_backup_jobs()
+CREATE TABLE IF NOT EXISTS pggit.backup_jobs_history (
+    LIKE pggit.backup_jobs INCLUDING DEFAULTS,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (job_id),
+    FOREIGN KEY (backup_id) REFERENCES pggit.backups(backup_id) ON DELETE CASCADE
+);
+
+COMMENT ON TABLE pggit.backup_jobs_history IS 'Completed, cancelled and permanently failed backup jobs moved out of the job queue';
+
+CREATE INDEX IF NOT EXISTS idx_backup_jobs_history_backup ON pggit.backup_jobs_history(backup_id);
+CREATE INDEX IF NOT EXISTS idx_backup_jobs_history_started ON pggit.backup_jobs_history(started_at);
+CREATE INDEX IF NOT EXISTS idx_backup_jobs_history_completed ON pggit.backup_jobs_history(completed_at);
+
+-- Queued, running and archived jobs together, for reporting
+-- Columns are listed because their order differs between fresh and
+-- upgraded installs.
+CREATE OR REPLACE VIEW pggit.backup_jobs_all AS
+SELECT j.job_id, j.backup_id, j.job_type, j.command, j.tool, j.priority,
+       j.status, j.attempts, j.max_attempts, j.next_retry_at, j.last_error,
+       j.created_at, j.started_at, j.completed_at, j.heartbeat_at, j.metadata,
+       NULL::TIMESTAMPTZ AS archived_at
+FROM pggit.backup_jobs j
+UNION ALL
+SELECT h.job_id, h.backup_id, h.job_type, h.command, h.tool, h.priority,
+       h.status, h.attempts, h.max_attempts, h.next_retry_at, h.last_error,
+       h.created_at, h.started_at, h.completed_at, h.heartbeat_at, h.metadata,
+       h.archived_at
+FROM pggit.backup_jobs_history h;
+
+COMMENT ON VIEW pggit.backup_jobs_all IS 'All backup jobs, whether still in the queue or archived';
 
 -- =====================================================
 -- Job Queue Functions
 -- =====================================================
 
 -- Enqueue a backup job
+DROP FUNCTION IF EXISTS pggit.enqueue_backup_job(UUID, TEXT, TEXT, INTEGER, JSONB);
 CREATE OR REPLACE FUNCTION pggit.enqueue_backup_job(
     p_backup_id UUID,
     p_command TEXT,
     p_tool TEXT,
     p_max_attempts INTEGER DEFAULT 3,
-    p_metadata JSONB DEFAULT '{}'
+    p_metadata JSONB DEFAULT '{}',
+    p_priority INTEGER DEFAULT 100
 ) RETURNS UUID AS $$
 DECLARE
     v_job_id UUID := gen_random_uuid();
@@ -88,6 +152,7 @@ BEGIN
         job_type,
         command,
         tool,
+        priority,
         max_attempts,
         metadata,
         next_retry_at
@@ -97,11 +162,15 @@ BEGIN
         'backup',
         p_command,
         p_tool,
+        p_priority,
         p_max_attempts,
         p_metadata,
         CURRENT_TIMESTAMP  -- Available immediately
     );
 
+    -- Wake listening workers once the enqueuing transaction commits
+    PERFORM pg_notify('pggit_backup_jobs', v_job_id::TEXT);
+
     RAISE NOTICE 'Enqueued backup job % for backup %', v_job_id, p_backup_id;
 
     RETURN v_job_id;
@@ -110,9 +179,17 @@ $$ LANGUAGE plpgsql;
 
 COMMENT ON FUNCTION pggit.enqueue_backup_job IS 'Enqueue a backup job for execution by the backup listener';
 
--- Get next job to process (called by listener)
-CREATE OR REPLACE FUNCTION pggit.get_next_backup_job(
-    p_worker_id TEXT DEFAULT 'default-worker'
+-- Claim up to p_limit ready jobs in one statement (called by listener)
+-- Jobs are taken in (priority, next_retry_at, created_at) order from the head
+-- of idx_backup_jobs_ready; jobs locked by other workers are skipped.
+-- p_tool_slots maps a tool to the number of its jobs the worker can still
+-- start, e.g. {"pgbackrest": 1}; unlisted tools are bounded by p_limit only.
+-- A batch may hold more candidates of a tool than it has slots for; those
+-- stay queued and fewer than p_limit jobs are returned.
+CREATE OR REPLACE FUNCTION pggit.claim_backup_jobs(
+    p_worker_id TEXT DEFAULT 'default-worker',
+    p_limit INTEGER DEFAULT 1,
+    p_tool_slots JSONB DEFAULT NULL
 ) RETURNS TABLE (
     job_id UUID,
     backup_id UUID,
@@ -121,54 +198,165 @@ CREATE OR REPLACE FUNCTION pggit.get_next_backup_job(
     attempts INTEGER,
     metadata JSONB
 ) AS $$
-DECLARE
-    v_job_id UUID;
 BEGIN
-    -- Find next available job and lock it
-    SELECT j.job_id INTO v_job_id
-    FROM pggit.backup_jobs j
-    WHERE j.status IN ('queued', 'failed')
-      AND (j.next_retry_at IS NULL OR j.next_retry_at <= CURRENT_TIMESTAMP)
-      AND j.attempts < j.max_attempts
-    ORDER BY
-        CASE WHEN j.status = 'queued' THEN 0 ELSE 1 END,  -- Queued jobs first
-        j.created_at ASC
-    LIMIT 1
-    FOR UPDATE SKIP LOCKED;
-
-    IF v_job_id IS NULL THEN
-        -- No jobs available
+    IF p_limit IS NULL OR p_limit < 1 THEN
         RETURN;
     END IF;
 
-    -- Mark as running
+    RETURN QUERY
+    WITH ready AS (
+        SELECT j.job_id, j.tool, j.priority, j.next_retry_at, j.created_at
+        FROM pggit.backup_jobs j
+        WHERE j.status IN ('queued', 'failed')
+          AND j.attempts < j.max_attempts
+          AND j.next_retry_at <= CURRENT_TIMESTAMP
+          AND COALESCE((p_tool_slots->>j.tool)::INTEGER, p_limit) > 0
+        ORDER BY j.priority, j.next_retry_at, j.created_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    ),
+    picked AS (
+        SELECT ranked.job_id
+        FROM (
+            SELECT r.job_id, r.tool,
+                   row_number() OVER (
+                       PARTITION BY r.tool
+                       ORDER BY r.priority, r.next_retry_at, r.created_at
+                   ) AS tool_rank
+            FROM ready r
+        ) ranked
+        WHERE ranked.tool_rank <= COALESCE((p_tool_slots->>ranked.tool)::INTEGER, p_limit)
+    )
     UPDATE pggit.backup_jobs j
     SET status = 'running',
         started_at = CURRENT_TIMESTAMP,
+        heartbeat_at = CURRENT_TIMESTAMP,
         attempts = j.attempts + 1,
         metadata = j.metadata || jsonb_build_object('worker_id', p_worker_id)
-    WHERE j.job_id = v_job_id;
+    FROM picked
+    WHERE j.job_id = picked.job_id
+    RETURNING j.job_id, j.backup_id, j.command, j.tool, j.attempts, j.metadata;
+END;
+$$ LANGUAGE plpgsql;
 
-    -- Return job details
+COMMENT ON FUNCTION pggit.claim_backup_jobs IS 'Claim a batch of ready jobs for a worker (used by backup listener service)';
+
+-- Get next job to process
+-- Single-job form of claim_backup_jobs(); p_exclude_tools skips tools the
+-- worker has no free slot for.
+DROP FUNCTION IF EXISTS pggit.get_next_backup_job(TEXT);
+CREATE OR REPLACE FUNCTION pggit.get_next_backup_job(
+    p_worker_id TEXT DEFAULT 'default-worker',
+    p_exclude_tools TEXT[] DEFAULT NULL
+) RETURNS TABLE (
+    job_id UUID,
+    backup_id UUID,
+    command TEXT,
+    tool TEXT,
+    attempts INTEGER,
+    metadata JSONB
+) AS $$
+BEGIN
     RETURN QUERY
-    SELECT
-        j.job_id,
-        j.backup_id,
-        j.command,
-        j.tool,
-        j.attempts,
-        j.metadata
-    FROM pggit.backup_jobs j
-    WHERE j.job_id = v_job_id;
+    SELECT c.*
+    FROM pggit.claim_backup_jobs(
+        p_worker_id,
+        1,
+        (SELECT jsonb_object_agg(t, 0) FROM unnest(p_exclude_tools) t)
+    ) c;
 END;
 $$ LANGUAGE plpgsql;
 
 COMMENT ON FUNCTION pggit.get_next_backup_job IS 'Get next job to process (used by backup listener service)';
 
+-- Record a heartbeat for jobs a worker is running
+-- Returns the jobs the worker still holds; a job missing from the result
+-- has been requeued or cancelled and its outcome will not be recorded.
+CREATE OR REPLACE FUNCTION pggit.heartbeat_backup_jobs(
+    p_worker_id TEXT,
+    p_job_ids UUID[]
+) RETURNS TABLE (
+    job_id UUID
+) AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE pggit.backup_jobs j
+    SET heartbeat_at = CURRENT_TIMESTAMP
+    WHERE j.job_id = ANY(p_job_ids)
+      AND j.status = 'running'
+      AND j.metadata->>'worker_id' = p_worker_id
+    RETURNING j.job_id;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION pggit.heartbeat_backup_jobs IS 'Keep the claim on running backup jobs alive (called periodically by the listener)';
+
+-- Release jobs whose worker stopped sending heartbeats
+-- Jobs with attempts left are queued again (and announced to listeners);
+-- the rest are failed permanently like any other exhausted job.
+CREATE OR REPLACE FUNCTION pggit.requeue_stale_backup_jobs(
+    p_stale_after INTERVAL DEFAULT '5 minutes'
+) RETURNS TABLE (
+    job_id UUID,
+    new_status TEXT
+) AS $$
+DECLARE
+    v_job RECORD;
+BEGIN
+    FOR v_job IN
+    WITH stale AS (
+        SELECT j.job_id
+        FROM pggit.backup_jobs j
+        WHERE j.status = 'running'
+          AND COALESCE(j.heartbeat_at, j.started_at) < CURRENT_TIMESTAMP - p_stale_after
+        FOR UPDATE SKIP LOCKED
+    ),
+    released AS (
+        UPDATE pggit.backup_jobs j
+        SET status = CASE WHEN j.attempts < j.max_attempts THEN 'queued' ELSE 'failed' END,
+            next_retry_at = CASE WHEN j.attempts < j.max_attempts THEN CURRENT_TIMESTAMP END,
+            completed_at = CASE WHEN j.attempts < j.max_attempts THEN NULL ELSE CURRENT_TIMESTAMP END,
+            last_error = format('Worker %s stopped sending heartbeats', j.metadata->>'worker_id'),
+            metadata = j.metadata || jsonb_build_object(
+                'heartbeat_lost_at', CURRENT_TIMESTAMP,
+                'permanently_failed', j.attempts >= j.max_attempts
+            )
+        FROM stale
+        WHERE j.job_id = stale.job_id
+        RETURNING j.job_id, j.backup_id, j.status, j.max_attempts
+    ),
+    failed_backups AS (
+        UPDATE pggit.backups b
+        SET status = 'failed',
+            error_message = 'Job failed after ' || r.max_attempts || ' attempts: worker heartbeat lost'
+        FROM released r
+        WHERE b.backup_id = r.backup_id
+          AND r.status = 'failed'
+    )
+    SELECT r.job_id, r.status
+    FROM released r
+    LOOP
+        IF v_job.status = 'queued' THEN
+            PERFORM pg_notify('pggit_backup_jobs', v_job.job_id::TEXT);
+        END IF;
+
+        job_id := v_job.job_id;
+        new_status := v_job.status;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION pggit.requeue_stale_backup_jobs IS 'Requeue or fail running backup jobs whose worker heartbeat is older than p_stale_after';
+
 -- Mark job as completed
+-- With p_worker_id, only the worker holding the claim can complete the job,
+-- so a worker whose claim was requeued cannot overwrite the new run.
+DROP FUNCTION IF EXISTS pggit.complete_backup_job(UUID, TEXT);
 CREATE OR REPLACE FUNCTION pggit.complete_backup_job(
     p_job_id UUID,
-    p_output TEXT DEFAULT NULL
+    p_output TEXT DEFAULT NULL,
+    p_worker_id TEXT DEFAULT NULL
 ) RETURNS BOOLEAN AS $$
 BEGIN
     UPDATE pggit.backup_jobs
@@ -179,28 +367,40 @@ BEGIN
             'completed_by', current_setting('application_name', true)
         )
     WHERE job_id = p_job_id
-      AND status = 'running';
+      AND status = 'running'
+      AND (p_worker_id IS NULL OR metadata->>'worker_id' = p_worker_id);
 
     RETURN FOUND;
 END;
 $$ LANGUAGE plpgsql;
 
-COMMENT ON FUNCTION pggit.complete_backup_job IS 'Mark a backup job as completed';
+COMMENT ON FUNCTION pggit.complete_backup_job IS 'Mark a backup job as completed; with p_worker_id, only if that worker still holds the claim';
 
 -- Mark job as failed with retry logic
+DROP FUNCTION IF EXISTS pggit.fail_backup_job(UUID, TEXT, INTEGER);
 CREATE OR REPLACE FUNCTION pggit.fail_backup_job(
     p_job_id UUID,
     p_error TEXT,
-    p_retry_delay_seconds INTEGER DEFAULT 300  -- 5 minutes
+    p_retry_delay_seconds INTEGER DEFAULT 300,  -- 5 minutes
+    p_worker_id TEXT DEFAULT NULL
 ) RETURNS BOOLEAN AS $$
 DECLARE
+    v_backup_id UUID;
     v_attempts INTEGER;
     v_max_attempts INTEGER;
 BEGIN
-    -- Get current attempt count
-    SELECT attempts, max_attempts INTO v_attempts, v_max_attempts
+    -- Lock the running job; nothing is recorded for a job this worker
+    -- no longer holds
+    SELECT backup_id, attempts, max_attempts INTO v_backup_id, v_attempts, v_max_attempts
     FROM pggit.backup_jobs
-    WHERE job_id = p_job_id;
+    WHERE job_id = p_job_id
+      AND status = 'running'
+      AND (p_worker_id IS NULL OR metadata->>'worker_id' = p_worker_id)
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN false;
+    END IF;
 
     IF v_attempts < v_max_attempts THEN
         -- Schedule retry with exponential backoff
@@ -212,8 +412,7 @@ BEGIN
                 'last_failure_at', CURRENT_TIMESTAMP,
                 'failure_reason', p_error
             )
-        WHERE job_id = p_job_id
-          AND status = 'running';
+        WHERE job_id = p_job_id;
     ELSE
         -- Max retries exceeded, permanently failed
         UPDATE pggit.backup_jobs
@@ -225,21 +424,75 @@ BEGIN
                 'permanently_failed', true,
                 'final_error', p_error
             )
-        WHERE job_id = p_job_id
-          AND status = 'running';
+        WHERE job_id = p_job_id;
 
         -- Also mark the backup as failed
         UPDATE pggit.backups
         SET status = 'failed',
             error_message = 'Job failed after ' || v_max_attempts || ' attempts: ' || p_error
-        WHERE backup_id = (SELECT backup_id FROM pggit.backup_jobs WHERE job_id = p_job_id);
+        WHERE backup_id = v_backup_id;
     END IF;
 
-    RETURN FOUND;
+    RETURN true;
 END;
 $$ LANGUAGE plpgsql;
 
-COMMENT ON FUNCTION pggit.fail_backup_job IS 'Mark a job as failed with automatic retry scheduling';
+COMMENT ON FUNCTION pggit.fail_backup_job IS 'Mark a job as failed with automatic retry scheduling; with p_worker_id, only if that worker still holds the claim';
+
+-- Move finished jobs out of the queue
+-- Completed, cancelled and permanently failed jobs finished more than
+-- p_older_than ago go to backup_jobs_history, keeping the queue table and
+-- its indexes down to the jobs workers still care about.
+CREATE OR REPLACE FUNCTION pggit.archive_backup_jobs(
+    p_older_than INTERVAL DEFAULT '1 hour',
+    p_batch_size INTEGER DEFAULT 10000
+) RETURNS INTEGER AS $$
+DECLARE
+    v_archived INTEGER;
+BEGIN
+    WITH finished AS (
+        SELECT j.job_id
+        FROM pggit.backup_jobs j
+        WHERE j.status IN ('completed', 'cancelled', 'failed')
+          AND j.completed_at IS NOT NULL
+          AND j.completed_at < CURRENT_TIMESTAMP - p_older_than
+          AND (j.status <> 'failed' OR j.attempts >= j.max_attempts)
+        ORDER BY j.completed_at
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    ),
+    moved AS (
+        DELETE FROM pggit.backup_jobs j
+        USING finished f
+        WHERE j.job_id = f.job_id
+        RETURNING j.*
+    ),
+    archived AS (
+        INSERT INTO pggit.backup_jobs_history (
+            job_id, backup_id, job_type, command, tool, priority,
+            status, attempts, max_attempts, next_retry_at, last_error,
+            created_at, started_at, completed_at, heartbeat_at, metadata,
+            archived_at
+        )
+        SELECT m.job_id, m.backup_id, m.job_type, m.command, m.tool, m.priority,
+               m.status, m.attempts, m.max_attempts, m.next_retry_at, m.last_error,
+               m.created_at, m.started_at, m.completed_at, m.heartbeat_at, m.metadata,
+               CURRENT_TIMESTAMP
+        FROM moved m
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INTEGER INTO v_archived FROM archived;
+
+    RETURN v_archived;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION pggit.archive_backup_jobs IS 'Move finished backup jobs from the queue to backup_jobs_history';
+
+-- Archiving runs from pggit.run_maintenance()
+INSERT INTO pggit.maintenance_jobs (job_name, run_interval, next_run)
+VALUES ('backup_job_archive', '15 minutes', CURRENT_TIMESTAMP)
+ON CONFLICT (job_name) DO NOTHING;
 
 -- =====================================================
 -- pgBackRest Integration
@@ -288,8 +541,8 @@ BEGIN
         p_options || jsonb_build_object('stanza', p_stanza)
     );
 
-    -- Build pgBackRest command
-    v_command := format('pgbackrest --stanza=%s --type=%s backup',
+    -- Build pgBackRest command; detail console logging reports per-file progress
+    v_command := format('pgbackrest --stanza=%s --type=%s --log-level-console=detail backup',
                        p_stanza,
                        p_backup_type);
 
@@ -321,20 +574,33 @@ $$ LANGUAGE plpgsql;
 COMMENT ON FUNCTION pggit.backup_pgbackrest IS 'Schedule an automated pgBackRest backup';
 
 -- Parse pgBackRest info output and update metadata
+-- Accepts one backup entry of `pgbackrest --output=json info` (sizes under
+-- info and info.repository, label, timestamp) or the flat database/repo form.
 CREATE OR REPLACE FUNCTION pggit.update_pgbackrest_metadata(
     p_backup_id UUID,
     p_info_json JSONB
 ) RETURNS BOOLEAN AS $$
+DECLARE
+    v_size BIGINT := COALESCE(
+        (p_info_json->'info'->>'size')::BIGINT,
+        (p_info_json->'database'->>'size')::BIGINT
+    );
+    v_repo_size BIGINT := COALESCE(
+        (p_info_json->'info'->'repository'->>'size')::BIGINT,
+        (p_info_json->'repo'->>'size')::BIGINT
+    );
 BEGIN
     UPDATE pggit.backups
     SET metadata = metadata || jsonb_build_object(
         'pgbackrest_info', p_info_json,
-        'database_size', (p_info_json->'database'->>'size')::BIGINT,
-        'backup_reference', p_info_json->>'reference',
-        'checksum', p_info_json->>'checksum'
+        'database_size', v_size,
+        'backup_reference', COALESCE(p_info_json->>'label', p_info_json->>'reference'),
+        'checksum', p_info_json->>'checksum',
+        'duration_seconds', (p_info_json->'timestamp'->>'stop')::BIGINT
+                            - (p_info_json->'timestamp'->>'start')::BIGINT
     ),
-    backup_size = COALESCE((p_info_json->'database'->>'size')::BIGINT, backup_size),
-    compressed_size = COALESCE((p_info_json->'repo'->>'size')::BIGINT, compressed_size)
+    backup_size = COALESCE(v_size, backup_size),
+    compressed_size = COALESCE(v_repo_size, compressed_size)
     WHERE backup_id = p_backup_id;
 
     RETURN FOUND;
@@ -343,6 +609,28 @@ $$ LANGUAGE plpgsql;
 
 COMMENT ON FUNCTION pggit.update_pgbackrest_metadata IS 'Update backup metadata from pgBackRest info output';
 
+-- Record progress of a running backup
+-- p_progress is parsed by the listener from the tool's output as the job
+-- runs (bytes, total_bytes, percent, duration_seconds,
+-- throughput_bytes_per_second) and replaces metadata.progress.
+CREATE OR REPLACE FUNCTION pggit.update_backup_progress(
+    p_backup_id UUID,
+    p_progress JSONB
+) RETURNS BOOLEAN AS $$
+BEGIN
+    UPDATE pggit.backups
+    SET metadata = metadata || jsonb_build_object(
+        'progress', p_progress || jsonb_build_object('updated_at', CURRENT_TIMESTAMP)
+    )
+    WHERE backup_id = p_backup_id
+      AND status = 'in_progress';
+
+    RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION pggit.update_backup_progress IS 'Record progress parsed from backup tool output while a job runs';
+
 -- =====================================================
 -- Barman Integration
 -- =====================================================
@@ -556,14 +844,21 @@ COMMENT ON VIEW pggit.backup_job_queue IS 'Current status of all backup jobs in
 -- =====================================================
 
 GRANT SELECT, INSERT, UPDATE ON pggit.backup_jobs TO PUBLIC;
+GRANT SELECT ON pggit.backup_jobs_history TO PUBLIC;
+GRANT SELECT ON pggit.backup_jobs_all TO PUBLIC;
 GRANT SELECT ON pggit.backup_job_queue TO PUBLIC;
 
 GRANT EXECUTE ON FUNCTION pggit.enqueue_backup_job TO PUBLIC;
+GRANT EXECUTE ON FUNCTION pggit.claim_backup_jobs TO PUBLIC;
 GRANT EXECUTE ON FUNCTION pggit.get_next_backup_job TO PUBLIC;
 GRANT EXECUTE ON FUNCTION pggit.complete_backup_job TO PUBLIC;
 GRANT EXECUTE ON FUNCTION pggit.fail_backup_job TO PUBLIC;
+GRANT EXECUTE ON FUNCTION pggit.heartbeat_backup_jobs TO PUBLIC;
+GRANT EXECUTE ON FUNCTION pggit.requeue_stale_backup_jobs TO PUBLIC;
+GRANT EXECUTE ON FUNCTION pggit.archive_backup_jobs TO PUBLIC;
 
 GRANT EXECUTE ON FUNCTION pggit.backup_pgbackrest TO PUBLIC;
 GRANT EXECUTE ON FUNCTION pggit.backup_barman TO PUBLIC;
 GRANT EXECUTE ON FUNCTION pggit.backup_pg_dump TO PUBLIC;
 GRANT EXECUTE ON FUNCTION pggit.update_pgbackrest_metadata TO PUBLIC;
+GRANT EXECUTE ON FUNCTION pggit.update_backup_progress TO PUBLIC;
@@ -62,7 +62,7 @@ BEGIN
         END::TEXT,
         5::BIGINT,
         'Jobs failed after max retries'::TEXT
-    FROM pggit.backup_jobs j
+    FROM pggit.backup_jobs_all j
     WHERE j.status = 'failed'
       AND j.attempts >= j.max_attempts;
 
@@ -96,7 +96,7 @@ BEGIN
         END::TEXT,
         2::BIGINT,
         'Number of workers active in last 5 minutes'::TEXT
-    FROM pggit.backup_jobs j
+    FROM pggit.backup_jobs_all j
     WHERE j.started_at > CURRENT_TIMESTAMP - INTERVAL '5 minutes';
 
     -- Backups completed today
@@ -162,7 +162,7 @@ BEGIN
             WHEN MAX(j.started_at) > CURRENT_TIMESTAMP - INTERVAL '10 minutes' THEN 'idle'
             ELSE 'inactive'
         END::TEXT AS status
-    FROM pggit.backup_jobs j
+    FROM pggit.backup_jobs_all j
     WHERE j.metadata ? 'worker_id'
       AND j.started_at > CURRENT_TIMESTAMP - (p_since_minutes || ' minutes')::INTERVAL
     GROUP BY j.metadata->>'worker_id'
@@ -215,7 +215,7 @@ BEGIN
         COUNT(*) FILTER (WHERE j.status = 'failed')::BIGINT,
         AVG(EXTRACT(EPOCH FROM (COALESCE(j.completed_at, CURRENT_TIMESTAMP) - j.started_at)))::NUMERIC,
         (COUNT(*) FILTER (WHERE j.status = 'completed')::NUMERIC / NULLIF(COUNT(*), 0) * 100)::NUMERIC
-    FROM pggit.backup_jobs j
+    FROM pggit.backup_jobs_all j
     WHERE j.metadata->>'worker_id' = p_worker_id
       AND j.started_at > CURRENT_TIMESTAMP - (p_since_hours || ' hours')::INTERVAL;
 END;
@@ -286,18 +286,25 @@ BEGIN
                 'retention_days', p_retention_days,
                 'cutoff_date', CURRENT_TIMESTAMP - (p_retention_days || ' days')::INTERVAL
             )
-        FROM pggit.backup_jobs j
+        FROM pggit.backup_jobs_all j
         WHERE j.status IN ('completed', 'cancelled')
           AND j.completed_at < CURRENT_TIMESTAMP - (p_retention_days || ' days')::INTERVAL;
     ELSE
-        -- Actually delete
-        WITH deleted AS (
+        -- Actually delete, from the archive and from jobs not archived yet
+        WITH deleted_history AS (
+            DELETE FROM pggit.backup_jobs_history h
+            WHERE h.status IN ('completed', 'cancelled')
+              AND h.completed_at < CURRENT_TIMESTAMP - (p_retention_days || ' days')::INTERVAL
+            RETURNING h.job_id
+        ),
+        deleted AS (
             DELETE FROM pggit.backup_jobs j
             WHERE j.status IN ('completed', 'cancelled')
               AND j.completed_at < CURRENT_TIMESTAMP - (p_retention_days || ' days')::INTERVAL
             RETURNING j.job_id
         )
-        SELECT COUNT(*)::BIGINT INTO v_deleted_count FROM deleted;
+        SELECT (SELECT COUNT(*) FROM deleted_history) + (SELECT COUNT(*) FROM deleted)
+        INTO v_deleted_count;
 
         RETURN QUERY
         SELECT
@@ -312,7 +319,7 @@ END;
 $$ LANGUAGE plpgsql;
 
 COMMENT ON FUNCTION pggit.cleanup_old_jobs IS
-'Delete old completed and cancelled jobs to prevent table bloat';
+'Delete old completed and cancelled jobs, archived or not, to prevent table bloat';
 
 -- Cancel stuck jobs
 CREATE OR REPLACE FUNCTION pggit.cancel_stuck_jobs(
@@ -490,7 +497,7 @@ BEGIN
         'avg_retry_rate'::TEXT,
         AVG(j.attempts - 1)::NUMERIC,
         'retries'::TEXT
-    FROM pggit.backup_jobs j
+    FROM pggit.backup_jobs_all j
     WHERE j.status = 'completed'
       AND j.created_at > CURRENT_TIMESTAMP - (p_since_days || ' days')::INTERVAL;
 END;
@@ -594,7 +601,7 @@ SELECT
     j.last_error AS job_error,
     j.metadata->>'worker_id' AS failed_worker
 FROM pggit.backups b
-LEFT JOIN pggit.backup_jobs j ON b.backup_id = j.backup_id
+LEFT JOIN pggit.backup_jobs_all j ON b.backup_id = j.backup_id
 WHERE b.status = 'failed'
   AND b.started_at > CURRENT_TIMESTAMP - INTERVAL '7 days'
 ORDER BY b.started_at DESC
@@ -613,6 +620,24 @@ CREATE OR REPLACE FUNCTION pggit.reset_job(
 )
 RETURNS BOOLEAN AS $$
 BEGIN
+    -- Bring an archived job back into the queue table
+    WITH restored AS (
+        DELETE FROM pggit.backup_jobs_history h
+        WHERE h.job_id = p_job_id
+          AND h.status IN ('failed', 'cancelled')
+        RETURNING h.*
+    )
+    INSERT INTO pggit.backup_jobs (
+        job_id, backup_id, job_type, command, tool, priority, status,
+        attempts, max_attempts, next_retry_at, last_error,
+        created_at, started_at, completed_at, heartbeat_at, metadata
+    )
+    SELECT
+        r.job_id, r.backup_id, r.job_type, r.command, r.tool, r.priority, r.status,
+        r.attempts, r.max_attempts, r.next_retry_at, r.last_error,
+        r.created_at, r.started_at, r.completed_at, r.heartbeat_at, r.metadata
+    FROM restored r;
+
     -- ✅ ROW-LEVEL LOCKING: Acquire exclusive lock on job record
     -- Prevent concurrent operations on the same job
     PERFORM 1
@@ -633,7 +658,7 @@ BEGIN
     UPDATE pggit.backup_jobs j
     SET status = 'queued',
         attempts = 0,
-        next_retry_at = NULL,
+        next_retry_at = CURRENT_TIMESTAMP,
         last_error = NULL,
         started_at = NULL,
         completed_at = NULL
@@ -28,6 +28,34 @@ CREATE TABLE pggit_audit.changes (
     commit_message TEXT,
     backfilled_from_v1 BOOLEAN DEFAULT FALSE,
     verified BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    chain_seq BIGINT,                   -- Position in the hash chain, set on insert
+    prev_hash TEXT,                     -- row_hash of the previous change
+    row_hash TEXT                       -- SHA-256 over this change and prev_hash
+);
+
+-- Table: chain_head
+-- Last link of the changes hash chain; appends lock it until commit
+CREATE TABLE pggit_audit.chain_head (
+    id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    last_seq BIGINT NOT NULL DEFAULT 0,
+    last_hash TEXT NOT NULL DEFAULT repeat('0', 64),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO pggit_audit.chain_head DEFAULT VALUES;
+
+-- Table: chain_checkpoints (immutable)
+-- Signed, verified positions in the hash chain; verification resumes from
+-- the latest one
+CREATE TABLE pggit_audit.chain_checkpoints (
+    checkpoint_id BIGSERIAL PRIMARY KEY,
+    chain_seq BIGINT NOT NULL,
+    row_hash TEXT NOT NULL,
+    signature TEXT NOT NULL,            -- HMAC-SHA256 of chain_seq and row_hash
+    verified_from BIGINT NOT NULL,      -- Checkpoint the verification started at
+    rows_verified BIGINT NOT NULL,
+    created_by TEXT NOT NULL DEFAULT CURRENT_USER,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -76,22 +104,106 @@ CREATE TRIGGER compliance_immutability
     BEFORE UPDATE OR DELETE ON pggit_audit.compliance_log
     FOR EACH ROW EXECUTE FUNCTION pggit_audit.prevent_compliance_modification();
 
+CREATE TRIGGER checkpoint_immutability
+    BEFORE UPDATE OR DELETE ON pggit_audit.chain_checkpoints
+    FOR EACH ROW EXECUTE FUNCTION pggit_audit.prevent_compliance_modification();
+
+-- Function: Hash of a change in the chain
+-- Covers every column except verified, which verify_change sets later.
+-- jsonb renders NULLs, text and timestamps the same under any session
+-- settings.
+CREATE OR REPLACE FUNCTION pggit_audit.change_hash(
+    p_change pggit_audit.changes
+) RETURNS TEXT AS $$
+    SELECT encode(digest(
+        p_change.prev_hash || jsonb_build_array(
+            p_change.chain_seq,
+            p_change.change_id,
+            p_change.commit_sha,
+            p_change.object_schema,
+            p_change.object_name,
+            p_change.object_type,
+            p_change.change_type,
+            p_change.old_definition,
+            p_change.new_definition,
+            p_change.author,
+            p_change.committed_at,
+            p_change.commit_message,
+            p_change.backfilled_from_v1,
+            p_change.created_at
+        )::TEXT,
+        'sha256'
+    ), 'hex');
+$$ LANGUAGE sql STABLE;
+
+-- Link new changes to the end of the hash chain
+CREATE OR REPLACE FUNCTION pggit_audit.chain_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_head pggit_audit.chain_head%ROWTYPE;
+BEGIN
+    -- Concurrent appends wait here until this transaction ends
+    SELECT * INTO v_head
+    FROM pggit_audit.chain_head
+    FOR UPDATE;
+
+    NEW.chain_seq := v_head.last_seq + 1;
+    NEW.prev_hash := v_head.last_hash;
+    NEW.row_hash := pggit_audit.change_hash(NEW);
+
+    UPDATE pggit_audit.chain_head
+    SET last_seq = NEW.chain_seq,
+        last_hash = NEW.row_hash,
+        updated_at = clock_timestamp();
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Only the verified flag of a chained change may be updated
+CREATE OR REPLACE FUNCTION pggit_audit.prevent_chained_change_modification()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF OLD.row_hash IS NOT NULL AND (
+        NEW.row_hash IS DISTINCT FROM OLD.row_hash
+        OR pggit_audit.change_hash(NEW) IS DISTINCT FROM OLD.row_hash
+    ) THEN
+        RAISE EXCEPTION 'Audit change % is hash-chained - only verified can be updated', OLD.change_id;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER changes_chain
+    BEFORE INSERT ON pggit_audit.changes
+    FOR EACH ROW EXECUTE FUNCTION pggit_audit.chain_change();
+
+CREATE TRIGGER changes_chain_immutability
+    BEFORE UPDATE ON pggit_audit.changes
+    FOR EACH ROW EXECUTE FUNCTION pggit_audit.prevent_chained_change_modification();
+
 -- ============================================
 -- PERFORMANCE INDICES
 -- ============================================
 
 -- Indices for changes table
 CREATE INDEX idx_changes_commit_sha ON pggit_audit.changes(commit_sha);
-CREATE INDEX idx_changes_object ON pggit_audit.changes(object_schema, object_name);
+-- Per-object history, newest first
+CREATE INDEX idx_changes_object ON pggit_audit.changes(object_schema, object_name, committed_at DESC);
 CREATE INDEX idx_changes_time ON pggit_audit.changes(committed_at DESC);
 CREATE INDEX idx_changes_type ON pggit_audit.changes(change_type);
 CREATE INDEX idx_changes_verified ON pggit_audit.changes(verified) WHERE verified = false;
+-- Chain order; verification walks it from the latest checkpoint
+CREATE INDEX idx_changes_chain_seq ON pggit_audit.changes(chain_seq);
 
 -- Indices for object_versions table
 CREATE INDEX idx_versions_object ON pggit_audit.object_versions(object_schema, object_name);
 CREATE INDEX idx_versions_commit ON pggit_audit.object_versions(commit_sha);
 CREATE INDEX idx_versions_time ON pggit_audit.object_versions(created_at DESC);
 
+-- Indices for chain_checkpoints table
+CREATE INDEX idx_checkpoints_seq ON pggit_audit.chain_checkpoints(chain_seq DESC);
+
 -- Indices for compliance_log table
 CREATE INDEX idx_compliance_change ON pggit_audit.compliance_log(change_id);
 CREATE INDEX idx_compliance_status ON pggit_audit.compliance_log(verification_status);
@@ -238,6 +350,8 @@ COMMENT ON SCHEMA pggit_audit_v0 IS 'Immutable audit trail extracted from pggit_
 COMMENT ON TABLE pggit_audit.changes IS 'All DDL changes detected from pggit_v0 commits';
 COMMENT ON TABLE pggit_audit.object_versions IS 'Complete version history for each database object';
 COMMENT ON TABLE pggit_audit.compliance_log IS 'Immutable log of compliance verification activities';
+COMMENT ON TABLE pggit_audit.chain_head IS 'Last link of the audit change hash chain';
+COMMENT ON TABLE pggit_audit.chain_checkpoints IS 'Immutable, signed checkpoints of the verified audit hash chain';
 COMMENT ON FUNCTION pggit_audit.verify_change IS 'Mark a change as verified and log compliance activity';
 
 -- ============================================
@@ -249,5 +363,6 @@ BEGIN
     RAISE NOTICE 'pgGit Audit Layer initialized successfully';
     RAISE NOTICE 'Schema: pggit_audit created with compliance tables';
     RAISE NOTICE 'Immutability: compliance_log cannot be modified';
+    RAISE NOTICE 'Tamper evidence: changes are hash-chained, verify with pggit_audit.verify_audit_chain()';
     RAISE NOTICE 'Ready to extract DDL history from pggit_v0';
 END $$;
\ No newline at end of file
@@ -134,220 +134,151 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- View: v1 history parsed into audit change fields
+-- Each statement is matched against the DDL patterns in priority order;
+-- the first statement pattern that matches decides the object type and
+-- change type, and its object pattern extracts schema and name. Statements
+-- that cannot be parsed fall back to the change description. Filtering on
+-- history_id reads only that range of pggit.history.
+CREATE OR REPLACE VIEW pggit_audit.v1_history_changes AS
+WITH patterns (priority, statement_pattern, object_pattern, object_type, change_type) AS (
+    VALUES
+        (1, '^CREATE\s+(?:OR\s+REPLACE\s+)?TABLE\s+',
+            'CREATE\s+(?:OR\s+REPLACE\s+)?TABLE\s+(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'TABLE', 'CREATE'),
+        (2, '^ALTER\s+TABLE\s+',
+            'ALTER\s+TABLE\s+(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'TABLE', 'ALTER'),
+        (3, '^DROP\s+TABLE\s+',
+            'DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'TABLE', 'DROP'),
+        (4, '^CREATE\s+(?:OR\s+REPLACE\s+)?FUNCTION\s+',
+            'CREATE\s+(?:OR\s+REPLACE\s+)?FUNCTION\s+(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?\s*\(', 'FUNCTION', 'CREATE'),
+        (5, '^DROP\s+FUNCTION\s+',
+            'DROP\s+FUNCTION\s+(?:IF\s+EXISTS\s+)?(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?\s*\(', 'FUNCTION', 'DROP'),
+        (6, '^CREATE\s+(?:OR\s+REPLACE\s+)?VIEW\s+',
+            'CREATE\s+(?:OR\s+REPLACE\s+)?VIEW\s+(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'VIEW', 'CREATE'),
+        (7, '^DROP\s+VIEW\s+',
+            'DROP\s+VIEW\s+(?:IF\s+EXISTS\s+)?(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'VIEW', 'DROP'),
+        (8, '^CREATE\s+(?:UNIQUE\s+)?INDEX\s+',
+            'CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'INDEX', 'CREATE'),
+        (9, '^DROP\s+INDEX\s+',
+            'DROP\s+INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+EXISTS\s+)?(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'INDEX', 'DROP'),
+        (10, '^CREATE\s+SEQUENCE\s+',
+            'CREATE\s+SEQUENCE\s+(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'SEQUENCE', 'CREATE'),
+        (11, '^DROP\s+SEQUENCE\s+',
+            'DROP\s+SEQUENCE\s+(?:IF\s+EXISTS\s+)?(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'SEQUENCE', 'DROP')
+)
+SELECT
+    h.id AS history_id,
+    h.commit_hash,
+    h.sql_executed,
+    h.change_description,
+    h.created_at,
+    h.created_by,
+    CASE
+        WHEN d.m IS NOT NULL THEN COALESCE(d.m[1], d.m[2], d.m[3], 'public')
+        WHEN f.m IS NOT NULL THEN COALESCE(f.m[1], 'public')
+        ELSE 'unknown'
+    END AS object_schema,
+    CASE
+        WHEN d.m IS NOT NULL THEN d.m[4]
+        WHEN f.m IS NOT NULL THEN COALESCE(f.m[2], 'unknown')
+        ELSE 'unknown'
+    END AS object_name,
+    CASE
+        WHEN d.m IS NOT NULL THEN d.object_type
+        WHEN f.m IS NOT NULL THEN COALESCE(d.object_type, 'TABLE')
+        ELSE 'UNKNOWN'
+    END AS object_type,
+    CASE
+        WHEN d.m IS NOT NULL THEN d.change_type
+        WHEN f.m IS NOT NULL THEN COALESCE(d.change_type, 'UNKNOWN')
+        ELSE 'UNKNOWN'
+    END AS change_type,
+    d.m IS NULL AS used_fallback
+FROM pggit.history h
+LEFT JOIN LATERAL (
+    SELECT
+        p.object_type,
+        p.change_type,
+        regexp_match(h.sql_executed, p.object_pattern, 'i') AS m
+    FROM patterns p
+    WHERE upper(trim(h.sql_executed)) ~ p.statement_pattern
+    ORDER BY p.priority
+    LIMIT 1
+) d ON true
+LEFT JOIN LATERAL (
+    SELECT regexp_match(h.change_description, 'table\s+(\w+\.)?(\w+)', 'i') AS m
+    WHERE d.m IS NULL
+) f ON true;
+
 -- Function: Backfill audit data from v1 history
--- This function converts pggit v1 history to pggit_audit.changes records
--- Implements robust DDL parsing for production use
-CREATE OR REPLACE FUNCTION pggit_audit.backfill_from_v1_history()
-RETURNS TABLE(processed INT, errors INT, warnings INT) AS $$
+-- Converts pggit v1 history to pggit_audit.changes records, optionally
+-- only for a range of history ids. Statements are parsed in one pass into
+-- a CTE, which spills to disk instead of being held in memory, and
+-- written with a single multi-row INSERT; its sort reads every parsed row
+-- before the first is written, so the audit chain is only locked for the
+-- write. For large histories use pggit_migration.start_v1_backfill and
+-- run_v1_backfill, which commit per chunk and can run on several
+-- connections.
+DROP FUNCTION IF EXISTS pggit_audit.backfill_from_v1_history();
+CREATE OR REPLACE FUNCTION pggit_audit.backfill_from_v1_history(
+    p_from_id INTEGER DEFAULT NULL,
+    p_to_id INTEGER DEFAULT NULL
+) RETURNS TABLE(processed INT, errors INT, warnings INT) AS $$
 DECLARE
-    v_history_record RECORD;
-    v_processed_count INT := 0;
-    v_error_count INT := 0;
-    v_warning_count INT := 0;
-    v_change_id UUID;
-    v_object_schema TEXT;
-    v_object_name TEXT;
-    v_object_type TEXT;
-    v_change_type TEXT;
-    v_parse_success BOOLEAN;
-    v_ddl_upper TEXT;
-    v_matches TEXT[];
+    v_processed_count INT;
+    v_error_count INT;
+    v_warning_count INT;
+    v_total_count INT;
 BEGIN
-    -- Process each v1 history record in chronological order
-    FOR v_history_record IN
-        SELECT * FROM pggit.history
-        ORDER BY created_at, id
-    LOOP
-        BEGIN
-            -- Initialize parsing variables
-            v_object_schema := NULL;
-            v_object_name := NULL;
-            v_object_type := NULL;
-            v_change_type := NULL;
-            v_parse_success := false;
-            v_ddl_upper := upper(trim(v_history_record.sql_executed));
-
-            -- Comprehensive DDL parsing with multiple patterns
-            -- TABLE operations
-            IF v_ddl_upper ~ '^CREATE\s+(?:OR\s+REPLACE\s+)?TABLE\s+' THEN
-                v_object_type := 'TABLE';
-                v_change_type := 'CREATE';
-                v_matches := regexp_match(v_history_record.sql_executed, 'CREATE\s+(?:OR\s+REPLACE\s+)?TABLE\s+(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'i');
-                IF v_matches IS NOT NULL THEN
-                    v_object_schema := COALESCE(v_matches[1], v_matches[2], v_matches[3], 'public');
-                    v_object_name := v_matches[4];
-                    v_parse_success := true;
-                END IF;
-
-            ELSIF v_ddl_upper ~ '^ALTER\s+TABLE\s+' THEN
-                v_object_type := 'TABLE';
-                v_change_type := 'ALTER';
-                v_matches := regexp_match(v_history_record.sql_executed, 'ALTER\s+TABLE\s+(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'i');
-                IF v_matches IS NOT NULL THEN
-                    v_object_schema := COALESCE(v_matches[1], v_matches[2], v_matches[3], 'public');
-                    v_object_name := v_matches[4];
-                    v_parse_success := true;
-                END IF;
-
-            ELSIF v_ddl_upper ~ '^DROP\s+TABLE\s+' THEN
-                v_object_type := 'TABLE';
-                v_change_type := 'DROP';
-                v_matches := regexp_match(v_history_record.sql_executed, 'DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'i');
-                IF v_matches IS NOT NULL THEN
-                    v_object_schema := COALESCE(v_matches[1], v_matches[2], v_matches[3], 'public');
-                    v_object_name := v_matches[4];
-                    v_parse_success := true;
-                END IF;
-
-            -- FUNCTION operations
-            ELSIF v_ddl_upper ~ '^CREATE\s+(?:OR\s+REPLACE\s+)?FUNCTION\s+' THEN
-                v_object_type := 'FUNCTION';
-                v_change_type := 'CREATE';
-                v_matches := regexp_match(v_history_record.sql_executed, 'CREATE\s+(?:OR\s+REPLACE\s+)?FUNCTION\s+(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?\s*\(', 'i');
-                IF v_matches IS NOT NULL THEN
-                    v_object_schema := COALESCE(v_matches[1], v_matches[2], v_matches[3], 'public');
-                    v_object_name := v_matches[4];
-                    v_parse_success := true;
-                END IF;
-
-            ELSIF v_ddl_upper ~ '^DROP\s+FUNCTION\s+' THEN
-                v_object_type := 'FUNCTION';
-                v_change_type := 'DROP';
-                v_matches := regexp_match(v_history_record.sql_executed, 'DROP\s+FUNCTION\s+(?:IF\s+EXISTS\s+)?(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?\s*\(', 'i');
-                IF v_matches IS NOT NULL THEN
-                    v_object_schema := COALESCE(v_matches[1], v_matches[2], v_matches[3], 'public');
-                    v_object_name := v_matches[4];
-                    v_parse_success := true;
-                END IF;
-
-            -- VIEW operations
-            ELSIF v_ddl_upper ~ '^CREATE\s+(?:OR\s+REPLACE\s+)?VIEW\s+' THEN
-                v_object_type := 'VIEW';
-                v_change_type := 'CREATE';
-                v_matches := regexp_match(v_history_record.sql_executed, 'CREATE\s+(?:OR\s+REPLACE\s+)?VIEW\s+(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'i');
-                IF v_matches IS NOT NULL THEN
-                    v_object_schema := COALESCE(v_matches[1], v_matches[2], v_matches[3], 'public');
-                    v_object_name := v_matches[4];
-                    v_parse_success := true;
-                END IF;
-
-            ELSIF v_ddl_upper ~ '^DROP\s+VIEW\s+' THEN
-                v_object_type := 'VIEW';
-                v_change_type := 'DROP';
-                v_matches := regexp_match(v_history_record.sql_executed, 'DROP\s+VIEW\s+(?:IF\s+EXISTS\s+)?(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'i');
-                IF v_matches IS NOT NULL THEN
-                    v_object_schema := COALESCE(v_matches[1], v_matches[2], v_matches[3], 'public');
-                    v_object_name := v_matches[4];
-                    v_parse_success := true;
-                END IF;
-
-            -- INDEX operations
-            ELSIF v_ddl_upper ~ '^CREATE\s+(?:UNIQUE\s+)?INDEX\s+' THEN
-                v_object_type := 'INDEX';
-                v_change_type := 'CREATE';
-                v_matches := regexp_match(v_history_record.sql_executed, 'CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'i');
-                IF v_matches IS NOT NULL THEN
-                    v_object_schema := COALESCE(v_matches[1], v_matches[2], v_matches[3], 'public');
-                    v_object_name := v_matches[4];
-                    v_parse_success := true;
-                END IF;
-
-            ELSIF v_ddl_upper ~ '^DROP\s+INDEX\s+' THEN
-                v_object_type := 'INDEX';
-                v_change_type := 'DROP';
-                v_matches := regexp_match(v_history_record.sql_executed, 'DROP\s+INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+EXISTS\s+)?(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'i');
-                IF v_matches IS NOT NULL THEN
-                    v_object_schema := COALESCE(v_matches[1], v_matches[2], v_matches[3], 'public');
-                    v_object_name := v_matches[4];
-                    v_parse_success := true;
-                END IF;
-
-            -- SEQUENCE operations
-            ELSIF v_ddl_upper ~ '^CREATE\s+SEQUENCE\s+' THEN
-                v_object_type := 'SEQUENCE';
-                v_change_type := 'CREATE';
-                v_matches := regexp_match(v_history_record.sql_executed, 'CREATE\s+SEQUENCE\s+(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'i');
-                IF v_matches IS NOT NULL THEN
-                    v_object_schema := COALESCE(v_matches[1], v_matches[2], v_matches[3], 'public');
-                    v_object_name := v_matches[4];
-                    v_parse_success := true;
-                END IF;
-
-            ELSIF v_ddl_upper ~ '^DROP\s+SEQUENCE\s+' THEN
-                v_object_type := 'SEQUENCE';
-                v_change_type := 'DROP';
-                v_matches := regexp_match(v_history_record.sql_executed, 'DROP\s+SEQUENCE\s+(?:IF\s+EXISTS\s+)?(?:"([^"]+)"\.|"([^"]+)"\.|(\w+)\.)?"?(\w+)"?', 'i');
-                IF v_matches IS NOT NULL THEN
-                    v_object_schema := COALESCE(v_matches[1], v_matches[2], v_matches[3], 'public');
-                    v_object_name := v_matches[4];
-                    v_parse_success := true;
-                END IF;
-            END IF;
-
-            -- Handle parsing results
-            IF NOT v_parse_success THEN
-                -- Try to extract minimal info from change_description
-                IF v_history_record.change_description ~* 'table\s+(\w+\.)?(\w+)' THEN
-                    v_object_type := COALESCE(v_object_type, 'TABLE');
-                    v_matches := regexp_match(v_history_record.change_description, 'table\s+(\w+\.)?(\w+)', 'i');
-                    v_object_schema := COALESCE(v_matches[1], 'public');
-                    v_object_name := COALESCE(v_matches[2], 'unknown');
-                    v_change_type := COALESCE(v_change_type, 'UNKNOWN');
-                    v_warning_count := v_warning_count + 1;
-                    RAISE WARNING 'Used fallback parsing for history record %: %', v_history_record.id, left(v_history_record.sql_executed, 100);
-                ELSE
-                    -- Complete fallback
-                    v_object_schema := 'unknown';
-                    v_object_name := 'unknown';
-                    v_object_type := 'UNKNOWN';
-                    v_change_type := 'UNKNOWN';
-                    v_warning_count := v_warning_count + 1;
-                    RAISE WARNING 'Could not parse DDL for history record %: %', v_history_record.id, left(v_history_record.sql_executed, 100);
-                END IF;
-            END IF;
-
-            -- Validate required fields
-            IF v_object_schema IS NULL OR v_object_name IS NULL THEN
-                RAISE EXCEPTION 'Failed to extract schema/name from DDL: %', left(v_history_record.sql_executed, 200);
-            END IF;
-
-            v_change_id := gen_random_uuid();
-
-            INSERT INTO pggit_audit.changes (
-                change_id,
-                commit_sha,
-                object_schema,
-                object_name,
-                object_type,
-                change_type,
-                new_definition,
-                author,
-                committed_at,
-                commit_message,
-                backfilled_from_v1,
-                verified
-            ) VALUES (
-                v_change_id,
-                COALESCE(v_history_record.commit_hash, 'unknown'),
-                v_object_schema,
-                v_object_name,
-                COALESCE(v_object_type, 'UNKNOWN'),
-                COALESCE(v_change_type, 'UNKNOWN'),
-                v_history_record.sql_executed,
-                COALESCE(v_history_record.created_by, 'unknown'),
-                v_history_record.created_at,
-                'Backfilled from v1: ' || COALESCE(v_history_record.change_description, 'Unknown change'),
-                true,
-                false
-            );
-
-            v_processed_count := v_processed_count + 1;
-
-        EXCEPTION WHEN OTHERS THEN
-            v_error_count := v_error_count + 1;
-            RAISE WARNING 'Error processing history record %: %', v_history_record.id, SQLERRM;
-        END;
-    END LOOP;
+    WITH parsed AS (
+        SELECT v.*
+        FROM pggit_audit.v1_history_changes v
+        WHERE v.history_id BETWEEN COALESCE(p_from_id, 0) AND COALESCE(p_to_id, 2147483647)
+    ),
+    inserted AS (
+        INSERT INTO pggit_audit.changes (
+            commit_sha,
+            object_schema,
+            object_name,
+            object_type,
+            change_type,
+            new_definition,
+            author,
+            committed_at,
+            commit_message,
+            backfilled_from_v1,
+            verified
+        )
+        SELECT
+            COALESCE(v.commit_hash, 'unknown'),
+            v.object_schema,
+            v.object_name,
+            v.object_type,
+            v.change_type,
+            v.sql_executed,
+            COALESCE(v.created_by, 'unknown'),
+            v.created_at,
+            'Backfilled from v1: ' || COALESCE(v.change_description, 'Unknown change'),
+            true,
+            false
+        FROM parsed v
+        WHERE v.object_schema IS NOT NULL
+        AND v.object_name IS NOT NULL
+        ORDER BY v.created_at, v.history_id
+        RETURNING 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM inserted)::INT,
+        COUNT(*) FILTER (WHERE v.object_schema IS NULL OR v.object_name IS NULL)::INT,
+        COUNT(*) FILTER (WHERE v.used_fallback)::INT,
+        COUNT(*)::INT
+    INTO v_processed_count, v_error_count, v_warning_count, v_total_count
+    FROM parsed v;
+
+    IF v_warning_count > 0 THEN
+        RAISE WARNING 'Used fallback parsing for % of % history records',
+            v_warning_count, v_total_count;
+    END IF;
 
     RETURN QUERY SELECT v_processed_count, v_error_count, v_warning_count;
 END;
@@ -722,6 +653,178 @@ BEGIN
     FROM pggit_audit.compliance_log
     WHERE created_at != verified_at;  -- This is a basic check; real immutability is enforced by trigger
 
+    -- Check 8: Hash chain since the last checkpoint
+    RETURN QUERY
+    SELECT
+        'hash_chain'::TEXT,
+        v.status,
+        v.details,
+        CASE
+            WHEN v.status = 'PASS' THEN 'LOW'
+            ELSE 'CRITICAL'
+        END
+    FROM pggit_audit.verify_audit_chain() v;
+
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function: Verify the changes hash chain
+-- Starts at the latest checkpoint (or the first change with p_full) and
+-- recomputes every later row hash in one ordered pass over chain_seq, so a
+-- daily verification only reads the changes of that day. Reports the
+-- first change that was edited, removed or inserted out of chain, and
+-- checks the checkpoint signature when a signing key is given or set in
+-- pggit.audit_signing_key. The scan stops at the chain head read at the
+-- start, so changes appended while it runs are left to the next run
+-- instead of being reported as a chain running past its head.
+--
+-- A key passed as p_signing_key is part of the statement: it can show up
+-- in the server log (log_statement, log_min_duration_statement, errors)
+-- and, when sent as a literal, in pg_stat_statements. Prefer setting
+-- pggit.audit_signing_key in server or role configuration.
+CREATE OR REPLACE FUNCTION pggit_audit.verify_audit_chain(
+    p_full BOOLEAN DEFAULT false,
+    p_signing_key TEXT DEFAULT NULL
+) RETURNS TABLE (
+    verified_from BIGINT,
+    verified_to BIGINT,
+    rows_verified BIGINT,
+    broken_at BIGINT,
+    status TEXT,
+    details TEXT
+) AS $$
+DECLARE
+    v_key TEXT := COALESCE(p_signing_key, NULLIF(current_setting('pggit.audit_signing_key', true), ''));
+    v_checkpoint pggit_audit.chain_checkpoints%ROWTYPE;
+    v_head pggit_audit.chain_head%ROWTYPE;
+    v_from_seq BIGINT := 0;
+    v_from_hash TEXT := repeat('0', 64);
+    v_rows BIGINT;
+    v_last_seq BIGINT;
+    v_last_hash TEXT;
+    v_broken BIGINT;
+    v_unchained BIGINT;
+BEGIN
+    IF NOT p_full THEN
+        SELECT * INTO v_checkpoint
+        FROM pggit_audit.chain_checkpoints cp
+        ORDER BY cp.chain_seq DESC, cp.checkpoint_id DESC
+        LIMIT 1;
+
+        IF FOUND THEN
+            IF v_key IS NOT NULL AND v_checkpoint.signature IS DISTINCT FROM
+               encode(hmac(v_checkpoint.chain_seq || ':' || v_checkpoint.row_hash, v_key, 'sha256'), 'hex') THEN
+                RETURN QUERY SELECT v_checkpoint.chain_seq, v_checkpoint.chain_seq, 0::BIGINT,
+                    v_checkpoint.chain_seq, 'FAIL'::TEXT,
+                    format('Signature of checkpoint %s does not match', v_checkpoint.checkpoint_id);
+                RETURN;
+            END IF;
+
+            IF EXISTS (
+                SELECT 1 FROM pggit_audit.changes c
+                WHERE c.chain_seq = v_checkpoint.chain_seq
+                AND c.row_hash IS DISTINCT FROM v_checkpoint.row_hash
+            ) THEN
+                RETURN QUERY SELECT v_checkpoint.chain_seq, v_checkpoint.chain_seq, 0::BIGINT,
+                    v_checkpoint.chain_seq, 'FAIL'::TEXT,
+                    format('Change %s no longer matches checkpoint %s',
+                        v_checkpoint.chain_seq, v_checkpoint.checkpoint_id);
+                RETURN;
+            END IF;
+
+            v_from_seq := v_checkpoint.chain_seq;
+            v_from_hash := v_checkpoint.row_hash;
+        END IF;
+    END IF;
+
+    SELECT * INTO v_head FROM pggit_audit.chain_head;
+
+    WITH chain AS (
+        SELECT
+            c.chain_seq,
+            c.row_hash,
+            c.row_hash IS DISTINCT FROM pggit_audit.change_hash(c)
+                OR c.prev_hash IS DISTINCT FROM LAG(c.row_hash, 1, v_from_hash) OVER w
+                OR c.chain_seq <> (LAG(c.chain_seq, 1, v_from_seq) OVER w) + 1 AS is_broken
+        FROM pggit_audit.changes c
+        WHERE c.chain_seq > v_from_seq
+          AND c.chain_seq <= v_head.last_seq
+        WINDOW w AS (ORDER BY c.chain_seq)
+    )
+    SELECT
+        COUNT(*),
+        MIN(chain.chain_seq) FILTER (WHERE chain.is_broken),
+        (array_agg(chain.chain_seq ORDER BY chain.chain_seq DESC))[1],
+        (array_agg(chain.row_hash ORDER BY chain.chain_seq DESC))[1]
+    INTO v_rows, v_broken, v_last_seq, v_last_hash
+    FROM chain;
+
+    -- Changes written with the trigger disabled carry no chain position
+    SELECT COUNT(*) INTO v_unchained
+    FROM pggit_audit.changes c
+    WHERE c.chain_seq IS NULL;
+
+    v_last_seq := COALESCE(v_last_seq, v_from_seq);
+    v_last_hash := COALESCE(v_last_hash, v_from_hash);
+
+    IF v_broken IS NOT NULL THEN
+        RETURN QUERY SELECT v_from_seq, v_last_seq, v_rows, v_broken, 'FAIL'::TEXT,
+            format('Hash chain broken at change %s', v_broken);
+    ELSIF v_last_seq <> v_head.last_seq OR v_last_hash <> v_head.last_hash THEN
+        RETURN QUERY SELECT v_from_seq, v_last_seq, v_rows, v_last_seq + 1, 'FAIL'::TEXT,
+            format('Hash chain ends at change %s but its head is at %s', v_last_seq, v_head.last_seq);
+    ELSIF v_unchained > 0 THEN
+        RETURN QUERY SELECT v_from_seq, v_last_seq, v_rows, NULL::BIGINT, 'FAIL'::TEXT,
+            format('Found %s changes outside the hash chain', v_unchained);
+    ELSE
+        RETURN QUERY SELECT v_from_seq, v_last_seq, v_rows, NULL::BIGINT, 'PASS'::TEXT,
+            format('Verified %s changes from %s to %s%s', v_rows, v_from_seq, v_last_seq,
+                CASE WHEN v_key IS NULL AND v_from_seq > 0 THEN ' (checkpoint signature not checked)' ELSE '' END);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function: Verify the chain and sign a checkpoint at its head
+-- Appends wait while the checkpoint is taken. Run it periodically (e.g.
+-- daily); the next verification starts from here. Returns the checkpoint.
+-- As with verify_audit_chain(), a key passed as an argument can end up in
+-- logs; pggit.audit_signing_key keeps it out of the statement text.
+CREATE OR REPLACE FUNCTION pggit_audit.create_audit_checkpoint(
+    p_signing_key TEXT DEFAULT NULL
+) RETURNS BIGINT AS $$
+DECLARE
+    v_key TEXT := COALESCE(p_signing_key, NULLIF(current_setting('pggit.audit_signing_key', true), ''));
+    v_head pggit_audit.chain_head%ROWTYPE;
+    v_result RECORD;
+    v_checkpoint_id BIGINT;
+BEGIN
+    IF v_key IS NULL THEN
+        RAISE EXCEPTION 'No audit signing key given and pggit.audit_signing_key is not set';
+    END IF;
+
+    SELECT * INTO v_head
+    FROM pggit_audit.chain_head
+    FOR UPDATE;
+
+    SELECT * INTO v_result
+    FROM pggit_audit.verify_audit_chain(false, v_key);
+
+    IF v_result.status <> 'PASS' THEN
+        RAISE EXCEPTION 'Audit chain verification failed: %', v_result.details;
+    END IF;
+
+    INSERT INTO pggit_audit.chain_checkpoints (
+        chain_seq, row_hash, signature, verified_from, rows_verified
+    ) VALUES (
+        v_head.last_seq,
+        v_head.last_hash,
+        encode(hmac(v_head.last_seq || ':' || v_head.last_hash, v_key, 'sha256'), 'hex'),
+        v_result.verified_from,
+        v_result.rows_verified
+    )
+    RETURNING checkpoint_id INTO v_checkpoint_id;
+
+    RETURN v_checkpoint_id;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -822,13 +925,19 @@ DECLARE
     v_changes_count INT := 0;
     v_versions_count INT := 0;
     v_compliance_count INT := 0;
+    v_checkpoint_seq BIGINT;
 BEGIN
+    -- Only changes covered by a signed checkpoint can go
+    SELECT COALESCE(MAX(chain_seq), 0) INTO v_checkpoint_seq
+    FROM pggit_audit.chain_checkpoints;
+
     -- Count records that would be affected
     SELECT COUNT(*) INTO v_changes_count
     FROM pggit_audit.changes
     WHERE committed_at < v_cutoff_date
       AND verified = true  -- Only cleanup verified old data
-      AND backfilled_from_v1 = true;  -- Prefer to keep native changes
+      AND backfilled_from_v1 = true  -- Prefer to keep native changes
+      AND chain_seq <= v_checkpoint_seq;  -- Verification resumes after the checkpoint
 
     SELECT COUNT(*) INTO v_versions_count
     FROM pggit_audit.object_versions
@@ -852,7 +961,8 @@ BEGIN
         DELETE FROM pggit_audit.changes
         WHERE committed_at < v_cutoff_date
           AND verified = true
-          AND backfilled_from_v1 = true;
+          AND backfilled_from_v1 = true
+          AND chain_seq <= v_checkpoint_seq;
 
         RETURN QUERY SELECT 'cleanup_completed'::TEXT, v_changes_count + v_versions_count + v_compliance_count, 'Records removed'::TEXT;
     ELSE
@@ -867,6 +977,8 @@ COMMENT ON FUNCTION pggit_audit.get_object_ddl_at_commit IS 'Get DDL definition
 COMMENT ON FUNCTION pggit_audit.compare_object_versions IS 'Compare object DDL between two commits';
 COMMENT ON FUNCTION pggit_audit.process_commit_range IS 'Extract and store changes for commit range with validation';
 COMMENT ON FUNCTION pggit_audit.validate_audit_integrity IS 'Validate audit data integrity comprehensively';
+COMMENT ON FUNCTION pggit_audit.verify_audit_chain IS 'Verify the audit hash chain since the last checkpoint';
+COMMENT ON FUNCTION pggit_audit.create_audit_checkpoint IS 'Verify the audit hash chain and sign a checkpoint at its head';
 COMMENT ON FUNCTION pggit_audit.determine_object_type IS 'Determine object type from DDL content';
 COMMENT ON FUNCTION pggit_audit.validate_change_record IS 'Validate completeness of change record';
 COMMENT ON FUNCTION pggit_audit.generate_audit_report IS 'Generate comprehensive audit summary report';
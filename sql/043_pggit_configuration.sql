@@ -16,6 +16,180 @@ CREATE TABLE IF NOT EXISTS pggit.tracking_config (
 -- Index for fast lookups during event processing
 CREATE INDEX idx_tracking_config_lookup ON pggit.tracking_config(config_type, action);
 
+-- Compiled tracking rules
+-- config_version is bumped by every change to tracking_config; rules holds
+-- the rule set compiled at compiled_version, one entry per precedence class
+-- (config type, priority, action) in evaluation order.
+CREATE TABLE IF NOT EXISTS pggit.tracking_rules_state (
+    id integer PRIMARY KEY DEFAULT 1 CHECK (id = 1), -- Ensure single row
+    config_version bigint NOT NULL DEFAULT 0,
+    compiled_version bigint,
+    rules jsonb NOT NULL DEFAULT '[]'::jsonb,
+    compiled_at timestamptz
+);
+
+INSERT INTO pggit.tracking_rules_state (id)
+VALUES (1)
+ON CONFLICT (id) DO NOTHING;
+
+-- Recompile on every configuration change, so DDL capture only reads the
+-- compiled rules and never writes
+CREATE OR REPLACE FUNCTION pggit.bump_tracking_config_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE pggit.tracking_rules_state
+    SET config_version = config_version + 1
+    WHERE id = 1;
+    PERFORM pggit.compile_tracking_rules();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tracking_config_version ON pggit.tracking_config;
+CREATE TRIGGER tracking_config_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON pggit.tracking_config
+    FOR EACH STATEMENT EXECUTE FUNCTION pggit.bump_tracking_config_version();
+
+-- Combine LIKE patterns into one anchored regular expression
+-- Patterns are merged into a prefix trie so the regex engine follows one
+-- branch per shared prefix instead of trying every alternative.
+CREATE OR REPLACE FUNCTION pggit.like_patterns_to_regex(patterns text[]) RETURNS text AS $$
+BEGIN
+    IF cardinality(patterns) > 0 THEN
+        RETURN '^' || pggit.like_patterns_trie(patterns);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION pggit.like_patterns_trie(patterns text[]) RETURNS text AS $$
+DECLARE
+    branch record;
+    alternatives text[] := '{}';
+    unit_regex text;
+BEGIN
+    FOR branch IN
+        SELECT u.unit, array_agg(substr(u.pattern, length(u.unit) + 1)) AS rests
+        FROM (
+            -- A unit is one character, or a backslash-escaped character
+            SELECT p AS pattern, substring(p from '^(\\.|.)') AS unit
+            FROM unnest(patterns) AS p
+        ) u
+        GROUP BY u.unit
+        ORDER BY u.unit NULLS FIRST
+    LOOP
+        IF branch.unit IS NULL THEN
+            alternatives := alternatives || '$'::text;
+        ELSIF branch.unit = '%' AND '' = ANY(branch.rests) THEN
+            -- A trailing % accepts any remainder
+            alternatives := alternatives || ''::text;
+        ELSE
+            unit_regex := CASE
+                WHEN branch.unit = '%' THEN '.*'
+                WHEN branch.unit = '_' THEN '.'
+                ELSE regexp_replace(right(branch.unit, 1), '([^[:alnum:]_ ])', '\\\1')
+            END;
+            alternatives := alternatives || (unit_regex || pggit.like_patterns_trie(branch.rests));
+        END IF;
+    END LOOP;
+
+    IF cardinality(alternatives) = 1 THEN
+        RETURN alternatives[1];
+    END IF;
+    RETURN '(?:' || array_to_string(alternatives, '|') || ')';
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- Build the compiled rule set from tracking_config, without storing it
+-- Each precedence class gets a jsonb object of its literal patterns, for
+-- key lookups, and one combined regex for its wildcard patterns.
+-- Classes are ordered pattern, operation, schema, then by priority, so the
+-- first matching class decides.
+CREATE OR REPLACE FUNCTION pggit.tracking_rules_from_config() RETURNS jsonb AS $$
+    SELECT COALESCE(jsonb_agg(
+        jsonb_build_object(
+            'config_type', c.config_type,
+            'priority', c.priority,
+            'action', c.action,
+            'exact', c.exact,
+            'regex', c.regex
+        )
+        ORDER BY c.precedence, c.priority DESC, c.action
+    ), '[]'::jsonb)
+    FROM (
+        SELECT
+            config_type,
+            COALESCE(priority, 0) AS priority,
+            action,
+            CASE config_type WHEN 'pattern' THEN 1 WHEN 'operation' THEN 2 ELSE 3 END AS precedence,
+            -- Schema rules also match by equality, operation rules only do
+            COALESCE(jsonb_object_agg(pattern, true) FILTER (
+                WHERE config_type <> 'pattern' OR pattern !~ '[%_\\]'), '{}'::jsonb) AS exact,
+            pggit.like_patterns_to_regex(array_agg(pattern) FILTER (
+                WHERE config_type <> 'operation' AND pattern ~ '[%_\\]')) AS regex
+        FROM pggit.tracking_config
+        GROUP BY config_type, COALESCE(priority, 0), action
+    ) c;
+$$ LANGUAGE sql STABLE;
+
+-- Compile tracking_config into tracking_rules_state
+-- Runs from the tracking_config trigger, never from DDL capture.
+CREATE OR REPLACE FUNCTION pggit.compile_tracking_rules() RETURNS jsonb AS $$
+DECLARE
+    v_version bigint;
+    v_rules jsonb;
+BEGIN
+    -- Serializes concurrent compiles; the version is read before the rules
+    -- so a concurrent config change can only make the result look stale
+    SELECT config_version INTO v_version
+    FROM pggit.tracking_rules_state
+    WHERE id = 1
+    FOR UPDATE;
+
+    v_rules := pggit.tracking_rules_from_config();
+
+    INSERT INTO pggit.tracking_rules_state (id, config_version, compiled_version, rules, compiled_at)
+    VALUES (1, COALESCE(v_version, 0), COALESCE(v_version, 0), v_rules, now())
+    ON CONFLICT (id) DO UPDATE
+    SET compiled_version = EXCLUDED.compiled_version,
+        rules = EXCLUDED.rules,
+        compiled_at = EXCLUDED.compiled_at;
+
+    RETURN v_rules;
+END;
+$$ LANGUAGE plpgsql;
+
+-- The compiled rules, or rules built in memory if the stored ones are stale
+-- (tracking_config changed with triggers disabled). Never writes.
+CREATE OR REPLACE FUNCTION pggit.current_tracking_rules() RETURNS jsonb AS $$
+    SELECT CASE WHEN s.compiled_version IS NOT DISTINCT FROM s.config_version
+        THEN s.rules
+        ELSE pggit.tracking_rules_from_config()
+    END
+    FROM pggit.tracking_rules_state s
+    WHERE s.id = 1;
+$$ LANGUAGE sql STABLE;
+
+-- The decision of the first compiled class matching a schema and operation
+-- Returns no row when no rule matches. Inlined into the caller's query, so
+-- the event triggers decide for all objects of a command in one statement.
+CREATE OR REPLACE FUNCTION pggit.match_tracking_rules(
+    p_rules jsonb,
+    p_schema text,
+    p_operation text
+) RETURNS TABLE (track boolean) AS $$
+    SELECT r.rule->>'action' = 'track'
+    FROM jsonb_array_elements(p_rules) WITH ORDINALITY AS r(rule, ord)
+    CROSS JOIN LATERAL (
+        SELECT CASE r.rule->>'config_type' WHEN 'schema' THEN p_schema ELSE p_operation END AS subject
+    ) s
+    WHERE r.rule->'exact' ? s.subject
+        OR s.subject ~ (r.rule->>'regex')
+    ORDER BY r.ord
+    LIMIT 1;
+$$ LANGUAGE sql STABLE;
+
+SELECT pggit.compile_tracking_rules();
+
 -- Function to configure tracking preferences
 CREATE OR REPLACE FUNCTION pggit.configure_tracking(
     track_schemas text[] DEFAULT NULL,
@@ -87,53 +261,20 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Function to check if an object should be tracked
+-- Evaluates the compiled rules; the event triggers match whole commands
+-- through pggit.match_tracking_rules() instead.
 CREATE OR REPLACE FUNCTION pggit.should_track_object(
     object_schema text,
     object_type text,
     operation text
 ) RETURNS boolean AS $$
 DECLARE
-    should_track boolean := true;
-    config_record record;
+    should_track boolean;
 BEGIN
-    -- Check schema rules
-    FOR config_record IN 
-        SELECT action, pattern, priority 
-        FROM pggit.tracking_config 
-        WHERE config_type = 'schema' 
-            AND (object_schema = pattern OR object_schema LIKE pattern)
-        ORDER BY priority DESC
-        LIMIT 1
-    LOOP
-        should_track := (config_record.action = 'track');
-        EXIT;
-    END LOOP;
-    
-    -- Check operation rules (can override schema rules)
-    FOR config_record IN 
-        SELECT action, pattern, priority 
-        FROM pggit.tracking_config 
-        WHERE config_type = 'operation' 
-            AND operation = pattern
-        ORDER BY priority DESC
-        LIMIT 1
-    LOOP
-        should_track := (config_record.action = 'track');
-    END LOOP;
-    
-    -- Check pattern rules (highest precedence)
-    FOR config_record IN 
-        SELECT action, pattern, priority 
-        FROM pggit.tracking_config 
-        WHERE config_type = 'pattern' 
-            AND operation LIKE pattern
-        ORDER BY priority DESC
-        LIMIT 1
-    LOOP
-        should_track := (config_record.action = 'track');
-    END LOOP;
-    
-    RETURN should_track;
+    SELECT m.track INTO should_track
+    FROM pggit.match_tracking_rules(pggit.current_tracking_rules(), object_schema, operation) m;
+
+    RETURN COALESCE(should_track, true);
 END;
 $$ LANGUAGE plpgsql;
 
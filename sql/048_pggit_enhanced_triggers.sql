@@ -15,6 +15,7 @@ DECLARE
     comment_directive boolean;
     operation text;
     current_deployment_id uuid;
+    tracking_rules jsonb;
 BEGIN
     -- Check if tracking is paused
     IF EXISTS (
@@ -35,13 +36,17 @@ BEGIN
     FROM pggit.deployment_state ds
     WHERE ds.is_active = true;
     
-    FOR obj IN SELECT * FROM pg_event_trigger_ddl_commands()
+    -- Rules are compiled when tracking_config changes; this only reads them
+    tracking_rules := pggit.current_tracking_rules();
+    
+    -- Configuration is matched for every object of the command at once,
+    -- skipping pggit schema objects
+    FOR obj IN
+        SELECT c.*, COALESCE(m.track, true) AS tracked
+        FROM pg_event_trigger_ddl_commands() c
+        LEFT JOIN LATERAL pggit.match_tracking_rules(tracking_rules, c.schema_name, operation) m ON true
+        WHERE c.schema_name IS DISTINCT FROM 'pggit'
     LOOP
-        -- Skip pggit schema objects
-        IF obj.schema_name = 'pggit' THEN
-            CONTINUE;
-        END IF;
-        
         -- Check comment-based directive first (highest priority)
         -- Extract just the object name without schema
         comment_directive := pggit.check_object_comment_directive(
@@ -54,16 +59,7 @@ BEGIN
             END
         );
         
-        IF comment_directive IS NOT NULL THEN
-            should_track := comment_directive;
-        ELSE
-            -- Check configuration
-            should_track := pggit.should_track_object(
-                obj.schema_name,
-                obj.object_type,
-                operation
-            );
-        END IF;
+        should_track := COALESCE(comment_directive, obj.tracked);
         
         -- Skip if not tracking
         IF NOT should_track THEN
@@ -119,9 +115,9 @@ CREATE OR REPLACE FUNCTION pggit.enhanced_drop_trigger_func()
 RETURNS event_trigger AS $$
 DECLARE
     obj record;
-    should_track boolean;
     operation text;
     current_deployment_id uuid;
+    tracking_rules jsonb;
 BEGIN
     -- Check if tracking is paused
     IF EXISTS (
@@ -141,24 +137,17 @@ BEGIN
     FROM pggit.deployment_state ds
     WHERE ds.is_active = true;
     
-    FOR obj IN SELECT * FROM pg_event_trigger_dropped_objects()
+    tracking_rules := pggit.current_tracking_rules();
+    
+    -- Configuration for drops, matched set-based; untracked objects and
+    -- pggit schema objects are filtered out
+    FOR obj IN
+        SELECT d.*
+        FROM pg_event_trigger_dropped_objects() d
+        LEFT JOIN LATERAL pggit.match_tracking_rules(tracking_rules, d.schema_name, operation) m ON true
+        WHERE d.schema_name IS DISTINCT FROM 'pggit'
+        AND COALESCE(m.track, true)
     LOOP
-        -- Skip pggit schema objects
-        IF obj.schema_name = 'pggit' THEN
-            CONTINUE;
-        END IF;
-        
-        -- Check configuration for drops
-        should_track := pggit.should_track_object(
-            obj.schema_name,
-            obj.object_type,
-            operation
-        );
-        
-        IF NOT should_track THEN
-            CONTINUE;
-        END IF;
-        
         BEGIN
             -- In deployment mode, just count the change
             IF current_deployment_id IS NOT NULL THEN
@@ -27,6 +27,8 @@ CREATE TABLE pggit_migration.migration_status (
     created_changes INTEGER DEFAULT 0,
     errors INTEGER DEFAULT 0,
     warnings INTEGER DEFAULT 0,
+    total_chunks INTEGER DEFAULT 0,     -- v1 history backfill chunks planned
+    completed_chunks INTEGER DEFAULT 0, -- and checkpointed
     created_by TEXT,
     notes TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -48,6 +50,23 @@ CREATE TABLE pggit_migration.migration_commits (
     UNIQUE(migration_id, commit_sha)
 );
 
+-- Table: backfill_chunks
+-- Ranges of pggit.history ids backfilled into pggit_audit.changes
+CREATE TABLE pggit_migration.backfill_chunks (
+    migration_id UUID NOT NULL REFERENCES pggit_migration.migration_status(migration_id) ON DELETE CASCADE,
+    first_history_id INTEGER NOT NULL,
+    last_history_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'PENDING', -- PENDING, COMPLETED, FAILED
+    changes_created INTEGER DEFAULT 0,
+    errors INTEGER DEFAULT 0,
+    warnings INTEGER DEFAULT 0,
+    worker_pid INTEGER,
+    processing_time INTERVAL,
+    processed_at TIMESTAMP,
+
+    PRIMARY KEY (migration_id, first_history_id)
+);
+
 -- Table: migration_errors
 -- Detailed error tracking during migration
 CREATE TABLE pggit_migration.migration_errors (
@@ -83,6 +102,7 @@ CREATE INDEX idx_migration_status_started ON pggit_migration.migration_status(st
 CREATE INDEX idx_migration_commits_migration ON pggit_migration.migration_commits(migration_id);
 CREATE INDEX idx_migration_commits_status ON pggit_migration.migration_commits(status);
 CREATE INDEX idx_migration_commits_sha ON pggit_migration.migration_commits(commit_sha);
+CREATE INDEX idx_backfill_chunks_pending ON pggit_migration.backfill_chunks(migration_id, first_history_id) WHERE status = 'PENDING';
 CREATE INDEX idx_migration_errors_migration ON pggit_migration.migration_errors(migration_id);
 CREATE INDEX idx_migration_errors_type ON pggit_migration.migration_errors(error_type);
 CREATE INDEX idx_migration_verification_migration ON pggit_migration.migration_verification(migration_id);
@@ -215,6 +235,199 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Function: Recompute a chunked backfill's totals from its chunks
+-- A failed chunk counts as one error until it is retried, when its counts
+-- are replaced by the retry's. The migration row is locked before the
+-- chunks are read, so the totals include every chunk committed by a worker
+-- that held the lock before this one.
+CREATE OR REPLACE FUNCTION pggit_migration.refresh_backfill_totals(
+    p_migration_id UUID
+) RETURNS VOID AS $$
+BEGIN
+    PERFORM 1
+    FROM pggit_migration.migration_status
+    WHERE migration_id = p_migration_id
+    FOR UPDATE;
+
+    UPDATE pggit_migration.migration_status ms
+    SET total_chunks = t.total_chunks,
+        completed_chunks = t.completed_chunks,
+        total_changes = t.created_changes + t.errors,
+        created_changes = t.created_changes,
+        errors = t.errors,
+        warnings = t.warnings
+    FROM (
+        SELECT
+            COUNT(*)::INTEGER AS total_chunks,
+            COUNT(*) FILTER (WHERE bc.status = 'COMPLETED')::INTEGER AS completed_chunks,
+            COALESCE(SUM(bc.changes_created), 0)::INTEGER AS created_changes,
+            COALESCE(SUM(bc.errors), 0)::INTEGER AS errors,
+            COALESCE(SUM(bc.warnings), 0)::INTEGER AS warnings
+        FROM pggit_migration.backfill_chunks bc
+        WHERE bc.migration_id = p_migration_id
+    ) t
+    WHERE ms.migration_id = p_migration_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function: Plan a chunked backfill of v1 history
+-- Splits the range of pggit.history ids into chunks for
+-- pggit_migration.run_v1_backfill. Calling it again for the same migration
+-- keeps completed chunks, adds chunks for newer history and retries failed
+-- ones. Returns the number of chunks left to run.
+CREATE OR REPLACE FUNCTION pggit_migration.start_v1_backfill(
+    p_migration_id UUID,
+    p_chunk_size INTEGER DEFAULT 10000
+) RETURNS INTEGER AS $$
+DECLARE
+    v_min_id INTEGER;
+    v_max_id INTEGER;
+    v_pending INTEGER;
+BEGIN
+    IF p_chunk_size IS NULL OR p_chunk_size < 1 THEN
+        RAISE EXCEPTION 'Chunk size must be positive, got %', p_chunk_size;
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM pggit_migration.migration_status WHERE migration_id = p_migration_id
+    ) THEN
+        RAISE EXCEPTION 'Migration not found: %', p_migration_id;
+    END IF;
+
+    SELECT MIN(id), MAX(id) INTO v_min_id, v_max_id FROM pggit.history;
+
+    -- Chunks continue after the last planned one
+    SELECT COALESCE(MAX(last_history_id) + 1, v_min_id) INTO v_min_id
+    FROM pggit_migration.backfill_chunks
+    WHERE migration_id = p_migration_id;
+
+    INSERT INTO pggit_migration.backfill_chunks (migration_id, first_history_id, last_history_id)
+    SELECT p_migration_id, g, LEAST(g + p_chunk_size - 1, v_max_id)
+    FROM generate_series(v_min_id, v_max_id, p_chunk_size) AS g;
+
+    UPDATE pggit_migration.backfill_chunks
+    SET status = 'PENDING',
+        changes_created = 0,
+        errors = 0,
+        warnings = 0
+    WHERE migration_id = p_migration_id
+    AND status = 'FAILED';
+
+    SELECT COUNT(*) FILTER (WHERE status = 'PENDING') INTO v_pending
+    FROM pggit_migration.backfill_chunks
+    WHERE migration_id = p_migration_id;
+
+    UPDATE pggit_migration.migration_status ms
+    SET status = 'RUNNING',
+        started_at = COALESCE(ms.started_at, CURRENT_TIMESTAMP),
+        completed_at = NULL
+    WHERE ms.migration_id = p_migration_id;
+
+    PERFORM pggit_migration.refresh_backfill_totals(p_migration_id);
+
+    RETURN v_pending;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function: Backfill the next chunk of v1 history
+-- Claims the first pending chunk no other session is working on, so
+-- workers on several connections take disjoint id ranges. The chunk's
+-- changes and its checkpoint are written together; a failing chunk is
+-- rolled back, logged and marked FAILED. migration_status totals are
+-- recomputed from the chunks after each one. Returns false when no chunk
+-- is left to claim.
+CREATE OR REPLACE FUNCTION pggit_migration.backfill_v1_chunk(
+    p_migration_id UUID
+) RETURNS BOOLEAN AS $$
+DECLARE
+    v_chunk pggit_migration.backfill_chunks%ROWTYPE;
+    v_result RECORD;
+    v_started TIMESTAMP := clock_timestamp();
+BEGIN
+    SELECT * INTO v_chunk
+    FROM pggit_migration.backfill_chunks
+    WHERE migration_id = p_migration_id
+    AND status = 'PENDING'
+    ORDER BY first_history_id
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED;
+
+    IF NOT FOUND THEN
+        -- The last worker to finish closes the migration
+        UPDATE pggit_migration.migration_status ms
+        SET status = CASE WHEN ms.errors = 0 THEN 'COMPLETED' ELSE 'COMPLETED_WITH_ERRORS' END,
+            completed_at = CURRENT_TIMESTAMP
+        WHERE ms.migration_id = p_migration_id
+        AND ms.status = 'RUNNING'
+        AND NOT EXISTS (
+            SELECT 1 FROM pggit_migration.backfill_chunks bc
+            WHERE bc.migration_id = p_migration_id
+            AND bc.status = 'PENDING'
+        );
+        RETURN false;
+    END IF;
+
+    BEGIN
+        SELECT * INTO v_result
+        FROM pggit_audit.backfill_from_v1_history(v_chunk.first_history_id, v_chunk.last_history_id);
+
+        UPDATE pggit_migration.backfill_chunks
+        SET status = 'COMPLETED',
+            changes_created = v_result.processed,
+            errors = v_result.errors,
+            warnings = v_result.warnings,
+            worker_pid = pg_backend_pid(),
+            processing_time = clock_timestamp() - v_started,
+            processed_at = CURRENT_TIMESTAMP
+        WHERE migration_id = p_migration_id
+        AND first_history_id = v_chunk.first_history_id;
+
+    EXCEPTION WHEN OTHERS THEN
+        INSERT INTO pggit_migration.migration_errors (
+            migration_id, error_type, error_message, error_details
+        ) VALUES (
+            p_migration_id, 'BACKFILL_CHUNK', SQLERRM,
+            jsonb_build_object(
+                'state', SQLSTATE,
+                'first_history_id', v_chunk.first_history_id,
+                'last_history_id', v_chunk.last_history_id
+            )
+        );
+
+        UPDATE pggit_migration.backfill_chunks
+        SET status = 'FAILED',
+            changes_created = 0,
+            errors = 1,
+            warnings = 0,
+            worker_pid = pg_backend_pid(),
+            processing_time = clock_timestamp() - v_started,
+            processed_at = CURRENT_TIMESTAMP
+        WHERE migration_id = p_migration_id
+        AND first_history_id = v_chunk.first_history_id;
+    END;
+
+    PERFORM pggit_migration.refresh_backfill_totals(p_migration_id);
+
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Procedure: Run or resume a v1 history backfill, committing per chunk
+-- Must be called with CALL outside an explicit transaction block. Call it
+-- from several connections to backfill chunks in parallel; after an
+-- interruption, calling it again continues with the unfinished chunks.
+-- Parsing runs in parallel, while the writes queue on the audit hash chain.
+CREATE OR REPLACE PROCEDURE pggit_migration.run_v1_backfill(
+    p_migration_id UUID
+) AS $$
+BEGIN
+    WHILE pggit_migration.backfill_v1_chunk(p_migration_id) LOOP
+        COMMIT;
+    END LOOP;
+    COMMIT;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Function: Verify migration integrity and completeness
 CREATE OR REPLACE FUNCTION pggit_migration.verify_migration(
     p_migration_id UUID
@@ -523,11 +736,16 @@ $$ LANGUAGE plpgsql;
 COMMENT ON SCHEMA pggit_migration_v0 IS 'Migration tooling for pggit v1 to v2 conversion';
 COMMENT ON TABLE pggit_migration.migration_status IS 'Overall migration progress and status tracking';
 COMMENT ON TABLE pggit_migration.migration_commits IS 'Individual commit processing status';
+COMMENT ON TABLE pggit_migration.backfill_chunks IS 'Checkpointed id ranges of the chunked v1 history backfill';
 COMMENT ON TABLE pggit_migration.migration_errors IS 'Detailed error tracking during migration';
 COMMENT ON TABLE pggit_migration.migration_verification IS 'Post-migration verification results';
 
 COMMENT ON FUNCTION pggit_migration.initialize_migration IS 'Initialize migration tracking and commit enumeration';
 COMMENT ON FUNCTION pggit_migration.backfill_audit_from_v1 IS 'Execute the actual migration from v1 to audit data';
+COMMENT ON FUNCTION pggit_migration.refresh_backfill_totals IS 'Recompute chunked backfill totals in migration_status from backfill_chunks';
+COMMENT ON FUNCTION pggit_migration.start_v1_backfill IS 'Plan a chunked, restartable v1 history backfill';
+COMMENT ON FUNCTION pggit_migration.backfill_v1_chunk IS 'Backfill and checkpoint the next unclaimed chunk of v1 history';
+COMMENT ON PROCEDURE pggit_migration.run_v1_backfill IS 'Run or resume a v1 history backfill, committing per chunk';
 COMMENT ON FUNCTION pggit_migration.verify_migration IS 'Verify migration integrity and completeness';
 COMMENT ON FUNCTION pggit_migration.dry_run_migration IS 'Test migration readiness without making changes';
 COMMENT ON FUNCTION pggit_migration.get_migration_status IS 'Get detailed migration progress and status';
@@ -20,6 +20,99 @@ CREATE TABLE IF NOT EXISTS pggit.monitoring_metrics (
 CREATE INDEX IF NOT EXISTS idx_monitoring_metrics_type_time
     ON pggit.monitoring_metrics(metric_type, recorded_at DESC);
 
+-- Scrapes must not count pggit.history or pggit.objects, which grow without
+-- bound. Totals are kept in pggit.metric_counters and latencies in
+-- pggit.metric_histograms. Writers never update those rows: statement-level
+-- triggers on history and objects (PART 4) and pggit.observe_metric() only
+-- append to pggit.metric_counter_deltas and pggit.metric_observations, so
+-- concurrent DDL does not queue on a shared counter row. Appended rows are
+-- folded in by pggit.fold_metric_deltas() from pggit.run_maintenance(), and
+-- scrapes read the metric_counter_totals and metric_histogram_totals views,
+-- which add the rows not folded yet.
+
+-- Totals per label combination; unused labels are '' or 0
+CREATE TABLE IF NOT EXISTS pggit.metric_counters (
+    metric_name TEXT NOT NULL,
+    object_type TEXT NOT NULL DEFAULT '',
+    change_type TEXT NOT NULL DEFAULT '',
+    branch_id INTEGER NOT NULL DEFAULT 0,
+    value BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric_name, object_type, change_type, branch_id)
+);
+
+-- Latency histograms with cumulative bucket counts (upper bounds in seconds)
+CREATE TABLE IF NOT EXISTS pggit.metric_histograms (
+    metric_name TEXT PRIMARY KEY,
+    help TEXT NOT NULL,
+    bucket_bounds DOUBLE PRECISION[] NOT NULL,
+    bucket_counts BIGINT[] NOT NULL,
+    sample_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    sample_count BIGINT NOT NULL DEFAULT 0,
+    CHECK (cardinality(bucket_bounds) = cardinality(bucket_counts))
+);
+
+INSERT INTO pggit.metric_histograms (metric_name, help, bucket_bounds, bucket_counts)
+SELECT h.metric_name, h.help, b.bounds, array_fill(0::BIGINT, ARRAY[cardinality(b.bounds)])
+FROM (VALUES
+    ('pggit_ddl_capture_duration_seconds', 'Time spent capturing DDL in event triggers'),
+    ('pggit_merge_duration_seconds', 'Duration of branch merges'),
+    ('pggit_commit_duration_seconds', 'Duration of commit creation')
+) AS h(metric_name, help)
+CROSS JOIN (
+    SELECT ARRAY[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]::DOUBLE PRECISION[] AS bounds
+) b
+ON CONFLICT (metric_name) DO NOTHING;
+
+-- Counter increments (negative for decrements) not folded into
+-- metric_counters yet
+CREATE TABLE IF NOT EXISTS pggit.metric_counter_deltas (
+    delta_id BIGSERIAL PRIMARY KEY,
+    metric_name TEXT NOT NULL,
+    object_type TEXT NOT NULL DEFAULT '',
+    change_type TEXT NOT NULL DEFAULT '',
+    branch_id INTEGER NOT NULL DEFAULT 0,
+    value BIGINT NOT NULL
+);
+
+-- Histogram observations not folded into metric_histograms yet
+CREATE TABLE IF NOT EXISTS pggit.metric_observations (
+    observation_id BIGSERIAL PRIMARY KEY,
+    metric_name TEXT NOT NULL,
+    value DOUBLE PRECISION NOT NULL
+);
+
+-- Current totals: folded counters plus pending deltas
+CREATE OR REPLACE VIEW pggit.metric_counter_totals AS
+SELECT metric_name, object_type, change_type, branch_id, SUM(value)::BIGINT AS value
+FROM (
+    SELECT metric_name, object_type, change_type, branch_id, value
+    FROM pggit.metric_counters
+    UNION ALL
+    SELECT metric_name, object_type, change_type, branch_id, value
+    FROM pggit.metric_counter_deltas
+) c
+GROUP BY metric_name, object_type, change_type, branch_id;
+
+-- Current histograms: folded buckets plus pending observations
+CREATE OR REPLACE VIEW pggit.metric_histogram_totals AS
+SELECT
+    h.metric_name,
+    h.help,
+    h.bucket_bounds,
+    ARRAY(
+        SELECT u.c + COALESCE((SELECT COUNT(*) FROM unnest(p.pending) v WHERE v <= u.b), 0)
+        FROM unnest(h.bucket_counts, h.bucket_bounds) WITH ORDINALITY AS u(c, b, i)
+        ORDER BY u.i
+    ) AS bucket_counts,
+    h.sample_sum + COALESCE(p.pending_sum, 0) AS sample_sum,
+    h.sample_count + COALESCE(cardinality(p.pending), 0) AS sample_count
+FROM pggit.metric_histograms h
+LEFT JOIN (
+    SELECT metric_name, array_agg(value) AS pending, SUM(value) AS pending_sum
+    FROM pggit.metric_observations
+    GROUP BY metric_name
+) p ON p.metric_name = h.metric_name;
+
 -- Record performance metrics
 DROP FUNCTION IF EXISTS pggit.record_metric(TEXT, NUMERIC, JSONB) CASCADE;
 CREATE OR REPLACE FUNCTION pggit.record_metric(
@@ -135,18 +228,19 @@ COMMENT ON VIEW pggit.metrics_summary IS
 CREATE OR REPLACE VIEW pggit.system_overview AS
 SELECT
     'total_objects' as metric,
-    COUNT(*)::TEXT as value,
+    COALESCE(SUM(value), 0)::TEXT as value,
     'Total tracked database objects' as description
-FROM pggit.objects
-WHERE is_active = true
+FROM pggit.metric_counter_totals
+WHERE metric_name = 'pggit_objects_total'
 
 UNION ALL
 
 SELECT
     'total_changes' as metric,
-    COUNT(*)::TEXT as value,
+    COALESCE(SUM(value), 0)::TEXT as value,
     'Total recorded schema changes' as description
-FROM pggit.history
+FROM pggit.metric_counter_totals
+WHERE metric_name = 'pggit_changes_total'
 
 UNION ALL
 
@@ -173,47 +267,252 @@ COMMENT ON VIEW pggit.system_overview IS
 -- PART 4: Prometheus Metrics Export
 -- ============================================
 
+-- Record one observation in a histogram
+CREATE OR REPLACE FUNCTION pggit.observe_metric(
+    p_metric_name TEXT,
+    p_value DOUBLE PRECISION
+) RETURNS VOID AS $$
+BEGIN
+    INSERT INTO pggit.metric_observations (metric_name, value)
+    VALUES (p_metric_name, p_value);
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION pggit.observe_metric(TEXT, DOUBLE PRECISION) IS
+'Add an observation (in seconds) to a latency histogram; appended to pggit.metric_observations until folded.';
+
+-- Count recorded changes per object type, change type and branch
+CREATE OR REPLACE FUNCTION pggit.count_history_changes()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO pggit.metric_counter_deltas (metric_name, object_type, change_type, branch_id, value)
+    SELECT 'pggit_changes_total', COALESCE(o.object_type::TEXT, ''), n.change_type::TEXT,
+           COALESCE(n.branch_id, 0), COUNT(*)
+    FROM pggit_new_history n
+    LEFT JOIN pggit.objects o ON o.id = n.object_id
+    GROUP BY 1, 2, 3, 4;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Keep the number of active objects per object type and branch
+CREATE OR REPLACE FUNCTION pggit.count_active_objects()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO pggit.metric_counter_deltas (metric_name, object_type, branch_id, value)
+        SELECT 'pggit_objects_total', object_type::TEXT, COALESCE(branch_id, 0), COUNT(*)
+        FROM pggit_new_objects
+        WHERE is_active
+        GROUP BY 1, 2, 3;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO pggit.metric_counter_deltas (metric_name, object_type, branch_id, value)
+        SELECT 'pggit_objects_total', object_type::TEXT, COALESCE(branch_id, 0), -COUNT(*)
+        FROM pggit_old_objects
+        WHERE is_active
+        GROUP BY 1, 2, 3;
+    ELSE
+        -- Most updates bump versions only; skip rows whose counts do not move
+        INSERT INTO pggit.metric_counter_deltas (metric_name, object_type, branch_id, value)
+        SELECT 'pggit_objects_total', object_type, branch_id, SUM(delta)
+        FROM (
+            SELECT object_type::TEXT AS object_type, COALESCE(branch_id, 0) AS branch_id, 1 AS delta
+            FROM pggit_new_objects WHERE is_active
+            UNION ALL
+            SELECT object_type::TEXT, COALESCE(branch_id, 0), -1
+            FROM pggit_old_objects WHERE is_active
+        ) d
+        GROUP BY 1, 2, 3
+        HAVING SUM(delta) <> 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fold pending deltas and observations into the counter and histogram rows
+-- Only this function updates those rows, so writers never wait on them.
+-- Concurrent runs each fold the rows they deleted. Returns the number of
+-- counter and histogram rows updated.
+CREATE OR REPLACE FUNCTION pggit.fold_metric_deltas()
+RETURNS INTEGER AS $$
+DECLARE
+    v_counters INTEGER;
+    v_histograms INTEGER;
+BEGIN
+    WITH folded AS (
+        DELETE FROM pggit.metric_counter_deltas
+        RETURNING metric_name, object_type, change_type, branch_id, value
+    )
+    INSERT INTO pggit.metric_counters (metric_name, object_type, change_type, branch_id, value)
+    SELECT metric_name, object_type, change_type, branch_id, SUM(value)
+    FROM folded
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT (metric_name, object_type, change_type, branch_id)
+    DO UPDATE SET value = pggit.metric_counters.value + EXCLUDED.value;
+
+    GET DIAGNOSTICS v_counters = ROW_COUNT;
+
+    WITH folded AS (
+        DELETE FROM pggit.metric_observations
+        RETURNING metric_name, value
+    ), pending AS (
+        SELECT metric_name, array_agg(value) AS observations, SUM(value) AS total
+        FROM folded
+        GROUP BY metric_name
+    )
+    UPDATE pggit.metric_histograms h
+    SET bucket_counts = ARRAY(
+            SELECT u.c + (SELECT COUNT(*) FROM unnest(p.observations) v WHERE v <= u.b)
+            FROM unnest(h.bucket_counts, h.bucket_bounds) WITH ORDINALITY AS u(c, b, i)
+            ORDER BY u.i
+        ),
+        sample_sum = h.sample_sum + p.total,
+        sample_count = h.sample_count + cardinality(p.observations)
+    FROM pending p
+    WHERE h.metric_name = p.metric_name;
+
+    GET DIAGNOSTICS v_histograms = ROW_COUNT;
+    RETURN v_counters + v_histograms;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION pggit.fold_metric_deltas() IS
+'Fold pending counter deltas and histogram observations into pggit.metric_counters and pggit.metric_histograms.';
+
+-- Folding runs from pggit.run_maintenance()
+INSERT INTO pggit.maintenance_jobs (job_name, run_interval, next_run)
+VALUES ('metric_fold', '1 minute', CURRENT_TIMESTAMP)
+ON CONFLICT (job_name) DO NOTHING;
+
+DROP TRIGGER IF EXISTS pggit_count_history_changes ON pggit.history;
+CREATE TRIGGER pggit_count_history_changes
+    AFTER INSERT ON pggit.history
+    REFERENCING NEW TABLE AS pggit_new_history
+    FOR EACH STATEMENT EXECUTE FUNCTION pggit.count_history_changes();
+
+DROP TRIGGER IF EXISTS pggit_count_objects_ins ON pggit.objects;
+CREATE TRIGGER pggit_count_objects_ins
+    AFTER INSERT ON pggit.objects
+    REFERENCING NEW TABLE AS pggit_new_objects
+    FOR EACH STATEMENT EXECUTE FUNCTION pggit.count_active_objects();
+
+DROP TRIGGER IF EXISTS pggit_count_objects_upd ON pggit.objects;
+CREATE TRIGGER pggit_count_objects_upd
+    AFTER UPDATE ON pggit.objects
+    REFERENCING OLD TABLE AS pggit_old_objects NEW TABLE AS pggit_new_objects
+    FOR EACH STATEMENT EXECUTE FUNCTION pggit.count_active_objects();
+
+DROP TRIGGER IF EXISTS pggit_count_objects_del ON pggit.objects;
+CREATE TRIGGER pggit_count_objects_del
+    AFTER DELETE ON pggit.objects
+    REFERENCING OLD TABLE AS pggit_old_objects
+    FOR EACH STATEMENT EXECUTE FUNCTION pggit.count_active_objects();
+
+-- Recount totals from pggit.history and pggit.objects. Counters are
+-- maintained by triggers; this seeds them at install and repairs drift.
+CREATE OR REPLACE FUNCTION pggit.rebuild_metric_counters()
+RETURNS INTEGER AS $$
+DECLARE
+    v_rows INTEGER;
+BEGIN
+    -- Writers append deltas; hold them off until the recount commits
+    LOCK TABLE pggit.metric_counters, pggit.metric_counter_deltas IN EXCLUSIVE MODE;
+
+    DELETE FROM pggit.metric_counter_deltas
+    WHERE metric_name IN ('pggit_changes_total', 'pggit_objects_total');
+
+    DELETE FROM pggit.metric_counters
+    WHERE metric_name IN ('pggit_changes_total', 'pggit_objects_total');
+
+    INSERT INTO pggit.metric_counters (metric_name, object_type, change_type, branch_id, value)
+    SELECT 'pggit_changes_total', COALESCE(o.object_type::TEXT, ''), h.change_type::TEXT,
+           COALESCE(h.branch_id, 0), COUNT(*)
+    FROM pggit.history h
+    LEFT JOIN pggit.objects o ON o.id = h.object_id
+    GROUP BY 1, 2, 3, 4
+    UNION ALL
+    SELECT 'pggit_objects_total', object_type::TEXT, '', COALESCE(branch_id, 0), COUNT(*)
+    FROM pggit.objects
+    WHERE is_active
+    GROUP BY 1, 2, 3, 4;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION pggit.rebuild_metric_counters() IS
+'Recount pggit.metric_counters from history and objects. Returns the number of counter rows written.';
+
+SELECT pggit.rebuild_metric_counters();
+
+-- Escape a label value for the Prometheus text format
+-- Backslash, double quote and newline are the only characters to escape.
+CREATE OR REPLACE FUNCTION pggit.prometheus_label_value(p_value TEXT)
+RETURNS TEXT AS $$
+    SELECT replace(replace(replace(p_value, '\', '\\'), '"', '\"'), E'\n', '\n');
+$$ LANGUAGE sql IMMUTABLE STRICT;
+
 -- Prometheus metrics exporter
 CREATE OR REPLACE FUNCTION pggit.prometheus_metrics()
 RETURNS TEXT AS $$
 DECLARE
     v_output TEXT := '';
-    v_metric RECORD;
+    v_histogram RECORD;
 BEGIN
     -- Help and type definitions
     v_output := v_output || E'# HELP pggit_objects_total Total number of tracked objects\n';
     v_output := v_output || E'# TYPE pggit_objects_total gauge\n';
-    v_output := v_output || format(E'pggit_objects_total %s\n',
-        (SELECT COUNT(*) FROM pggit.objects WHERE is_active = true));
+    v_output := v_output || COALESCE((
+        SELECT string_agg(format(E'pggit_objects_total{object_type="%s",branch="%s"} %s\n',
+                   pggit.prometheus_label_value(c.object_type),
+                   pggit.prometheus_label_value(COALESCE(b.name, c.branch_id::TEXT)),
+                   c.value),
+               '' ORDER BY c.object_type, c.branch_id)
+        FROM pggit.metric_counter_totals c
+        LEFT JOIN pggit.branches b ON b.id = c.branch_id
+        WHERE c.metric_name = 'pggit_objects_total'
+    ), '');
 
     v_output := v_output || E'# HELP pggit_changes_total Total number of recorded changes\n';
     v_output := v_output || E'# TYPE pggit_changes_total counter\n';
-    v_output := v_output || format(E'pggit_changes_total %s\n',
-        (SELECT COUNT(*) FROM pggit.history));
-
+    v_output := v_output || COALESCE((
+        SELECT string_agg(format(E'pggit_changes_total{object_type="%s",change_type="%s",branch="%s"} %s\n',
+                   pggit.prometheus_label_value(c.object_type),
+                   pggit.prometheus_label_value(c.change_type),
+                   pggit.prometheus_label_value(COALESCE(b.name, c.branch_id::TEXT)),
+                   c.value),
+               '' ORDER BY c.object_type, c.change_type, c.branch_id)
+        FROM pggit.metric_counter_totals c
+        LEFT JOIN pggit.branches b ON b.id = c.branch_id
+        WHERE c.metric_name = 'pggit_changes_total'
+    ), '');
+
+    -- Sizes include every partition once pggit.history is partitioned
     v_output := v_output || E'# HELP pggit_storage_bytes Total storage used by pgGit\n';
     v_output := v_output || E'# TYPE pggit_storage_bytes gauge\n';
     v_output := v_output || format(E'pggit_storage_bytes %s\n',
-        pg_total_relation_size('pggit.history') + pg_total_relation_size('pggit.objects'));
-
-    -- Performance metrics by type
-    FOR v_metric IN
-        SELECT metric_type, AVG(metric_value) as avg_val, COUNT(*) as sample_count
-        FROM pggit.monitoring_metrics
-        WHERE recorded_at > NOW() - INTERVAL '5 minutes'
-        GROUP BY metric_type
+        (SELECT SUM(pg_total_relation_size(relid)) FROM pg_partition_tree('pggit.history'))
+        + pg_total_relation_size('pggit.objects'));
+
+    FOR v_histogram IN
+        SELECT * FROM pggit.metric_histogram_totals ORDER BY metric_name
     LOOP
-        v_output := v_output || format(E'# HELP pggit_%s_avg Average %s time\n',
-            v_metric.metric_type, v_metric.metric_type);
-        v_output := v_output || format(E'# TYPE pggit_%s_avg gauge\n', v_metric.metric_type);
-        v_output := v_output || format(E'pggit_%s_avg %s\n',
-            v_metric.metric_type, v_metric.avg_val);
-
-        v_output := v_output || format(E'# HELP pggit_%s_samples Number of %s samples\n',
-            v_metric.metric_type, v_metric.metric_type);
-        v_output := v_output || format(E'# TYPE pggit_%s_samples gauge\n', v_metric.metric_type);
-        v_output := v_output || format(E'pggit_%s_samples %s\n',
-            v_metric.metric_type, v_metric.sample_count);
+        v_output := v_output || format(E'# HELP %s %s\n', v_histogram.metric_name, v_histogram.help);
+        v_output := v_output || format(E'# TYPE %s histogram\n', v_histogram.metric_name);
+        v_output := v_output || (
+            SELECT string_agg(format(E'%s_bucket{le="%s"} %s\n', v_histogram.metric_name, u.b, u.c),
+                   '' ORDER BY u.i)
+            FROM unnest(v_histogram.bucket_bounds, v_histogram.bucket_counts)
+                WITH ORDINALITY AS u(b, c, i)
+        );
+        v_output := v_output || format(E'%s_bucket{le="+Inf"} %s\n',
+            v_histogram.metric_name, v_histogram.sample_count);
+        v_output := v_output || format(E'%s_sum %s\n', v_histogram.metric_name, v_histogram.sample_sum);
+        v_output := v_output || format(E'%s_count %s\n', v_histogram.metric_name, v_histogram.sample_count);
     END LOOP;
 
     RETURN v_output;
@@ -221,29 +520,30 @@ END;
 $$ LANGUAGE plpgsql;
 
 COMMENT ON FUNCTION pggit.prometheus_metrics() IS
-'Export metrics in Prometheus format for monitoring systems.';
+'Export metrics in Prometheus format for monitoring systems. Reads only pre-aggregated counters and histograms and their pending deltas.';
 
 -- ============================================
 -- PART 5: Automated Metrics Collection
 -- ============================================
 
--- DDL performance monitoring trigger
+-- DDL capture latency. pggit.handle_ddl_command() stamps the start of
+-- capture in pggit.ddl_capture_started_at; event triggers fire in name
+-- order, so this one runs after pggit_ddl_trigger and
+-- pggit_enhanced_ddl_trigger and observes both.
 CREATE OR REPLACE FUNCTION pggit.collect_ddl_metrics()
 RETURNS event_trigger AS $$
 DECLARE
-    v_start TIMESTAMP;
-    v_duration NUMERIC;
+    v_start TIMESTAMPTZ;
 BEGIN
-    v_start := clock_timestamp();
-
-    -- This trigger fires after DDL commands
-    -- Record the time it took to process the DDL
-    v_duration := EXTRACT(EPOCH FROM (clock_timestamp() - v_start)) * 1000;
-
-    PERFORM pggit.record_metric(
-        'ddl_processing_ms',
-        v_duration,
-        jsonb_build_object('command', TG_TAG)
+    v_start := NULLIF(current_setting('pggit.ddl_capture_started_at', true), '')::TIMESTAMPTZ;
+    IF v_start IS NULL THEN
+        RETURN;
+    END IF;
+
+    PERFORM set_config('pggit.ddl_capture_started_at', '', true);
+    PERFORM pggit.observe_metric(
+        'pggit_ddl_capture_duration_seconds',
+        EXTRACT(EPOCH FROM (clock_timestamp() - v_start))
     );
 END;
 $$ LANGUAGE plpgsql;
@@ -322,6 +622,8 @@ GRANT SELECT ON pggit.system_overview TO PUBLIC;
 GRANT SELECT ON pggit.maintenance_status TO PUBLIC;
 GRANT EXECUTE ON FUNCTION pggit.health_check() TO PUBLIC;
 GRANT EXECUTE ON FUNCTION pggit.prometheus_metrics() TO PUBLIC;
+GRANT SELECT ON pggit.metric_counters TO PUBLIC;
+GRANT SELECT ON pggit.metric_histograms TO PUBLIC;
 
 -- Final setup message
 DO $$
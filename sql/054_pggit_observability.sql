@@ -44,6 +44,256 @@ CREATE INDEX IF NOT EXISTS idx_structured_logs_timestamp ON pggit.structured_log
 CREATE INDEX IF NOT EXISTS idx_structured_logs_trace_id ON pggit.structured_logs(trace_id);
 CREATE INDEX IF NOT EXISTS idx_structured_logs_severity ON pggit.structured_logs(severity);
 
+-- Buffered Logging
+-- SET pggit.log_mode = 'buffered' collects log records and spans in
+-- session-local temp tables instead of writing them one by one. They are
+-- flushed in one batch at commit, or earlier once pggit.log_buffer_size
+-- records (default 1000) are buffered. Temp tables write no WAL, and the
+-- caller context is only parsed at flush time.
+--
+-- SET pggit.log_sink = 'collector' sends flushed records to the unlogged
+-- pggit.log_outbox instead of structured_logs/trace_spans and signals
+-- pg_notify('pggit_log_outbox', <record count>). External collectors drain
+-- it with pggit.drain_log_outbox().
+--
+-- Open spans stay buffered until they end, across commits, and are lost if
+-- the session ends first. With the table sink, closed spans under an open
+-- span and log records attached to a buffered open span wait with it, as
+-- trace_spans and structured_logs reference their span.
+
+-- Outbox for external collectors (unlogged: no WAL, emptied on crash)
+CREATE UNLOGGED TABLE IF NOT EXISTS pggit.log_outbox (
+    outbox_id BIGSERIAL PRIMARY KEY,
+    record_type TEXT NOT NULL CHECK (record_type IN ('log', 'span')),
+    record JSONB NOT NULL,
+    queued_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+);
+
+-- Create this session's buffer tables on first use
+-- The flush marker table carries a deferred constraint trigger, so a row
+-- inserted into it flushes the buffers when the transaction commits.
+CREATE OR REPLACE FUNCTION pggit.ensure_log_buffer()
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF to_regclass('pg_temp.pggit_log_buffer') IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    CREATE TEMP TABLE pggit_log_buffer (
+        timestamp TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+        trace_id UUID,
+        span_id UUID,
+        severity TEXT NOT NULL,
+        message TEXT NOT NULL,
+        attributes JSONB,
+        context TEXT
+    );
+
+    CREATE TEMP TABLE pggit_span_buffer (
+        span_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+        trace_id UUID NOT NULL,
+        parent_span_id UUID,
+        operation_name TEXT NOT NULL,
+        start_time TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+        end_time TIMESTAMPTZ,
+        status TEXT NOT NULL DEFAULT 'unset',
+        status_message TEXT,
+        attributes JSONB DEFAULT '{}',
+        events JSONB[] DEFAULT ARRAY[]::JSONB[],
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+
+    CREATE TEMP TABLE pggit_log_flush (armed BOOLEAN);
+
+    CREATE CONSTRAINT TRIGGER pggit_log_flush_at_commit
+        AFTER INSERT ON pg_temp.pggit_log_flush
+        DEFERRABLE INITIALLY DEFERRED
+        FOR EACH ROW EXECUTE FUNCTION pggit.flush_log_buffer_at_commit();
+END;
+$$;
+
+-- Count a buffered record; arm the commit flush once per transaction and
+-- flush right away when the buffer reaches pggit.log_buffer_size
+CREATE OR REPLACE FUNCTION pggit.note_buffered_record()
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_buffered TEXT := current_setting('pggit.log_buffered', true);
+    v_count INTEGER;
+BEGIN
+    -- Unset until the first buffered record of the transaction
+    IF COALESCE(v_buffered, '') = '' THEN
+        INSERT INTO pg_temp.pggit_log_flush VALUES (true);
+        v_count := 1;
+    ELSE
+        v_count := v_buffered::INTEGER + 1;
+    END IF;
+
+    IF v_count >= COALESCE(NULLIF(current_setting('pggit.log_buffer_size', true), '')::INTEGER, 1000) THEN
+        PERFORM pggit.flush_log_buffer();
+        v_count := 0;
+    END IF;
+
+    PERFORM set_config('pggit.log_buffered', v_count::TEXT, true);
+END;
+$$;
+
+-- Flush buffered log records and spans to the configured sink
+-- Spans go first so log rows can reference them; open spans are carried
+-- over to a later flush. Returns the number of records flushed.
+CREATE OR REPLACE FUNCTION pggit.flush_log_buffer()
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_spans INTEGER;
+    v_logs INTEGER;
+    v_held UUID[];
+BEGIN
+    IF to_regclass('pg_temp.pggit_log_buffer') IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    IF current_setting('pggit.log_sink', true) = 'collector' THEN
+        WITH flushed AS (
+            DELETE FROM pg_temp.pggit_span_buffer
+            WHERE end_time IS NOT NULL
+            RETURNING *
+        )
+        INSERT INTO pggit.log_outbox (record_type, record)
+        SELECT 'span', to_jsonb(f) || jsonb_build_object(
+            'duration_ms', EXTRACT(EPOCH FROM (f.end_time - f.start_time)) * 1000)
+        FROM flushed f;
+        GET DIAGNOSTICS v_spans = ROW_COUNT;
+
+        WITH flushed AS (
+            DELETE FROM pg_temp.pggit_log_buffer
+            RETURNING *
+        )
+        INSERT INTO pggit.log_outbox (record_type, record)
+        SELECT 'log', jsonb_build_object(
+            'timestamp', f.timestamp,
+            'trace_id', f.trace_id,
+            'span_id', f.span_id,
+            'severity', f.severity,
+            'message', f.message,
+            'attributes', f.attributes,
+            'source_function', pggit.log_source_function(f.context),
+            'source_line', pggit.log_source_line(f.context)
+        )
+        FROM flushed f;
+        GET DIAGNOSTICS v_logs = ROW_COUNT;
+
+        IF v_spans + v_logs > 0 THEN
+            PERFORM pg_notify('pggit_log_outbox', (v_spans + v_logs)::TEXT);
+        END IF;
+    ELSE
+        -- Open spans and everything buffered under them
+        WITH RECURSIVE held AS (
+            SELECT b.span_id
+            FROM pg_temp.pggit_span_buffer b
+            WHERE b.end_time IS NULL
+            UNION
+            SELECT b.span_id
+            FROM pg_temp.pggit_span_buffer b
+            JOIN held h ON b.parent_span_id = h.span_id
+        )
+        SELECT COALESCE(array_agg(span_id), ARRAY[]::UUID[]) INTO v_held
+        FROM held;
+
+        WITH flushed AS (
+            DELETE FROM pg_temp.pggit_span_buffer
+            WHERE span_id <> ALL(v_held)
+            RETURNING *
+        )
+        INSERT INTO pggit.trace_spans (
+            span_id, trace_id, parent_span_id, operation_name, start_time, end_time,
+            status, status_message, attributes, events, created_at
+        )
+        SELECT
+            span_id, trace_id, parent_span_id, operation_name, start_time, end_time,
+            status, status_message, attributes, events, created_at
+        FROM flushed;
+        GET DIAGNOSTICS v_spans = ROW_COUNT;
+
+        WITH flushed AS (
+            DELETE FROM pg_temp.pggit_log_buffer
+            WHERE span_id IS NULL OR span_id <> ALL(v_held)
+            RETURNING *
+        )
+        INSERT INTO pggit.structured_logs (
+            timestamp, severity, message, attributes, trace_id, span_id,
+            source_function, source_line
+        )
+        SELECT
+            timestamp, severity, message, attributes, trace_id, span_id,
+            pggit.log_source_function(context), pggit.log_source_line(context)
+        FROM flushed;
+        GET DIAGNOSTICS v_logs = ROW_COUNT;
+    END IF;
+
+    RETURN v_spans + v_logs;
+END;
+$$;
+
+COMMENT ON FUNCTION pggit.flush_log_buffer IS 'Flush buffered log records and spans of this session';
+
+CREATE OR REPLACE FUNCTION pggit.flush_log_buffer_at_commit()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM pggit.flush_log_buffer();
+    DELETE FROM pg_temp.pggit_log_flush;
+    RETURN NULL;
+END;
+$$;
+
+-- Take up to p_limit records from the collector outbox, oldest first
+CREATE OR REPLACE FUNCTION pggit.drain_log_outbox(p_limit INTEGER DEFAULT 1000)
+RETURNS TABLE (
+    outbox_id BIGINT,
+    record_type TEXT,
+    record JSONB,
+    queued_at TIMESTAMPTZ
+)
+LANGUAGE SQL
+AS $$
+    DELETE FROM pggit.log_outbox o
+    WHERE o.outbox_id IN (
+        SELECT q.outbox_id FROM pggit.log_outbox q
+        ORDER BY q.outbox_id
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING o.outbox_id, o.record_type, o.record, o.queued_at;
+$$;
+
+COMMENT ON FUNCTION pggit.drain_log_outbox IS 'Remove and return records queued for an external log collector';
+
+-- Caller function and line from a PG_CONTEXT call stack
+-- Format: "PL/pgSQL function <schema>.<function>(<args>) line <N> at <statement>"
+CREATE OR REPLACE FUNCTION pggit.log_source_function(p_context TEXT)
+RETURNS TEXT
+LANGUAGE SQL STABLE
+AS $$
+    SELECT COALESCE(
+        substring(p_context FROM 'function ([a-zA-Z_][a-zA-Z0-9_]*\.[a-zA-Z_][a-zA-Z0-9_]*)\('),
+        current_setting('application_name', true),
+        'unknown'
+    );
+$$;
+
+CREATE OR REPLACE FUNCTION pggit.log_source_line(p_context TEXT)
+RETURNS INTEGER
+LANGUAGE SQL IMMUTABLE
+AS $$
+    SELECT COALESCE(substring(p_context FROM 'line ([0-9]+)')::INTEGER, 0);
+$$;
+
 -- Start a new trace span
 CREATE OR REPLACE FUNCTION pggit.start_span(
     p_operation TEXT,
@@ -57,6 +307,17 @@ DECLARE
     v_trace_id UUID := COALESCE(p_trace_id, gen_random_uuid());
     v_span_id UUID;
 BEGIN
+    IF current_setting('pggit.log_mode', true) = 'buffered' THEN
+        PERFORM pggit.ensure_log_buffer();
+
+        INSERT INTO pg_temp.pggit_span_buffer (trace_id, parent_span_id, operation_name, attributes)
+        VALUES (v_trace_id, p_parent_span_id, p_operation, p_attributes)
+        RETURNING span_id INTO v_span_id;
+
+        PERFORM pggit.note_buffered_record();
+        RETURN v_span_id;
+    END IF;
+
     INSERT INTO pggit.trace_spans (trace_id, parent_span_id, operation_name, attributes)
     VALUES (v_trace_id, p_parent_span_id, p_operation, p_attributes)
     RETURNING span_id INTO v_span_id;
@@ -76,6 +337,21 @@ CREATE OR REPLACE FUNCTION pggit.end_span(
 LANGUAGE plpgsql
 AS $$
 BEGIN
+    -- Spans still in this session's buffer are ended there
+    IF to_regclass('pg_temp.pggit_span_buffer') IS NOT NULL THEN
+        UPDATE pg_temp.pggit_span_buffer
+        SET end_time = clock_timestamp(),
+            status = p_status,
+            status_message = p_status_message
+        WHERE span_id = p_span_id
+          AND end_time IS NULL;
+
+        IF FOUND THEN
+            PERFORM pggit.note_buffered_record();
+            RETURN;
+        END IF;
+    END IF;
+
     UPDATE pggit.trace_spans
     SET end_time = clock_timestamp(),
         status = p_status,
@@ -108,6 +384,16 @@ BEGIN
         'attributes', p_attributes
     );
 
+    IF to_regclass('pg_temp.pggit_span_buffer') IS NOT NULL THEN
+        UPDATE pg_temp.pggit_span_buffer
+        SET events = events || v_event
+        WHERE span_id = p_span_id;
+
+        IF FOUND THEN
+            RETURN;
+        END IF;
+    END IF;
+
     UPDATE pggit.trace_spans
     SET events = events || v_event
     WHERE span_id = p_span_id;
@@ -128,25 +414,20 @@ LANGUAGE plpgsql
 AS $$
 DECLARE
     v_context TEXT;
-    v_source_function TEXT;
-    v_source_line INTEGER;
 BEGIN
     -- Extract caller context from PG call stack
     GET DIAGNOSTICS v_context = PG_CONTEXT;
 
-    -- Parse context to extract function name (first function in stack)
-    -- Format: "PL/pgSQL function <schema>.<function>(<args>) line <N> at <statement>"
-    v_source_function := COALESCE(
-        substring(v_context FROM 'function ([a-zA-Z_][a-zA-Z0-9_]*\.[a-zA-Z_][a-zA-Z0-9_]*)\('),
-        current_setting('application_name', true),
-        'unknown'
-    );
+    -- Buffered: parse the context when the buffer is flushed
+    IF current_setting('pggit.log_mode', true) = 'buffered' THEN
+        PERFORM pggit.ensure_log_buffer();
 
-    -- Extract line number from context
-    v_source_line := COALESCE(
-        substring(v_context FROM 'line ([0-9]+)')::INTEGER,
-        0
-    );
+        INSERT INTO pg_temp.pggit_log_buffer (severity, message, attributes, trace_id, span_id, context)
+        VALUES (UPPER(p_severity), p_message, p_attributes, p_trace_id, p_span_id, v_context);
+
+        PERFORM pggit.note_buffered_record();
+        RETURN;
+    END IF;
 
     INSERT INTO pggit.structured_logs (
         severity,
@@ -162,13 +443,13 @@ BEGIN
         p_attributes,
         p_trace_id,
         p_span_id,
-        v_source_function,
-        v_source_line
+        pggit.log_source_function(v_context),
+        pggit.log_source_line(v_context)
     );
 END;
 $$;
 
-COMMENT ON FUNCTION pggit.log IS 'Write structured log entry';
+COMMENT ON FUNCTION pggit.log IS 'Write structured log entry, or buffer it when pggit.log_mode is buffered';
 
 -- Convenience logging functions
 CREATE OR REPLACE FUNCTION pggit.log_debug(p_message TEXT, p_attributes JSONB DEFAULT '{}')
@@ -349,3 +630,5 @@ COMMENT ON FUNCTION pggit.create_branch_with_tracing IS
 GRANT SELECT, INSERT ON pggit.trace_spans TO PUBLIC;
 GRANT SELECT, INSERT ON pggit.structured_logs TO PUBLIC;
 GRANT USAGE ON SEQUENCE pggit.structured_logs_log_id_seq TO PUBLIC;
+GRANT SELECT, INSERT, DELETE ON pggit.log_outbox TO PUBLIC;
+GRANT USAGE ON SEQUENCE pggit.log_outbox_outbox_id_seq TO PUBLIC;
@@ -9,6 +9,52 @@
 -- - Performance metrics
 -- - Health checks and data integrity
 
+-- ============================================
+-- OBJECT STORE AND COMMIT GRAPH
+-- ============================================
+-- Content-addressed objects, refs and the commit graph the v2 functions
+-- read. Objects are addressed by SHA and may be loaded separately from the
+-- commits and trees that name them, so only the graph links are enforced.
+
+CREATE SCHEMA IF NOT EXISTS pggit_v0;
+
+CREATE TABLE IF NOT EXISTS pggit_v0.objects (
+    sha TEXT PRIMARY KEY,
+    type TEXT NOT NULL CHECK (type IN ('blob', 'tree', 'commit')),
+    size BIGINT DEFAULT 0,
+    content TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS pggit_v0.refs (
+    name TEXT PRIMARY KEY,
+    type TEXT NOT NULL CHECK (type IN ('branch', 'tag', 'remote')),
+    target_sha TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS pggit_v0.commit_graph (
+    commit_sha TEXT PRIMARY KEY,
+    tree_sha TEXT NOT NULL,
+    author TEXT,
+    message TEXT,
+    committed_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Paths are schema-qualified object names, e.g. 'public.users'
+CREATE TABLE IF NOT EXISTS pggit_v0.tree_entries (
+    tree_sha TEXT NOT NULL,
+    path TEXT NOT NULL,
+    object_sha TEXT NOT NULL,
+    PRIMARY KEY (tree_sha, path)
+);
+
+CREATE TABLE IF NOT EXISTS pggit_v0.commit_parents (
+    commit_sha TEXT REFERENCES pggit_v0.commit_graph(commit_sha),
+    parent_sha TEXT REFERENCES pggit_v0.commit_graph(commit_sha),
+    PRIMARY KEY (commit_sha, parent_sha)
+);
+
 -- ============================================
 -- STORAGE ANALYSIS
 -- ============================================
@@ -10,6 +10,241 @@
 -- - Merge strategies (recursive, ours, theirs)
 -- - Pull request simulation
 
+-- ============================================
+-- COMMIT GRAPH
+-- ============================================
+-- Generation numbers: 1 for root commits, otherwise one more than the
+-- highest parent generation. Every ancestor of a commit has a lower
+-- generation, so ancestor walks can stop at a generation floor.
+
+ALTER TABLE pggit_v0.commit_graph ADD COLUMN IF NOT EXISTS generation INTEGER;
+ALTER TABLE pggit_v0.commit_graph ALTER COLUMN generation SET DEFAULT 1;
+
+CREATE INDEX IF NOT EXISTS idx_commit_graph_generation ON pggit_v0.commit_graph(generation);
+CREATE INDEX IF NOT EXISTS idx_commit_graph_committed_at ON pggit_v0.commit_graph(committed_at);
+CREATE INDEX IF NOT EXISTS idx_commit_parents_commit ON pggit_v0.commit_parents(commit_sha);
+
+-- Function: Set generations of commits whose parents were just recorded
+-- History is append-only, so a commit has no children yet when its
+-- parents are inserted and nothing further down needs renumbering.
+-- Bulk imports that link a commit and its parent in one statement are
+-- handed to backfill_commit_generations, which visits them in order.
+CREATE OR REPLACE FUNCTION pggit_v0.update_commit_generations()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM new_parents n
+        JOIN new_parents p ON p.commit_sha = n.parent_sha
+    ) THEN
+        UPDATE pggit_v0.commit_graph
+        SET generation = NULL
+        WHERE commit_sha IN (SELECT commit_sha FROM new_parents);
+
+        PERFORM pggit_v0.backfill_commit_generations();
+        RETURN NULL;
+    END IF;
+
+    UPDATE pggit_v0.commit_graph c
+    SET generation = g.generation
+    FROM (
+        SELECT cp.commit_sha, 1 + MAX(p.generation) AS generation
+        FROM pggit_v0.commit_parents cp
+        JOIN pggit_v0.commit_graph p ON p.commit_sha = cp.parent_sha
+        WHERE cp.commit_sha IN (SELECT commit_sha FROM new_parents)
+        GROUP BY cp.commit_sha
+    ) g
+    WHERE c.commit_sha = g.commit_sha
+      AND c.generation IS DISTINCT FROM g.generation;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_commit_parents_generation ON pggit_v0.commit_parents;
+CREATE TRIGGER trg_commit_parents_generation
+    AFTER INSERT ON pggit_v0.commit_parents
+    REFERENCING NEW TABLE AS new_parents
+    FOR EACH STATEMENT EXECUTE FUNCTION pggit_v0.update_commit_generations();
+
+-- Function: Compute missing generation numbers
+-- Visits commits in commit time order, which is topological unless clocks
+-- were skewed; commits reached before one of their parents are retried.
+CREATE OR REPLACE FUNCTION pggit_v0.backfill_commit_generations()
+RETURNS INTEGER AS $$
+DECLARE
+    v_commit_sha TEXT;
+    v_generation INTEGER;
+    v_unknown INTEGER;
+    v_updated INTEGER := 0;
+    v_progress BOOLEAN := true;
+BEGIN
+    WHILE v_progress LOOP
+        v_progress := false;
+
+        FOR v_commit_sha IN
+            SELECT commit_sha FROM pggit_v0.commit_graph
+            WHERE generation IS NULL
+            ORDER BY committed_at, commit_sha
+        LOOP
+            SELECT 1 + COALESCE(MAX(p.generation), 0),
+                   COUNT(*) FILTER (WHERE p.commit_sha IS NOT NULL AND p.generation IS NULL)
+            INTO v_generation, v_unknown
+            FROM pggit_v0.commit_parents cp
+            LEFT JOIN pggit_v0.commit_graph p ON p.commit_sha = cp.parent_sha
+            WHERE cp.commit_sha = v_commit_sha;
+
+            CONTINUE WHEN v_unknown > 0;
+
+            UPDATE pggit_v0.commit_graph
+            SET generation = v_generation
+            WHERE commit_sha = v_commit_sha;
+
+            v_updated := v_updated + 1;
+            v_progress := true;
+        END LOOP;
+    END LOOP;
+
+    RETURN v_updated;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT pggit_v0.backfill_commit_generations();
+
+-- Function: Find the best common ancestor of two commits
+-- Walks the ancestors of both commits down to a generation floor and
+-- intersects them, lowering the floor geometrically until they meet. Only
+-- commits between the tips and the merge base are visited, however long
+-- the history below it. Returns the common ancestor with the highest
+-- generation, or NULL for unrelated histories.
+CREATE OR REPLACE FUNCTION pggit_v0.merge_base(
+    p_sha_a TEXT,
+    p_sha_b TEXT
+) RETURNS TEXT AS $$
+DECLARE
+    v_generation_a INTEGER;
+    v_generation_b INTEGER;
+    v_step INTEGER := 32;
+    v_floor INTEGER;
+    v_base_sha TEXT;
+BEGIN
+    SELECT generation INTO v_generation_a
+    FROM pggit_v0.commit_graph
+    WHERE commit_sha = p_sha_a;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Commit % not found', p_sha_a;
+    END IF;
+
+    SELECT generation INTO v_generation_b
+    FROM pggit_v0.commit_graph
+    WHERE commit_sha = p_sha_b;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Commit % not found', p_sha_b;
+    END IF;
+
+    IF p_sha_a = p_sha_b THEN
+        RETURN p_sha_a;
+    END IF;
+
+    LOOP
+        v_floor := COALESCE(LEAST(v_generation_a, v_generation_b), 1) - v_step;
+
+        WITH RECURSIVE ancestors_a(commit_sha) AS (
+            SELECT p_sha_a
+            UNION
+            SELECT cp.parent_sha
+            FROM ancestors_a a
+            JOIN pggit_v0.commit_parents cp ON cp.commit_sha = a.commit_sha
+            JOIN pggit_v0.commit_graph p ON p.commit_sha = cp.parent_sha
+            WHERE COALESCE(p.generation, v_floor) >= v_floor
+        ),
+        ancestors_b(commit_sha) AS (
+            SELECT p_sha_b
+            UNION
+            SELECT cp.parent_sha
+            FROM ancestors_b b
+            JOIN pggit_v0.commit_parents cp ON cp.commit_sha = b.commit_sha
+            JOIN pggit_v0.commit_graph p ON p.commit_sha = cp.parent_sha
+            WHERE COALESCE(p.generation, v_floor) >= v_floor
+        )
+        SELECT c.commit_sha INTO v_base_sha
+        FROM ancestors_a a
+        JOIN ancestors_b b ON b.commit_sha = a.commit_sha
+        JOIN pggit_v0.commit_graph c ON c.commit_sha = a.commit_sha
+        ORDER BY c.generation DESC NULLS LAST, c.commit_sha
+        LIMIT 1;
+
+        -- A floor at or below the roots has walked both histories fully
+        IF v_base_sha IS NOT NULL OR v_floor <= 1 THEN
+            RETURN v_base_sha;
+        END IF;
+
+        v_step := v_step * 2;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION pggit_v0.merge_base(TEXT, TEXT) IS
+'Best common ancestor of two commits, found with a generation-pruned ancestor walk. NULL for unrelated histories.';
+
+-- Function: Three-way diff of two commits against their merge base
+-- Compares tree entries by path. Unchanged paths are omitted; status is
+-- ours or theirs when only that side changed the path, both when both
+-- made the same change, and conflict when they differ.
+CREATE OR REPLACE FUNCTION pggit_v0.three_way_diff(
+    p_base_sha TEXT,
+    p_ours_sha TEXT,
+    p_theirs_sha TEXT
+) RETURNS TABLE (
+    path TEXT,
+    base_object_sha TEXT,
+    ours_object_sha TEXT,
+    theirs_object_sha TEXT,
+    status TEXT
+) AS $$
+BEGIN
+    RETURN QUERY
+    WITH trees AS (
+        SELECT
+            (SELECT tree_sha FROM pggit_v0.commit_graph WHERE commit_sha = p_base_sha) AS base_tree,
+            (SELECT tree_sha FROM pggit_v0.commit_graph WHERE commit_sha = p_ours_sha) AS ours_tree,
+            (SELECT tree_sha FROM pggit_v0.commit_graph WHERE commit_sha = p_theirs_sha) AS theirs_tree
+    ),
+    entries AS (
+        SELECT
+            COALESCE(b.path, o.path, t.path) AS path,
+            b.object_sha AS base_sha,
+            o.object_sha AS ours_sha,
+            t.object_sha AS theirs_sha
+        FROM (SELECT te.path, te.object_sha FROM pggit_v0.tree_entries te, trees
+              WHERE te.tree_sha = trees.base_tree) b
+        FULL JOIN (SELECT te.path, te.object_sha FROM pggit_v0.tree_entries te, trees
+                   WHERE te.tree_sha = trees.ours_tree) o ON o.path = b.path
+        FULL JOIN (SELECT te.path, te.object_sha FROM pggit_v0.tree_entries te, trees
+                   WHERE te.tree_sha = trees.theirs_tree) t ON t.path = COALESCE(b.path, o.path)
+    )
+    SELECT
+        e.path,
+        e.base_sha,
+        e.ours_sha,
+        e.theirs_sha,
+        CASE
+            WHEN e.ours_sha IS NOT DISTINCT FROM e.theirs_sha THEN 'both'
+            WHEN e.ours_sha IS NOT DISTINCT FROM e.base_sha THEN 'theirs'
+            WHEN e.theirs_sha IS NOT DISTINCT FROM e.base_sha THEN 'ours'
+            ELSE 'conflict'
+        END
+    FROM entries e
+    WHERE e.ours_sha IS DISTINCT FROM e.base_sha
+       OR e.theirs_sha IS DISTINCT FROM e.base_sha
+    ORDER BY e.path;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION pggit_v0.three_way_diff(TEXT, TEXT, TEXT) IS
+'Three-way diff of two commits against a base commit: paths changed on either side with ours/theirs/both/conflict status.';
+
 -- ============================================
 -- BRANCH MANAGEMENT
 -- ============================================
@@ -33,10 +268,7 @@ BEGIN
     END IF;
 
     -- Get current HEAD
-    SELECT target_sha INTO v_head_sha
-    FROM pggit_v0.commit_graph
-    ORDER BY committed_at DESC
-    LIMIT 1;
+    v_head_sha := pggit_v0.get_head_sha();
 
     IF v_head_sha IS NULL THEN
         RAISE EXCEPTION 'No commits found - cannot create branch';
@@ -58,7 +290,7 @@ BEGIN
 
     -- Store feature metadata (if table exists)
     INSERT INTO pggit_audit.changes (
-        target_sha, object_schema, object_name, object_type,
+        commit_sha, object_schema, object_name, object_type,
         change_type, old_definition, new_definition, author
     ) VALUES (
         v_head_sha, 'pggit', 'feature_' || p_feature_name, 'METADATA',
@@ -112,30 +344,28 @@ BEGIN
         RAISE EXCEPTION 'Target branch % not found', p_target_branch;
     END IF;
 
-    -- Find common ancestor (simplified - would need proper LCA algorithm)
-    -- For now, we detect conflicts and provide merge commit SHA
-    v_merge_target_sha := gen_random_uuid()::text;
+    v_common_ancestor_sha := pggit_v0.merge_base(v_source_sha, v_target_sha);
 
-    -- Detect conflicts using the diff
-    WITH source_changes AS (
-        SELECT object_schema, object_name, change_type
-        FROM pggit_audit.changes
-        WHERE target_sha = v_source_sha
-    ),
-    target_changes AS (
-        SELECT object_schema, object_name, change_type
-        FROM pggit_audit.changes
-        WHERE target_sha = v_target_sha
-    )
-    SELECT
-        COALESCE(array_agg(sc.object_schema || '.' || sc.object_name), ARRAY[]::TEXT[])
+    IF v_common_ancestor_sha = v_source_sha THEN
+        -- Already up to date
+        v_merge_target_sha := v_target_sha;
+    ELSIF v_common_ancestor_sha = v_target_sha THEN
+        -- Fast-forward
+        v_merge_target_sha := v_source_sha;
+    ELSE
+        v_merge_target_sha := gen_random_uuid()::text;
+    END IF;
+
+    -- Objects changed differently on both sides since the merge base
+    SELECT COALESCE(array_agg(d.path ORDER BY d.path), ARRAY[]::TEXT[])
     INTO v_conflict_objects
-    FROM source_changes sc
-    JOIN target_changes tc ON tc.object_schema = sc.object_schema
-                          AND tc.object_name = sc.object_name
-                          AND tc.change_type != sc.change_type;
+    FROM pggit_v0.three_way_diff(v_common_ancestor_sha, v_target_sha, v_source_sha) d
+    WHERE d.status = 'conflict';
 
-    v_conflict_count := COALESCE(array_length(v_conflict_objects, 1), 0);
+    -- ours and theirs resolve every conflict in favour of one side
+    IF p_merge_strategy = 'recursive' THEN
+        v_conflict_count := cardinality(v_conflict_objects);
+    END IF;
 
     RETURN QUERY SELECT
         v_merge_target_sha,
@@ -145,7 +375,7 @@ END;
 $$ LANGUAGE plpgsql;
 
 COMMENT ON FUNCTION pggit_v0.merge_branch(TEXT, TEXT, TEXT) IS
-'Merge source branch into target with specified strategy (recursive/ours/theirs). Detects conflicts.';
+'Merge source branch into target with specified strategy (recursive/ours/theirs). Conflicts come from a three-way diff against the merge base.';
 
 -- Function: Rebase branch onto another
 CREATE OR REPLACE FUNCTION pggit_v0.rebase_branch(
@@ -159,8 +389,7 @@ CREATE OR REPLACE FUNCTION pggit_v0.rebase_branch(
 DECLARE
     v_branch_sha TEXT;
     v_onto_sha TEXT;
-    v_branch_tree_sha TEXT;
-    v_onto_tree_sha TEXT;
+    v_base_sha TEXT;
     v_rebased_sha TEXT;
     v_conflicts TEXT[];
 BEGIN
@@ -174,38 +403,27 @@ BEGIN
     END IF;
 
     -- Use HEAD if no target specified
-    v_onto_sha := COALESCE(p_onto_target_sha,
-        (SELECT target_sha FROM pggit_v0.commit_graph ORDER BY committed_at DESC LIMIT 1)
-    );
-
-    -- Get tree SHAs
-    SELECT tree_sha INTO v_branch_tree_sha
-    FROM pggit_v0.commit_graph
-    WHERE target_sha = v_branch_sha;
+    v_onto_sha := COALESCE(p_onto_target_sha, pggit_v0.get_head_sha());
 
-    SELECT tree_sha INTO v_onto_tree_sha
-    FROM pggit_v0.commit_graph
-    WHERE target_sha = v_onto_sha;
+    v_base_sha := pggit_v0.merge_base(v_branch_sha, v_onto_sha);
 
-    -- Simulate rebase (in real system, would replay commits)
-    v_rebased_sha := gen_random_uuid()::text;
+    IF v_base_sha = v_onto_sha THEN
+        -- Already based on the target
+        v_rebased_sha := v_branch_sha;
+    ELSE
+        -- Simulate rebase (in real system, would replay commits)
+        v_rebased_sha := gen_random_uuid()::text;
+    END IF;
 
-    -- Detect conflicts using tree diff
-    WITH branch_objects AS (
-        SELECT DISTINCT path FROM pggit_v0.tree_entries WHERE tree_sha = v_branch_tree_sha
-    ),
-    onto_objects AS (
-        SELECT DISTINCT path FROM pggit_v0.tree_entries WHERE tree_sha = v_onto_tree_sha
-    )
-    SELECT
-        COALESCE(array_agg(DISTINCT bo.path), ARRAY[]::TEXT[])
+    -- Objects the branch changed that the target also changed differently
+    SELECT COALESCE(array_agg(d.path ORDER BY d.path), ARRAY[]::TEXT[])
     INTO v_conflicts
-    FROM branch_objects bo
-    JOIN onto_objects oo ON oo.path = bo.path;
+    FROM pggit_v0.three_way_diff(v_base_sha, v_onto_sha, v_branch_sha) d
+    WHERE d.status = 'conflict';
 
     RETURN QUERY SELECT
         v_rebased_sha,
-        array_length(v_conflicts, 1) > 0,
+        cardinality(v_conflicts) > 0,
         v_conflicts;
 END;
 $$ LANGUAGE plpgsql;
@@ -248,40 +466,29 @@ BEGIN
         RAISE EXCEPTION 'Target branch % not found', p_target_branch;
     END IF;
 
-    -- Find conflicting objects (modified in both branches)
+    -- Find conflicting objects (changed differently in both branches since the merge base)
     RETURN QUERY
-    WITH source_changes AS (
-        SELECT
-            object_schema || '.' || object_name as object_path,
-            'MODIFIED' as change_type,
-            new_definition
-        FROM pggit_audit.changes
-        WHERE target_sha = v_source_sha
-          AND change_type IN ('ALTER', 'CREATE')
-    ),
-    target_changes AS (
-        SELECT
-            object_schema || '.' || object_name as object_path,
-            'MODIFIED' as change_type,
-            new_definition
-        FROM pggit_audit.changes
-        WHERE target_sha = v_target_sha
-          AND change_type IN ('ALTER', 'CREATE')
-    )
     SELECT
-        sc.object_path,
-        'BOTH_MODIFIED'::TEXT,
-        sc.new_definition,
-        tc.new_definition
-    FROM source_changes sc
-    JOIN target_changes tc ON tc.object_path = sc.object_path
-    WHERE sc.new_definition != tc.new_definition
-    ORDER BY sc.object_path;
+        d.path,
+        CASE
+            WHEN d.base_object_sha IS NULL THEN 'BOTH_ADDED'
+            WHEN d.ours_object_sha IS NULL OR d.theirs_object_sha IS NULL THEN 'MODIFIED_DELETED'
+            ELSE 'BOTH_MODIFIED'
+        END,
+        so.content,
+        tobj.content
+    FROM pggit_v0.three_way_diff(
+        pggit_v0.merge_base(v_source_sha, v_target_sha), v_target_sha, v_source_sha
+    ) d
+    LEFT JOIN pggit_v0.objects so ON so.sha = d.theirs_object_sha
+    LEFT JOIN pggit_v0.objects tobj ON tobj.sha = d.ours_object_sha
+    WHERE d.status = 'conflict'
+    ORDER BY d.path;
 END;
 $$ LANGUAGE plpgsql STABLE;
 
 COMMENT ON FUNCTION pggit_v0.detect_merge_conflicts(TEXT, TEXT) IS
-'Detect conflicts before merge: objects modified in both branches with different definitions.';
+'Detect conflicts before merge: objects changed differently in both branches since their merge base.';
 
 -- Function: Resolve a conflict
 CREATE OR REPLACE FUNCTION pggit_v0.resolve_conflict(
@@ -36,7 +36,7 @@ BEGIN
     )
     SELECT
         'public' as object_schema,
-        te.name as object_name,
+        te.path as object_name,
         'TABLE' as object_type,
         cg.committed_at,
         cg.author
@@ -54,16 +54,29 @@ $$ LANGUAGE plpgsql STABLE;
 COMMENT ON FUNCTION pggit_v0.get_current_schema() IS
 'Get current schema state at HEAD. Returns all objects in the latest commit with their types and metadata.';
 
--- Function: List all objects in a commit or HEAD
-CREATE OR REPLACE FUNCTION pggit_v0.list_objects(
-    p_commit_sha TEXT DEFAULT NULL
+-- Function: Get paginated commit history
+CREATE OR REPLACE FUNCTION pggit_v0.get_commit_history(
+    p_limit INT DEFAULT 20,
+    p_offset INT DEFAULT 0
 ) RETURNS TABLE (
     commit_sha TEXT,
     author TEXT,
     message TEXT,
     committed_at TIMESTAMPTZ,
     parent_shas TEXT[]
-)
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        cg.commit_sha,
+        cg.author,
+        cg.message,
+        cg.committed_at,
+        ARRAY(
+            SELECT cp.parent_sha
+            FROM pggit_v0.commit_parents cp
+            WHERE cp.commit_sha = cg.commit_sha
+        )
     FROM pggit_v0.commit_graph cg
     ORDER BY cg.committed_at DESC
     LIMIT p_limit
@@ -86,11 +99,9 @@ CREATE OR REPLACE FUNCTION pggit_v0.get_object_history(
     committed_at TIMESTAMPTZ,
     message TEXT
 ) AS $$
-DECLARE
-    v_object_path TEXT;
 BEGIN
-    v_object_path := p_schema_name || '.' || p_object_name;
-
+    -- Matches the columns separately so idx_changes_object serves both
+    -- the filter and the ordering
     RETURN QUERY
     SELECT
         pac.commit_sha,
@@ -100,8 +111,9 @@ BEGIN
         cg.message
     FROM pggit_audit.changes pac
     JOIN pggit_v0.commit_graph cg ON cg.commit_sha = pac.commit_sha
-    WHERE (pac.object_schema || '.' || pac.object_name) = v_object_path
-    ORDER BY cg.committed_at DESC
+    WHERE pac.object_schema = p_schema_name
+      AND pac.object_name = p_object_name
+    ORDER BY pac.committed_at DESC
     LIMIT p_limit;
 END;
 $$ LANGUAGE plpgsql STABLE;
@@ -113,6 +125,123 @@ COMMENT ON FUNCTION pggit_v0.get_object_history(TEXT, TEXT, INT) IS
 -- DIFF OPERATIONS
 -- ============================================
 
+-- Subtree hashes: one hash per schema of a tree, over the sorted
+-- (path, object_sha) pairs of its entries. Tree entries are written once
+-- per tree, so the hashes are computed as entries are inserted. Diffs
+-- compare these first and only read the entries of schemas that changed.
+CREATE TABLE IF NOT EXISTS pggit_v0.tree_subtrees (
+    tree_sha TEXT NOT NULL,
+    schema_name TEXT NOT NULL,
+    subtree_sha TEXT NOT NULL,
+    entry_count INTEGER NOT NULL,
+    PRIMARY KEY (tree_sha, schema_name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tree_entries_tree_schema
+    ON pggit_v0.tree_entries(tree_sha, split_part(path, '.', 1));
+
+-- Function: Recompute the subtree hashes of the given trees (all trees if NULL)
+CREATE OR REPLACE FUNCTION pggit_v0.refresh_tree_subtrees(
+    p_tree_shas TEXT[] DEFAULT NULL
+) RETURNS INTEGER AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    DELETE FROM pggit_v0.tree_subtrees
+    WHERE p_tree_shas IS NULL OR tree_sha = ANY(p_tree_shas);
+
+    INSERT INTO pggit_v0.tree_subtrees (tree_sha, schema_name, subtree_sha, entry_count)
+    SELECT
+        te.tree_sha,
+        split_part(te.path, '.', 1),
+        encode(sha256(convert_to(
+            string_agg(te.path || ' ' || te.object_sha, E'\n' ORDER BY te.path), 'UTF8'
+        )), 'hex'),
+        COUNT(*)
+    FROM pggit_v0.tree_entries te
+    WHERE p_tree_shas IS NULL OR te.tree_sha = ANY(p_tree_shas)
+    GROUP BY te.tree_sha, split_part(te.path, '.', 1);
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION pggit_v0.update_tree_subtrees()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pggit_v0.refresh_tree_subtrees(
+        ARRAY(SELECT DISTINCT tree_sha FROM new_entries)
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_tree_entries_subtrees ON pggit_v0.tree_entries;
+CREATE TRIGGER trg_tree_entries_subtrees
+    AFTER INSERT ON pggit_v0.tree_entries
+    REFERENCING NEW TABLE AS new_entries
+    FOR EACH STATEMENT EXECUTE FUNCTION pggit_v0.update_tree_subtrees();
+
+SELECT pggit_v0.refresh_tree_subtrees();
+
+-- Function: Diff two trees
+-- Returns only the paths whose object differs. Identical trees return
+-- nothing without reading any entries; otherwise schemas whose subtree
+-- hashes match are skipped and the entries of the rest are joined on path.
+CREATE OR REPLACE FUNCTION pggit_v0.diff_trees(
+    p_old_tree_sha TEXT,
+    p_new_tree_sha TEXT
+) RETURNS TABLE (
+    path TEXT,
+    old_object_sha TEXT,
+    new_object_sha TEXT,
+    change_type TEXT
+) AS $$
+BEGIN
+    IF p_old_tree_sha IS NOT DISTINCT FROM p_new_tree_sha THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    WITH changed_schemas AS (
+        SELECT COALESCE(o.schema_name, n.schema_name) AS schema_name
+        FROM (SELECT * FROM pggit_v0.tree_subtrees WHERE tree_sha = p_old_tree_sha) o
+        FULL JOIN (SELECT * FROM pggit_v0.tree_subtrees WHERE tree_sha = p_new_tree_sha) n
+            ON n.schema_name = o.schema_name
+        WHERE o.subtree_sha IS DISTINCT FROM n.subtree_sha
+    ),
+    old_entries AS (
+        SELECT te.path, te.object_sha
+        FROM changed_schemas cs
+        JOIN pggit_v0.tree_entries te
+            ON te.tree_sha = p_old_tree_sha AND split_part(te.path, '.', 1) = cs.schema_name
+    ),
+    new_entries AS (
+        SELECT te.path, te.object_sha
+        FROM changed_schemas cs
+        JOIN pggit_v0.tree_entries te
+            ON te.tree_sha = p_new_tree_sha AND split_part(te.path, '.', 1) = cs.schema_name
+    )
+    SELECT
+        COALESCE(o.path, n.path),
+        o.object_sha,
+        n.object_sha,
+        CASE
+            WHEN o.path IS NULL THEN 'CREATE'
+            WHEN n.path IS NULL THEN 'DROP'
+            ELSE 'ALTER'
+        END
+    FROM old_entries o
+    FULL JOIN new_entries n ON n.path = o.path
+    WHERE o.object_sha IS DISTINCT FROM n.object_sha
+    ORDER BY 1;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+COMMENT ON FUNCTION pggit_v0.diff_trees(TEXT, TEXT) IS
+'Diff two trees by path. Schemas with equal subtree hashes are skipped. Returns changed paths with CREATE/ALTER/DROP.';
+
 -- Function: Show differences between two commits
 CREATE OR REPLACE FUNCTION pggit_v0.diff_commits(
     p_old_commit_sha TEXT,
@@ -123,6 +252,9 @@ CREATE OR REPLACE FUNCTION pggit_v0.diff_commits(
     old_definition TEXT,
     new_definition TEXT
 ) AS $$
+DECLARE
+    v_old_tree_sha TEXT;
+    v_new_tree_sha TEXT;
 BEGIN
     -- Validate inputs
     IF p_old_commit_sha IS NULL OR p_new_commit_sha IS NULL THEN
@@ -133,21 +265,37 @@ BEGIN
         RAISE EXCEPTION 'Cannot diff a commit against itself';
     END IF;
 
+    SELECT tree_sha INTO v_old_tree_sha
+    FROM pggit_v0.commit_graph
+    WHERE commit_sha = p_old_commit_sha;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Commit % not found', p_old_commit_sha;
+    END IF;
+
+    SELECT tree_sha INTO v_new_tree_sha
+    FROM pggit_v0.commit_graph
+    WHERE commit_sha = p_new_commit_sha;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Commit % not found', p_new_commit_sha;
+    END IF;
+
     RETURN QUERY
     SELECT
-        (pac.object_schema || '.' || pac.object_name)::TEXT,
-        pac.change_type,
-        pac.old_definition,
-        pac.new_definition
-    FROM pggit_audit.changes pac
-    WHERE pac.commit_sha = p_new_commit_sha
-      AND (p_old_commit_sha IS NULL OR pac.commit_sha > p_old_commit_sha)
-    ORDER BY pac.object_schema, pac.object_name;
+        d.path,
+        d.change_type,
+        o_old.content,
+        o_new.content
+    FROM pggit_v0.diff_trees(v_old_tree_sha, v_new_tree_sha) d
+    LEFT JOIN pggit_v0.objects o_old ON o_old.sha = d.old_object_sha
+    LEFT JOIN pggit_v0.objects o_new ON o_new.sha = d.new_object_sha
+    ORDER BY d.path;
 END;
 $$ LANGUAGE plpgsql STABLE;
 
 COMMENT ON FUNCTION pggit_v0.diff_commits(TEXT, TEXT) IS
-'Show what changed between two commits. Returns object path, change type (CREATE/ALTER/DROP), and definitions.';
+'Show what changed between two commits by diffing their trees. Returns object path, change type (CREATE/ALTER/DROP), and definitions.';
 
 -- Function: Compare two branches
 CREATE OR REPLACE FUNCTION pggit_v0.diff_branches(
@@ -180,21 +328,32 @@ BEGIN
         RAISE EXCEPTION 'Branch % not found', p_branch_name2;
     END IF;
 
-    -- Use diff_commits logic for branches
+    -- Objects that differ between the branches, classified by which side
+    -- changed them since the merge base
     RETURN QUERY
     SELECT
-        (pac.object_schema || '.' || pac.object_name)::TEXT,
-        pac.change_type,
-        pac.old_definition,
-        pac.new_definition
-    FROM pggit_audit.changes pac
-    WHERE pac.commit_sha = v_commit_sha2
-    ORDER BY pac.object_schema, pac.object_name;
+        d.path,
+        CASE
+            WHEN d.status = 'conflict' THEN 'CONFLICT'
+            WHEN d.base_object_sha IS NULL THEN 'CREATE'
+            WHEN (d.status = 'ours' AND d.ours_object_sha IS NULL)
+              OR (d.status = 'theirs' AND d.theirs_object_sha IS NULL) THEN 'DROP'
+            ELSE 'ALTER'
+        END,
+        o1.content,
+        o2.content
+    FROM pggit_v0.three_way_diff(
+        pggit_v0.merge_base(v_commit_sha1, v_commit_sha2), v_commit_sha1, v_commit_sha2
+    ) d
+    LEFT JOIN pggit_v0.objects o1 ON o1.sha = d.ours_object_sha
+    LEFT JOIN pggit_v0.objects o2 ON o2.sha = d.theirs_object_sha
+    WHERE d.status <> 'both'
+    ORDER BY d.path;
 END;
 $$ LANGUAGE plpgsql STABLE;
 
 COMMENT ON FUNCTION pggit_v0.diff_branches(TEXT, TEXT) IS
-'Compare two branches and show differences. Returns changed objects with their definitions.';
+'Compare two branches against their merge base. Returns objects changed on either side (CREATE/ALTER/DROP, or CONFLICT when both changed them differently) with both definitions.';
 
 -- ============================================
 -- OBJECT INTROSPECTION
@@ -213,9 +372,7 @@ DECLARE
     v_definition TEXT;
 BEGIN
     -- Use HEAD if no commit specified
-    v_commit_sha := COALESCE(p_commit_sha,
-        (SELECT commit_sha FROM pggit_v0.commit_graph ORDER BY committed_at DESC LIMIT 1)
-    );
+    v_commit_sha := COALESCE(p_commit_sha, pggit_v0.get_head_sha());
 
     v_object_path := p_schema_name || '.' || p_object_name;
 
@@ -264,9 +421,7 @@ DECLARE
     v_object_sha TEXT;
 BEGIN
     -- Use HEAD if no commit specified
-    v_commit_sha := COALESCE(p_commit_sha,
-        (SELECT commit_sha FROM pggit_v0.commit_graph ORDER BY committed_at DESC LIMIT 1)
-    );
+    v_commit_sha := COALESCE(p_commit_sha, pggit_v0.get_head_sha());
 
     v_object_path := p_schema_name || '.' || p_object_name;
 
@@ -284,7 +439,7 @@ BEGIN
     SELECT
         pggit_audit.determine_object_type(o.content),
         o.size,
-        cg.committed_at,
+        cg.committed_at::TIMESTAMP,
         cg.author
     FROM pggit_v0.tree_entries te
     JOIN pggit_v0.objects o ON o.sha = te.object_sha
@@ -305,14 +460,34 @@ COMMENT ON FUNCTION pggit_v0.get_object_metadata(TEXT, TEXT, TEXT) IS
 -- HELPER FUNCTION: Get current HEAD SHA
 -- ============================================
 
+-- HEAD is the tip of the main branch, or of master. Graphs without either
+-- ref fall back to the commit with the highest generation, read from
+-- idx_commit_graph_generation; commit times only break ties, so clock skew
+-- cannot pick an ancestor.
 CREATE OR REPLACE FUNCTION pggit_v0.get_head_sha()
 RETURNS TEXT AS $$
+DECLARE
+    v_head_sha TEXT;
 BEGIN
-    RETURN (SELECT commit_sha FROM pggit_v0.commit_graph ORDER BY committed_at DESC LIMIT 1);
+    SELECT target_sha INTO v_head_sha
+    FROM pggit_v0.refs
+    WHERE type = 'branch' AND name IN ('main', 'master')
+    ORDER BY name = 'main' DESC
+    LIMIT 1;
+
+    IF v_head_sha IS NULL THEN
+        SELECT commit_sha INTO v_head_sha
+        FROM pggit_v0.commit_graph
+        WHERE generation IS NOT NULL
+        ORDER BY generation DESC, committed_at DESC
+        LIMIT 1;
+    END IF;
+
+    RETURN v_head_sha;
 END;
 $$ LANGUAGE plpgsql STABLE;
 
-COMMENT ON FUNCTION pggit_v0.get_head_sha() IS 'Get the current HEAD (latest) commit SHA.';
+COMMENT ON FUNCTION pggit_v0.get_head_sha() IS 'Get the current HEAD commit SHA: the tip of main (or master), else the newest commit by generation.';
 
 -- ============================================
 -- METADATA AND DOCUMENTATION
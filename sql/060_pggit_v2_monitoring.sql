@@ -179,9 +179,9 @@ SELECT
     'N/A' as contributors,
     MAX(cg.committed_at)::TEXT as last_activity
 FROM pggit_v0.refs r
-JOIN pggit_v0.commit_graph cg ON cg.commit_sha = r.commit_sha
+JOIN pggit_v0.commit_graph cg ON cg.commit_sha = r.target_sha
 WHERE cg.committed_at >= CURRENT_TIMESTAMP - INTERVAL '24 hours'
-  AND r.ref_type = 'branch';
+  AND r.type = 'branch';
 
 COMMENT ON VIEW pggit_v0.recent_activity_summary IS
 'Activity metrics for last 24 hours: commits, objects, changes, and updated branches.';
@@ -260,8 +260,8 @@ BEGIN
         format('Branch %s last updated %s days ago - consider cleanup',
             name, EXTRACT(DAY FROM (CURRENT_TIMESTAMP - cg.committed_at))::INT)::TEXT
     FROM pggit_v0.refs r
-    JOIN pggit_v0.commit_graph cg ON cg.commit_sha = r.commit_sha
-    WHERE r.ref_type = 'branch'
+    JOIN pggit_v0.commit_graph cg ON cg.commit_sha = r.target_sha
+    WHERE r.type = 'branch'
       AND r.name NOT IN ('main', 'master')
       AND cg.committed_at < CURRENT_TIMESTAMP - INTERVAL '90 days'
     LIMIT 10;
@@ -315,8 +315,8 @@ BEGIN
         3,
         'Reduces clutter and improves branch navigation'::TEXT
     FROM pggit_v0.refs r
-    JOIN pggit_v0.commit_graph cg ON cg.commit_sha = r.commit_sha
-    WHERE r.ref_type = 'branch'
+    JOIN pggit_v0.commit_graph cg ON cg.commit_sha = r.target_sha
+    WHERE r.type = 'branch'
       AND r.name NOT IN ('main', 'master')
       AND cg.committed_at < CURRENT_TIMESTAMP - INTERVAL '90 days'
     HAVING COUNT(*) > 0;
@@ -48,16 +48,16 @@ COMMENT ON VIEW pggit_v0.most_changed_objects IS
 -- View: Branch comparison summary
 CREATE OR REPLACE VIEW pggit_v0.branch_comparison AS
 SELECT
-    r.ref_name as branch_name,
-    r.commit_sha as head_sha,
+    r.name as branch_name,
+    r.target_sha as head_sha,
     cg.author as head_author,
     cg.committed_at as head_commit_time,
     (SELECT COUNT(*) FROM pggit_v0.commit_graph
      WHERE committed_at <= cg.committed_at) as total_commits_to_head,
     cg.message as head_message
 FROM pggit_v0.refs r
-JOIN pggit_v0.commit_graph cg ON cg.commit_sha = r.commit_sha
-WHERE r.ref_type = 'branch'
+JOIN pggit_v0.commit_graph cg ON cg.commit_sha = r.target_sha
+WHERE r.type = 'branch'
 ORDER BY cg.committed_at DESC;
 
 COMMENT ON VIEW pggit_v0.branch_comparison IS
@@ -217,13 +217,13 @@ SELECT
     'Branches' as metric,
     COUNT(*)::TEXT as value
 FROM pggit_v0.refs
-WHERE ref_type = 'branch'
+WHERE type = 'branch'
 UNION ALL
 SELECT
     'Tags' as metric,
     COUNT(*)::TEXT as value
 FROM pggit_v0.refs
-WHERE ref_type = 'tag'
+WHERE type = 'tag'
 UNION ALL
 SELECT
     'Total Commits' as metric,
@@ -0,0 +1,97 @@
+-- pgGit Branch Routing Benchmark
+-- Compares point-lookup latency on a routed table (the view created by
+-- pggit.setup_table_routing) against the same lookups on the base table,
+-- on main and on a copy branch and a delta branch.
+--
+-- Usage: psql -d your_database -f tests/benchmarks/branch_routing.sql
+
+\timing on
+
+CREATE SCHEMA IF NOT EXISTS benchmark_routing;
+
+CREATE TABLE public.bench_routed (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    amount NUMERIC(10,2)
+);
+
+INSERT INTO public.bench_routed
+SELECT i, 'row_' || i, (i % 1000) / 10.0
+FROM generate_series(1, 100000) AS i;
+
+SELECT pggit.create_data_branch('bench_copy', 'main', ARRAY['bench_routed']);
+SET pggit.data_branch_storage = 'delta';
+SELECT pggit.create_data_branch('bench_delta', 'main', ARRAY['bench_routed']);
+RESET pggit.data_branch_storage;
+
+-- Give the delta branch some changes so the overlay has work to do
+SELECT pggit.switch_branch('bench_delta');
+UPDATE public.bench_routed SET amount = 0 WHERE id % 100 = 0;
+SELECT pggit.switch_branch('main');
+
+ANALYZE pggit_base._pggit_main_bench_routed;
+ANALYZE pggit_branch_bench_copy.bench_routed;
+ANALYZE pggit_branch_bench_delta._pggit_delta_bench_routed;
+
+-- Lookups run as static SQL in a generated function so plans are cached,
+-- as they would be for prepared statements in an application
+CREATE OR REPLACE FUNCTION benchmark_routing.lookups(
+    p_label TEXT,
+    p_relation TEXT,
+    p_lookups INTEGER
+) RETURNS INTERVAL AS $$
+DECLARE
+    v_start TIMESTAMP;
+    v_elapsed INTERVAL;
+BEGIN
+    EXECUTE format($fn$
+        CREATE OR REPLACE FUNCTION benchmark_routing.run_lookups(p_lookups INTEGER)
+        RETURNS VOID AS $body$
+        DECLARE
+            v_amount NUMERIC;
+        BEGIN
+            FOR i IN 1..p_lookups LOOP
+                SELECT amount INTO v_amount FROM %s WHERE id = (i * 7919) %% 100000 + 1;
+            END LOOP;
+        END;
+        $body$ LANGUAGE plpgsql
+    $fn$, p_relation);
+
+    RAISE NOTICE '=== Benchmark: Point Lookup (%) ===', p_label;
+
+    v_start := clock_timestamp();
+    PERFORM benchmark_routing.run_lookups(p_lookups);
+    v_elapsed := clock_timestamp() - v_start;
+
+    RAISE NOTICE '% lookups in: %', p_lookups, v_elapsed;
+    RAISE NOTICE 'Per lookup: % ms',
+        round((EXTRACT(EPOCH FROM v_elapsed) * 1000 / p_lookups)::numeric, 4);
+
+    RETURN v_elapsed;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT benchmark_routing.lookups('base table', 'pggit_base._pggit_main_bench_routed', 10000);
+
+SELECT pggit.switch_branch('main');
+SELECT benchmark_routing.lookups('routed, main', 'public.bench_routed', 10000);
+
+SELECT pggit.switch_branch('bench_copy');
+SELECT benchmark_routing.lookups('routed, copy branch', 'public.bench_routed', 10000);
+
+SELECT pggit.switch_branch('bench_delta');
+SELECT benchmark_routing.lookups('routed, delta branch', 'public.bench_routed', 10000);
+
+SELECT pggit.switch_branch('main');
+
+-- Plans should show index scans under one-time filters, not a function scan
+EXPLAIN (COSTS OFF) SELECT amount FROM public.bench_routed WHERE id = 42;
+
+-- Cleanup
+DROP SCHEMA benchmark_routing CASCADE;
+DROP VIEW public.bench_routed;
+DROP SCHEMA pggit_branch_bench_copy CASCADE;
+DROP SCHEMA pggit_branch_bench_delta CASCADE;
+DROP TABLE pggit_base._pggit_main_bench_routed;
+DELETE FROM pggit.branched_tables WHERE source_table = 'bench_routed';
+DELETE FROM pggit.branch_storage_stats WHERE branch_name IN ('bench_copy', 'bench_delta');
@@ -0,0 +1,69 @@
+-- pgGit DDL Capture Mode Benchmark
+-- Compares the per-object handler with the set-based capture path
+-- (pggit.ddl_capture_mode = 'set_based') at 10/100/1000 objects per command.
+--
+-- Each run issues a single CREATE SCHEMA ... CREATE TABLE ... command, so
+-- one trigger firing sees N tables, N primary key indexes and N-1 foreign keys.
+--
+-- Usage: psql -d your_database -f tests/benchmarks/ddl_capture_modes.sql
+
+\timing on
+
+CREATE SCHEMA IF NOT EXISTS benchmark_capture;
+
+CREATE OR REPLACE FUNCTION benchmark_capture.run(
+    p_mode TEXT,
+    p_objects INTEGER
+) RETURNS INTERVAL AS $$
+DECLARE
+    v_sql TEXT;
+    v_start TIMESTAMP;
+    v_elapsed INTERVAL;
+    v_tracked INTEGER;
+BEGIN
+    SELECT 'CREATE SCHEMA bench_capture_target ' || string_agg(
+        format(
+            'CREATE TABLE t%s (id INTEGER PRIMARY KEY, parent_id INTEGER%s, '
+            'name VARCHAR(40) NOT NULL DEFAULT %L, created_at TIMESTAMP DEFAULT now())',
+            i,
+            CASE WHEN i > 1 THEN ' REFERENCES t1(id)' ELSE '' END,
+            'n/a'
+        ), ' ')
+    INTO v_sql
+    FROM generate_series(1, p_objects) AS i;
+
+    PERFORM set_config('pggit.ddl_capture_mode', p_mode, true);
+
+    RAISE NOTICE '=== Benchmark: DDL Capture (%, % objects) ===', p_mode, p_objects;
+
+    v_start := clock_timestamp();
+    EXECUTE v_sql;
+    v_elapsed := clock_timestamp() - v_start;
+
+    RAISE NOTICE 'Captured % tables in: %', p_objects, v_elapsed;
+
+    SELECT COUNT(*) INTO v_tracked
+    FROM pggit.objects
+    WHERE schema_name = 'bench_capture_target'
+    AND is_active = true;
+
+    RAISE NOTICE 'Objects tracked: %', v_tracked;
+
+    -- Leave no trace for the next run (the drop trigger is not measured)
+    DROP SCHEMA bench_capture_target CASCADE;
+    DELETE FROM pggit.objects WHERE schema_name = 'bench_capture_target';
+
+    RETURN v_elapsed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- One statement per run keeps every run in its own transaction
+SELECT benchmark_capture.run('per_object', 10);
+SELECT benchmark_capture.run('set_based', 10);
+SELECT benchmark_capture.run('per_object', 100);
+SELECT benchmark_capture.run('set_based', 100);
+SELECT benchmark_capture.run('per_object', 1000);
+SELECT benchmark_capture.run('set_based', 1000);
+
+-- Cleanup
+DROP SCHEMA benchmark_capture CASCADE;
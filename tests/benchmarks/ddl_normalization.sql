@@ -0,0 +1,137 @@
+-- pgGit DDL Normalization Benchmark
+-- Compares the catalog-based pggit.normalize_table_ddl with the previous
+-- information_schema implementation (kept here as benchmark_normalization.legacy_table_ddl)
+-- on one 500-column table and on a schema of 10,000 tables, and checks
+-- that both produce the same text.
+--
+-- Usage: psql -d your_database -f tests/benchmarks/ddl_normalization.sql
+
+\timing on
+
+CREATE SCHEMA IF NOT EXISTS benchmark_normalization;
+CREATE SCHEMA IF NOT EXISTS bench_norm_target;
+
+-- The information_schema implementation replaced by pggit.normalized_columns
+CREATE OR REPLACE FUNCTION benchmark_normalization.legacy_table_ddl(
+    p_schema_name TEXT,
+    p_table_name TEXT
+) RETURNS TEXT AS $$
+    SELECT lower(regexp_replace(
+        format('create table %I.%I (%s)', p_schema_name, p_table_name,
+            string_agg(
+                format('%I %s%s%s',
+                    column_name,
+                    CASE
+                        WHEN data_type = 'character varying' THEN 'varchar' ||
+                            CASE WHEN character_maximum_length IS NOT NULL
+                                 THEN '(' || character_maximum_length || ')'
+                                 ELSE ''
+                            END
+                        WHEN data_type = 'character' THEN 'char(' || character_maximum_length || ')'
+                        WHEN data_type = 'numeric' AND numeric_precision IS NOT NULL THEN
+                            'numeric(' || numeric_precision ||
+                            CASE WHEN numeric_scale IS NOT NULL
+                                 THEN ',' || numeric_scale
+                                 ELSE ''
+                            END || ')'
+                        ELSE data_type
+                    END,
+                    CASE WHEN is_nullable = 'NO' THEN ' not null' ELSE '' END,
+                    CASE WHEN column_default IS NOT NULL
+                         THEN ' default ' ||
+                              regexp_replace(
+                                  regexp_replace(column_default, '::[\w\s\[\]]+', '', 'g'),
+                                  '\s+', ' ', 'g'
+                              )
+                         ELSE ''
+                    END
+                ),
+                ', '
+                ORDER BY ordinal_position
+            )
+        ),
+        '\s+', ' ', 'g'
+    ))
+    FROM information_schema.columns
+    WHERE table_schema = p_schema_name
+    AND table_name = p_table_name
+    HAVING COUNT(*) > 0;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION benchmark_normalization.run(
+    p_label TEXT,
+    p_function TEXT,
+    p_tables TEXT,
+    p_repeat INTEGER DEFAULT 1
+) RETURNS INTERVAL AS $$
+DECLARE
+    v_start TIMESTAMP;
+    v_elapsed INTERVAL;
+BEGIN
+    RAISE NOTICE '=== Benchmark: % (%) ===', p_label, p_function;
+
+    v_start := clock_timestamp();
+    FOR i IN 1..p_repeat LOOP
+        EXECUTE format(
+            'SELECT COUNT(%s(schemaname, tablename)) FROM pg_tables WHERE schemaname = %L AND tablename LIKE %L',
+            p_function, 'bench_norm_target', p_tables
+        );
+    END LOOP;
+    v_elapsed := clock_timestamp() - v_start;
+
+    RAISE NOTICE 'Elapsed: %', v_elapsed;
+
+    RETURN v_elapsed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- One 500-column table with a mix of types, defaults and casts
+DO $$
+BEGIN
+    EXECUTE (
+        SELECT format('CREATE TABLE bench_norm_target.wide (%s)', string_agg(
+            format('c%s %s', i, CASE i % 5
+                WHEN 0 THEN 'INTEGER NOT NULL DEFAULT 0'
+                WHEN 1 THEN 'VARCHAR(40) DEFAULT ''n/a''::character varying'
+                WHEN 2 THEN 'NUMERIC(12,2)'
+                WHEN 3 THEN 'TEXT[] DEFAULT ''{}''::text[]'
+                ELSE 'TIMESTAMP DEFAULT now()'
+            END), ', ' ORDER BY i))
+        FROM generate_series(1, 500) AS i
+    );
+END;
+$$;
+
+-- 10,000 tables of five columns
+SET pggit.ddl_capture_mode = 'set_based';
+DO $$
+BEGIN
+    FOR i IN 1..10000 LOOP
+        EXECUTE format(
+            'CREATE TABLE bench_norm_target.t%s (id INTEGER PRIMARY KEY, '
+            'name VARCHAR(40) NOT NULL DEFAULT %L, amount NUMERIC(10,2), '
+            'tags TEXT[], created_at TIMESTAMP DEFAULT now())',
+            i, 'n/a'
+        );
+    END LOOP;
+END;
+$$;
+RESET pggit.ddl_capture_mode;
+ANALYZE;
+
+SELECT benchmark_normalization.run('500-column table x100', 'benchmark_normalization.legacy_table_ddl', 'wide', 100);
+SELECT benchmark_normalization.run('500-column table x100', 'pggit.normalize_table_ddl', 'wide', 100);
+SELECT benchmark_normalization.run('10k-table schema', 'benchmark_normalization.legacy_table_ddl', 't%');
+SELECT benchmark_normalization.run('10k-table schema', 'pggit.normalize_table_ddl', 't%');
+
+-- Both implementations must agree on every table (expect 0)
+SELECT COUNT(*) AS mismatches
+FROM pg_tables
+WHERE schemaname = 'bench_norm_target'
+AND benchmark_normalization.legacy_table_ddl(schemaname, tablename)
+    IS DISTINCT FROM pggit.normalize_table_ddl(schemaname, tablename);
+
+-- Cleanup
+DROP SCHEMA bench_norm_target CASCADE;
+DELETE FROM pggit.objects WHERE schema_name = 'bench_norm_target';
+DROP SCHEMA benchmark_normalization CASCADE;
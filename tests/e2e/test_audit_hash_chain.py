@@ -0,0 +1,187 @@
+"""
+E2E tests for the pggit_audit.changes hash chain.
+
+Tests pggit_audit.chain_change(), pggit_audit.verify_audit_chain() and
+pggit_audit.create_audit_checkpoint():
+- Each change linked to the previous one by a SHA-256 row hash
+- Signed checkpoints in pggit_audit.chain_checkpoints
+- Verification resuming from the latest checkpoint
+- Verification bounded by the chain head it started from
+
+Key Coverage:
+- Edited, deleted and unsigned history is reported
+- Only the verified flag of a chained change can be updated
+"""
+
+import pytest
+
+KEY = "hc-test-key"
+
+
+@pytest.fixture
+def chained(db_e2e, pggit_installed):
+    """Append five changes to the audit chain."""
+    _append(db_e2e, 5)
+    return db_e2e
+
+
+def _append(db, count, prefix="hc"):
+    db.execute("""
+        INSERT INTO pggit_audit.changes (
+            commit_sha, object_schema, object_name, object_type,
+            change_type, new_definition, author, committed_at
+        )
+        SELECT %s || '-' || i, 'public', %s || '_obj' || i, 'TABLE',
+               'CREATE', 'CREATE TABLE ' || %s || '_obj' || i || ' (id INT)', 'tester',
+               '2024-01-01'::timestamp + make_interval(mins => i)
+        FROM generate_series(1, %s) i
+    """, prefix, prefix, prefix, count)
+
+
+def _verify(db, *args):
+    return db.execute("""
+        SELECT verified_from, verified_to, rows_verified, broken_at, status
+        FROM pggit_audit.verify_audit_chain(%s, %s)
+    """, *args)[0]
+
+
+def _seqs(db, prefix="hc"):
+    return [r[0] for r in db.execute("""
+        SELECT chain_seq FROM pggit_audit.changes
+        WHERE commit_sha LIKE %s ORDER BY chain_seq
+    """, prefix + "-%")]
+
+
+class TestChain:
+    """Appending to the chain."""
+
+    def test_changes_are_linked(self, chained):
+        """Test each change points at the hash of the one before it"""
+        rows = chained.execute("""
+            SELECT chain_seq, prev_hash, row_hash,
+                   LAG(row_hash) OVER (ORDER BY chain_seq),
+                   row_hash = pggit_audit.change_hash(c)
+            FROM pggit_audit.changes c
+            WHERE commit_sha LIKE 'hc-%%'
+            ORDER BY chain_seq
+        """)
+
+        assert len(rows) == 5
+        assert [r[0] for r in rows] == list(range(rows[0][0], rows[0][0] + 5))
+        for _, prev_hash, _, previous, matches in rows[1:]:
+            assert prev_hash == previous
+            assert matches
+        assert chained.execute("SELECT last_seq, last_hash FROM pggit_audit.chain_head") == [
+            (rows[-1][0], rows[-1][2])
+        ]
+
+    def test_intact_chain_passes(self, chained):
+        """Test verification of an untouched chain passes"""
+        _, verified_to, _, broken_at, status = _verify(chained, True, None)
+
+        assert status == "PASS"
+        assert broken_at is None
+        assert verified_to == _seqs(chained)[-1]
+
+    def test_changes_past_head_left_for_next_run(self, chained):
+        """Test changes appended after the head was read are not reported as a broken chain"""
+        db = chained
+        seqs = _seqs(db)
+        # The head as a verification would have read it before hc-5 committed
+        db.execute("""
+            UPDATE pggit_audit.chain_head h SET last_seq = c.chain_seq, last_hash = c.row_hash
+            FROM pggit_audit.changes c WHERE c.commit_sha = 'hc-4'
+        """)
+
+        _, verified_to, _, broken_at, status = _verify(db, True, None)
+        assert status == "PASS"
+        assert broken_at is None
+        assert verified_to == seqs[3]
+
+    def test_verified_flag_can_change(self, chained):
+        """Test verify_change still marks a chained change as verified"""
+        change_id = chained.execute(
+            "SELECT change_id FROM pggit_audit.changes WHERE commit_sha = 'hc-1'"
+        )[0][0]
+        chained.execute("SELECT pggit_audit.verify_change(%s, 'auditor')", change_id)
+
+        assert _verify(chained, True, None)[4] == "PASS"
+
+    def test_content_update_rejected(self, chained):
+        """Test chained content cannot be updated"""
+        with pytest.raises(Exception, match="hash-chained"):
+            chained.execute("""
+                UPDATE pggit_audit.changes SET author = 'mallory' WHERE commit_sha = 'hc-2'
+            """)
+
+
+class TestTampering:
+    """History changed behind the triggers' back."""
+
+    def test_edited_change_detected(self, chained):
+        """Test an edited change breaks the chain at that change"""
+        db = chained
+        db.execute("ALTER TABLE pggit_audit.changes DISABLE TRIGGER changes_chain_immutability")
+        db.execute("UPDATE pggit_audit.changes SET author = 'mallory' WHERE commit_sha = 'hc-3'")
+        db.execute("ALTER TABLE pggit_audit.changes ENABLE TRIGGER changes_chain_immutability")
+
+        _, _, _, broken_at, status = _verify(db, True, None)
+        assert status == "FAIL"
+        assert broken_at == _seqs(db)[2]
+
+    def test_deleted_change_detected(self, chained):
+        """Test a removed change breaks the chain at its successor"""
+        db = chained
+        seqs = _seqs(db)
+        db.execute("DELETE FROM pggit_audit.changes WHERE commit_sha = 'hc-2'")
+
+        _, _, _, broken_at, status = _verify(db, True, None)
+        assert status == "FAIL"
+        assert broken_at == seqs[2]
+
+    def test_truncated_tail_detected(self, chained):
+        """Test removing the newest change no longer reaches the chain head"""
+        db = chained
+        db.execute("DELETE FROM pggit_audit.changes WHERE commit_sha = 'hc-5'")
+
+        assert _verify(db, True, None)[4] == "FAIL"
+
+
+class TestCheckpoints:
+    """Signed checkpoints and incremental verification."""
+
+    def test_verification_resumes_from_checkpoint(self, chained):
+        """Test only changes after the latest checkpoint are verified"""
+        db = chained
+        checkpoint_id = db.execute("SELECT pggit_audit.create_audit_checkpoint(%s)", KEY)[0][0]
+        checkpoint_seq = db.execute(
+            "SELECT chain_seq FROM pggit_audit.chain_checkpoints WHERE checkpoint_id = %s",
+            checkpoint_id,
+        )[0][0]
+        _append(db, 3, "hd")
+
+        verified_from, verified_to, rows_verified, _, status = _verify(db, False, KEY)
+        assert status == "PASS"
+        assert verified_from == checkpoint_seq == _seqs(db)[-1]
+        assert rows_verified == 3
+        assert verified_to == _seqs(db, "hd")[-1]
+
+    def test_wrong_key_fails(self, chained):
+        """Test a checkpoint does not verify under another key"""
+        db = chained
+        db.execute("SELECT pggit_audit.create_audit_checkpoint(%s)", KEY)
+
+        assert _verify(db, False, "other-key")[4] == "FAIL"
+
+    def test_checkpoints_are_immutable(self, chained):
+        """Test a checkpoint cannot be rewritten"""
+        db = chained
+        db.execute("SELECT pggit_audit.create_audit_checkpoint(%s)", KEY)
+        with pytest.raises(Exception, match="immutable"):
+            db.execute("UPDATE pggit_audit.chain_checkpoints SET row_hash = 'x'")
+
+    def test_checkpoint_requires_key(self, chained):
+        """Test a checkpoint is not taken without a signing key"""
+        chained.execute("SET LOCAL pggit.audit_signing_key = ''")
+        with pytest.raises(Exception, match="signing key"):
+            chained.execute("SELECT pggit_audit.create_audit_checkpoint()")
@@ -0,0 +1,187 @@
+"""
+E2E tests for batch claiming and archiving of backup jobs.
+
+Tests pggit.claim_backup_jobs() and pggit.archive_backup_jobs():
+- Up to N ready jobs claimed in one call, in priority order
+- Per-tool slots limiting how many jobs of a tool a worker takes
+- Finished jobs moved to pggit.backup_jobs_history
+- Reporting through pggit.backup_jobs_all
+
+Key Coverage:
+- Jobs waiting for their retry time are not claimed
+- Archived jobs can still be reset and cleaned up
+"""
+
+import pytest
+
+
+@pytest.fixture
+def queue(db_e2e, pggit_installed):
+    """Register a backup and return a helper that enqueues jobs for it."""
+    db_e2e.execute("""
+        INSERT INTO pggit.commits (hash, branch_id, message)
+        VALUES ('claim-commit', 1, 'Claim test')
+        ON CONFLICT (hash) DO NOTHING
+    """)
+    backup_id = db_e2e.execute(
+        "SELECT pggit.register_backup('claim-backup', 'full', 'pg_dump', '/tmp/claim', 'claim-commit')"
+    )[0][0]
+
+    def enqueue(tool="pg_dump", priority=100):
+        return db_e2e.execute(
+            "SELECT pggit.enqueue_backup_job(%s::UUID, 'echo claim', %s, 3, '{}', %s)",
+            backup_id, tool, priority,
+        )[0][0]
+
+    return db_e2e, enqueue
+
+
+def _claim(db, limit, slots=None):
+    return db.execute(
+        "SELECT job_id, tool FROM pggit.claim_backup_jobs('claim-worker', %s, %s::JSONB)",
+        limit, slots,
+    )
+
+
+class TestBatchClaim:
+    """Claiming several jobs per call."""
+
+    def test_claims_batch_by_priority(self, queue):
+        """Test a batch takes the highest priority ready jobs"""
+        db, enqueue = queue
+        low = [enqueue(priority=200) for _ in range(2)]
+        high = [enqueue(priority=10) for _ in range(2)]
+
+        claimed = {row[0] for row in _claim(db, 3)}
+        assert set(high) <= claimed
+        assert len(claimed & set(low)) == 1
+        assert db.execute(
+            "SELECT COUNT(*) FROM pggit.backup_jobs WHERE status = 'running' AND metadata->>'worker_id' = 'claim-worker'"
+        ) == [(3,)]
+
+    def test_tool_slots_respected(self, queue):
+        """Test a worker takes no more jobs of a tool than it has slots for"""
+        db, enqueue = queue
+        for _ in range(3):
+            enqueue("pgbackrest")
+        enqueue("pg_dump")
+
+        claimed = _claim(db, 4, '{"pgbackrest": 1}')
+        assert sorted(tool for _, tool in claimed) == ["pg_dump", "pgbackrest"]
+        assert _claim(db, 4, '{"pgbackrest": 0}') == []
+
+    def test_waiting_retries_skipped(self, queue):
+        """Test failed jobs are claimed only once their retry time has come"""
+        db, enqueue = queue
+        job_id = enqueue()
+        _claim(db, 1)
+        db.execute("SELECT pggit.fail_backup_job(%s::UUID, 'boom', 600)", job_id)
+
+        assert _claim(db, 5) == []
+
+    def test_get_next_backup_job_uses_claim(self, queue):
+        """Test the single-job function still honours excluded tools"""
+        db, enqueue = queue
+        enqueue("barman")
+        assert db.execute(
+            "SELECT job_id FROM pggit.get_next_backup_job('claim-worker', ARRAY['barman'])"
+        ) == []
+        assert len(db.execute("SELECT job_id FROM pggit.get_next_backup_job('claim-worker')")) == 1
+
+    def test_ready_index_used(self, queue):
+        """Test the claim query is served by the ready-job index"""
+        db, _ = queue
+        db.execute("SET LOCAL enable_seqscan = off")
+        plan = "\n".join(row[0] for row in db.execute("""
+            EXPLAIN SELECT job_id FROM pggit.backup_jobs
+            WHERE status IN ('queued', 'failed') AND attempts < max_attempts
+              AND next_retry_at <= CURRENT_TIMESTAMP
+            ORDER BY priority, next_retry_at, created_at
+            LIMIT 10
+        """))
+        assert "idx_backup_jobs_ready" in plan
+
+
+class TestArchive:
+    """Moving finished jobs out of the queue."""
+
+    def _finish(self, db, job_id, age="2 hours"):
+        db.execute(
+            "UPDATE pggit.backup_jobs SET status = 'completed', completed_at = now() - %s::INTERVAL WHERE job_id = %s",
+            age, job_id,
+        )
+
+    def test_finished_jobs_archived(self, queue):
+        """Test old completed jobs move to the history table"""
+        db, enqueue = queue
+        old_job, recent_job, queued_job = enqueue(), enqueue(), enqueue()
+        self._finish(db, old_job)
+        self._finish(db, recent_job, "1 minute")
+
+        assert db.execute("SELECT pggit.archive_backup_jobs()")[0][0] >= 1
+        assert db.execute(
+            "SELECT job_id FROM pggit.backup_jobs_history WHERE job_id IN (%s, %s, %s)",
+            old_job, recent_job, queued_job,
+        ) == [(old_job,)]
+        assert db.execute(
+            "SELECT COUNT(*) FROM pggit.backup_jobs_all WHERE job_id IN (%s, %s, %s)",
+            old_job, recent_job, queued_job,
+        ) == [(3,)]
+
+    def test_archived_columns_preserved(self, queue):
+        """Test each column of an archived job lands in the same history column"""
+        db, enqueue = queue
+        job_id = enqueue(tool="pgbackrest", priority=7)
+        db.execute(
+            "UPDATE pggit.backup_jobs SET heartbeat_at = now() - INTERVAL '3 hours', metadata = '{\"k\": 1}' WHERE job_id = %s",
+            job_id,
+        )
+        self._finish(db, job_id)
+        before = db.execute(
+            "SELECT tool, priority, status, heartbeat_at, completed_at, metadata FROM pggit.backup_jobs WHERE job_id = %s",
+            job_id,
+        )
+
+        db.execute("SELECT pggit.archive_backup_jobs()")
+        assert db.execute(
+            "SELECT tool, priority, status, heartbeat_at, completed_at, metadata FROM pggit.backup_jobs_history WHERE job_id = %s",
+            job_id,
+        ) == before
+        assert db.execute(
+            "SELECT priority, archived_at IS NOT NULL FROM pggit.backup_jobs_all WHERE job_id = %s", job_id
+        ) == [(7, True)]
+
+    def test_retryable_failures_stay_queued(self, queue):
+        """Test failed jobs with attempts left are not archived"""
+        db, enqueue = queue
+        job_id = enqueue()
+        _claim(db, 1)
+        db.execute("SELECT pggit.fail_backup_job(%s::UUID, 'boom', 0)", job_id)
+        db.execute("UPDATE pggit.backup_jobs SET completed_at = now() - INTERVAL '2 hours' WHERE job_id = %s", job_id)
+
+        db.execute("SELECT pggit.archive_backup_jobs()")
+        assert db.execute("SELECT status FROM pggit.backup_jobs WHERE job_id = %s", job_id) == [("failed",)]
+
+    def test_archived_job_reset(self, queue):
+        """Test resetting an archived cancelled job puts it back in the queue"""
+        db, enqueue = queue
+        job_id = enqueue()
+        db.execute(
+            "UPDATE pggit.backup_jobs SET status = 'cancelled', completed_at = now() - INTERVAL '2 hours' WHERE job_id = %s",
+            job_id,
+        )
+        db.execute("SELECT pggit.archive_backup_jobs()")
+
+        assert db.execute("SELECT pggit.reset_job(%s::UUID)", job_id) == [(True,)]
+        assert db.execute("SELECT status FROM pggit.backup_jobs WHERE job_id = %s", job_id) == [("queued",)]
+        assert db.execute("SELECT COUNT(*) FROM pggit.backup_jobs_history WHERE job_id = %s", job_id) == [(0,)]
+
+    def test_cleanup_covers_archive(self, queue):
+        """Test cleanup_old_jobs deletes expired archived jobs"""
+        db, enqueue = queue
+        job_id = enqueue()
+        self._finish(db, job_id, "30 days")
+        db.execute("SELECT pggit.archive_backup_jobs()")
+
+        db.execute("SELECT * FROM pggit.cleanup_old_jobs(7, FALSE)")
+        assert db.execute("SELECT COUNT(*) FROM pggit.backup_jobs_all WHERE job_id = %s", job_id) == [(0,)]
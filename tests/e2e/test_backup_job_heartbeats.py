@@ -0,0 +1,139 @@
+"""
+E2E tests for concurrent backup workers.
+
+Tests the queue functions behind the backup listener's worker pool:
+- get_next_backup_job() skipping tools the worker has no free slot for
+- heartbeat_backup_jobs() keeping a worker's claims alive
+- requeue_stale_backup_jobs() releasing jobs of workers that went silent
+- complete_backup_job() and fail_backup_job() checking the claim's owner
+
+Key Coverage:
+- Heartbeats only extend jobs claimed by the calling worker
+- Jobs out of attempts fail permanently instead of being requeued
+- A worker that lost its claim cannot record the job's outcome
+"""
+
+import pytest
+
+
+@pytest.fixture
+def jobs(db_e2e, pggit_installed):
+    """Queue one pgbackrest and two pg_dump jobs; return their ids by tool."""
+    db_e2e.execute("""
+        INSERT INTO pggit.commits (hash, branch_id, message)
+        VALUES ('hb-commit', 1, 'Heartbeat test')
+        ON CONFLICT (hash) DO NOTHING
+    """)
+    backup_id = db_e2e.execute(
+        "SELECT pggit.register_backup('hb-backup', 'full', 'pgbackrest', 's3://hb', 'hb-commit')"
+    )[0][0]
+
+    ids = {}
+    for tool in ("pgbackrest", "pg_dump", "pg_dump"):
+        job_id = db_e2e.execute(
+            "SELECT pggit.enqueue_backup_job(%s::UUID, 'echo hb', %s)", backup_id, tool
+        )[0][0]
+        ids.setdefault(tool, []).append(job_id)
+    return db_e2e, ids
+
+
+def _claim(db, worker, exclude=None):
+    rows = db.execute(
+        "SELECT job_id, tool FROM pggit.get_next_backup_job(%s, %s::TEXT[])", worker, exclude
+    )
+    return rows[0] if rows else None
+
+
+class TestWorkerPoolQueue:
+    """Queue support for concurrent workers."""
+
+    def test_claim_skips_saturated_tools(self, jobs):
+        """Test excluded tools are left for other workers"""
+        db, ids = jobs
+        claimed = [_claim(db, "hb-worker", ["pgbackrest"]) for _ in range(3)]
+
+        assert sorted(c[1] for c in claimed if c) == ["pg_dump", "pg_dump"]
+        assert _claim(db, "hb-worker")[0] == ids["pgbackrest"][0]
+
+    def test_heartbeat_only_for_own_jobs(self, jobs):
+        """Test a heartbeat returns and refreshes only the caller's running jobs"""
+        db, ids = jobs
+        mine = _claim(db, "hb-worker-1")[0]
+        theirs = _claim(db, "hb-worker-2")[0]
+        db.execute(
+            "UPDATE pggit.backup_jobs SET heartbeat_at = now() - INTERVAL '1 hour' WHERE job_id IN (%s, %s)",
+            mine, theirs,
+        )
+
+        held = db.execute(
+            "SELECT job_id FROM pggit.heartbeat_backup_jobs('hb-worker-1', ARRAY[%s, %s]::UUID[])",
+            mine, theirs,
+        )
+        assert held == [(mine,)]
+        assert db.execute(
+            "SELECT heartbeat_at > now() - INTERVAL '1 minute' FROM pggit.backup_jobs WHERE job_id = %s",
+            theirs,
+        ) == [(False,)]
+
+    def test_stale_jobs_requeued(self, jobs):
+        """Test a silent worker's job goes back to the queue for another worker"""
+        db, ids = jobs
+        job_id = _claim(db, "hb-dead")[0]
+        db.execute(
+            "UPDATE pggit.backup_jobs SET heartbeat_at = now() - INTERVAL '10 minutes' WHERE job_id = %s",
+            job_id,
+        )
+
+        released = db.execute("SELECT * FROM pggit.requeue_stale_backup_jobs(INTERVAL '5 minutes')")
+        assert released == [(job_id, "queued")]
+        assert db.execute("SELECT status FROM pggit.backup_jobs WHERE job_id = %s", job_id) == [("queued",)]
+
+    def test_fresh_jobs_kept(self, jobs):
+        """Test running jobs with a recent heartbeat stay claimed"""
+        db, ids = jobs
+        _claim(db, "hb-alive")
+        assert db.execute("SELECT * FROM pggit.requeue_stale_backup_jobs(INTERVAL '5 minutes')") == []
+
+    def test_exhausted_stale_job_fails(self, jobs):
+        """Test a stale job on its last attempt fails with its backup"""
+        db, ids = jobs
+        job_id = _claim(db, "hb-dead")[0]
+        db.execute(
+            """
+            UPDATE pggit.backup_jobs
+            SET attempts = max_attempts, heartbeat_at = now() - INTERVAL '10 minutes'
+            WHERE job_id = %s
+            """,
+            job_id,
+        )
+
+        assert db.execute("SELECT new_status FROM pggit.requeue_stale_backup_jobs()") == [("failed",)]
+        assert db.execute("""
+            SELECT b.status FROM pggit.backups b
+            JOIN pggit.backup_jobs j ON j.backup_id = b.backup_id
+            WHERE j.job_id = %s
+        """, job_id) == [("failed",)]
+
+    def test_outcome_of_lost_claim_ignored(self, jobs):
+        """Test a requeued worker cannot complete or fail the job another worker now runs"""
+        db, ids = jobs
+        job_id = _claim(db, "hb-dead", ["pg_dump"])[0]
+        db.execute(
+            "UPDATE pggit.backup_jobs SET heartbeat_at = now() - INTERVAL '10 minutes' WHERE job_id = %s",
+            job_id,
+        )
+        db.execute("SELECT * FROM pggit.requeue_stale_backup_jobs(INTERVAL '5 minutes')")
+        assert _claim(db, "hb-new", ["pg_dump"])[0] == job_id
+
+        assert db.execute(
+            "SELECT pggit.complete_backup_job(%s, 'late', 'hb-dead')", job_id
+        ) == [(False,)]
+        assert db.execute(
+            "SELECT pggit.fail_backup_job(%s, 'late', 0, 'hb-dead')", job_id
+        ) == [(False,)]
+        assert db.execute(
+            "SELECT status, metadata->>'worker_id' FROM pggit.backup_jobs WHERE job_id = %s", job_id
+        ) == [("running", "hb-new")]
+        assert db.execute(
+            "SELECT pggit.complete_backup_job(%s, 'done', 'hb-new')", job_id
+        ) == [(True,)]
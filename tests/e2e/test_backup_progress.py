@@ -0,0 +1,104 @@
+"""
+E2E tests for backup progress and tool metadata recorded by the listener.
+
+Tests pggit.update_backup_progress() and pggit.update_pgbackrest_metadata():
+- Progress parsed from tool output stored under metadata.progress
+- Progress only recorded while the backup is in progress
+- pgBackRest `--output=json info` backup entries mapped to sizes
+
+Key Coverage:
+- The older flat database/repo form still accepted
+- pgBackRest commands log per-file progress to the console
+"""
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def backup(db_e2e, pggit_installed):
+    """Register an in-progress pgBackRest backup and return its id."""
+    db_e2e.execute("""
+        INSERT INTO pggit.commits (hash, branch_id, message)
+        VALUES ('progress-commit', 1, 'Progress test')
+        ON CONFLICT (hash) DO NOTHING
+    """)
+    backup_id = db_e2e.execute(
+        "SELECT pggit.register_backup('progress-backup', 'full', 'pgbackrest', 's3://p', 'progress-commit')"
+    )[0][0]
+    return db_e2e, backup_id
+
+
+class TestBackupProgress:
+    """Progress and metadata updates."""
+
+    def test_progress_recorded(self, backup):
+        """Test the latest progress replaces the previous one"""
+        db, backup_id = backup
+        for done in (1024, 4096):
+            db.execute(
+                "SELECT pggit.update_backup_progress(%s, %s::jsonb)",
+                backup_id,
+                json.dumps({"bytes": done, "duration_seconds": 2.0, "throughput_bytes_per_second": done // 2}),
+            )
+
+        progress = db.execute(
+            "SELECT metadata->'progress' FROM pggit.backups WHERE backup_id = %s", backup_id
+        )[0][0]
+        assert progress["bytes"] == 4096
+        assert progress["throughput_bytes_per_second"] == 2048
+        assert "updated_at" in progress
+
+    def test_progress_ignored_after_completion(self, backup):
+        """Test a finished backup keeps its final metadata"""
+        db, backup_id = backup
+        db.execute("SELECT pggit.complete_backup(%s, 10)", backup_id)
+        assert db.execute(
+            "SELECT pggit.update_backup_progress(%s, '{\"bytes\": 1}'::jsonb)", backup_id
+        ) == [(False,)]
+
+    def test_pgbackrest_info_entry(self, backup):
+        """Test a backup entry of pgbackrest info sets sizes and reference"""
+        db, backup_id = backup
+        entry = {
+            "label": "20260101-010101F",
+            "type": "full",
+            "info": {"size": 25585254, "delta": 25585254, "repository": {"size": 3145728, "delta": 3145728}},
+            "timestamp": {"start": 1767229261, "stop": 1767229321},
+        }
+        db.execute("SELECT pggit.update_pgbackrest_metadata(%s, %s::jsonb)", backup_id, json.dumps(entry))
+
+        row = db.execute("""
+            SELECT backup_size, compressed_size,
+                   metadata->>'backup_reference', (metadata->>'duration_seconds')::INT
+            FROM pggit.backups WHERE backup_id = %s
+        """, backup_id)
+        assert row == [(25585254, 3145728, "20260101-010101F", 60)]
+
+    def test_flat_info_form(self, backup):
+        """Test the flat database/repo form keeps working"""
+        db, backup_id = backup
+        db.execute(
+            "SELECT pggit.update_pgbackrest_metadata(%s, %s::jsonb)",
+            backup_id,
+            json.dumps({"database": {"size": 100}, "repo": {"size": 40}, "reference": "ref-1"}),
+        )
+        assert db.execute(
+            "SELECT backup_size, compressed_size FROM pggit.backups WHERE backup_id = %s", backup_id
+        ) == [(100, 40)]
+
+    def test_pgbackrest_command_logs_detail(self, db_e2e, pggit_installed):
+        """Test generated pgBackRest commands emit per-file progress"""
+        db_e2e.execute("""
+            INSERT INTO pggit.commits (hash, branch_id, message)
+            VALUES ('progress-cmd', 1, 'Progress command')
+            ON CONFLICT (hash) DO NOTHING
+        """)
+        db_e2e.execute("UPDATE pggit.branches SET head_commit_hash = 'progress-cmd' WHERE name = 'main'")
+        backup_id = db_e2e.execute("SELECT pggit.backup_pgbackrest('full', 'main', 'prog')")[0][0]
+
+        command = db_e2e.execute(
+            "SELECT command FROM pggit.backup_jobs WHERE backup_id = %s", backup_id
+        )[0][0]
+        assert "--log-level-console=detail" in command
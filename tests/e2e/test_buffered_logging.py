@@ -0,0 +1,121 @@
+"""
+E2E tests for buffered structured logging and tracing.
+
+Tests pggit.log(), pggit.start_span() and pggit.end_span() with
+pggit.log_mode = 'buffered':
+- Records held in session-local buffers until flushed
+- Flush at commit through the deferred flush trigger
+- Early flush once pggit.log_buffer_size records are buffered
+- Collector sink through pggit.log_outbox and pggit.drain_log_outbox()
+
+Key Coverage:
+- Direct mode unchanged when no mode is set
+- Caller context parsed at flush time
+- Open spans, with the spans and logs under them, carried to a later flush
+"""
+
+import pytest
+
+
+@pytest.fixture
+def buffered(db_e2e, pggit_installed):
+    """Switch this transaction to buffered logging."""
+    db_e2e.execute("SET LOCAL pggit.log_mode = 'buffered'")
+    return db_e2e
+
+
+def _logs(db, message):
+    return db.execute(
+        "SELECT COUNT(*) FROM pggit.structured_logs WHERE message = %s", message
+    )[0][0]
+
+
+class TestBufferedLogging:
+    """Session-local buffering of log records and spans."""
+
+    def test_direct_mode_writes_immediately(self, db_e2e, pggit_installed):
+        """Test logging without a mode still inserts right away"""
+        db_e2e.execute("SELECT pggit.log_info('direct entry')")
+        assert _logs(db_e2e, "direct entry") == 1
+
+    def test_records_wait_for_commit_flush(self, buffered):
+        """Test buffered records reach structured_logs when deferred triggers fire"""
+        buffered.execute("SELECT pggit.log_info('buffered entry', '{\"k\": 1}')")
+        assert _logs(buffered, "buffered entry") == 0
+
+        buffered.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        rows = buffered.execute("""
+            SELECT severity, attributes, source_function, source_line > 0
+            FROM pggit.structured_logs WHERE message = 'buffered entry'
+        """)
+        assert rows == [("INFO", {"k": 1}, "pggit.log", True)]
+
+    def test_size_threshold_flushes_early(self, buffered):
+        """Test the buffer flushes once it holds pggit.log_buffer_size records"""
+        buffered.execute("SET LOCAL pggit.log_buffer_size = '10'")
+        buffered.execute("SELECT pggit.log_debug('batch ' || i) FROM generate_series(1, 25) i")
+
+        flushed = buffered.execute(
+            "SELECT COUNT(*) FROM pggit.structured_logs WHERE message LIKE 'batch %%'"
+        )[0][0]
+        assert flushed == 20
+        assert buffered.execute("SELECT pggit.flush_log_buffer()")[0][0] == 5
+
+    def test_spans_flush_before_logs(self, buffered):
+        """Test buffered spans are written with their end state and events"""
+        span_id = buffered.execute("SELECT pggit.start_span('buffered_op')")[0][0]
+        buffered.execute("SELECT pggit.add_span_event(%s, 'step')", span_id)
+        buffered.execute("SELECT pggit.log('INFO', 'in span', '{}', NULL, %s)", span_id)
+        buffered.execute("SELECT pggit.end_span(%s)", span_id)
+
+        assert buffered.execute("SELECT pggit.flush_log_buffer()")[0][0] == 2
+        rows = buffered.execute(
+            "SELECT status, end_time IS NOT NULL, cardinality(events) FROM pggit.trace_spans WHERE span_id = %s",
+            span_id,
+        )
+        assert rows == [("ok", True, 1)]
+        assert _logs(buffered, "in span") == 1
+
+    def test_open_spans_carried_over(self, buffered):
+        """Test an open span and the records under it wait for a flush after it ends"""
+        parent = buffered.execute("SELECT pggit.start_span('long_op')")[0][0]
+        child = buffered.execute("SELECT pggit.start_span('step', NULL, %s)", parent)[0][0]
+        buffered.execute("SELECT pggit.end_span(%s)", child)
+        buffered.execute("SELECT pggit.log('INFO', 'under open span', '{}', NULL, %s)", parent)
+        buffered.execute("SELECT pggit.log_info('no span')")
+
+        assert buffered.execute("SELECT pggit.flush_log_buffer()")[0][0] == 1
+        assert buffered.execute(
+            "SELECT COUNT(*) FROM pggit.trace_spans WHERE span_id IN (%s, %s)", parent, child
+        ) == [(0,)]
+        assert _logs(buffered, "under open span") == 0
+
+        buffered.execute("SELECT pggit.end_span(%s)", parent)
+        assert buffered.execute("SELECT pggit.flush_log_buffer()")[0][0] == 3
+        assert buffered.execute(
+            "SELECT bool_and(end_time IS NOT NULL), COUNT(*) FROM pggit.trace_spans WHERE span_id IN (%s, %s)",
+            parent, child,
+        ) == [(True, 2)]
+        assert _logs(buffered, "under open span") == 1
+
+    def test_collector_sink_uses_outbox(self, buffered):
+        """Test the collector sink queues ended spans and logs, keeping open spans"""
+        buffered.execute("SET LOCAL pggit.log_sink = 'collector'")
+        open_span = buffered.execute("SELECT pggit.start_span('still_open')")[0][0]
+        done_span = buffered.execute("SELECT pggit.start_span('done')")[0][0]
+        buffered.execute("SELECT pggit.end_span(%s, 'error', 'boom')", done_span)
+        buffered.execute("SELECT pggit.log_warn('to collector')")
+
+        assert buffered.execute("SELECT pggit.flush_log_buffer()")[0][0] == 2
+
+        drained = buffered.execute(
+            "SELECT record_type, record->>'operation_name', record->>'message' FROM pggit.drain_log_outbox()"
+        )
+        assert sorted(drained, key=str) == sorted(
+            [("span", "done", None), ("log", None, "to collector")], key=str
+        )
+        assert _logs(buffered, "to collector") == 0
+        assert buffered.execute(
+            "SELECT COUNT(*) FROM pg_temp.pggit_span_buffer WHERE span_id = %s", open_span
+        ) == [(1,)]
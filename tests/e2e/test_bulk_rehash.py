@@ -0,0 +1,172 @@
+"""
+E2E tests for the bulk rehash pipeline.
+
+Tests pggit.bulk_ddl_hashes(), pggit.update_all_hashes(),
+pggit.start_rehash() and pggit.rehash_batch():
+- Hashes for tables, views, functions and indexes computed in one query
+- Unhashed objects updated in batches behind a per-schema cursor
+- Workers partitioned by schema
+
+Key Coverage:
+- Bulk hashes equal the ones compute_ddl_hash returns
+- A run resumes from its cursor and finishes every schema once
+"""
+
+import pytest
+
+OBJECTS = [
+    ("TABLE", "items"),
+    ("TABLE", "holder"),
+    ("VIEW", "item_names"),
+    ("FUNCTION", "item_count"),
+    ("INDEX", "items_name_idx"),
+]
+
+
+@pytest.fixture
+def rehash_schemas(db_e2e, pggit_installed):
+    """Create objects to hash in schemas rh_a, rh_b and rh_c and clear their hashes."""
+    db_e2e.execute("CREATE TYPE public.rh_mood AS ENUM ('happy', 'sad')")
+    db_e2e.execute("CREATE DOMAIN public.rh_code AS VARCHAR(8) NOT NULL")
+    for schema in ("rh_a", "rh_b", "rh_c"):
+        db_e2e.execute(f"CREATE SCHEMA {schema}")
+        db_e2e.execute(f"""
+            CREATE TABLE {schema}.items (
+                id SERIAL PRIMARY KEY,
+                name VARCHAR(50) NOT NULL DEFAULT 'x'::character varying,
+                code CHAR(3),
+                price NUMERIC(10, 2) DEFAULT 0,
+                amount NUMERIC,
+                tags TEXT[],
+                mood public.rh_mood,
+                ref public.rh_code,
+                created_at TIMESTAMP DEFAULT now(),
+                doubled INT GENERATED ALWAYS AS (id * 2) STORED
+            )
+        """)
+        db_e2e.execute(f"CREATE TABLE {schema}.holder (note TEXT)")
+        db_e2e.execute(f"ALTER TABLE {schema}.holder DROP COLUMN note")
+        db_e2e.execute(f"ALTER TABLE {schema}.holder ADD COLUMN note VARCHAR")
+        db_e2e.execute(f"CREATE VIEW {schema}.item_names AS SELECT name FROM {schema}.items")
+        db_e2e.execute(f"CREATE INDEX items_name_idx ON {schema}.items (name)")
+        db_e2e.execute(f"""
+            CREATE FUNCTION {schema}.item_count() RETURNS BIGINT
+            LANGUAGE sql AS 'SELECT COUNT(*) FROM {schema}.items'
+        """)
+        for object_type, name in OBJECTS:
+            db_e2e.execute("""
+                INSERT INTO pggit.objects (object_type, schema_name, object_name)
+                SELECT %s, %s, %s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM pggit.objects
+                    WHERE object_type = %s AND schema_name = %s AND object_name = %s
+                )
+            """, object_type, schema, name, object_type, schema, name)
+    # Objects tracked by the DDL triggers (columns, sequences, ...) are left out
+    db_e2e.execute("""
+        UPDATE pggit.objects
+        SET ddl_hash = NULL,
+            is_active = (object_type::TEXT, object_name) IN (
+                ('TABLE', 'items'), ('TABLE', 'holder'), ('VIEW', 'item_names'),
+                ('FUNCTION', 'item_count'), ('INDEX', 'items_name_idx')
+            )
+        WHERE schema_name IN ('rh_a', 'rh_b', 'rh_c')
+    """)
+    return db_e2e
+
+
+def _hashes(db):
+    return db.execute("""
+        SELECT schema_name, object_name, ddl_hash FROM pggit.objects
+        WHERE schema_name IN ('rh_a', 'rh_b', 'rh_c') AND is_active = true
+        ORDER BY 1, 2
+    """)
+
+
+class TestBulkHashes:
+    """Set-based hash computation."""
+
+    def test_matches_compute_ddl_hash(self, rehash_schemas):
+        """Test every bulk hash equals the per-object hash"""
+        db = rehash_schemas
+        rows = db.execute("""
+            SELECT o.object_type::TEXT, o.object_name, h.ddl_hash,
+                   pggit.compute_ddl_hash(o.object_type, o.schema_name, o.object_name)
+            FROM pggit.bulk_ddl_hashes('rh_a') h
+            JOIN pggit.objects o ON o.id = h.object_id
+        """)
+
+        assert sorted((t, n) for t, n, _, _ in rows) == sorted(OBJECTS)
+        for object_type, name, bulk, single in rows:
+            assert bulk is not None
+            assert bulk == single, f"{object_type} {name}"
+
+    def test_missing_objects_get_null(self, rehash_schemas):
+        """Test objects that no longer exist are returned without a hash"""
+        db = rehash_schemas
+        object_id = db.execute("""
+            INSERT INTO pggit.objects (object_type, schema_name, object_name)
+            VALUES ('TABLE', 'rh_a', 'gone') RETURNING id
+        """)[0][0]
+
+        assert db.execute(
+            "SELECT ddl_hash FROM pggit.bulk_ddl_hashes('rh_a') WHERE object_id = %s", object_id
+        ) == [(None,)]
+
+    def test_update_all_hashes(self, rehash_schemas):
+        """Test update_all_hashes fills in every hashable object"""
+        db = rehash_schemas
+        updated, errors = db.execute("SELECT * FROM pggit.update_all_hashes()")[0]
+
+        assert updated >= len(OBJECTS) * 3
+        assert errors == 0
+        assert all(h is not None for _, _, h in _hashes(db))
+
+
+class TestRehashRuns:
+    """Batched, resumable runs."""
+
+    def test_batches_advance_cursor(self, rehash_schemas):
+        """Test each batch hashes the objects after the cursor"""
+        db = rehash_schemas
+        db.execute("UPDATE pggit.objects SET ddl_hash = 'x' WHERE ddl_hash IS NULL AND schema_name NOT LIKE 'rh\\_%%'")
+        run_id = db.execute("SELECT pggit.start_rehash(2)")[0][0]
+
+        assert db.execute(
+            "SELECT schema_name FROM pggit.rehash_progress WHERE run_id = %s ORDER BY 1", run_id
+        ) == [("rh_a",), ("rh_b",), ("rh_c",)]
+        assert db.execute("SELECT pggit.rehash_batch(%s)", run_id) == [(True,)]
+        assert db.execute("""
+            SELECT batches, objects_hashed, status FROM pggit.rehash_progress
+            WHERE run_id = %s AND schema_name = 'rh_a'
+        """, run_id) == [(1, 2, "running")]
+
+        while db.execute("SELECT pggit.rehash_batch(%s)", run_id)[0][0]:
+            pass
+        assert all(h is not None for _, _, h in _hashes(db))
+        assert db.execute("""
+            SELECT SUM(objects_hashed), bool_and(status = 'completed')
+            FROM pggit.rehash_progress WHERE run_id = %s
+        """, run_id) == [(15, True)]
+
+    def test_workers_take_disjoint_schemas(self, rehash_schemas):
+        """Test workers of a run only hash their own schemas"""
+        db = rehash_schemas
+        run_id = db.execute("SELECT pggit.start_rehash(100)")[0][0]
+
+        while db.execute("SELECT pggit.rehash_batch(%s, 0, 2)", run_id)[0][0]:
+            pass
+        done = db.execute("""
+            SELECT schema_name FROM pggit.rehash_progress
+            WHERE run_id = %s AND status = 'completed'
+        """, run_id)
+        assert all(
+            db.execute("SELECT (hashtext(%s) & 2147483647) %% 2", schema)[0][0] == 0
+            for (schema,) in done
+        )
+
+    def test_invalid_worker_rejected(self, rehash_schemas):
+        """Test a worker number outside the worker count is refused"""
+        run_id = rehash_schemas.execute("SELECT pggit.start_rehash()")[0][0]
+        with pytest.raises(Exception, match="Worker must be between 0 and 1"):
+            rehash_schemas.execute("SELECT pggit.rehash_batch(%s, 2, 2)", run_id)
@@ -0,0 +1,297 @@
+"""
+E2E tests for catalog-based DDL normalization.
+
+Tests pggit.normalize_table_ddl(), pggit.normalize_constraints(),
+pggit.normalize_indexes() and pggit.normalized_columns:
+- Columns read from pg_attribute, pg_type and pg_attrdef
+- Constraints and indexes read from pg_constraint and pg_index
+- Output compared with the previous information_schema implementation
+
+Key Coverage:
+- Golden text and hash for a fixed table
+- Domains, enums, arrays, generated and dropped columns
+- Partitioned tables and indexes keep the hashes pg_stat_user_indexes gave
+- Missing tables normalize to NULL or an empty string
+"""
+
+import hashlib
+
+import pytest
+
+# The information_schema implementations the catalog versions replaced
+LEGACY_TABLE_DDL = r"""
+    CREATE FUNCTION pg_temp.legacy_table_ddl(p_schema_name TEXT, p_table_name TEXT)
+    RETURNS TEXT AS $$
+        SELECT lower(regexp_replace(
+            format('create table %%I.%%I (%%s)', p_schema_name, p_table_name,
+                string_agg(
+                    format('%%I %%s%%s%%s',
+                        column_name,
+                        CASE
+                            WHEN data_type = 'character varying' THEN 'varchar' ||
+                                CASE WHEN character_maximum_length IS NOT NULL
+                                     THEN '(' || character_maximum_length || ')'
+                                     ELSE ''
+                                END
+                            WHEN data_type = 'character' THEN 'char(' || character_maximum_length || ')'
+                            WHEN data_type = 'numeric' AND numeric_precision IS NOT NULL THEN
+                                'numeric(' || numeric_precision ||
+                                CASE WHEN numeric_scale IS NOT NULL
+                                     THEN ',' || numeric_scale
+                                     ELSE ''
+                                END || ')'
+                            ELSE data_type
+                        END,
+                        CASE WHEN is_nullable = 'NO' THEN ' not null' ELSE '' END,
+                        CASE WHEN column_default IS NOT NULL
+                             THEN ' default ' ||
+                                  regexp_replace(
+                                      regexp_replace(column_default, '::[\w\s\[\]]+', '', 'g'),
+                                      '\s+', ' ', 'g'
+                                  )
+                             ELSE ''
+                        END
+                    ),
+                    ', '
+                    ORDER BY ordinal_position
+                )
+            ),
+            '\s+', ' ', 'g'
+        ))
+        FROM information_schema.columns
+        WHERE table_schema = p_schema_name
+        AND table_name = p_table_name
+        HAVING COUNT(*) > 0
+    $$ LANGUAGE sql
+"""
+
+LEGACY_CONSTRAINTS = r"""
+    CREATE FUNCTION pg_temp.legacy_constraints(p_schema_name TEXT, p_table_name TEXT)
+    RETURNS TEXT AS $$
+        SELECT COALESCE(lower(string_agg(
+            format('%%s %%s %%s', contype, conname,
+                CASE WHEN contype IN ('c', 'f', 'p', 'u')
+                     THEN pg_get_constraintdef(oid, true) ELSE '' END),
+            '; ' ORDER BY contype, conname
+        )), '')
+        FROM pg_constraint
+        WHERE conrelid = (p_schema_name || '.' || p_table_name)::regclass
+    $$ LANGUAGE sql
+"""
+
+LEGACY_INDEXES = r"""
+    CREATE FUNCTION pg_temp.legacy_indexes(p_schema_name TEXT, p_table_name TEXT)
+    RETURNS TEXT AS $$
+        SELECT COALESCE(string_agg(
+            regexp_replace(
+                regexp_replace(lower(pg_get_indexdef(ui.indexrelid, 0, true)), p_schema_name || '\.', '', 'g'),
+                '\s+', ' ', 'g'
+            ),
+            '; ' ORDER BY ui.indexrelname
+        ), '')
+        FROM pg_stat_user_indexes ui
+        WHERE ui.schemaname = p_schema_name
+        AND ui.relname = p_table_name
+        AND ui.indexrelname NOT IN (
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = (p_schema_name || '.' || p_table_name)::regclass
+            AND contype = 'p'
+        )
+    $$ LANGUAGE sql
+"""
+
+LEGACY_INDEX_HASH = r"""
+    CREATE FUNCTION pg_temp.legacy_index_hash(p_schema_name TEXT, p_index_name TEXT)
+    RETURNS TEXT AS $$
+        SELECT encode(digest(regexp_replace(
+            lower(pg_get_indexdef(i.indexrelid, 0, true)), '\s+', ' ', 'g'
+        ), 'sha256'), 'hex')
+        FROM pg_stat_user_indexes i
+        WHERE i.schemaname = p_schema_name
+        AND i.indexrelname = p_index_name
+    $$ LANGUAGE sql
+"""
+
+GOLDEN_DDL = (
+    "create table norm_gold.orders (id integer not null, "
+    "code varchar(12) not null default 'new', "
+    "total numeric(10,2) default 0.00, note text, "
+    "tags array default '{}', "
+    "placed timestamp without time zone default now())"
+)
+
+
+@pytest.fixture
+def norm_schema(db_e2e, pggit_installed):
+    """Create schema norm_gold with tables covering the column kinds."""
+    db = db_e2e
+    for legacy in (LEGACY_TABLE_DDL, LEGACY_CONSTRAINTS, LEGACY_INDEXES, LEGACY_INDEX_HASH):
+        db.execute(legacy)
+    db.execute("CREATE SCHEMA norm_gold")
+    db.execute("CREATE TYPE norm_gold.state AS ENUM ('open', 'closed')")
+    db.execute("CREATE DOMAIN norm_gold.code AS VARCHAR(8) NOT NULL")
+    db.execute("CREATE DOMAIN norm_gold.amounts AS NUMERIC(8, 3)[]")
+    db.execute("""
+        CREATE TABLE norm_gold.orders (
+            id INT PRIMARY KEY,
+            code VARCHAR(12) NOT NULL DEFAULT 'new',
+            total NUMERIC(10, 2) DEFAULT 0.00,
+            note TEXT,
+            tags TEXT[] DEFAULT '{}',
+            placed TIMESTAMP DEFAULT now()
+        )
+    """)
+    db.execute("""
+        CREATE TABLE norm_gold.kinds (
+            id BIGSERIAL PRIMARY KEY,
+            order_id INT REFERENCES norm_gold.orders (id),
+            flag CHAR,
+            padded BPCHAR,
+            free VARCHAR,
+            exact NUMERIC,
+            small SMALLINT CHECK (small > 0),
+            stamp TIMESTAMPTZ DEFAULT '2024-01-01 00:00:00+00'::timestamptz,
+            span INTERVAL,
+            letter "char",
+            state norm_gold.state DEFAULT 'open',
+            ref norm_gold.code,
+            amounts norm_gold.amounts,
+            names VARCHAR(20)[],
+            doubled BIGINT GENERATED ALWAYS AS (id * 2) STORED,
+            payload JSONB DEFAULT '{"a":   1}'::jsonb,
+            UNIQUE (order_id, flag)
+        )
+    """)
+    db.execute("ALTER TABLE norm_gold.kinds DROP COLUMN span")
+    db.execute("CREATE INDEX kinds_state_idx ON norm_gold.kinds (state) WHERE state = 'open'")
+    db.execute("CREATE INDEX kinds_lower_free_idx ON norm_gold.kinds (lower(free))")
+    db.execute("CREATE VIEW norm_gold.open_kinds AS SELECT id, free FROM norm_gold.kinds")
+    db.execute("""
+        CREATE TABLE norm_gold.events (
+            id INT,
+            at DATE,
+            PRIMARY KEY (id, at)
+        ) PARTITION BY RANGE (at)
+    """)
+    db.execute("""
+        CREATE TABLE norm_gold.events_2024 PARTITION OF norm_gold.events
+        FOR VALUES FROM ('2024-01-01') TO ('2025-01-01')
+    """)
+    db.execute("CREATE INDEX events_at_idx ON norm_gold.events (at)")
+    db.execute("CREATE MATERIALIZED VIEW norm_gold.kind_totals AS SELECT state, count(*) AS n FROM norm_gold.kinds GROUP BY state")
+    db.execute("CREATE INDEX kind_totals_state_idx ON norm_gold.kind_totals (state)")
+    return db
+
+
+class TestGolden:
+    """Fixed output for a fixed table."""
+
+    def test_golden_table_ddl(self, norm_schema):
+        """Test the normalized text of a known table is unchanged"""
+        assert norm_schema.execute(
+            "SELECT pggit.normalize_table_ddl('norm_gold', 'orders')"
+        ) == [(GOLDEN_DDL,)]
+
+    def test_golden_hash(self, norm_schema):
+        """Test compute_ddl_hash still hashes the golden text"""
+        expected = hashlib.sha256(GOLDEN_DDL.encode()).hexdigest()
+        assert norm_schema.execute(
+            "SELECT pggit.compute_ddl_hash('TABLE', 'norm_gold', 'orders')"
+        ) == [(expected,)]
+
+
+class TestLegacyParity:
+    """Same output as the information_schema implementation."""
+
+    @pytest.mark.parametrize("table", ["orders", "kinds", "open_kinds"])
+    def test_table_ddl_matches(self, norm_schema, table):
+        """Test column normalization matches information_schema"""
+        new, old = norm_schema.execute(
+            "SELECT pggit.normalize_table_ddl('norm_gold', %s), pg_temp.legacy_table_ddl('norm_gold', %s)",
+            table, table,
+        )[0]
+        assert new is not None
+        assert new == old
+
+    @pytest.mark.parametrize("table", ["orders", "kinds", "events", "events_2024"])
+    def test_constraints_and_indexes_match(self, norm_schema, table):
+        """Test constraint and index normalization match the previous queries"""
+        rows = norm_schema.execute("""
+            SELECT pggit.normalize_constraints('norm_gold', %s),
+                   pg_temp.legacy_constraints('norm_gold', %s),
+                   pggit.normalize_indexes('norm_gold', %s),
+                   pg_temp.legacy_indexes('norm_gold', %s)
+        """, table, table, table, table)
+        new_constraints, old_constraints, new_indexes, old_indexes = rows[0]
+        assert new_constraints == old_constraints
+        assert new_indexes == old_indexes
+
+    def test_index_hashes_match(self, norm_schema):
+        """Test index hashes match pg_stat_user_indexes, including partitioned ones"""
+        db = norm_schema
+        db.execute("""
+            INSERT INTO pggit.objects (object_type, schema_name, object_name)
+            SELECT 'INDEX', 'norm_gold', c.relname
+            FROM pg_class c
+            WHERE c.relnamespace = 'norm_gold'::regnamespace
+            AND c.relkind IN ('i', 'I')
+            AND NOT EXISTS (
+                SELECT 1 FROM pggit.objects
+                WHERE object_type = 'INDEX' AND schema_name = 'norm_gold' AND object_name = c.relname
+            )
+        """)
+
+        rows = db.execute("""
+            SELECT o.object_name,
+                   pggit.compute_ddl_hash('INDEX', 'norm_gold', o.object_name),
+                   h.ddl_hash,
+                   pg_temp.legacy_index_hash('norm_gold', o.object_name)
+            FROM pggit.objects o
+            JOIN pggit.catalog_ddl_hashes(ARRAY(
+                SELECT id FROM pggit.objects
+                WHERE object_type = 'INDEX' AND schema_name = 'norm_gold'
+            )) h ON h.object_id = o.id
+            ORDER BY o.object_name
+        """)
+        by_name = {name: (single, bulk, old) for name, single, bulk, old in rows}
+        assert by_name["events_at_idx"] == (None, None, None)
+        assert by_name["kind_totals_state_idx"][2] is not None
+        assert by_name["events_2024_at_idx"][2] is not None
+        assert all(single == bulk == old for single, bulk, old in by_name.values())
+
+    def test_bulk_hashes_use_same_columns(self, norm_schema):
+        """Test bulk hashes agree with the per-table normalization"""
+        db = norm_schema
+        db.execute("""
+            INSERT INTO pggit.objects (object_type, schema_name, object_name)
+            SELECT 'TABLE', 'norm_gold', t FROM unnest(ARRAY['orders', 'kinds']) t
+            WHERE NOT EXISTS (
+                SELECT 1 FROM pggit.objects
+                WHERE object_type = 'TABLE' AND schema_name = 'norm_gold' AND object_name = t
+            )
+        """)
+        db.execute("""
+            UPDATE pggit.objects SET ddl_hash = NULL, is_active = true
+            WHERE schema_name = 'norm_gold' AND object_type = 'TABLE'
+        """)
+
+        rows = db.execute("""
+            SELECT h.ddl_hash, encode(digest(pg_temp.legacy_table_ddl(o.schema_name, o.object_name), 'sha256'), 'hex')
+            FROM pggit.bulk_ddl_hashes('norm_gold') h
+            JOIN pggit.objects o ON o.id = h.object_id
+            WHERE o.object_type = 'TABLE' AND o.object_name IN ('orders', 'kinds')
+        """)
+        assert len(rows) >= 2
+        assert all(new == old for new, old in rows)
+
+
+class TestMissingObjects:
+    """Objects that do not exist."""
+
+    def test_missing_table(self, db_e2e, pggit_installed):
+        """Test a missing table has no DDL, constraints or indexes"""
+        assert db_e2e.execute("""
+            SELECT pggit.normalize_table_ddl('public', 'no_such_table'),
+                   pggit.normalize_constraints('public', 'no_such_table'),
+                   pggit.normalize_indexes('public', 'no_such_table')
+        """) == [(None, "", "")]
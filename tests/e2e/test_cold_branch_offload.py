@@ -0,0 +1,167 @@
+"""
+E2E tests for offloading data branches to cold tier files.
+
+Tests pggit.offload_branch_to_cold(), pggit.prefetch_from_cold(),
+pggit.measure_cold_retrieval() and pggit.archive_old_branches():
+- Branch tables exported with COPY to compressed files and truncated
+- Rows loaded back from the files on prefetch or branch switch
+- Retrieval time measured during the load
+- Stale branches archived by age
+
+Key Coverage:
+- Reads and writes of offloaded branches rejected until they are rehydrated
+- Copy and delta branches, with and without compression
+"""
+
+import pytest
+
+CHECKSUM = "SELECT md5(string_agg(t::TEXT, ',' ORDER BY t.id)), COUNT(*) FROM {} t"
+
+
+@pytest.fixture
+def cold_branches(db_e2e, pggit_installed):
+    """Create public.cold_items with a copy branch and a delta branch."""
+    if not db_e2e.execute("SELECT rolsuper FROM pg_roles WHERE rolname = current_user")[0][0]:
+        pytest.skip("COPY TO PROGRAM and pg_stat_file need a superuser")
+
+    db_e2e.execute("SET LOCAL pggit.cold_storage_path = '/tmp'")
+    db_e2e.execute("""
+        CREATE TABLE public.cold_items (id INT PRIMARY KEY, payload TEXT)
+    """)
+    db_e2e.execute("""
+        INSERT INTO public.cold_items
+        SELECT i, repeat(md5(i::TEXT), 4) FROM generate_series(1, 2000) i
+    """)
+    db_e2e.execute("SELECT pggit.create_data_branch('cold_copy', 'main', ARRAY['cold_items'])")
+    db_e2e.execute("SET LOCAL pggit.data_branch_storage = 'delta'")
+    db_e2e.execute("SELECT pggit.create_data_branch('cold_delta', 'main', ARRAY['cold_items'])")
+    db_e2e.execute("SET LOCAL pggit.data_branch_storage = 'copy'")
+    db_e2e.execute("UPDATE pggit_branch_cold_delta.cold_items SET payload = 'delta' WHERE id <= 10")
+    yield db_e2e
+    db_e2e.execute("SELECT pggit.switch_branch('main')")
+
+
+def _checksum(db, branch):
+    relation = db.execute("SELECT pggit.data_branch_relation(%s, 'public', 'cold_items')", branch)[0][0]
+    return db.execute(CHECKSUM.format(relation))[0]
+
+
+class TestOffload:
+    """Moving branch tables to cold tier files."""
+
+    def test_offload_empties_table(self, cold_branches):
+        """Test the table is truncated and its rows recorded with the file"""
+        db = cold_branches
+        rows = db.execute("""
+            SELECT table_name, row_count, heap_bytes, file_bytes, file_path
+            FROM pggit.offload_branch_to_cold('cold_copy')
+        """)
+
+        assert len(rows) == 1
+        table_name, row_count, heap_bytes, file_bytes, file_path = rows[0]
+        assert (table_name, row_count) == ("cold_items", 2000)
+        assert 0 < file_bytes < heap_bytes
+        assert file_path.startswith("/tmp/") and file_path.endswith(".gz")
+        assert db.execute("SELECT COUNT(*) FROM pggit_branch_cold_copy.cold_items") == [(0,)]
+        assert db.execute("""
+            SELECT current_tier, archived, compressed_size_bytes = %s
+            FROM pggit.storage_objects WHERE object_type = 'branch' AND object_name = 'cold_copy'
+        """, file_bytes) == [("COLD", True, True)]
+
+    def test_writes_rejected_while_cold(self, cold_branches):
+        """Test writing to an offloaded table raises instead of diverging"""
+        db = cold_branches
+        db.execute("SELECT * FROM pggit.offload_branch_to_cold('cold_copy')")
+        with pytest.raises(Exception, match="in cold storage"):
+            db.execute("INSERT INTO pggit_branch_cold_copy.cold_items VALUES (9999, 'x')")
+
+    def test_delta_reads_rejected_while_cold(self, cold_branches):
+        """Test reading an offloaded delta branch raises instead of showing the parent's rows"""
+        db = cold_branches
+        db.execute("SELECT * FROM pggit.offload_branch_to_cold('cold_delta')")
+
+        assert db.execute("SELECT COUNT(*) FROM public.cold_items WHERE payload = 'delta'") == [(0,)]
+        with pytest.raises(Exception, match="in cold storage"):
+            db.execute("SELECT COUNT(*) FROM pggit_branch_cold_delta.cold_items")
+
+    def test_routed_reads_rejected_while_cold(self, cold_branches):
+        """Test reading the routed table on an offloaded branch raises instead of reading empty"""
+        db = cold_branches
+        db.execute("SELECT * FROM pggit.offload_branch_to_cold('cold_copy')")
+        db.execute("SELECT set_config('pggit.current_branch', 'cold_copy', false)")
+        with pytest.raises(Exception, match="in cold storage"):
+            db.execute("SELECT COUNT(*) FROM public.cold_items WHERE id = 1")
+
+    def test_unknown_compression_rejected(self, db_e2e, pggit_installed):
+        """Test compressors other than none, gzip, lz4 and zstd are refused"""
+        with pytest.raises(Exception, match="Unsupported cold storage compression"):
+            db_e2e.execute("SELECT pggit.cold_compression_command('rar')")
+
+
+class TestRehydrate:
+    """Loading cold tables back."""
+
+    @pytest.mark.parametrize("branch,compression", [
+        ("cold_copy", "gzip"),
+        ("cold_copy", "none"),
+        ("cold_delta", "gzip"),
+    ])
+    def test_prefetch_restores_rows(self, cold_branches, branch, compression):
+        """Test prefetching a branch restores exactly the rows it had"""
+        db = cold_branches
+        before = _checksum(db, branch)
+        db.execute("SELECT * FROM pggit.offload_branch_to_cold(%s, %s)", branch, compression)
+
+        db.execute("SELECT pggit.prefetch_from_cold(%s)", branch)
+        assert _checksum(db, branch) == before
+        assert db.execute(
+            "SELECT bool_and(NOT is_cold) FROM pggit.cold_branch_tables WHERE branch_name = %s", branch
+        ) == [(True,)]
+        assert db.execute(
+            "SELECT current_tier FROM pggit.storage_objects WHERE object_type = 'branch' AND object_name = %s",
+            branch,
+        ) == [("HOT",)]
+
+    def test_retrieval_time_measured(self, cold_branches):
+        """Test measure_cold_retrieval reports the measured load time"""
+        db = cold_branches
+        db.execute("SELECT * FROM pggit.offload_branch_to_cold('cold_copy')")
+        db.execute("SELECT pggit.prefetch_from_cold('cold_copy')")
+
+        measured = db.execute("""
+            SELECT response_time_ms FROM pggit.access_patterns
+            WHERE object_name = 'cold_copy' AND access_type = 'COLD_RETRIEVAL'
+        """)
+        assert len(measured) == 1
+        assert db.execute("SELECT * FROM pggit.measure_cold_retrieval('cold_copy')") == measured
+
+    def test_switch_branch_rehydrates(self, cold_branches):
+        """Test switching to an offloaded branch loads its tables"""
+        db = cold_branches
+        db.execute("SELECT * FROM pggit.offload_branch_to_cold('cold_copy', 'gzip', 1)")
+
+        db.execute("SELECT pggit.switch_branch('cold_copy')")
+        assert db.execute("SELECT COUNT(*) FROM public.cold_items") == [(2000,)]
+        db.execute("INSERT INTO pggit_branch_cold_copy.cold_items VALUES (9999, 'x')")
+
+
+class TestArchive:
+    """Archiving branches by age."""
+
+    def test_archives_only_stale_branches(self, cold_branches):
+        """Test branches modified within the threshold stay hot"""
+        db = cold_branches
+        db.execute("""
+            UPDATE pggit.branch_storage_stats SET last_modified = now() - INTERVAL '200 days'
+            WHERE branch_name = 'cold_copy'
+        """)
+        db.execute("UPDATE pggit.branch_storage_stats SET last_modified = now() WHERE branch_name = 'cold_delta'")
+
+        archived, reclaimed = db.execute(
+            "SELECT * FROM pggit.archive_old_branches('180 days', 'gzip', 6)"
+        )[0]
+        assert archived == 1
+        assert reclaimed > 0
+        assert db.execute(
+            "SELECT DISTINCT branch_name FROM pggit.cold_branch_tables WHERE is_cold"
+        ) == [("cold_copy",)]
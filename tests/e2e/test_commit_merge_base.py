@@ -0,0 +1,139 @@
+"""
+E2E tests for commit-graph generation numbers and merge bases.
+
+Tests pggit_v0.merge_base() and pggit_v0.three_way_diff() over a small
+commit graph:
+- Generation numbers maintained as parents are recorded
+- Best common ancestor for diverged, linear and unrelated histories
+- Three-way classification of tree entries against the merge base
+
+Key Coverage:
+- Bulk parent inserts that link several new commits at once
+- Generation floors lowered until the histories meet
+"""
+
+import pytest
+
+
+def _commit(db, sha, parents, tree=None, minute=0):
+    db.execute(
+        """
+        INSERT INTO pggit_v0.commit_graph (commit_sha, tree_sha, author, message, committed_at)
+        VALUES (%s, %s, 'tester', %s, now() + make_interval(mins => %s))
+        """,
+        sha, tree or "tree-" + sha, "commit " + sha, minute,
+    )
+    for parent in parents:
+        db.execute(
+            "INSERT INTO pggit_v0.commit_parents (commit_sha, parent_sha) VALUES (%s, %s)",
+            sha, parent,
+        )
+
+
+@pytest.fixture
+def graph(db_e2e, pggit_installed):
+    """Build root -> a1 -> a2 and root -> b1 -> b2 -> b3, plus a merge of a2 and b1."""
+    _commit(db_e2e, "mb-root", [])
+    _commit(db_e2e, "mb-a1", ["mb-root"], minute=1)
+    _commit(db_e2e, "mb-a2", ["mb-a1"], minute=2)
+    _commit(db_e2e, "mb-b1", ["mb-root"], minute=1)
+    _commit(db_e2e, "mb-b2", ["mb-b1"], minute=2)
+    _commit(db_e2e, "mb-b3", ["mb-b2"], minute=3)
+    _commit(db_e2e, "mb-m", ["mb-a2", "mb-b1"], minute=4)
+    _commit(db_e2e, "mb-other", [])
+    return db_e2e
+
+
+def _merge_base(db, a, b):
+    return db.execute("SELECT pggit_v0.merge_base(%s, %s)", a, b)[0][0]
+
+
+class TestMergeBase:
+    """Generation-pruned common ancestor search."""
+
+    def test_generations_follow_parents(self, graph):
+        """Test each commit sits one level above its highest parent"""
+        rows = graph.execute(
+            """
+            SELECT commit_sha, generation FROM pggit_v0.commit_graph
+            WHERE commit_sha LIKE 'mb-%%' ORDER BY commit_sha
+            """
+        )
+        assert dict(rows) == {
+            "mb-a1": 2, "mb-a2": 3, "mb-b1": 2, "mb-b2": 3, "mb-b3": 4,
+            "mb-m": 4, "mb-other": 1, "mb-root": 1,
+        }
+
+    def test_bulk_parent_insert_orders_generations(self, graph):
+        """Test a single statement linking a chain of new commits numbers it in order"""
+        for sha, minute in [("mb-c1", 5), ("mb-c2", 6)]:
+            graph.execute(
+                """
+                INSERT INTO pggit_v0.commit_graph (commit_sha, tree_sha, author, message, committed_at)
+                VALUES (%s, 'tree', 'tester', 'bulk', now() + make_interval(mins => %s))
+                """,
+                sha, minute,
+            )
+        graph.execute(
+            """
+            INSERT INTO pggit_v0.commit_parents (commit_sha, parent_sha)
+            VALUES ('mb-c2', 'mb-c1'), ('mb-c1', 'mb-b3')
+            """
+        )
+        rows = graph.execute(
+            "SELECT commit_sha, generation FROM pggit_v0.commit_graph WHERE commit_sha IN ('mb-c1', 'mb-c2')"
+        )
+        assert dict(rows) == {"mb-c1": 5, "mb-c2": 6}
+
+    def test_diverged_histories(self, graph):
+        """Test diverged branches meet at their fork point"""
+        assert _merge_base(graph, "mb-a2", "mb-b3") == "mb-root"
+
+    def test_merge_commit_prefers_nearest_ancestor(self, graph):
+        """Test a merged branch's tip is the base, not the older root"""
+        assert _merge_base(graph, "mb-m", "mb-b3") == "mb-b1"
+
+    def test_linear_history(self, graph):
+        """Test an ancestor is its own merge base with a descendant"""
+        assert _merge_base(graph, "mb-b1", "mb-b3") == "mb-b1"
+        assert _merge_base(graph, "mb-b3", "mb-b3") == "mb-b3"
+
+    def test_unrelated_histories(self, graph):
+        """Test unrelated histories have no merge base"""
+        assert _merge_base(graph, "mb-a2", "mb-other") is None
+
+    def test_unknown_commit_raises(self, graph):
+        """Test an unknown commit is reported"""
+        with pytest.raises(Exception, match="not found"):
+            _merge_base(graph, "mb-a2", "mb-missing")
+
+
+class TestThreeWayDiff:
+    """Tree entries compared against the merge base."""
+
+    def test_statuses(self, db_e2e, pggit_installed):
+        """Test one-sided, identical and conflicting changes are classified"""
+        entries = {
+            "tw-base": {"s.same": "o1", "s.ours": "o2", "s.theirs": "o3", "s.both": "o4", "s.clash": "o5"},
+            "tw-ours": {"s.same": "o1", "s.ours": "o2x", "s.theirs": "o3", "s.both": "o4x", "s.clash": "o5a"},
+            "tw-theirs": {"s.same": "o1", "s.ours": "o2", "s.theirs": "o3x", "s.both": "o4x", "s.clash": "o5b"},
+        }
+        for tree, paths in entries.items():
+            for path, obj in paths.items():
+                db_e2e.execute(
+                    "INSERT INTO pggit_v0.tree_entries (tree_sha, path, object_sha) VALUES (%s, %s, %s)",
+                    tree, path, obj,
+                )
+        _commit(db_e2e, "tw-base", [], tree="tw-base")
+        _commit(db_e2e, "tw-ours", ["tw-base"], tree="tw-ours", minute=1)
+        _commit(db_e2e, "tw-theirs", ["tw-base"], tree="tw-theirs", minute=1)
+
+        rows = db_e2e.execute(
+            "SELECT path, status FROM pggit_v0.three_way_diff('tw-base', 'tw-ours', 'tw-theirs')"
+        )
+        assert rows == [
+            ("s.both", "both"),
+            ("s.clash", "conflict"),
+            ("s.ours", "ours"),
+            ("s.theirs", "theirs"),
+        ]
@@ -0,0 +1,162 @@
+"""
+E2E tests for set-based data branch routing.
+
+Tests the routing view created by pggit.setup_table_routing() and rebuilt by
+pggit.refresh_table_routing() and pggit.drop_data_branch():
+- Point lookups use index scans on the active branch only
+- Reads and writes follow pggit.current_branch, including cached plans
+- Inserts through the view use the base table's defaults
+- Removed branches drop out of the routing view
+
+Key Coverage:
+- Planner visibility of routed tables
+- Branch isolation for copy and delta branches
+"""
+
+import pytest
+
+
+@pytest.fixture
+def routed(db_e2e, pggit_installed):
+    """Create public.routed_items with a copy branch and a delta branch."""
+    db_e2e.execute("""
+        CREATE TABLE public.routed_items (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            qty INT DEFAULT 0
+        )
+    """)
+    db_e2e.execute("""
+        INSERT INTO public.routed_items (name, qty)
+        SELECT 'item' || i, i FROM generate_series(1, 1000) i
+    """)
+    db_e2e.execute(
+        "SELECT pggit.create_data_branch('route_copy', 'main', ARRAY['routed_items'])"
+    )
+    db_e2e.execute("SET LOCAL pggit.data_branch_storage = 'delta'")
+    db_e2e.execute(
+        "SELECT pggit.create_data_branch('route_delta', 'main', ARRAY['routed_items'])"
+    )
+    yield db_e2e
+    db_e2e.execute("SELECT pggit.switch_branch('main')")
+
+
+def _plan(db, query):
+    return "\n".join(r[0] for r in db.execute(f"EXPLAIN (COSTS OFF) {query}"))
+
+
+def _view(db):
+    return db.execute("SELECT pg_get_viewdef('public.routed_items'::regclass)")[0][0]
+
+
+class TestSetBasedRouting:
+    """Planner-visible routing views."""
+
+    def test_point_lookup_uses_index(self, routed):
+        """Test a routed point lookup is an index scan, not a function scan"""
+        plan = _plan(routed, "SELECT * FROM public.routed_items WHERE id = 5")
+
+        assert "Function Scan" not in plan
+        assert "Seq Scan" not in plan
+        assert "Index Cond: (id = 5)" in plan
+        assert "One-Time Filter" in plan
+
+    def test_reads_follow_current_branch(self, routed):
+        """Test one session sees each branch's data after switching"""
+        routed.execute("SELECT pggit.switch_branch('route_copy')")
+        routed.execute("UPDATE public.routed_items SET qty = -1 WHERE id = 1")
+        routed.execute("SELECT pggit.switch_branch('route_delta')")
+        routed.execute("UPDATE public.routed_items SET qty = -2 WHERE id = 1")
+
+        seen = {}
+        for branch in ["main", "route_copy", "route_delta"]:
+            routed.execute("SELECT pggit.switch_branch(%s)", branch)
+            seen[branch] = routed.execute(
+                "SELECT qty FROM public.routed_items WHERE id = 1"
+            )[0][0]
+
+        assert seen == {"main": 1, "route_copy": -1, "route_delta": -2}
+
+    def test_cached_plan_follows_branch_switch(self, routed):
+        """Test a plan cached in a function still routes after switch_branch"""
+        routed.execute("""
+            CREATE FUNCTION public.routed_qty(p_id INT) RETURNS INT AS $$
+            DECLARE v_qty INT;
+            BEGIN
+                SELECT qty INTO v_qty FROM public.routed_items WHERE id = p_id;
+                RETURN v_qty;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        routed.execute("SELECT pggit.switch_branch('route_copy')")
+        routed.execute("DELETE FROM public.routed_items WHERE id = 2")
+
+        # Enough calls for plpgsql to switch to a generic plan
+        for _ in range(6):
+            assert routed.execute("SELECT public.routed_qty(2)")[0][0] is None
+
+        routed.execute("SELECT pggit.switch_branch('main')")
+        assert routed.execute("SELECT public.routed_qty(2)")[0][0] == 2
+
+    def test_insert_uses_base_defaults(self, routed):
+        """Test inserts through the view get serial ids and column defaults"""
+        routed.execute("SELECT pggit.switch_branch('route_delta')")
+        row = routed.execute(
+            "INSERT INTO public.routed_items (name) VALUES ('new') RETURNING id, qty"
+        )
+
+        assert row == [(1001, 0)]
+
+        routed.execute("SELECT pggit.switch_branch('main')")
+        count = routed.execute(
+            "SELECT COUNT(*) FROM public.routed_items WHERE name = 'new'"
+        )
+        assert count[0][0] == 0
+
+    def test_unbranched_name_reads_main(self, routed):
+        """Test a branch without a copy of the table reads main"""
+        routed.execute("SELECT pggit.switch_branch('route_other')")
+        count = routed.execute("SELECT COUNT(*) FROM public.routed_items")
+
+        assert count[0][0] == 1000
+
+
+class TestBranchRemoval:
+    """Routing after a branch is removed."""
+
+    def test_drop_removes_branch_arm(self, routed):
+        """Test dropping a branch rebuilds the view without it and drops its tables"""
+        assert routed.execute("SELECT pggit.drop_data_branch('route_copy')") == [(1,)]
+
+        assert "pggit_branch_route_copy" not in _view(routed)
+        assert "pggit_branch_route_delta" in _view(routed)
+        assert routed.execute(
+            "SELECT to_regnamespace('pggit_branch_route_copy') IS NULL"
+        ) == [(True,)]
+
+    def test_dropped_branch_reads_main(self, routed):
+        """Test a session still on a dropped branch reads and writes main"""
+        routed.execute("SELECT pggit.switch_branch('route_copy')")
+        routed.execute("UPDATE public.routed_items SET qty = -1 WHERE id = 1")
+        routed.execute("SELECT pggit.drop_data_branch('route_copy')")
+
+        assert routed.execute("SELECT qty FROM public.routed_items WHERE id = 1") == [(1,)]
+        routed.execute("UPDATE public.routed_items SET qty = -3 WHERE id = 1")
+        routed.execute("SELECT pggit.switch_branch('main')")
+        assert routed.execute("SELECT qty FROM public.routed_items WHERE id = 1") == [(-3,)]
+
+    def test_other_branches_keep_routing(self, routed):
+        """Test the remaining branch still reads its own rows"""
+        routed.execute("SELECT pggit.switch_branch('route_delta')")
+        routed.execute("UPDATE public.routed_items SET qty = -2 WHERE id = 1")
+        routed.execute("SELECT pggit.drop_data_branch('route_copy')")
+
+        assert routed.execute("SELECT qty FROM public.routed_items WHERE id = 1") == [(-2,)]
+
+    def test_deleted_tracking_rows_rebuild_view(self, routed):
+        """Test removing branched_tables rows directly also rebuilds the view"""
+        routed.execute("DELETE FROM pggit.branched_tables WHERE branch_name = 'route_delta'")
+
+        assert "pggit_branch_route_delta" not in _view(routed)
+        routed.execute("DROP SCHEMA pggit_branch_route_delta CASCADE")
+        assert routed.execute("SELECT COUNT(*) FROM public.routed_items") == [(1000,)]
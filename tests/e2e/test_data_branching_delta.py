@@ -0,0 +1,150 @@
+"""
+E2E tests for delta (copy-on-write) data branches.
+
+Tests pggit.create_delta_table_branch() selected through the
+pggit.data_branch_storage setting:
+- Branch creation copies no rows
+- Reads overlay branch changes on the parent
+- Inserts, updates, deletes and key changes stay on the branch
+- Tables without a primary key fall back to full copies
+
+Key Coverage:
+- Storage proportional to changed rows
+- Isolation of main from branch writes
+"""
+
+import pytest
+
+
+@pytest.fixture
+def delta_branch(db_e2e, pggit_installed):
+    """Create public.delta_items with 100 rows and a delta branch 'delta_feat'."""
+    db_e2e.execute("""
+        CREATE TABLE public.delta_items (
+            id INT PRIMARY KEY,
+            name TEXT NOT NULL,
+            qty INT DEFAULT 0
+        )
+    """)
+    db_e2e.execute("""
+        INSERT INTO public.delta_items
+        SELECT i, 'item' || i, i FROM generate_series(1, 100) i
+    """)
+    db_e2e.execute("SET LOCAL pggit.data_branch_storage = 'delta'")
+    db_e2e.execute(
+        "SELECT pggit.create_data_branch('delta_feat', 'main', ARRAY['delta_items'])"
+    )
+    return db_e2e
+
+
+def _delta_rows(db):
+    return db.execute("""
+        SELECT id, _pggit_op, qty
+        FROM pggit_branch_delta_feat._pggit_delta_delta_items
+        ORDER BY id
+    """)
+
+
+class TestDeltaDataBranches:
+    """Copy-on-write data branches backed by delta tables."""
+
+    def test_branch_creation_copies_nothing(self, delta_branch):
+        """Test the branch starts with an empty delta and sees all parent rows"""
+        mode = delta_branch.execute("""
+            SELECT storage_mode, storage_table
+            FROM pggit.branched_tables
+            WHERE branch_name = 'delta_feat'
+        """)
+        assert mode == [("delta", "_pggit_delta_delta_items")]
+        assert _delta_rows(delta_branch) == []
+
+        count = delta_branch.execute(
+            'SELECT COUNT(*) FROM pggit_branch_delta_feat.delta_items'
+        )
+        assert count[0][0] == 100
+
+    def test_writes_stay_on_branch(self, delta_branch):
+        """Test branch DML is recorded as deltas and main is unaffected"""
+        delta_branch.execute("SELECT pggit.switch_branch('delta_feat')")
+        delta_branch.execute("UPDATE public.delta_items SET qty = -1 WHERE id = 5")
+        delta_branch.execute("DELETE FROM public.delta_items WHERE id = 6")
+        delta_branch.execute(
+            "INSERT INTO public.delta_items (id, name) VALUES (101, 'new')"
+        )
+        delta_branch.execute("UPDATE public.delta_items SET id = 200 WHERE id = 8")
+
+        assert _delta_rows(delta_branch) == [
+            (5, "U", -1),
+            (6, "D", 6),
+            (8, "D", 8),
+            (101, "I", 0),
+            (200, "I", 8),
+        ]
+
+        branch = delta_branch.execute(
+            "SELECT COUNT(*), SUM(qty) FROM public.delta_items"
+        )
+        assert branch == [(100, 5050 - 5 - 1 - 6)]
+
+        delta_branch.execute("SELECT pggit.switch_branch('main')")
+        main = delta_branch.execute(
+            "SELECT COUNT(*), SUM(qty) FROM public.delta_items"
+        )
+        assert main == [(100, 5050)]
+
+    def test_delete_of_branch_insert_leaves_no_delta(self, delta_branch):
+        """Test deleting a row that only exists on the branch drops its delta"""
+        view = 'pggit_branch_delta_feat.delta_items'
+        delta_branch.execute(f"INSERT INTO {view} (id, name) VALUES (300, 'tmp')")
+        delta_branch.execute(f"DELETE FROM {view} WHERE id = 300")
+
+        assert _delta_rows(delta_branch) == []
+
+    def test_duplicate_key_rejected(self, delta_branch):
+        """Test inserting a key visible through the parent raises unique_violation"""
+        with pytest.raises(Exception, match="duplicate key"):
+            delta_branch.execute(
+                """INSERT INTO pggit_branch_delta_feat.delta_items (id, name)
+                   VALUES (7, 'dup')"""
+            )
+
+    def test_copy_is_default_storage(self, db_e2e, pggit_installed):
+        """Test branches are full copies when pggit.data_branch_storage is unset"""
+        db_e2e.execute("CREATE TABLE public.delta_default (id INT PRIMARY KEY)")
+        db_e2e.execute("INSERT INTO public.delta_default VALUES (1), (2)")
+        db_e2e.execute(
+            "SELECT pggit.create_data_branch('delta_default', 'main', ARRAY['delta_default'])"
+        )
+
+        mode = db_e2e.execute("""
+            SELECT storage_mode FROM pggit.branched_tables
+            WHERE branch_name = 'delta_default'
+        """)
+        assert mode == [("copy",)]
+
+        count = db_e2e.execute(
+            "SELECT COUNT(*) FROM pggit_branch_delta_default.delta_default"
+        )
+        assert count[0][0] == 2
+
+    def test_table_without_primary_key_is_copied(self, db_e2e, pggit_installed):
+        """Test tables without a primary key fall back to a full copy"""
+        db_e2e.execute("CREATE TABLE public.delta_nopk (val INT)")
+        db_e2e.execute("INSERT INTO public.delta_nopk VALUES (1), (2), (3)")
+        db_e2e.execute("SET LOCAL pggit.data_branch_storage = 'delta'")
+        db_e2e.execute(
+            "SELECT pggit.create_data_branch('delta_nopk', 'main', ARRAY['delta_nopk'])"
+        )
+
+        mode = db_e2e.execute("""
+            SELECT storage_mode FROM pggit.branched_tables
+            WHERE branch_name = 'delta_nopk'
+        """)
+        assert mode == [("copy",)]
+
+        kind = db_e2e.execute("""
+            SELECT c.relkind::text FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'pggit_branch_delta_nopk' AND c.relname = 'delta_nopk'
+        """)
+        assert kind == [("r",)]
@@ -0,0 +1,257 @@
+"""
+E2E tests for the chunked data-branch merge.
+
+Tests pggit.start_data_merge(), pggit.merge_data_chunk() and the functions
+built on them (merge_data_branches, detect_data_conflicts, apply_data_merge):
+- Keyset walk in primary key order with bounded chunks
+- Resume from the saved position
+- Real primary keys, including composite keys not named id
+- Only changed rows are logged and applied
+
+Key Coverage:
+- Progress bookkeeping in pggit.data_merge_progress
+- Interactive merges applied later with a strategy
+- run_data_merge committing between chunks
+- Tables without a primary key refused by apply_data_merge
+"""
+
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def branches(db_e2e, pggit_installed):
+    """Create public.merge_lines (composite key) with branches merge_src and merge_dst."""
+    db_e2e.execute("""
+        CREATE TABLE public.merge_lines (
+            order_no INT,
+            line_no INT,
+            sku TEXT NOT NULL,
+            qty INT,
+            PRIMARY KEY (order_no, line_no)
+        )
+    """)
+    db_e2e.execute("""
+        INSERT INTO public.merge_lines
+        SELECT o, l, 'sku' || o || '-' || l, l
+        FROM generate_series(1, 50) o, generate_series(1, 4) l
+    """)
+    db_e2e.execute(
+        "SELECT pggit.create_data_branch('merge_src', 'main', ARRAY['merge_lines'])"
+    )
+    db_e2e.execute(
+        "SELECT pggit.create_data_branch('merge_dst', 'main', ARRAY['merge_lines'])"
+    )
+
+    src = "pggit_branch_merge_src.merge_lines"
+    db_e2e.execute(f"UPDATE {src} SET qty = 100 WHERE order_no IN (7, 42) AND line_no = 2")
+    db_e2e.execute(f"INSERT INTO {src} VALUES (51, 1, 'sku51-1', 1)")
+    db_e2e.execute(f"DELETE FROM {src} WHERE order_no = 3 AND line_no = 4")
+    return db_e2e
+
+
+@pytest.fixture
+def committed_branches(db_load, pggit_installed):
+    """Create a keyed table with a changed source branch, committed so run_data_merge can COMMIT."""
+    conn = db_load._ensure_connection()
+    conn.autocommit = True
+    suffix = uuid.uuid4().hex[:8]
+    table, src, dst = f"merge_run_{suffix}", f"mr_src_{suffix}", f"mr_dst_{suffix}"
+
+    db_load.execute(f"CREATE TABLE public.{table} (id INT PRIMARY KEY, qty INT)")
+    db_load.execute(f"INSERT INTO public.{table} SELECT i, i FROM generate_series(1, 100) i")
+    db_load.execute("SELECT pggit.create_data_branch(%s, 'main', ARRAY[%s])", src, table)
+    db_load.execute("SELECT pggit.create_data_branch(%s, 'main', ARRAY[%s])", dst, table)
+    db_load.execute(f"UPDATE pggit_branch_{src}.{table} SET qty = 0 WHERE id IN (5, 55, 95)")
+    try:
+        yield db_load, table, src, dst
+    finally:
+        db_load.execute("DELETE FROM pggit.data_conflicts WHERE table_name = %s", table)
+        db_load.execute("DELETE FROM pggit.data_merge_progress WHERE table_name = %s", table)
+        db_load.execute("SELECT pggit.drop_data_branch(%s)", src)
+        db_load.execute("SELECT pggit.drop_data_branch(%s)", dst)
+        db_load.execute(f"DROP VIEW IF EXISTS public.{table} CASCADE")
+        db_load.execute(f"DROP TABLE IF EXISTS pggit_base._pggit_main_{table} CASCADE")
+        conn.autocommit = False
+        db_load.cleanup()
+
+
+def _dst(db, where):
+    return db.execute(
+        f"SELECT qty FROM pggit_branch_merge_dst.merge_lines WHERE {where}"
+    )
+
+
+class TestChunkedDataMerge:
+    """Keyset-paginated data merge."""
+
+    def test_source_wins_applies_changed_rows(self, branches):
+        """Test a source-wins merge applies updates and inserts on a composite key"""
+        result = branches.execute(
+            "SELECT * FROM pggit.merge_data_branches('merge_src', 'merge_dst', 'source-wins')"
+        )
+        merge_id, has_conflicts, conflicts, tables = result[0]
+
+        assert (has_conflicts, conflicts, tables) == (True, 4, 1)
+        assert _dst(branches, "order_no = 7 AND line_no = 2") == [(100,)]
+        assert _dst(branches, "order_no = 51") == [(1,)]
+        # Deletions on the source are reported, not propagated
+        assert _dst(branches, "order_no = 3 AND line_no = 4") == [(4,)]
+
+        progress = branches.execute(
+            """
+            SELECT rows_scanned, rows_changed, rows_applied, status, last_key
+            FROM pggit.data_merge_progress WHERE merge_id = %s
+            """,
+            merge_id,
+        )
+        assert progress == [(201, 4, 3, "completed", ["51", "1"])]
+
+        keys = branches.execute(
+            """
+            SELECT primary_key_value, conflict_type FROM pggit.data_conflicts
+            WHERE merge_id = %s ORDER BY primary_key_value
+            """,
+            merge_id,
+        )
+        assert keys == [
+            ("(3,4)", "delete-update"),
+            ("(42,2)", "update-update"),
+            ("(51,1)", "update-delete"),
+            ("(7,2)", "update-update"),
+        ]
+
+    def test_chunks_resume_from_saved_key(self, branches):
+        """Test each chunk advances last_key and a later run finishes the table"""
+        merge_id = branches.execute(
+            "SELECT pggit.start_data_merge('merge_src', 'merge_dst', 'source-wins', 30)"
+        )[0][0]
+
+        scanned = [
+            branches.execute(
+                "SELECT pggit.merge_data_chunk(%s, 'merge_lines')", merge_id
+            )[0][0]
+            for _ in range(2)
+        ]
+        assert scanned == [30, 30]
+
+        progress = branches.execute(
+            """
+            SELECT last_key, chunks, status FROM pggit.data_merge_progress
+            WHERE merge_id = %s
+            """,
+            merge_id,
+        )
+        assert progress == [(["15", "4"], 2, "running")]
+        assert _dst(branches, "order_no = 42 AND line_no = 2") == [(2,)]
+
+        while branches.execute(
+            "SELECT pggit.merge_data_chunk(%s, 'merge_lines')", merge_id
+        )[0][0]:
+            pass
+
+        progress = branches.execute(
+            """
+            SELECT rows_scanned, rows_applied, chunks, status
+            FROM pggit.data_merge_progress WHERE merge_id = %s
+            """,
+            merge_id,
+        )
+        assert progress == [(201, 3, 7, "completed")]
+        assert _dst(branches, "order_no = 42 AND line_no = 2") == [(100,)]
+
+    def test_interactive_merge_applied_later(self, branches):
+        """Test an interactive merge leaves the target alone until apply_data_merge"""
+        merge_id, _, conflicts, _ = branches.execute(
+            "SELECT * FROM pggit.merge_data_branches('merge_src', 'merge_dst')"
+        )[0]
+
+        assert conflicts == 4
+        assert _dst(branches, "order_no = 51") == []
+        pending = branches.execute(
+            """
+            SELECT COUNT(*) FROM pggit.data_conflicts
+            WHERE merge_id = %s AND resolution = 'pending'
+            """,
+            merge_id,
+        )
+        assert pending[0][0] == 4
+
+        branches.execute(
+            "SELECT pggit.apply_data_merge(%s, 'merge_src', 'merge_dst', 'target-wins')",
+            merge_id,
+        )
+
+        # target-wins only adds rows missing from the target
+        assert _dst(branches, "order_no = 51") == [(1,)]
+        assert _dst(branches, "order_no = 7 AND line_no = 2") == [(2,)]
+
+    def test_merge_into_main(self, branches):
+        """Test merging a branch into main writes the base table"""
+        branches.execute(
+            "SELECT * FROM pggit.merge_data_branches('merge_src', 'main', 'source-wins')"
+        )
+
+        main = branches.execute(
+            "SELECT qty FROM pggit_base._pggit_main_merge_lines WHERE order_no = 42 AND line_no = 2"
+        )
+        assert main == [(100,)]
+
+    def test_apply_without_key_rejected(self, db_e2e, pggit_installed):
+        """Test apply_data_merge refuses a table without a primary key instead of matching on id"""
+        db = db_e2e
+        db.execute("CREATE TABLE public.merge_unkeyed (id INT, qty INT)")
+        merge_id = db.execute("""
+            INSERT INTO pggit.data_conflicts (
+                merge_id, table_name, primary_key_value, source_branch, target_branch,
+                source_data, target_data, conflict_type, resolution
+            ) VALUES (
+                gen_random_uuid(), 'merge_unkeyed', '1', 'merge_src', 'merge_dst',
+                '{"id": 1, "qty": 2}', '{"id": 1, "qty": 1}', 'update-update', 'pending'
+            )
+            RETURNING merge_id
+        """)[0][0]
+
+        with pytest.raises(Exception, match="no primary key"):
+            db.execute(
+                "SELECT pggit.apply_data_merge(%s, 'merge_src', 'merge_dst', 'source-wins')",
+                merge_id,
+            )
+
+
+class TestRunDataMerge:
+    """The committing merge procedure."""
+
+    def test_run_commits_each_chunk(self, committed_branches):
+        """Test CALL run_data_merge finishes every table, committing between chunks"""
+        db, table, src, dst = committed_branches
+        merge_id = db.execute(
+            "SELECT pggit.start_data_merge(%s, %s, 'source-wins', 30)", src, dst
+        )[0][0]
+
+        db.execute("CALL pggit.run_data_merge(%s)", merge_id)
+
+        assert db.execute("""
+            SELECT rows_scanned, rows_changed, rows_applied, chunks, status
+            FROM pggit.data_merge_progress WHERE merge_id = %s
+        """, merge_id) == [(100, 3, 3, 4, "completed")]
+        assert db.execute(
+            f"SELECT id FROM pggit_branch_{dst}.{table} WHERE qty = 0 ORDER BY id"
+        ) == [(5,), (55,), (95,)]
+
+    def test_run_resumes_after_partial_merge(self, committed_branches):
+        """Test a merge interrupted after one chunk is finished by a later CALL"""
+        db, table, src, dst = committed_branches
+        merge_id = db.execute(
+            "SELECT pggit.start_data_merge(%s, %s, 'source-wins', 30)", src, dst
+        )[0][0]
+        db.execute("SELECT pggit.merge_data_chunk(%s, %s)", merge_id, table)
+
+        db.execute("CALL pggit.run_data_merge(%s)", merge_id)
+
+        assert db.execute("""
+            SELECT rows_scanned, rows_applied, chunks, status
+            FROM pggit.data_merge_progress WHERE merge_id = %s
+        """, merge_id) == [(100, 3, 4, "completed")]
+        assert db.execute("CALL pggit.run_data_merge(%s)", merge_id) is None
@@ -0,0 +1,167 @@
+"""
+E2E tests for the set-based DDL capture path.
+
+Tests pggit.capture_ddl_commands_set_based() selected through the
+pggit.ddl_capture_mode setting:
+- Tables, columns and indexes are tracked like the per-object handler
+- Foreign key and view dependencies are recorded
+- Version bumps and history rows for ALTER TABLE
+- Many objects in a single command
+
+Key Coverage:
+- Parity with the per-object handler
+- Multi-row capture of one trigger firing
+- Targets read once per firing and shared with the hash tree refresh
+"""
+
+import json
+
+import pytest
+
+
+def _tracked(db, schema):
+    """Return {(object_type, object_name): metadata} for active objects in schema."""
+    rows = db.execute(
+        """
+        SELECT object_type::text, object_name, metadata
+        FROM pggit.objects
+        WHERE schema_name = %s AND is_active = true
+        """,
+        schema,
+    )
+    return {(r[0], r[1]): r[2] for r in rows or []}
+
+
+class TestSetBasedCapture:
+    """Set-based capture of DDL commands."""
+
+    def test_same_objects_as_per_object_handler(self, db_e2e, pggit_installed):
+        """Test both capture modes track the same objects and metadata"""
+        ddl = """
+            CREATE TABLE {schema}.parent (
+                id SERIAL PRIMARY KEY,
+                name VARCHAR(50) NOT NULL DEFAULT 'x'
+            );
+            CREATE TABLE {schema}.child (
+                id INT PRIMARY KEY,
+                parent_id INT REFERENCES {schema}.parent(id),
+                code CHAR(3)
+            );
+        """
+        db_e2e.execute("CREATE SCHEMA capture_row")
+        db_e2e.execute("CREATE SCHEMA capture_set")
+
+        db_e2e.execute("SET LOCAL pggit.ddl_capture_mode = 'per_object'")
+        db_e2e.execute(ddl.format(schema="capture_row"))
+        db_e2e.execute("SET LOCAL pggit.ddl_capture_mode = 'set_based'")
+        db_e2e.execute(ddl.format(schema="capture_set"))
+
+        def normalize(metadata, schema):
+            # OIDs differ and serial defaults name the schema's own sequence
+            metadata = {k: v for k, v in metadata.items() if k != "oid"}
+            return json.loads(json.dumps(metadata).replace(schema, "<schema>"))
+
+        per_object = {
+            k: normalize(v, "capture_row")
+            for k, v in _tracked(db_e2e, "capture_row").items()
+        }
+        set_based = {
+            k: normalize(v, "capture_set")
+            for k, v in _tracked(db_e2e, "capture_set").items()
+        }
+
+        assert set_based == per_object
+        assert ("COLUMN", "child.parent_id") in set_based
+        assert set_based[("TABLE", "parent")]["columns"]["name"]["type"] == "varchar(50)"
+
+    def test_dependencies_recorded(self, db_e2e, pggit_installed):
+        """Test foreign key and view dependencies are captured in one pass"""
+        db_e2e.execute("SET LOCAL pggit.ddl_capture_mode = 'set_based'")
+        db_e2e.execute("""
+            CREATE SCHEMA capture_deps
+                CREATE TABLE a (id INT PRIMARY KEY)
+                CREATE TABLE b (id INT PRIMARY KEY, a_id INT REFERENCES a(id))
+                CREATE VIEW v AS SELECT * FROM b
+        """)
+
+        deps = db_e2e.execute("""
+            SELECT d.dependency_type, dep.full_name, ref.full_name
+            FROM pggit.dependencies d
+            JOIN pggit.objects dep ON dep.id = d.dependent_id
+            JOIN pggit.objects ref ON ref.id = d.depends_on_id
+            WHERE dep.schema_name = 'capture_deps'
+            ORDER BY 1, 2
+        """)
+
+        assert deps == [
+            ("foreign_key", "capture_deps.b", "capture_deps.a"),
+            ("view", "capture_deps.v", "capture_deps.b"),
+        ]
+
+        parent = db_e2e.execute("""
+            SELECT p.object_name
+            FROM pggit.objects i
+            JOIN pggit.objects p ON p.id = i.parent_id
+            WHERE i.schema_name = 'capture_deps' AND i.object_name = 'b_pkey'
+        """)
+        assert parent == [("b",)]
+
+    def test_alter_table_bumps_version(self, db_e2e, pggit_installed):
+        """Test ALTER TABLE records a MAJOR change with the added column"""
+        db_e2e.execute("SET LOCAL pggit.ddl_capture_mode = 'set_based'")
+        db_e2e.execute("CREATE TABLE public.capture_alter (id INT PRIMARY KEY)")
+        db_e2e.execute("ALTER TABLE public.capture_alter ADD COLUMN note TEXT")
+
+        history = db_e2e.execute("""
+            SELECT h.change_type::text, h.change_severity::text, h.change_description
+            FROM pggit.history h
+            JOIN pggit.objects o ON o.id = h.object_id
+            WHERE o.full_name = 'public.capture_alter'
+            ORDER BY h.id
+        """)
+
+        assert [h[0] for h in history] == ["CREATE", "ALTER"]
+        assert history[-1][1] == "MAJOR"
+        assert history[-1][2].endswith("Added column(s): note")
+
+    def test_hash_tree_reuses_captured_targets(self, db_e2e, pggit_installed):
+        """Test the hash tree refresh takes the capture's targets and leaves none behind"""
+        db_e2e.execute("SET LOCAL pggit.ddl_capture_mode = 'set_based'")
+        db_e2e.execute("CREATE TABLE public.capture_shared (id INT PRIMARY KEY)")
+        db_e2e.execute("ALTER TABLE public.capture_shared ADD COLUMN note TEXT")
+
+        leaves = db_e2e.execute("""
+            SELECT l.leaf_name
+            FROM pggit.hash_tree_leaves l
+            JOIN pggit.hash_tree_nodes n ON n.object_id = l.object_id
+            WHERE n.schema_name = 'public' AND n.object_name = 'capture_shared'
+              AND l.leaf_type = 'column'
+            ORDER BY l.position
+        """)
+        assert [leaf[0] for leaf in leaves] == ["id", "note"]
+        assert db_e2e.execute(
+            "SELECT COALESCE(current_setting('pggit.ddl_capture_targets_at', true), '')"
+        ) == [("",)]
+
+    @pytest.mark.parametrize("table_count", [10, 100])
+    def test_many_objects_in_one_command(self, db_e2e, pggit_installed, table_count):
+        """Test a single command creating many tables is fully captured"""
+        tables = " ".join(
+            f"CREATE TABLE t{i} (id INT PRIMARY KEY, label TEXT)"
+            for i in range(table_count)
+        )
+        db_e2e.execute("SET LOCAL pggit.ddl_capture_mode = 'set_based'")
+        db_e2e.execute(f"CREATE SCHEMA capture_bulk {tables}")
+
+        counts = dict(db_e2e.execute("""
+            SELECT object_type::text, COUNT(*)
+            FROM pggit.objects
+            WHERE schema_name = 'capture_bulk'
+            GROUP BY object_type
+        """))
+
+        assert counts == {
+            "TABLE": table_count,
+            "INDEX": table_count,
+            "COLUMN": table_count * 2,
+        }
@@ -0,0 +1,172 @@
+"""
+E2E tests for the hash tree.
+
+Tests pggit.refresh_hash_tree(), pggit.hash_tree_root(),
+pggit.diff_hash_tree() and pggit.rebuild_hash_tree():
+- Column and constraint leaves, object nodes, schema nodes and a root
+- Live hashes maintained by the DDL event trigger
+- Recorded hashes following pggit.objects.ddl_hash
+
+Key Coverage:
+- Equal roots when every hash is current
+- A DDL change drifts only its leaf, object and schema
+- Constraint-only changes recorded, since a table's ddl_hash ignores them
+- detect_changes_by_hash only rehashes drifted objects
+"""
+
+import pytest
+
+OBJECTS = [
+    ("TABLE", "items"),
+    ("TABLE", "holder"),
+    ("VIEW", "item_names"),
+]
+
+
+@pytest.fixture
+def tree_schemas(db_e2e, pggit_installed):
+    """Create schemas ht_a and ht_b and bring every hash up to date."""
+    db = db_e2e
+    for schema in ("ht_a", "ht_b"):
+        db.execute(f"CREATE SCHEMA {schema}")
+        db.execute(f"CREATE TABLE {schema}.items (id INT PRIMARY KEY, name TEXT NOT NULL)")
+        db.execute(f"CREATE TABLE {schema}.holder (note VARCHAR(20))")
+        db.execute(f"CREATE VIEW {schema}.item_names AS SELECT name FROM {schema}.items")
+        for object_type, name in OBJECTS:
+            db.execute("""
+                INSERT INTO pggit.objects (object_type, schema_name, object_name)
+                SELECT %s, %s, %s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM pggit.objects
+                    WHERE object_type = %s AND schema_name = %s AND object_name = %s
+                )
+            """, object_type, schema, name, object_type, schema, name)
+    db.execute("SELECT pggit.rebuild_hash_tree()")
+    db.execute("""
+        UPDATE pggit.objects SET ddl_hash = NULL
+        WHERE object_type IN ('TABLE', 'VIEW', 'FUNCTION', 'INDEX')
+    """)
+    db.execute("SELECT * FROM pggit.update_all_hashes()")
+    return db
+
+
+def _diff(db):
+    return db.execute("""
+        SELECT level, schema_name, object_name, leaf_type, leaf_name
+        FROM pggit.diff_hash_tree()
+        ORDER BY level, object_name, leaf_name
+    """)
+
+
+class TestRoot:
+    """Root comparison."""
+
+    def test_roots_equal_when_hashed(self, tree_schemas):
+        """Test live and recorded roots match once every object is hashed"""
+        live, recorded = tree_schemas.execute("SELECT * FROM pggit.hash_tree_root()")[0]
+
+        assert live is not None
+        assert live == recorded
+        assert _diff(tree_schemas) == []
+
+    def test_leaves_cover_columns_and_constraints(self, tree_schemas):
+        """Test a table node has one leaf per column and constraint"""
+        rows = tree_schemas.execute("""
+            SELECT l.leaf_type, l.leaf_name
+            FROM pggit.hash_tree_leaves l
+            JOIN pggit.objects o ON o.id = l.object_id
+            WHERE o.schema_name = 'ht_a' AND o.object_name = 'items'
+            AND o.object_type = 'TABLE' AND o.is_active = true
+            ORDER BY 1, 2
+        """)
+
+        assert rows == [("column", "id"), ("column", "name"), ("constraint", "items_pkey")]
+
+
+class TestDrift:
+    """Descending from the root to what changed."""
+
+    def test_added_column_drifts_one_path(self, tree_schemas):
+        """Test adding a column drifts only its leaf, table and schema"""
+        db = tree_schemas
+        db.execute("ALTER TABLE ht_a.items ADD COLUMN price NUMERIC(10, 2)")
+
+        live, recorded = db.execute("SELECT * FROM pggit.hash_tree_root()")[0]
+        assert live != recorded
+        assert _diff(db) == [
+            ("leaf", "ht_a", "items", "column", "price"),
+            ("object", "ht_a", "items", None, None),
+            ("schema", "ht_a", None, None, None),
+        ]
+
+    def test_detect_changes_flags_altered_table(self, tree_schemas):
+        """Test detect_changes_by_hash reports only the altered table"""
+        db = tree_schemas
+        db.execute("ALTER TABLE ht_b.holder ALTER COLUMN note TYPE VARCHAR(40)")
+
+        changed = db.execute("""
+            SELECT full_name FROM pggit.detect_changes_by_hash() WHERE has_changed
+        """)
+        assert changed == [("ht_b.holder",)]
+
+    def test_constraint_change_is_recorded(self, tree_schemas):
+        """Test a constraint-only change is recorded instead of drifting forever"""
+        db = tree_schemas
+        db.execute("ALTER TABLE ht_a.holder ADD CONSTRAINT holder_note_check CHECK (note <> '')")
+
+        assert _diff(db) == []
+        assert db.execute("""
+            SELECT l.live_hash = l.recorded_hash
+            FROM pggit.hash_tree_leaves l
+            JOIN pggit.objects o ON o.id = l.object_id
+            WHERE o.schema_name = 'ht_a' AND o.object_name = 'holder'
+            AND l.leaf_name = 'holder_note_check'
+        """) == [(True,)]
+        assert db.execute("""
+            SELECT COUNT(*) FROM pggit.detect_changes_by_hash() WHERE has_changed
+        """) == [(0,)]
+
+    def test_constraint_change_waits_for_column_drift(self, tree_schemas):
+        """Test a constraint change on a drifted table is recorded with its ddl_hash"""
+        db = tree_schemas
+        db.execute("ALTER TABLE ht_a.holder ADD COLUMN extra INT")
+        db.execute("ALTER TABLE ht_a.holder ADD CONSTRAINT holder_note_check CHECK (note <> '')")
+
+        assert ("leaf", "ht_a", "holder", "constraint", "holder_note_check") in _diff(db)
+        db.execute("""
+            UPDATE pggit.objects
+            SET ddl_hash = pggit.compute_ddl_hash(object_type, schema_name, object_name)
+            WHERE object_type = 'TABLE' AND schema_name = 'ht_a' AND object_name = 'holder'
+        """)
+        assert _diff(db) == []
+
+    def test_recording_hash_clears_drift(self, tree_schemas):
+        """Test storing the new ddl_hash brings the roots back together"""
+        db = tree_schemas
+        db.execute("ALTER TABLE ht_a.items ADD COLUMN price NUMERIC(10, 2)")
+        db.execute("""
+            UPDATE pggit.objects
+            SET ddl_hash = pggit.compute_ddl_hash(object_type, schema_name, object_name)
+            WHERE object_type = 'TABLE' AND schema_name = 'ht_a' AND object_name = 'items'
+        """)
+
+        assert _diff(db) == []
+
+
+class TestRebuild:
+    """Changes the event trigger did not see."""
+
+    def test_rebuild_finds_untracked_change(self, tree_schemas):
+        """Test rebuild_hash_tree picks up DDL run with the trigger disabled"""
+        db = tree_schemas
+        db.execute("ALTER EVENT TRIGGER pggit_hash_tree_trigger DISABLE")
+        db.execute("ALTER TABLE ht_b.items ADD COLUMN price NUMERIC(10, 2)")
+        db.execute("ALTER EVENT TRIGGER pggit_hash_tree_trigger ENABLE")
+        assert _diff(db) == []
+
+        db.execute("SELECT pggit.rebuild_hash_tree('ht_b')")
+
+        assert ("object", "ht_b", "items", None, None) in _diff(db)
+        assert db.execute("""
+            SELECT full_name FROM pggit.detect_changes_by_hash() WHERE has_changed
+        """) == [("ht_b.items",)]
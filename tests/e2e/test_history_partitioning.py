@@ -0,0 +1,261 @@
+"""
+E2E tests for the online conversion of history tables to partitions.
+
+Tests pggit.start_partition_migration() and its pipeline:
+- Monthly partitions for existing data plus a default partition
+- Chunked copy along the primary key and catch-up of captured writes
+- Cutover that swaps tables and rebuilds dependent views and triggers
+- Retention by detaching and dropping expired partitions
+- Partitions created for months already in the default partition
+
+Key Coverage:
+- Rows with a NULL partition column kept in the default partition
+- pggit.history converted with its foreign keys and sequence
+- pggit_audit.changes converted with its hash chain and the compliance_log
+  foreign key, which triggers enforce from then on
+"""
+
+import pytest
+
+
+@pytest.fixture
+def events(db_e2e, pggit_installed):
+    """Create public.part_events (1200 rows over 12 months) with a view on it."""
+    db_e2e.execute("""
+        CREATE TABLE public.part_events (
+            id SERIAL PRIMARY KEY,
+            payload TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    db_e2e.execute("CREATE INDEX part_events_payload ON public.part_events (payload)")
+    db_e2e.execute("""
+        INSERT INTO public.part_events (payload, created_at)
+        SELECT 'e' || i, date_trunc('month', now()) - make_interval(months => i % 12) + INTERVAL '1 day'
+        FROM generate_series(1, 1200) i
+    """)
+    db_e2e.execute("INSERT INTO public.part_events (payload, created_at) VALUES ('undated', NULL)")
+    db_e2e.execute("CREATE VIEW public.part_events_recent AS SELECT id, payload FROM public.part_events")
+    db_e2e.execute(
+        "SELECT pggit.start_partition_migration('public.part_events', 'created_at', 2, 500)"
+    )
+    return db_e2e
+
+
+def _migrate(db, table):
+    while db.execute("SELECT pggit.copy_partition_chunk(%s)", table)[0][0]:
+        pass
+    while db.execute("SELECT pggit.apply_partition_changes(%s)", table)[0][0] > 0:
+        pass
+    db.execute("SELECT pggit.cutover_partition_migration(%s)", table)
+
+
+class TestPartitionMigration:
+    """Online conversion to monthly range partitions."""
+
+    def test_staging_partitions_cover_existing_data(self, events):
+        """Test one partition per month of data and months ahead, plus a default"""
+        count = events.execute("""
+            SELECT COUNT(*) FROM pg_inherits
+            WHERE inhparent = 'public.part_events_partitioned'::regclass
+        """)[0][0]
+        # 12 months of data, 2 months ahead, the default partition
+        assert count == 15
+
+    def test_writes_during_copy_are_applied(self, events):
+        """Test rows written during the copy reach the partitioned table"""
+        assert events.execute("SELECT pggit.copy_partition_chunk('public.part_events')")[0][0]
+        events.execute("DELETE FROM public.part_events WHERE id = 1")
+        events.execute("UPDATE public.part_events SET payload = 'changed' WHERE id = 1100")
+        events.execute("INSERT INTO public.part_events (payload) VALUES ('late')")
+
+        _migrate(events, "public.part_events")
+
+        assert events.execute("SELECT relkind FROM pg_class WHERE oid = 'public.part_events'::regclass") == [("p",)]
+        assert events.execute("SELECT COUNT(*) FROM public.part_events")[0][0] == 1201
+        assert events.execute("SELECT payload FROM public.part_events WHERE id = 1100") == [("changed",)]
+        assert events.execute("SELECT COUNT(*) FROM public.part_events WHERE id = 1") == [(0,)]
+        assert events.execute(
+            "SELECT COUNT(*) FROM public.part_events_default WHERE payload = 'undated'"
+        ) == [(1,)]
+
+    def test_cutover_rebuilds_views_and_sequence(self, events):
+        """Test views read the partitioned table and inserts keep numbering"""
+        _migrate(events, "public.part_events")
+
+        events.execute("INSERT INTO public.part_events (payload) VALUES ('after')")
+        assert events.execute(
+            "SELECT id > 1201 FROM public.part_events_recent WHERE payload = 'after'"
+        ) == [(True,)]
+        assert events.execute("""
+            SELECT status, staging_table FROM pggit.partition_migrations
+            WHERE table_name = 'public.part_events'
+        """) == [("completed", "public.part_events_unpartitioned")]
+
+    def test_unqualified_name_accepted(self, events):
+        """Test the pipeline finds the migration by the table name on the search path"""
+        _migrate(events, "part_events")
+
+        assert events.execute("""
+            SELECT status FROM pggit.partition_migrations WHERE table_name = 'public.part_events'
+        """) == [("completed",)]
+
+    def test_cutover_moves_triggers(self, events):
+        """Test triggers of the table fire on the partitioned table"""
+        events.execute("""
+            CREATE FUNCTION public.part_events_mark() RETURNS TRIGGER AS $$
+            BEGIN
+                NEW.payload := NEW.payload || '!';
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        events.execute("""
+            CREATE TRIGGER part_events_mark BEFORE INSERT ON public.part_events
+            FOR EACH ROW EXECUTE FUNCTION public.part_events_mark()
+        """)
+        _migrate(events, "public.part_events")
+
+        events.execute("INSERT INTO public.part_events (payload) VALUES ('after')")
+        assert events.execute(
+            "SELECT COUNT(*) FROM public.part_events WHERE payload = 'after!'"
+        ) == [(1,)]
+
+    def test_partition_created_over_default_rows(self, events):
+        """Test a month with rows in the default partition gets its own partition"""
+        _migrate(events, "public.part_events")
+        events.execute("""
+            INSERT INTO public.part_events (payload, created_at)
+            VALUES ('future', date_trunc('month', now()) + INTERVAL '4 months 1 day')
+        """)
+        assert events.execute(
+            "SELECT COUNT(*) FROM public.part_events_default WHERE payload = 'future'"
+        ) == [(1,)]
+
+        # Months 3 to 5 ahead; month 4 takes its row from the default
+        assert events.execute("SELECT pggit.create_time_partitions('public.part_events', 5)") == [(3,)]
+        assert events.execute("""
+            SELECT tableoid::regclass::TEXT
+                = 'part_events_' || to_char(date_trunc('month', now()) + INTERVAL '4 months', 'YYYY_MM')
+            FROM public.part_events WHERE payload = 'future'
+        """) == [(True,)]
+        assert events.execute("SELECT COUNT(*) FROM public.part_events")[0][0] == 1202
+
+    def test_cascading_reference_refused(self, events):
+        """Test cutover refuses a foreign key with referential actions"""
+        events.execute("""
+            CREATE TABLE public.part_event_notes (
+                event_id INT REFERENCES public.part_events (id) ON DELETE CASCADE
+            )
+        """)
+        with pytest.raises(Exception, match="cannot be enforced once it is partitioned"):
+            _migrate(events, "public.part_events")
+
+    def test_retention_drops_expired_partitions(self, events):
+        """Test expired months are detached and dropped, the rest stay"""
+        _migrate(events, "public.part_events")
+
+        dropped = events.execute("""
+            SELECT partition_name FROM pggit.drop_expired_partitions(
+                'public.part_events', INTERVAL '6 months')
+        """)
+
+        # Months 7 to 11 back end before the retention horizon
+        assert len(dropped) == 5
+        assert events.execute("""
+            SELECT COUNT(*) FROM public.part_events
+            WHERE created_at < now() - INTERVAL '7 months' AND created_at > '-infinity'
+        """) == [(0,)]
+        assert events.execute("SELECT to_regclass('public.part_events_default') IS NOT NULL") == [(True,)]
+
+    def test_history_table_converts(self, db_e2e, pggit_installed):
+        """Test pggit.history converts with its foreign keys kept"""
+        db_e2e.execute("SELECT pggit.start_partition_migration('pggit.history')")
+        _migrate(db_e2e, "pggit.history")
+
+        assert db_e2e.execute(
+            "SELECT relkind FROM pg_class WHERE oid = 'pggit.history'::regclass"
+        ) == [("p",)]
+        assert db_e2e.execute("""
+            SELECT COUNT(*) > 0 FROM pg_constraint
+            WHERE conrelid = 'pggit.history'::regclass AND contype = 'f'
+        """) == [(True,)]
+        assert db_e2e.execute("SELECT pggit.create_history_partitions(6)")[0][0] >= 0
+
+
+@pytest.fixture
+def audit_changes(db_e2e, pggit_installed):
+    """Convert pggit_audit.changes holding three changes, one with a compliance entry."""
+    db_e2e.execute("""
+        INSERT INTO pggit_audit.changes (
+            commit_sha, object_schema, object_name, object_type,
+            change_type, new_definition, author, committed_at
+        )
+        SELECT 'pm-' || i, 'public', 'pm_obj' || i, 'TABLE',
+               'CREATE', 'CREATE TABLE pm_obj' || i || ' (id INT)', 'tester', now()
+        FROM generate_series(1, 3) i
+    """)
+    change_id = db_e2e.execute(
+        "SELECT change_id FROM pggit_audit.changes WHERE commit_sha = 'pm-1'"
+    )[0][0]
+    db_e2e.execute("""
+        INSERT INTO pggit_audit.compliance_log (change_id, verified_by, verification_status)
+        VALUES (%s, 'auditor', 'PASSED')
+    """, change_id)
+
+    db_e2e.execute("SELECT pggit.start_partition_migration('pggit_audit.changes')")
+    _migrate(db_e2e, "pggit_audit.changes")
+    return db_e2e, change_id
+
+
+class TestAuditChangesPartitioning:
+    """Converting the audit trail."""
+
+    def test_chain_continues(self, audit_changes):
+        """Test changes appended after cutover extend a chain that still verifies"""
+        db, _ = audit_changes
+        db.execute("""
+            INSERT INTO pggit_audit.changes (
+                commit_sha, object_schema, object_name, object_type, change_type, author
+            ) VALUES ('pm-4', 'public', 'pm_obj4', 'TABLE', 'DROP', 'tester')
+        """)
+
+        assert db.execute(
+            "SELECT relkind FROM pg_class WHERE oid = 'pggit_audit.changes'::regclass"
+        ) == [("p",)]
+        assert db.execute(
+            "SELECT row_hash = pggit_audit.change_hash(c) FROM pggit_audit.changes c WHERE commit_sha = 'pm-4'"
+        ) == [(True,)]
+        assert db.execute("SELECT status FROM pggit_audit.verify_audit_chain(true)") == [("PASS",)]
+
+    def test_compliance_reference_recorded(self, audit_changes):
+        """Test the compliance_log foreign key is replaced and still accepts valid rows"""
+        db, change_id = audit_changes
+        db.execute("""
+            INSERT INTO pggit_audit.compliance_log (change_id, verified_by, verification_status)
+            VALUES (%s, 'auditor', 'PASSED')
+        """, change_id)
+
+        assert db.execute("""
+            SELECT referencing_table, columns, referenced_columns
+            FROM pggit.partition_foreign_keys WHERE table_name = 'pggit_audit.changes'
+        """) == [("pggit_audit.compliance_log", ["change_id"], ["change_id"])]
+        assert db.execute("""
+            SELECT COUNT(*) FROM pg_constraint
+            WHERE conrelid = 'pggit_audit.compliance_log'::regclass AND contype = 'f'
+        """) == [(0,)]
+
+    def test_unknown_change_rejected(self, audit_changes):
+        """Test compliance entries for missing changes are still refused"""
+        db, _ = audit_changes
+        with pytest.raises(Exception, match="violates foreign key constraint"):
+            db.execute("""
+                INSERT INTO pggit_audit.compliance_log (change_id, verified_by, verification_status)
+                VALUES (gen_random_uuid(), 'auditor', 'PASSED')
+            """)
+
+    def test_referenced_change_kept(self, audit_changes):
+        """Test a change with compliance entries cannot be deleted"""
+        db, change_id = audit_changes
+        with pytest.raises(Exception, match="violates foreign key constraint"):
+            db.execute("DELETE FROM pggit_audit.changes WHERE change_id = %s", change_id)
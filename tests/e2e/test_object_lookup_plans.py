@@ -0,0 +1,149 @@
+"""
+E2E plan regression tests for per-object lookups.
+
+Tests pggit_v0.get_object_history(), pggit_audit.get_object_changes(),
+pggit_v0.get_object_definition(), pggit_v0.get_object_metadata() and
+pggit_audit.get_object_ddl_at_commit() against a populated, analyzed
+audit table and tree:
+- Object history served by idx_changes_object, newest first
+- Tree entry lookups served by the (tree_sha, path) primary key
+- HEAD resolved through the main branch ref
+
+Key Coverage:
+- auto_explain plans of the statements the functions run, not copies of them
+- Any sequential scan of the audit table, tree or object store fails the test
+"""
+
+import pytest
+
+
+@pytest.fixture
+def populated(db_e2e, pggit_installed):
+    """Write 20k audit changes over 2k objects and a 2k-entry tree."""
+    if not db_e2e.execute("SELECT rolsuper FROM pg_roles WHERE rolname = current_user")[0][0]:
+        pytest.skip("auto_explain settings need a superuser")
+
+    db_e2e.execute("""
+        INSERT INTO pggit_audit.changes (
+            commit_sha, object_schema, object_name, object_type,
+            change_type, new_definition, author, committed_at
+        )
+        SELECT 'lp-c' || (i % 50), 'lp_s' || (i % 20), 'obj' || (i % 2000), 'TABLE',
+               'ALTER', 'def ' || i, 'tester', now() - make_interval(secs => i)
+        FROM generate_series(1, 20000) i
+    """)
+    db_e2e.execute("""
+        INSERT INTO pggit_v0.commit_graph (commit_sha, tree_sha, author, message, committed_at)
+        SELECT 'lp-c' || i, 'lp-tree', 'tester', 'lookup plans', now() - make_interval(mins => i)
+        FROM generate_series(0, 49) i
+    """)
+    db_e2e.execute("""
+        INSERT INTO pggit_v0.objects (sha, type, size, content)
+        SELECT 'lp-o' || i, 'blob', 40, 'CREATE TABLE lp_s' || (i % 20) || '.obj' || i || ' (id INT)'
+        FROM generate_series(0, 1999) i
+    """)
+    db_e2e.execute("""
+        INSERT INTO pggit_v0.tree_entries (tree_sha, path, object_sha)
+        SELECT 'lp-tree', 'lp_s' || (i % 20) || '.obj' || i, 'lp-o' || i
+        FROM generate_series(0, 1999) i
+    """)
+    db_e2e.execute("INSERT INTO pggit_v0.refs (name, type, target_sha) VALUES ('main', 'branch', 'lp-c5')")
+    for table in ("pggit_audit.changes", "pggit_v0.commit_graph", "pggit_v0.objects", "pggit_v0.tree_entries"):
+        db_e2e.execute(f"ANALYZE {table}")
+    return db_e2e
+
+
+def _run_explained(db, query, *args):
+    """Run a query and return its rows and the plans of the statements run inside it."""
+    notices = []
+
+    def collect(diag):
+        notices.append(diag.message_primary)
+
+    conn = db._ensure_connection()
+    db.execute("LOAD 'auto_explain'")
+    db.execute("SET LOCAL auto_explain.log_min_duration = 0")
+    db.execute("SET LOCAL auto_explain.log_nested_statements = on")
+    db.execute("SET LOCAL auto_explain.log_level = notice")
+    conn.add_notice_handler(collect)
+    try:
+        rows = db.execute(query, *args)
+    finally:
+        conn.remove_notice_handler(collect)
+        db.execute("SET LOCAL auto_explain.log_min_duration = -1")
+    return rows, [n for n in notices if "Query Text:" in n]
+
+
+def _plans_reading(plans, relation):
+    matching = [p for p in plans if relation in p]
+    assert matching, f"no statement reading {relation} was run"
+    return "\n".join(matching)
+
+
+class TestObjectLookupPlans:
+    """Index use for object lookups."""
+
+    def test_v0_object_history_uses_index(self, populated):
+        """Test get_object_history filters and orders through idx_changes_object"""
+        rows, plans = _run_explained(
+            populated, "SELECT commit_sha FROM pggit_v0.get_object_history('lp_s7', 'obj7', 3)"
+        )
+        plan = _plans_reading(plans, "pggit_audit.changes")
+
+        # Changes i = 7, 2007, 4007, ... are newest first at i = 7
+        assert [r[0] for r in rows] == ["lp-c7", "lp-c7", "lp-c7"]
+        assert "pggit_v0.commit_graph" in plan
+        assert "Seq Scan on changes" not in plan
+        assert "idx_changes_object" in plan
+
+    def test_audit_object_history_uses_index(self, populated):
+        """Test get_object_changes uses the same index"""
+        rows, plans = _run_explained(
+            populated, "SELECT * FROM pggit_audit.get_object_changes('lp_s7', 'obj7')"
+        )
+        plan = _plans_reading(plans, "pggit_audit.changes")
+
+        assert len(rows) == 10
+        assert "Seq Scan on changes" not in plan
+        assert "idx_changes_object" in plan
+
+    def test_object_definition_uses_tree_key(self, populated):
+        """Test get_object_definition looks up the path and object by key"""
+        rows, plans = _run_explained(
+            populated, "SELECT pggit_v0.get_object_definition('lp_s7', 'obj7', 'lp-c0')"
+        )
+        plan = _plans_reading(plans, "pggit_v0.tree_entries")
+
+        assert rows == [("CREATE TABLE lp_s7.obj7 (id INT)",)]
+        assert "Seq Scan on tree_entries" not in plan
+        assert "Seq Scan on objects" not in plan
+        assert "tree_entries_pkey" in plan
+
+    def test_object_metadata_uses_tree_key(self, populated):
+        """Test get_object_metadata finds an entry by path at a commit"""
+        rows, plans = _run_explained(
+            populated, "SELECT object_type, size FROM pggit_v0.get_object_metadata('lp_s7', 'obj7', 'lp-c0')"
+        )
+        plan = _plans_reading(plans, "pggit_v0.tree_entries")
+
+        assert rows == [("TABLE", 40)]
+        assert "Seq Scan on tree_entries" not in plan
+        assert "Seq Scan on objects" not in plan
+
+    def test_ddl_at_commit_uses_tree_key(self, populated):
+        """Test get_object_ddl_at_commit looks up the path by key"""
+        rows, plans = _run_explained(
+            populated, "SELECT pggit_audit.get_object_ddl_at_commit('lp-c0', 'lp_s7', 'obj7')"
+        )
+        plan = _plans_reading(plans, "pggit_v0.tree_entries")
+
+        assert rows == [("CREATE TABLE lp_s7.obj7 (id INT)",)]
+        assert "Seq Scan on tree_entries" not in plan
+        assert "tree_entries_pkey" in plan
+
+    def test_head_follows_main_branch(self, populated):
+        """Test HEAD is the tip of main rather than the newest commit"""
+        assert populated.execute("SELECT pggit_v0.get_head_sha()") == [("lp-c5",)]
+        assert populated.execute(
+            "SELECT pggit_v0.get_object_definition('lp_s7', 'obj7')"
+        ) == [("CREATE TABLE lp_s7.obj7 (id INT)",)]
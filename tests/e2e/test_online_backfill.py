@@ -0,0 +1,250 @@
+"""
+E2E tests for the keyset-paginated online backfill.
+
+Tests pggit.prepare_online_backfill(), pggit.run_backfill_batch() and
+pggit.run_online_backfill():
+- Batches follow primary key ranges, including composite keys
+- The checkpoint in pggit.deployments lets a backfill resume
+- The {batch} placeholder scopes statements with joins
+- Row conditions passed separately as p_filter
+- The adaptive throttle stays at zero on an idle server
+- run_online_backfill runs its batches without sleeping
+
+Key Coverage:
+- Resumable batches without OFFSET paging
+- Progress reported by monitor_schema_change
+- Subqueries and aliased targets in the backfill statement
+"""
+
+import time
+
+import pytest
+
+
+@pytest.fixture
+def deployment(db_e2e, pggit_installed):
+    """Create public.backfill_items with 2500 rows and an online_change deployment."""
+    db_e2e.execute("""
+        CREATE TABLE public.backfill_items (
+            id INT PRIMARY KEY,
+            price INT NOT NULL,
+            price_cents INT
+        )
+    """)
+    db_e2e.execute("""
+        INSERT INTO public.backfill_items (id, price)
+        SELECT i, i FROM generate_series(1, 2500) i
+    """)
+    deployment_id = db_e2e.execute("""
+        INSERT INTO pggit.deployments (deployment_name, deployment_type, changes_sql)
+        VALUES ('backfill test', 'online_change', 'ALTER TABLE backfill_items ...')
+        RETURNING deployment_id
+    """)[0][0]
+    return db_e2e, deployment_id
+
+
+def _backfill(db, deployment_id):
+    return db.execute(
+        "SELECT metadata->'backfill' FROM pggit.deployments WHERE deployment_id = %s",
+        deployment_id,
+    )[0][0]
+
+
+class TestOnlineBackfill:
+    """Keyset-paginated, resumable backfill."""
+
+    def test_run_online_backfill_pages_by_key(self, deployment):
+        """Test run_online_backfill covers every row in primary key batches"""
+        db, deployment_id = deployment
+        processed = db.execute(
+            """
+            SELECT pggit.run_online_backfill(
+                %s, 'backfill_items',
+                'UPDATE backfill_items SET price_cents = price * 100', 1000)
+            """,
+            deployment_id,
+        )[0][0]
+
+        assert processed == 2500
+        missing = db.execute(
+            "SELECT COUNT(*) FROM public.backfill_items WHERE price_cents IS NULL"
+        )
+        assert missing[0][0] == 0
+
+        state = _backfill(db, deployment_id)
+        assert state["batches"] == 3
+        assert state["last_key"] == ["2500"]
+        assert state["status"] == "completed"
+
+        monitor = db.execute(
+            "SELECT status, percent_complete, rows_processed FROM pggit.monitor_schema_change(%s)",
+            deployment_id,
+        )
+        assert monitor == [("completed", 100, 2500)]
+
+    def test_batches_resume_from_checkpoint(self, deployment):
+        """Test each batch checkpoints its last key and a later run continues"""
+        db, deployment_id = deployment
+        db.execute(
+            """
+            SELECT pggit.prepare_online_backfill(
+                %s, 'public.backfill_items',
+                'UPDATE public.backfill_items SET price_cents = price * 100',
+                400, 'price_cents IS NULL')
+            """,
+            deployment_id,
+        )
+
+        assert db.execute("SELECT pggit.run_backfill_batch(%s)", deployment_id)[0][0]
+        assert db.execute("SELECT pggit.run_backfill_batch(%s)", deployment_id)[0][0]
+
+        state = _backfill(db, deployment_id)
+        assert (state["last_key"], state["processed_rows"]) == (["800"], 800)
+        done = db.execute(
+            "SELECT MAX(id) FROM public.backfill_items WHERE price_cents IS NOT NULL"
+        )
+        assert done[0][0] == 800
+
+        # Resuming through run_online_backfill keeps the checkpoint
+        processed = db.execute(
+            "SELECT pggit.run_online_backfill(%s, 'backfill_items', 'ignored', 1)",
+            deployment_id,
+        )[0][0]
+
+        assert processed == 2500
+        assert _backfill(db, deployment_id)["batches"] == 7
+        assert not db.execute(
+            "SELECT pggit.run_backfill_batch(%s)", deployment_id
+        )[0][0]
+
+    def test_composite_key_with_batch_placeholder(self, db_e2e, pggit_installed):
+        """Test composite keys and the {batch} placeholder in a joined update"""
+        db_e2e.execute("""
+            CREATE TABLE public.backfill_lines (
+                order_no INT, line_no INT, total INT,
+                PRIMARY KEY (order_no, line_no)
+            )
+        """)
+        db_e2e.execute("""
+            INSERT INTO public.backfill_lines
+            SELECT o, l, NULL FROM generate_series(1, 30) o, generate_series(1, 3) l
+        """)
+        deployment_id = db_e2e.execute("""
+            INSERT INTO pggit.deployments (deployment_name, deployment_type, changes_sql)
+            VALUES ('composite', 'online_change', '-')
+            RETURNING deployment_id
+        """)[0][0]
+
+        db_e2e.execute(
+            """
+            SELECT pggit.run_online_backfill(%s, 'backfill_lines', $sql$
+                UPDATE backfill_lines SET total = f.factor * line_no
+                FROM (VALUES (10)) AS f(factor)
+                WHERE {batch}
+            $sql$, 20)
+            """,
+            deployment_id,
+        )
+
+        assert db_e2e.execute(
+            "SELECT COUNT(*), SUM(total) FROM public.backfill_lines"
+        ) == [(90, 30 * 60)]
+        state = _backfill(db_e2e, deployment_id)
+        assert state["batches"] == 5
+        assert state["last_key"] == ["30", "3"]
+
+    def test_subquery_where_not_mistaken_for_filter(self, deployment):
+        """Test a WHERE inside a subquery does not stop the key range being applied"""
+        db, deployment_id = deployment
+        db.execute(
+            """
+            SELECT pggit.prepare_online_backfill(
+                %s, 'backfill_items',
+                'UPDATE backfill_items SET price_cents = (SELECT 7 WHERE true)', 1000)
+            """,
+            deployment_id,
+        )
+
+        assert db.execute("SELECT pggit.run_backfill_batch(%s)", deployment_id)[0][0]
+        assert db.execute(
+            "SELECT COUNT(*), MAX(id) FROM public.backfill_items WHERE price_cents = 7"
+        ) == [(1000, 1000)]
+
+    def test_aliased_target_with_filter(self, deployment):
+        """Test the key range names an aliased target by its alias and the filter is kept"""
+        db, deployment_id = deployment
+        processed = db.execute(
+            """
+            SELECT pggit.run_online_backfill(
+                %s, 'backfill_items',
+                'UPDATE backfill_items AS bi SET price_cents = bi.price * 100;',
+                1000, 'bi.id %% 2 = 0')
+            """,
+            deployment_id,
+        )[0][0]
+
+        assert processed == 1250
+        assert _backfill(db, deployment_id)["target_alias"] == "bi"
+        assert db.execute(
+            "SELECT COUNT(*) FROM public.backfill_items WHERE price_cents IS NOT NULL AND id %% 2 = 1"
+        ) == [(0,)]
+
+    def test_statement_with_where_rejected(self, deployment):
+        """Test a statement with its own WHERE clause is refused rather than re-scoped"""
+        db, deployment_id = deployment
+        with pytest.raises(Exception, match="cannot be restricted to a key range"):
+            db.execute(
+                """
+                SELECT pggit.prepare_online_backfill(
+                    %s, 'backfill_items',
+                    'UPDATE backfill_items SET price_cents = 1 WHERE price_cents IS NULL')
+                """,
+                deployment_id,
+            )
+
+    def test_table_without_primary_key_rejected(self, deployment):
+        """Test keyset paging refuses tables without a primary key"""
+        db, deployment_id = deployment
+        db.execute("CREATE TABLE public.backfill_nopk (v INT)")
+
+        with pytest.raises(Exception, match="requires a primary key"):
+            db.execute(
+                "SELECT pggit.prepare_online_backfill(%s, 'backfill_nopk', 'UPDATE backfill_nopk SET v = 1')",
+                deployment_id,
+            )
+
+    def test_run_online_backfill_does_not_sleep(self, deployment):
+        """Test the in-transaction entry point runs batches without the throttle delay"""
+        db, deployment_id = deployment
+        db.execute(
+            """
+            SELECT pggit.prepare_online_backfill(
+                %s, 'public.backfill_items',
+                'UPDATE public.backfill_items SET price_cents = price * 100', 1000)
+            """,
+            deployment_id,
+        )
+        db.execute("""
+            UPDATE pggit.deployments
+            SET metadata = jsonb_set(metadata, '{backfill,throttle_ms}', '4000')
+            WHERE deployment_id = %s
+        """, deployment_id)
+
+        started = time.monotonic()
+        processed = db.execute(
+            "SELECT pggit.run_online_backfill(%s, 'backfill_items', 'ignored', 1)",
+            deployment_id,
+        )[0][0]
+
+        assert processed == 2500
+        # Sleeping the decaying delay after each of the three batches takes 3.5s
+        assert time.monotonic() - started < 2
+
+    def test_throttle_decays_when_idle(self, db_e2e, pggit_installed):
+        """Test the throttle halves its delay and reaches zero without lag or waiters"""
+        delays = db_e2e.execute("""
+            SELECT pggit.backfill_throttle_delay(400),
+                   pggit.backfill_throttle_delay(15),
+                   pggit.backfill_throttle_delay(0)
+        """)
+        assert delays == [(200, 0, 0)]
@@ -0,0 +1,163 @@
+"""
+E2E tests for resource sampling in performance metrics.
+
+Tests pggit.record_performance_metric() and the batch jobs behind it:
+- No fabricated CPU time; counters attached later from pg_stat_statements
+- Statement counters measured from a baseline taken by the first metric
+- Memory sampled at pggit.metrics_memory_sample_rate
+- Alerts evaluated by pggit.evaluate_performance_alerts(), not inline
+
+Key Coverage:
+- Each metric evaluated for alerts once
+- The alert job registered with pggit.run_maintenance()
+"""
+
+import pytest
+
+
+def _record(db, operation_type="sampling_op"):
+    return db.execute(
+        """
+        SELECT pggit.record_performance_metric(
+            %s, 'sampled', (clock_timestamp() - INTERVAL '2 seconds')::TIMESTAMP(6))
+        """,
+        operation_type,
+    )[0][0]
+
+
+def _metric(db, metric_id):
+    return db.execute(
+        """
+        SELECT cpu_time_ms, memory_used_mb, alerts_evaluated
+        FROM pggit.performance_metrics WHERE metric_id = %s
+        """,
+        metric_id,
+    )[0]
+
+
+class TestMetricSampling:
+    """Cheap per-metric recording."""
+
+    def test_no_estimated_cpu_time(self, db_e2e, pggit_installed):
+        """Test CPU time is left for the counter collection to fill"""
+        db_e2e.execute("SET LOCAL pggit.metrics_memory_sample_rate = '0'")
+        cpu, memory, evaluated = _metric(db_e2e, _record(db_e2e))
+        assert cpu is None
+        assert memory is None
+        assert evaluated is False
+
+    def test_memory_sampled_when_rate_is_one(self, db_e2e, pggit_installed):
+        """Test a sample rate of 1 measures backend memory on every call"""
+        db_e2e.execute("SET LOCAL pggit.metrics_memory_sample_rate = '1'")
+        _, memory, _ = _metric(db_e2e, _record(db_e2e))
+        assert memory > 0
+
+    def test_counters_without_pg_stat_statements(self, db_e2e, pggit_installed):
+        """Test counter collection is a no-op without pg_stat_statements"""
+        if db_e2e.execute(
+            "SELECT COUNT(*) FROM pg_extension WHERE extname = 'pg_stat_statements'"
+        )[0][0]:
+            pytest.skip("pg_stat_statements installed")
+        _record(db_e2e)
+        assert db_e2e.execute("SELECT pggit.collect_performance_counters()")[0][0] == 0
+
+
+def _require_pg_stat_statements(db):
+    if not db.execute(
+        "SELECT COUNT(*) FROM pg_extension WHERE extname = 'pg_stat_statements'"
+    )[0][0]:
+        pytest.skip("pg_stat_statements not installed")
+
+
+class TestStatementCounters:
+    """Statement-level counters from pg_stat_statements."""
+
+    def test_first_delta_starts_at_metric(self, db_e2e, pggit_installed):
+        """Test a statement's first metric is measured from its own baseline, not all-time totals"""
+        _require_pg_stat_statements(db_e2e)
+        metric_id = _record(db_e2e)
+        query_id = db_e2e.execute(
+            "SELECT query_id FROM pggit.performance_metrics WHERE metric_id = %s", metric_id
+        )[0][0]
+        if query_id is None:
+            pytest.skip("compute_query_id is off")
+        assert db_e2e.execute(
+            "SELECT COUNT(*) FROM pggit.performance_counter_snapshots WHERE query_id = %s", query_id
+        ) == [(1,)]
+
+        assert db_e2e.execute("SELECT pggit.collect_performance_counters()")[0][0] >= 1
+        calls, cpu, statement_cpu = db_e2e.execute("""
+            SELECT statement_calls, cpu_time_ms, statement_cpu_time_ms
+            FROM pggit.performance_metrics WHERE metric_id = %s
+        """, metric_id)[0]
+        assert calls == 1
+        assert cpu is None
+        assert statement_cpu is not None
+
+    def test_metric_without_baseline_not_charged(self, db_e2e, pggit_installed):
+        """Test a metric whose statement has no baseline gets no counters"""
+        _require_pg_stat_statements(db_e2e)
+        metric_id = _record(db_e2e)
+        if db_e2e.execute(
+            "SELECT query_id FROM pggit.performance_metrics WHERE metric_id = %s", metric_id
+        )[0][0] is None:
+            pytest.skip("compute_query_id is off")
+        db_e2e.execute("DELETE FROM pggit.performance_counter_snapshots")
+
+        db_e2e.execute("SELECT pggit.collect_performance_counters()")
+        assert db_e2e.execute("""
+            SELECT counters_collected_at IS NOT NULL, statement_calls, statement_cpu_time_ms
+            FROM pggit.performance_metrics WHERE metric_id = %s
+        """, metric_id) == [(True, None, None)]
+
+
+class TestBatchAlerts:
+    """Alert evaluation outside the recording path."""
+
+    @pytest.fixture
+    def baseline(self, db_e2e, pggit_installed):
+        """Give sampling_op a 10ms p95 baseline."""
+        db_e2e.execute("""
+            INSERT INTO pggit.performance_baselines (
+                operation_type, percentile_50, percentile_95, percentile_99, sample_count
+            ) VALUES ('sampling_op', 5, 10, 20, 100)
+        """)
+        db_e2e.execute("UPDATE pggit.performance_metrics SET alerts_evaluated = true")
+        return db_e2e
+
+    def _alerts(self, db, metric_id):
+        return db.execute(
+            "SELECT alert_type, severity FROM pggit.performance_alerts WHERE metric_id = %s",
+            metric_id,
+        )
+
+    def test_alerts_wait_for_batch(self, baseline):
+        """Test a slow metric raises its alert only when the batch runs"""
+        metric_id = _record(baseline)
+        assert self._alerts(baseline, metric_id) == []
+
+        assert baseline.execute("SELECT pggit.evaluate_performance_alerts()")[0][0] == 1
+        assert self._alerts(baseline, metric_id) == [("slow_operation", "critical")]
+
+    def test_metrics_evaluated_once(self, baseline):
+        """Test a second batch finds nothing left to evaluate"""
+        metric_id = _record(baseline)
+        baseline.execute("SELECT pggit.evaluate_performance_alerts()")
+
+        assert baseline.execute("SELECT pggit.evaluate_performance_alerts()")[0][0] == 0
+        assert len(self._alerts(baseline, metric_id)) == 1
+
+    def test_batch_size_limits_work(self, baseline):
+        """Test a batch evaluates at most p_batch_size metrics"""
+        for _ in range(3):
+            _record(baseline, "fast_op")
+
+        assert baseline.execute("SELECT pggit.evaluate_performance_alerts(2)")[0][0] == 2
+        assert baseline.execute("SELECT pggit.evaluate_performance_alerts(2)")[0][0] == 1
+
+    def test_job_registered(self, db_e2e, pggit_installed):
+        """Test the alert batch is scheduled as a maintenance job"""
+        assert db_e2e.execute("""
+            SELECT run_interval FROM pggit.maintenance_jobs
+            WHERE job_name = 'performance_alerts'
+        """)[0][0].total_seconds() == 60
@@ -0,0 +1,171 @@
+"""
+E2E tests for the pre-aggregated metrics behind pggit.prometheus_metrics().
+
+Tests pggit.metric_counter_totals, pggit.metric_histogram_totals and
+pggit.fold_metric_deltas():
+- Change totals per object type, change type and branch kept by triggers
+- Active object gauge following inserts, deactivation and deletes
+- Cumulative latency histograms fed by pggit.observe_metric()
+- Exporter output built from counters and histograms only
+
+Key Coverage:
+- Writers only append deltas; no counter row is updated outside folding
+- Folding leaves every total unchanged
+- Version-only updates leave the object gauge alone
+- rebuild_metric_counters() agrees with the trigger-maintained totals
+"""
+
+import pytest
+
+
+def _counter(db, metric, object_type, change_type="", branch_id=1):
+    rows = db.execute(
+        """
+        SELECT value FROM pggit.metric_counter_totals
+        WHERE metric_name = %s AND object_type = %s AND change_type = %s AND branch_id = %s
+        """,
+        metric, object_type, change_type, branch_id,
+    )
+    return rows[0][0] if rows else 0
+
+
+@pytest.fixture
+def sequences(db_e2e, pggit_installed):
+    """Add three active SEQUENCE objects on main with one CREATE change each."""
+    db_e2e.execute("""
+        INSERT INTO pggit.objects (object_type, schema_name, object_name)
+        SELECT 'SEQUENCE', 'pc_schema', 'seq' || i FROM generate_series(1, 3) i
+    """)
+    db_e2e.execute("""
+        INSERT INTO pggit.history (object_id, change_type, change_severity, branch_id)
+        SELECT id, 'CREATE', 'MINOR', 1 FROM pggit.objects WHERE schema_name = 'pc_schema'
+    """)
+    return db_e2e
+
+
+class TestCounters:
+    """Trigger-maintained totals."""
+
+    def test_changes_counted_by_labels(self, db_e2e, pggit_installed):
+        """Test inserted history rows increment their label combination"""
+        before = _counter(db_e2e, "pggit_changes_total", "SEQUENCE", "CREATE")
+        db_e2e.execute("""
+            INSERT INTO pggit.objects (object_type, schema_name, object_name)
+            SELECT 'SEQUENCE', 'pc_schema', 'seq' || i FROM generate_series(1, 3) i
+        """)
+        db_e2e.execute("""
+            INSERT INTO pggit.history (object_id, change_type, change_severity, branch_id)
+            SELECT id, 'CREATE', 'MINOR', 1 FROM pggit.objects WHERE schema_name = 'pc_schema'
+        """)
+        assert _counter(db_e2e, "pggit_changes_total", "SEQUENCE", "CREATE") == before + 3
+
+    def test_object_gauge_follows_activity(self, sequences):
+        """Test deactivating and deleting objects lowers the gauge"""
+        active = _counter(sequences, "pggit_objects_total", "SEQUENCE")
+
+        sequences.execute(
+            "UPDATE pggit.objects SET is_active = false WHERE schema_name = 'pc_schema' AND object_name = 'seq1'"
+        )
+        assert _counter(sequences, "pggit_objects_total", "SEQUENCE") == active - 1
+
+        sequences.execute(
+            "DELETE FROM pggit.objects WHERE schema_name = 'pc_schema' AND object_name = 'seq2'"
+        )
+        assert _counter(sequences, "pggit_objects_total", "SEQUENCE") == active - 2
+
+    def test_version_updates_leave_gauge(self, sequences):
+        """Test updates that keep objects active do not move the gauge"""
+        active = _counter(sequences, "pggit_objects_total", "SEQUENCE")
+        sequences.execute(
+            "UPDATE pggit.objects SET version = version + 1 WHERE schema_name = 'pc_schema'"
+        )
+        assert _counter(sequences, "pggit_objects_total", "SEQUENCE") == active
+
+    def test_writes_append_deltas(self, db_e2e, pggit_installed):
+        """Test recording changes leaves the folded counter rows untouched"""
+        pending = """
+            SELECT COALESCE(SUM(value), 0) FROM pggit.metric_counter_deltas
+            WHERE metric_name = 'pggit_objects_total' AND object_type = 'SEQUENCE'
+        """
+        before = db_e2e.execute(pending)[0][0]
+        folded = db_e2e.execute(
+            "SELECT metric_name, object_type, change_type, branch_id, value FROM pggit.metric_counters ORDER BY 1, 2, 3, 4"
+        )
+        db_e2e.execute("""
+            INSERT INTO pggit.objects (object_type, schema_name, object_name)
+            SELECT 'SEQUENCE', 'pc_schema', 'seq' || i FROM generate_series(1, 3) i
+        """)
+        db_e2e.execute("SELECT pggit.observe_metric('pggit_commit_duration_seconds', 0.5)")
+
+        assert db_e2e.execute(
+            "SELECT metric_name, object_type, change_type, branch_id, value FROM pggit.metric_counters ORDER BY 1, 2, 3, 4"
+        ) == folded
+        assert db_e2e.execute(pending)[0][0] == before + 3
+
+    def test_fold_keeps_totals(self, sequences):
+        """Test folding moves deltas into the counters without changing totals"""
+        counters = "SELECT * FROM pggit.metric_counter_totals WHERE value <> 0 ORDER BY 1, 2, 3, 4"
+        histograms = "SELECT metric_name, bucket_counts, sample_count FROM pggit.metric_histogram_totals ORDER BY 1"
+        sequences.execute("SELECT pggit.observe_metric('pggit_commit_duration_seconds', 0.5)")
+        before = sequences.execute(counters), sequences.execute(histograms)
+
+        sequences.execute("SELECT pggit.fold_metric_deltas()")
+
+        assert (sequences.execute(counters), sequences.execute(histograms)) == before
+        assert sequences.execute("SELECT COUNT(*) FROM pggit.metric_counter_deltas") == [(0,)]
+        assert sequences.execute("SELECT COUNT(*) FROM pggit.metric_observations") == [(0,)]
+
+    def test_rebuild_matches_triggers(self, sequences):
+        """Test a full recount gives the same totals as the triggers"""
+        query = "SELECT * FROM pggit.metric_counter_totals ORDER BY 1, 2, 3, 4"
+        before = sequences.execute(query)
+        sequences.execute("SELECT pggit.rebuild_metric_counters()")
+        after = sequences.execute(query)
+        assert [r for r in after if r[4]] == [r for r in before if r[4]]
+
+
+class TestHistograms:
+    """Latency histograms and export."""
+
+    def test_observation_fills_cumulative_buckets(self, db_e2e, pggit_installed):
+        """Test an observation counts in every bucket at or above its value"""
+        query = """
+            SELECT bucket_counts, sample_count, sample_sum
+            FROM pggit.metric_histogram_totals WHERE metric_name = 'pggit_commit_duration_seconds'
+        """
+        counts, count, total = db_e2e.execute(query)[0]
+        db_e2e.execute("SELECT pggit.observe_metric('pggit_commit_duration_seconds', 0.005)")
+        db_e2e.execute("SELECT pggit.observe_metric('pggit_commit_duration_seconds', 20)")
+        new_counts, new_count, new_total = db_e2e.execute(query)[0]
+
+        # Buckets 0.001 and below miss 0.005; 20 is above every bound
+        assert [n - o for n, o in zip(new_counts, counts)] == [0] + [1] * 11
+        assert new_count == count + 2
+        assert new_total == pytest.approx(total + 20.005)
+
+    def test_merge_observed(self, db_e2e, pggit_installed):
+        """Test a merge adds to the merge duration histogram"""
+        before = db_e2e.execute(
+            "SELECT sample_count FROM pggit.metric_histogram_totals WHERE metric_name = 'pggit_merge_duration_seconds'"
+        )[0][0]
+        db_e2e.execute("INSERT INTO pggit.branches (name) VALUES ('pc-feature')")
+        db_e2e.execute("SELECT pggit.merge('pc-feature', 'main')")
+        assert db_e2e.execute(
+            "SELECT sample_count FROM pggit.metric_histogram_totals WHERE metric_name = 'pggit_merge_duration_seconds'"
+        )[0][0] == before + 1
+
+    def test_exporter_output(self, sequences):
+        """Test the exporter renders labelled counters and histogram series"""
+        output = sequences.execute("SELECT pggit.prometheus_metrics()")[0][0]
+
+        assert 'pggit_changes_total{object_type="SEQUENCE",change_type="CREATE",branch="main"}' in output
+        assert 'pggit_objects_total{object_type="SEQUENCE",branch="main"}' in output
+        assert "# TYPE pggit_ddl_capture_duration_seconds histogram" in output
+        assert 'pggit_merge_duration_seconds_bucket{le="+Inf"}' in output
+        assert "pggit_commit_duration_seconds_count" in output
+
+    def test_label_values_escaped(self, db_e2e, pggit_installed):
+        """Test backslash, double quote and newline are escaped in label values"""
+        assert db_e2e.execute(
+            "SELECT pggit.prometheus_label_value(%s)", 'a "q" b\\c\nd'
+        ) == [('a \\"q\\" b\\\\c\\nd',)]
@@ -0,0 +1,136 @@
+"""
+E2E tests for hash-driven schema snapshots.
+
+Tests pggit.get_schema_snapshot(), pggit.diff_schema_manifests() and
+pggit.compare_schemas():
+- Snapshots stored as content-addressed manifests (schema, bucket, object)
+- Only buckets whose objects changed are rebuilt on the next snapshot
+- Bucket rows deleted with their branch
+- Diffs streamed as added, removed and modified rows
+
+Key Coverage:
+- Identical branches share one manifest hash
+- compare_schemas keeps its summary and change document
+"""
+
+import pytest
+
+
+@pytest.fixture
+def branches(db_e2e, pggit_installed):
+    """Create two branches holding the same 300 tables; return their ids."""
+    ids = []
+    for name in ("manifest-a", "manifest-b"):
+        ids.append(db_e2e.execute(
+            "INSERT INTO pggit.branches (name) VALUES (%s) RETURNING id", name
+        )[0][0])
+        db_e2e.execute("""
+            INSERT INTO pggit.objects (object_type, schema_name, object_name, content_hash,
+                                       ddl_normalized, branch_id, branch_name)
+            SELECT 'TABLE', 'sm_' || (i % 3), 'table_' || i, md5('table_' || i),
+                   'CREATE TABLE table_' || i || ' (id int)', %s, %s
+            FROM generate_series(1, 300) i
+        """, ids[-1], name)
+    return db_e2e, ids
+
+
+def _manifest(db, branch):
+    return db.execute("SELECT pggit.get_schema_snapshot(%s)->>'manifest_hash'", branch)[0][0]
+
+
+class TestManifests:
+    """Content-addressed snapshots."""
+
+    def test_identical_branches_share_manifest(self, branches):
+        """Test branches with the same objects get the same manifest hash"""
+        db, _ = branches
+        snapshot = db.execute("SELECT pggit.get_schema_snapshot('manifest-a')")[0][0]
+
+        assert snapshot["summary"] == {"object_count": 300, "schema_count": 3}
+        assert snapshot["manifest_hash"] == _manifest(db, "manifest-b")
+        assert db.execute(
+            "SELECT COUNT(*) FROM pggit.snapshot_objects(%s)", snapshot["manifest_hash"]
+        ) == [(300,)]
+
+    def test_only_changed_buckets_go_stale(self, branches):
+        """Test a change clears the hash of its bucket only"""
+        db, (_, b_id) = branches
+        _manifest(db, "manifest-b")
+        db.execute("""
+            UPDATE pggit.objects SET content_hash = 'changed'
+            WHERE branch_id = %s AND object_name = 'table_7'
+        """, b_id)
+        db.execute("UPDATE pggit.objects SET version = version + 1 WHERE branch_id = %s", b_id)
+
+        assert db.execute("""
+            SELECT COUNT(*) FROM pggit.branch_schema_buckets
+            WHERE branch_id = %s AND bucket_hash IS NULL
+        """, b_id) == [(1,)]
+
+    def test_rebuild_matches_fresh_manifest(self, branches):
+        """Test an incrementally updated manifest equals a full rebuild"""
+        db, (_, b_id) = branches
+        _manifest(db, "manifest-b")
+        db.execute("DELETE FROM pggit.objects WHERE branch_id = %s AND object_name = 'table_8'", b_id)
+        incremental = _manifest(db, "manifest-b")
+
+        db.execute("SELECT pggit.reset_schema_buckets(%s)", b_id)
+        assert _manifest(db, "manifest-b") == incremental
+
+    def test_deleted_branch_drops_its_buckets(self, db_e2e, pggit_installed):
+        """Test deleting a branch deletes its bucket rows"""
+        branch_id = db_e2e.execute(
+            "INSERT INTO pggit.branches (name) VALUES ('manifest-gone') RETURNING id"
+        )[0][0]
+        db_e2e.execute("""
+            INSERT INTO pggit.branch_schema_buckets (branch_id, schema_name, bucket)
+            VALUES (%s, 'sm_0', '00')
+        """, branch_id)
+
+        db_e2e.execute("DELETE FROM pggit.branches WHERE id = %s", branch_id)
+
+        assert db_e2e.execute(
+            "SELECT COUNT(*) FROM pggit.branch_schema_buckets WHERE branch_id = %s", branch_id
+        ) == [(0,)]
+
+
+class TestManifestDiff:
+    """Diffs between manifests."""
+
+    def test_diff_streams_changes(self, branches):
+        """Test the diff returns exactly the changed objects"""
+        db, (_, b_id) = branches
+        old = _manifest(db, "manifest-a")
+        db.execute("UPDATE pggit.objects SET content_hash = 'new' WHERE branch_id = %s AND object_name = 'table_1'", b_id)
+        db.execute("DELETE FROM pggit.objects WHERE branch_id = %s AND object_name = 'table_2'", b_id)
+        db.execute("""
+            INSERT INTO pggit.objects (object_type, schema_name, object_name, content_hash, branch_id, branch_name)
+            VALUES ('VIEW', 'sm_new', 'report', 'v1', %s, 'manifest-b')
+        """, b_id)
+        new = _manifest(db, "manifest-b")
+
+        rows = db.execute("""
+            SELECT change_type, object_type, schema_name, object_name
+            FROM pggit.diff_schema_manifests(%s, %s) ORDER BY 1
+        """, old, new)
+        assert rows == [
+            ("added", "VIEW", "sm_new", "report"),
+            ("modified", "TABLE", "sm_1", "table_1"),
+            ("removed", "TABLE", "sm_2", "table_2"),
+        ]
+        assert db.execute("SELECT COUNT(*) FROM pggit.diff_schema_manifests(%s, %s)", new, new) == [(0,)]
+
+    def test_compare_schemas_document(self, branches):
+        """Test compare_schemas reports the changes with their definitions"""
+        db, (_, b_id) = branches
+        db.execute("""
+            UPDATE pggit.objects SET content_hash = 'new', ddl_normalized = 'CREATE TABLE table_3 (id bigint)'
+            WHERE branch_id = %s AND object_name = 'table_3'
+        """, b_id)
+
+        diff = db.execute("SELECT pggit.compare_schemas('manifest-a', 'manifest-b')")[0][0]
+        assert diff["summary"] == {"added": 0, "removed": 0, "modified": 1}
+        change = diff["changes"][0]
+        assert change["object_name"] == "table_3"
+        assert change["old_definition"] == "CREATE TABLE table_3 (id int)"
+        assert change["new_definition"] == "CREATE TABLE table_3 (id bigint)"
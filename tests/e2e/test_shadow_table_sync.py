@@ -0,0 +1,174 @@
+"""
+E2E tests for incremental shadow table synchronization.
+
+Tests the shadow_table pipeline of pggit.start_zero_downtime_deployment():
+- Chunked initial copy along the primary key with a checkpoint
+- Change capture on the original table and catch-up by key
+- Lag metrics from pggit.get_shadow_sync_status()
+- Cutover that drains the remaining changes and swaps the tables
+
+Key Coverage:
+- Shadow deployments that do not copy the table in one statement
+- Accurate rows_synced bookkeeping
+"""
+
+import pytest
+
+
+@pytest.fixture
+def shadow(db_e2e, pggit_installed):
+    """Start a deferred shadow deployment of public.shadow_items (2500 rows)."""
+    db_e2e.execute("""
+        CREATE TABLE public.shadow_items (
+            id INT PRIMARY KEY,
+            qty INT NOT NULL
+        )
+    """)
+    db_e2e.execute("""
+        INSERT INTO public.shadow_items
+        SELECT i, i FROM generate_series(1, 2500) i
+    """)
+    db_e2e.execute("SET LOCAL pggit.shadow_sync = 'deferred'")
+    deployment_id = db_e2e.execute("""
+        SELECT pggit.start_zero_downtime_deployment(
+            'shadow_items', 'shadow_table',
+            'ALTER TABLE shadow_items ADD COLUMN note TEXT')
+    """)[0][0]
+    shadow_id, shadow_table = db_e2e.execute(
+        "SELECT shadow_id, shadow_table FROM pggit.shadow_tables WHERE deployment_id = %s",
+        deployment_id,
+    )[0]
+    db_e2e.execute(
+        "UPDATE pggit.shadow_tables SET chunk_size = 1000 WHERE shadow_id = %s",
+        shadow_id,
+    )
+    return db_e2e, deployment_id, shadow_id, shadow_table
+
+
+def _status(db, deployment_id):
+    return db.execute(
+        """
+        SELECT sync_status, rows_synced, pending_changes, changes_applied
+        FROM pggit.get_shadow_sync_status(%s)
+        """,
+        deployment_id,
+    )[0]
+
+
+def _diff(db, shadow_table):
+    return db.execute(f"""
+        SELECT COUNT(*) FROM (
+            (SELECT id, qty FROM public.shadow_items
+             EXCEPT SELECT id, qty FROM public.{shadow_table})
+            UNION ALL
+            (SELECT id, qty FROM public.{shadow_table}
+             EXCEPT SELECT id, qty FROM public.shadow_items)
+        ) d
+    """)[0][0]
+
+
+class TestShadowTableSync:
+    """Chunked copy, change capture and cutover."""
+
+    def test_chunked_copy_with_catch_up(self, shadow):
+        """Test writes during the chunked copy are captured and applied"""
+        db, deployment_id, shadow_id, shadow_table = shadow
+        assert _status(db, deployment_id) == ("creating", 0, 0, 0)
+
+        assert db.execute("SELECT pggit.copy_shadow_chunk(%s)", shadow_id)[0][0]
+        last_key = db.execute(
+            "SELECT last_key FROM pggit.shadow_tables WHERE shadow_id = %s", shadow_id
+        )
+        assert last_key == [(["1000"],)]
+
+        # Rows on both sides of the checkpoint, a delete and a key change
+        db.execute("UPDATE public.shadow_items SET qty = -1 WHERE id IN (5, 2000)")
+        db.execute("DELETE FROM public.shadow_items WHERE id = 6")
+        db.execute("UPDATE public.shadow_items SET id = 3000 WHERE id = 7")
+        assert _status(db, deployment_id) == ("syncing", 1000, 5, 0)
+
+        db.execute("SELECT pggit.sync_shadow_table(%s)", shadow_id)
+
+        assert _status(db, deployment_id) == ("synchronized", 2499, 0, 5)
+        assert _diff(db, shadow_table) == 0
+        chunks = db.execute(
+            "SELECT pggit.copy_shadow_chunk(%s)", shadow_id
+        )[0][0]
+        assert chunks is False
+
+    def test_inline_sync_keeps_capturing(self, db_e2e, pggit_installed):
+        """Test the default inline sync copies everything and keeps capture on"""
+        db_e2e.execute("CREATE TABLE public.shadow_inline (id INT PRIMARY KEY, v INT)")
+        db_e2e.execute(
+            "INSERT INTO public.shadow_inline SELECT i, i FROM generate_series(1, 300) i"
+        )
+        deployment_id = db_e2e.execute("""
+            SELECT pggit.start_zero_downtime_deployment(
+                'shadow_inline', 'shadow_table',
+                'ALTER TABLE shadow_inline ADD COLUMN w INT')
+        """)[0][0]
+
+        assert _status(db_e2e, deployment_id) == ("synchronized", 300, 0, 0)
+
+        db_e2e.execute("INSERT INTO public.shadow_inline VALUES (301, 301)")
+        status = db_e2e.execute(
+            "SELECT pending_changes, sync_lag > INTERVAL '0' FROM pggit.get_shadow_sync_status(%s)",
+            deployment_id,
+        )
+        assert status == [(1, True)]
+
+    def test_cutover_swaps_tables(self, shadow):
+        """Test cutover drains captured changes and renames the tables"""
+        db, deployment_id, shadow_id, shadow_table = shadow
+        db.execute("SELECT pggit.sync_shadow_table(%s)", shadow_id)
+        db.execute("UPDATE public.shadow_items SET qty = 0 WHERE id = 1")
+        db.execute("INSERT INTO public.shadow_items VALUES (9000, 9)")
+
+        db.execute("SELECT pggit.cutover_shadow_table(%s)", shadow_id)
+
+        rows = db.execute(
+            "SELECT id, qty, note FROM public.shadow_items WHERE id IN (1, 9000) ORDER BY id"
+        )
+        assert rows == [(1, 0, None), (9000, 9, None)]
+        # The pre-deployment table lives on under the shadow name
+        old = db.execute(
+            f"SELECT COUNT(*) FROM information_schema.columns "
+            f"WHERE table_name = '{shadow_table}' AND column_name = 'note'"
+        )
+        assert old[0][0] == 0
+        assert _status(db, deployment_id) == ("completed", 2501, 0, 2)
+
+        triggers = db.execute(f"""
+            SELECT COUNT(*) FROM pg_trigger
+            WHERE tgfoid = 'pggit.capture_shadow_changes'::regproc
+            AND tgrelid IN ('public.shadow_items'::regclass, 'public.{shadow_table}'::regclass)
+        """)
+        assert triggers[0][0] == 0
+        status = db.execute(
+            "SELECT status FROM pggit.deployments WHERE deployment_id = %s",
+            deployment_id,
+        )
+        assert status[0][0] == "completed"
+
+    def test_cutover_requires_synchronized(self, shadow):
+        """Test cutover refuses a shadow table whose copy is unfinished"""
+        db, _, shadow_id, _ = shadow
+
+        with pytest.raises(Exception, match="is not synchronized"):
+            db.execute("SELECT pggit.cutover_shadow_table(%s)", shadow_id)
+
+    def test_table_without_primary_key_copied_once(self, db_e2e, pggit_installed):
+        """Test tables without a primary key are copied in one pass without capture"""
+        db_e2e.execute("CREATE TABLE public.shadow_nopk (v INT)")
+        db_e2e.execute("INSERT INTO public.shadow_nopk SELECT generate_series(1, 10)")
+        deployment_id = db_e2e.execute("""
+            SELECT pggit.start_zero_downtime_deployment(
+                'shadow_nopk', 'shadow_table',
+                'ALTER TABLE shadow_nopk ADD COLUMN w INT')
+        """)[0][0]
+
+        assert _status(db_e2e, deployment_id) == ("synchronized", 10, 0, 0)
+        triggers = db_e2e.execute(
+            "SELECT COUNT(*) FROM pg_trigger WHERE tgrelid = 'public.shadow_nopk'::regclass"
+        )
+        assert triggers[0][0] == 0
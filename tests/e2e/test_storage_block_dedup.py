@@ -0,0 +1,186 @@
+"""
+E2E tests for the content-defined block store.
+
+Tests pggit.chunk_content(), pggit.store_object_blocks(),
+pggit.store_table_blocks() and pggit.read_object_blocks():
+- Gear rolling hash chunking within the minimum and maximum sizes
+- SHA-256 addressed blocks with exact reference counts
+- Compressed block data reassembled into the original content
+- Table dumps of near-identical snapshots sharing blocks
+
+Key Coverage:
+- An edit in the middle of content only adds the blocks around it
+- Releasing an object deletes only blocks nobody else references
+- Tiered branches store their cold tables later, in batches
+"""
+
+import pytest
+
+# ~200KB of varied text: distinct md5 lines chunk at content-defined points
+CONTENT = "SELECT string_agg(md5(i::TEXT), E'\\n' ORDER BY i) FROM generate_series(1, 6000) i"
+
+
+def _store(db, name, expression):
+    return db.execute(
+        f"SELECT pggit.store_object_blocks('blob', 'bs_schema', %s, convert_to(({expression}), 'UTF8'))",
+        name,
+    )[0][0]
+
+
+def _blocks(db, object_id):
+    return {
+        row[0] for row in db.execute(
+            "SELECT block_hash FROM pggit.block_references WHERE object_id = %s", object_id
+        )
+    }
+
+
+class TestChunking:
+    """Content-defined chunk boundaries."""
+
+    def test_chunks_cover_content(self, db_e2e, pggit_installed):
+        """Test chunks are contiguous and within the size bounds"""
+        rows = db_e2e.execute(f"""
+            SELECT chunk_offset, chunk_length
+            FROM pggit.chunk_content(convert_to(({CONTENT}), 'UTF8'))
+            ORDER BY chunk_seq
+        """)
+        total = db_e2e.execute(f"SELECT length(convert_to(({CONTENT}), 'UTF8'))")[0][0]
+
+        offset = 0
+        for chunk_offset, length in rows:
+            assert chunk_offset == offset
+            offset += length
+        assert offset == total
+        assert all(2048 <= length <= 65536 for _, length in rows[:-1])
+        assert len(rows) > 5
+
+    def test_boundaries_resync_after_insert(self, db_e2e, pggit_installed):
+        """Test an insertion shifts only the chunks next to it"""
+        original = _store(db_e2e, "bs-original", CONTENT)
+        edited = _store(
+            db_e2e, "bs-edited",
+            f"SELECT overlay(({CONTENT}) PLACING 'inserted text' FROM 100000 FOR 0)",
+        )
+
+        new_blocks = _blocks(db_e2e, edited) - _blocks(db_e2e, original)
+        assert 1 <= len(new_blocks) <= 3
+
+
+class TestBlockStore:
+    """Storage, reference counting and reassembly."""
+
+    def test_roundtrip(self, db_e2e, pggit_installed):
+        """Test an object reads back exactly as stored"""
+        object_id = _store(db_e2e, "bs-roundtrip", CONTENT)
+        assert db_e2e.execute(
+            f"SELECT pggit.read_object_blocks(%s) = convert_to(({CONTENT}), 'UTF8')", object_id
+        ) == [(True,)]
+
+    def test_reference_counts_match(self, db_e2e, pggit_installed):
+        """Test reference_count equals the references to each block"""
+        _store(db_e2e, "bs-a", CONTENT)
+        _store(db_e2e, "bs-b", CONTENT)
+        _store(db_e2e, "bs-a", f"SELECT upper(({CONTENT}))")
+
+        assert db_e2e.execute("""
+            SELECT COUNT(*) FROM pggit.storage_blocks b
+            WHERE b.reference_count <> (
+                SELECT COUNT(*) FROM pggit.block_references r WHERE r.block_hash = b.block_hash
+            )
+        """) == [(0,)]
+
+    def test_release_keeps_shared_blocks(self, db_e2e, pggit_installed):
+        """Test releasing one of two identical objects keeps their blocks"""
+        first = _store(db_e2e, "bs-first", CONTENT)
+        second = _store(db_e2e, "bs-second", CONTENT)
+        assert db_e2e.execute(
+            "SELECT deduplicated_size_bytes FROM pggit.storage_objects WHERE object_id = %s", second
+        ) == [(0,)]
+
+        assert db_e2e.execute("SELECT pggit.release_object_blocks(%s)", first) == [(0,)]
+        assert db_e2e.execute(
+            f"SELECT pggit.read_object_blocks(%s) = convert_to(({CONTENT}), 'UTF8')", second
+        ) == [(True,)]
+        assert db_e2e.execute("SELECT pggit.release_object_blocks(%s)", second)[0][0] > 0
+
+    def test_blocks_compressed(self, db_e2e, pggit_installed):
+        """Test block data is stored compressed"""
+        object_id = _store(db_e2e, "bs-repeat", "SELECT repeat('pggit block store ', 20000)")
+        assert db_e2e.execute("""
+            SELECT bool_and(pg_column_size(b.compressed_data) < b.block_size / 4)
+            FROM pggit.storage_blocks b
+            JOIN pggit.block_references r ON r.block_hash = b.block_hash
+            WHERE r.object_id = %s
+        """, object_id) == [(True,)]
+
+
+class TestTableDumps:
+    """Branch snapshots stored as table dumps."""
+
+    @pytest.fixture
+    def snapshots(self, db_e2e, pggit_installed):
+        """Create two snapshots of a table differing in one row."""
+        for name in ("bs_snap_a", "bs_snap_b"):
+            db_e2e.execute(f"""
+                CREATE TABLE public.{name} AS
+                SELECT i AS id, md5(i::TEXT) AS payload FROM generate_series(1, 5000) i
+            """)
+        db_e2e.execute("UPDATE public.bs_snap_b SET payload = 'changed' WHERE id = 2500")
+        return db_e2e
+
+    def test_snapshot_costs_only_delta(self, snapshots):
+        """Test the second snapshot adds only the blocks around its change"""
+        a = snapshots.execute("SELECT pggit.store_table_blocks('public.bs_snap_a')")[0][0]
+        b = snapshots.execute("SELECT pggit.store_table_blocks('public.bs_snap_b')")[0][0]
+
+        assert len(_blocks(snapshots, b) - _blocks(snapshots, a)) <= 2
+        dump = snapshots.execute("""
+            SELECT convert_to(string_agg(t::TEXT || E'\\n', '' ORDER BY t::TEXT COLLATE "C"), 'UTF8')
+            FROM public.bs_snap_b t
+        """)[0][0]
+        assert snapshots.execute("SELECT pggit.read_object_blocks(%s)", b)[0][0] == dump
+
+    def test_deduplicate_storage_reports_real_blocks(self, snapshots):
+        """Test deduplicate_storage stores the table and reports its blocks"""
+        original, dedup, total, unique, _ = snapshots.execute(
+            "SELECT * FROM pggit.deduplicate_storage('public.bs_snap_a')"
+        )[0]
+        assert total >= unique > 0
+        assert 0 < dedup < original
+
+    def test_tiered_branch_defers_blocks(self, snapshots):
+        """Test branch creation only references cold tables and a batch job stores them"""
+        status, _, cold, saved = snapshots.execute("""
+            SELECT * FROM pggit.create_tiered_branch(
+                'bs_tiered', 'main', '{}', ARRAY['public.bs_snap_a', 'public.bs_snap_b']
+            )
+        """)[0]
+        assert (status, cold, saved) == ("success", 2, 0)
+        assert snapshots.execute("""
+            SELECT COUNT(*) FROM pggit.storage_objects
+            WHERE object_type = 'branch_ref' AND metadata->>'branch' = 'bs_tiered'
+            AND block_count IS NULL
+        """) == [(2,)]
+
+        assert snapshots.execute("SELECT pggit.store_pending_branch_refs(1)") == [(1,)]
+        assert snapshots.execute("SELECT pggit.store_pending_branch_refs(10)") == [(1,)]
+        assert snapshots.execute("SELECT pggit.store_pending_branch_refs(10)") == [(0,)]
+
+        logical, unique_stored = snapshots.execute("""
+            SELECT SUM(b.block_size), (
+                SELECT SUM(pg_column_size(compressed_data)) FROM pggit.storage_blocks
+                WHERE block_hash IN (
+                    SELECT r.block_hash FROM pggit.block_references r
+                    JOIN pggit.storage_objects o ON o.object_id = r.object_id
+                    WHERE o.metadata->>'branch' = 'bs_tiered'
+                )
+            )
+            FROM pggit.block_references r
+            JOIN pggit.storage_objects o ON o.object_id = r.object_id
+            JOIN pggit.storage_blocks b ON b.block_hash = r.block_hash
+            WHERE o.metadata->>'branch' = 'bs_tiered'
+        """)[0]
+        saved = snapshots.execute("SELECT pggit.tiered_branch_saved_bytes('bs_tiered')")[0][0]
+        assert saved == logical - unique_stored
+        assert saved > 0
@@ -0,0 +1,133 @@
+"""
+E2E tests for the compiled tracking-rule matcher.
+
+Tests pggit.should_track_object() over the rules compiled by
+pggit.compile_tracking_rules():
+- Precedence of pattern, operation and schema rules, then priority
+- LIKE semantics of wildcard patterns, including _ and escapes
+- Recompilation driven by the tracking_config version counter
+- Set-based matching through pggit.match_tracking_rules()
+
+Key Coverage:
+- Exact patterns as key lookups, wildcard patterns as one regex per class
+- Rules compiled on configuration change, never while deciding
+"""
+
+import pytest
+
+
+@pytest.fixture
+def rules(db_e2e, pggit_installed):
+    """Replace tracking_config with a mixed rule set."""
+    db_e2e.execute("DELETE FROM pggit.tracking_config")
+    db_e2e.execute("""
+        INSERT INTO pggit.tracking_config (config_type, action, pattern, priority)
+        VALUES
+            ('schema', 'ignore', 'tmp_%%', 50),
+            ('schema', 'track', 'tmp\\_keep%%', 60),
+            ('schema', 'ignore', 'scratch', 50),
+            ('operation', 'track', 'DROP TABLE', 80),
+            ('pattern', 'ignore', '%%INDEX%%', 75)
+    """)
+    return db_e2e
+
+
+def _track(db, schema, operation):
+    return db.execute(
+        "SELECT pggit.should_track_object(%s, 'table', %s)", schema, operation
+    )[0][0]
+
+
+def _state(db):
+    return db.execute(
+        "SELECT config_version, compiled_version, compiled_at FROM pggit.tracking_rules_state"
+    )[0]
+
+
+class TestCompiledTrackingRules:
+    """Cached decision structure for should_track_object."""
+
+    def test_schema_rules_follow_like_semantics(self, rules):
+        """Test wildcard schema rules match like LIKE and priorities decide"""
+        results = {
+            schema: _track(rules, schema, "CREATE TABLE")
+            for schema in ["public", "scratch", "tmp_a", "tmpxa", "tmp", "tmp_keep1", "tmpxkeep1"]
+        }
+
+        assert results == {
+            "public": True,
+            "scratch": False,
+            "tmp_a": False,
+            "tmpxa": False,  # _ is a single-character wildcard
+            "tmp": True,
+            "tmp_keep1": True,  # higher priority track rule
+            "tmpxkeep1": False,  # escaped _ only matches itself
+        }
+
+    def test_operation_and_pattern_rules_override(self, rules):
+        """Test operation rules override schema rules and pattern rules override both"""
+        assert _track(rules, "scratch", "DROP TABLE") is True
+        assert _track(rules, "public", "CREATE INDEX") is False
+        assert _track(rules, "public", "DROP INDEX") is False
+
+    def test_config_changes_recompile(self, rules):
+        """Test each config change recompiles and deciding never writes"""
+        version, compiled, compiled_at = _state(rules)
+        assert version == compiled
+
+        _track(rules, "public", "CREATE TABLE")
+        assert _state(rules) == (version, compiled, compiled_at)
+
+        rules.execute("SELECT pggit.add_ignore_pattern('CREATE TABLE')")
+        new_version, new_compiled, _ = _state(rules)
+        assert new_version > version
+        assert new_compiled == new_version
+        assert _track(rules, "public", "CREATE TABLE") is False
+
+    def test_stale_rules_evaluated_without_writing(self, rules):
+        """Test rules changed behind the trigger are used but not stored"""
+        rules.execute("ALTER TABLE pggit.tracking_config DISABLE TRIGGER tracking_config_version")
+        rules.execute("DELETE FROM pggit.tracking_config WHERE pattern = 'scratch'")
+        rules.execute("UPDATE pggit.tracking_rules_state SET config_version = config_version + 1")
+        rules.execute("ALTER TABLE pggit.tracking_config ENABLE TRIGGER tracking_config_version")
+        state = _state(rules)
+
+        assert _track(rules, "scratch", "CREATE TABLE") is True
+        assert _state(rules) == state
+
+    def test_set_based_match_agrees(self, rules):
+        """Test matching many objects in one query decides like should_track_object"""
+        subjects = [
+            ("public", "CREATE TABLE"), ("scratch", "CREATE TABLE"), ("tmp_a", "CREATE TABLE"),
+            ("tmp_keep1", "CREATE TABLE"), ("scratch", "DROP TABLE"), ("public", "CREATE INDEX"),
+        ]
+        matched = rules.execute("""
+            SELECT s.schema_name, s.operation, COALESCE(m.track, true)
+            FROM unnest(%s::text[], %s::text[]) AS s(schema_name, operation)
+            LEFT JOIN LATERAL pggit.match_tracking_rules(
+                pggit.current_tracking_rules(), s.schema_name, s.operation) m ON true
+        """, [s for s, _ in subjects], [o for _, o in subjects])
+
+        assert matched == [(s, o, _track(rules, s, o)) for s, o in subjects]
+
+    def test_compiled_classes(self, rules):
+        """Test each precedence class compiles to exact keys and one regex"""
+        compiled = rules.execute("""
+            SELECT c->>'config_type', c->>'action', c->'exact', c->>'regex'
+            FROM jsonb_array_elements(pggit.compile_tracking_rules()) c
+        """)
+
+        assert compiled == [
+            ("pattern", "ignore", {}, "^.*INDEX"),
+            ("operation", "track", {"DROP TABLE": True}, None),
+            ("schema", "track", {"tmp\\_keep%": True}, "^tmp_keep"),
+            ("schema", "ignore", {"scratch": True, "tmp_%": True}, "^tmp."),
+        ]
+
+    def test_wildcard_patterns_share_prefixes(self, db_e2e, pggit_installed):
+        """Test LIKE patterns are merged into one prefix-factored regex"""
+        regex = db_e2e.execute("""
+            SELECT pggit.like_patterns_to_regex(ARRAY['pg\\_temp%%', 'pg_toast%%', 'a.b', 'x%%y'])
+        """)[0][0]
+
+        assert regex == "^(?:a\\.b$|pg(?:_temp|.toast)|x.*y$)"
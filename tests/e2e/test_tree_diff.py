@@ -0,0 +1,84 @@
+"""
+E2E tests for tree-level commit diffs.
+
+Tests pggit_v0.diff_trees() and pggit_v0.diff_commits():
+- Only paths whose object differs are returned
+- CREATE/ALTER/DROP classification by path presence
+- Subtree hashes maintained per schema as tree entries are written
+
+Key Coverage:
+- Unchanged schemas skipped through equal subtree hashes
+- Diffs between non-adjacent commits
+"""
+
+import pytest
+
+
+TREES = {
+    "td-t1": {"app.users": "u1", "app.orders": "o1", "audit.log": "l1"},
+    "td-t2": {"app.users": "u2", "app.orders": "o1", "audit.log": "l1", "app.items": "i1"},
+    "td-t3": {"app.users": "u2", "app.items": "i1", "audit.log": "l1"},
+}
+
+
+@pytest.fixture
+def trees(db_e2e, pggit_installed):
+    """Write three trees and one commit per tree."""
+    for minute, (tree, entries) in enumerate(TREES.items()):
+        for path, obj in entries.items():
+            db_e2e.execute(
+                "INSERT INTO pggit_v0.tree_entries (tree_sha, path, object_sha) VALUES (%s, %s, %s)",
+                tree, path, obj,
+            )
+        db_e2e.execute(
+            """
+            INSERT INTO pggit_v0.commit_graph (commit_sha, tree_sha, author, message, committed_at)
+            VALUES (%s, %s, 'tester', 'tree diff', now() + make_interval(mins => %s))
+            """,
+            "c-" + tree, tree, minute,
+        )
+    return db_e2e
+
+
+class TestTreeDiff:
+    """Path-level diffs over pggit_v0.tree_entries."""
+
+    def test_subtree_hashes_per_schema(self, trees):
+        """Test unchanged schemas keep their subtree hash across trees"""
+        rows = trees.execute(
+            """
+            SELECT schema_name, COUNT(DISTINCT subtree_sha), MAX(entry_count)
+            FROM pggit_v0.tree_subtrees
+            WHERE tree_sha LIKE 'td-%%'
+            GROUP BY schema_name ORDER BY schema_name
+            """
+        )
+        assert rows == [("app", 3, 3), ("audit", 1, 1)]
+
+    def test_diff_trees_returns_changed_paths(self, trees):
+        """Test only differing paths are returned and classified"""
+        rows = trees.execute("SELECT * FROM pggit_v0.diff_trees('td-t1', 'td-t2')")
+        assert rows == [
+            ("app.items", None, "i1", "CREATE"),
+            ("app.users", "u1", "u2", "ALTER"),
+        ]
+
+    def test_identical_trees(self, trees):
+        """Test a tree diffed against itself is empty"""
+        assert trees.execute("SELECT * FROM pggit_v0.diff_trees('td-t2', 'td-t2')") == []
+
+    def test_diff_commits_across_history(self, trees):
+        """Test diffing non-adjacent commits compares their trees directly"""
+        rows = trees.execute(
+            "SELECT object_path, change_type FROM pggit_v0.diff_commits('c-td-t1', 'c-td-t3')"
+        )
+        assert rows == [
+            ("app.items", "CREATE"),
+            ("app.orders", "DROP"),
+            ("app.users", "ALTER"),
+        ]
+
+    def test_unknown_commit_raises(self, trees):
+        """Test an unknown commit is reported"""
+        with pytest.raises(Exception, match="not found"):
+            trees.execute("SELECT * FROM pggit_v0.diff_commits('c-td-t1', 'c-missing')")
@@ -0,0 +1,185 @@
+"""
+E2E tests for the v1 history backfill.
+
+Tests pggit_audit.v1_history_changes, pggit_audit.backfill_from_v1_history(),
+pggit_migration.start_v1_backfill() and pggit_migration.backfill_v1_chunk():
+- DDL parsed set-based over a range of pggit.history ids
+- Chunks checkpointed in backfill_chunks and migration_status
+- Resuming a backfill without duplicating changes
+
+Key Coverage:
+- Parsed fields match the statement patterns and their fallbacks
+- Every history row is backfilled exactly once across chunks
+- Error totals recomputed from the chunks when failed chunks are retried
+"""
+
+import pytest
+
+HISTORY = [
+    ("CREATE TABLE sales.orders (id INT)", None, ("sales", "orders", "TABLE", "CREATE")),
+    ('  alter table "Sales".items ADD COLUMN x INT', None, ("Sales", "items", "TABLE", "ALTER")),
+    ("DROP TABLE IF EXISTS old_stuff", None, ("public", "old_stuff", "TABLE", "DROP")),
+    (
+        "CREATE OR REPLACE FUNCTION api.get_user(INT) RETURNS INT LANGUAGE sql AS 'SELECT 1'",
+        None,
+        ("api", "get_user", "FUNCTION", "CREATE"),
+    ),
+    ("CREATE UNIQUE INDEX CONCURRENTLY idx_a ON t (a)", None, ("public", "idx_a", "INDEX", "CREATE")),
+    ("DROP SEQUENCE IF EXISTS s.seq1", None, ("s", "seq1", "SEQUENCE", "DROP")),
+    ("GRANT SELECT ON t TO bob", "Touched table stock", ("public", "stock", "TABLE", "UNKNOWN")),
+    ("VACUUM", "maintenance", ("unknown", "unknown", "UNKNOWN", "UNKNOWN")),
+]
+
+
+@pytest.fixture
+def v1_history(db_e2e, pggit_installed):
+    """Write one v1 history row per statement and return their id range."""
+    db = db_e2e
+    object_id = db.execute("""
+        INSERT INTO pggit.objects (object_type, schema_name, object_name)
+        VALUES ('TABLE', 'public', 'bf_tracked') RETURNING id
+    """)[0][0]
+    ids = []
+    for n, (sql, description, _) in enumerate(HISTORY):
+        ids.append(db.execute("""
+            INSERT INTO pggit.history (
+                object_id, change_type, change_severity, commit_hash,
+                change_description, sql_executed, created_at
+            ) VALUES (%s, 'ALTER', 'MINOR', %s, %s, %s, '2024-01-01'::timestamp + make_interval(mins => %s))
+            RETURNING id
+        """, object_id, f"bf-{n}", description, sql, n)[0][0])
+    return db, min(ids), max(ids)
+
+
+def _backfilled(db):
+    return db.execute("""
+        SELECT commit_sha, object_schema, object_name, object_type, change_type
+        FROM pggit_audit.changes
+        WHERE commit_sha LIKE 'bf-%%' AND backfilled_from_v1
+        ORDER BY commit_sha
+    """)
+
+
+class TestParsing:
+    """Set-based parsing of one range."""
+
+    def test_parses_statements(self, v1_history):
+        """Test each statement is parsed like the per-row parser did"""
+        db, first_id, last_id = v1_history
+        processed, errors, warnings = db.execute(
+            "SELECT * FROM pggit_audit.backfill_from_v1_history(%s, %s)", first_id, last_id
+        )[0]
+
+        assert (processed, errors, warnings) == (len(HISTORY), 0, 2)
+        assert _backfilled(db) == [
+            (f"bf-{n}", *expected) for n, (_, _, expected) in enumerate(HISTORY)
+        ]
+
+    def test_only_the_range_is_written(self, v1_history):
+        """Test a range backfills only its history rows"""
+        db, first_id, _ = v1_history
+        assert db.execute(
+            "SELECT processed FROM pggit_audit.backfill_from_v1_history(%s, %s)",
+            first_id, first_id + 2,
+        ) == [(3,)]
+        assert [r[0] for r in _backfilled(db)] == ["bf-0", "bf-1", "bf-2"]
+
+
+    def test_whole_history_without_range(self, v1_history):
+        """Test a call without a range backfills every history row"""
+        db, _, _ = v1_history
+        processed, errors, _ = db.execute("SELECT * FROM pggit_audit.backfill_from_v1_history()")[0]
+
+        assert processed >= len(HISTORY)
+        assert errors == 0
+        assert len(_backfilled(db)) == len(HISTORY)
+
+
+class TestChunkedBackfill:
+    """Chunked, restartable runs."""
+
+    @pytest.fixture
+    def migration(self, v1_history):
+        db, _, _ = v1_history
+        migration_id = db.execute("""
+            INSERT INTO pggit_migration.migration_status (migration_name)
+            VALUES ('bf-test') RETURNING migration_id
+        """)[0][0]
+        return db, migration_id
+
+    def test_chunks_cover_history_once(self, migration):
+        """Test every history row is backfilled once over all chunks"""
+        db, migration_id = migration
+        pending = db.execute("SELECT pggit_migration.start_v1_backfill(%s, 3)", migration_id)[0][0]
+
+        claimed = 0
+        while db.execute("SELECT pggit_migration.backfill_v1_chunk(%s)", migration_id)[0][0]:
+            claimed += 1
+
+        assert claimed == pending
+        assert len(_backfilled(db)) == len(HISTORY)
+        status, total, completed, created = db.execute("""
+            SELECT status, total_chunks, completed_chunks, created_changes
+            FROM pggit_migration.migration_status WHERE migration_id = %s
+        """, migration_id)[0]
+        assert status == "COMPLETED"
+        assert total == completed == pending
+        assert created >= len(HISTORY)
+
+    def test_restart_skips_completed_chunks(self, migration):
+        """Test planning again keeps finished chunks and adds no duplicates"""
+        db, migration_id = migration
+        pending = db.execute("SELECT pggit_migration.start_v1_backfill(%s, 3)", migration_id)[0][0]
+        db.execute("SELECT pggit_migration.backfill_v1_chunk(%s)", migration_id)
+
+        assert db.execute(
+            "SELECT pggit_migration.start_v1_backfill(%s, 3)", migration_id
+        ) == [(pending - 1,)]
+        while db.execute("SELECT pggit_migration.backfill_v1_chunk(%s)", migration_id)[0][0]:
+            pass
+        assert len(_backfilled(db)) == len(HISTORY)
+
+    def test_retried_chunk_clears_its_error(self, migration):
+        """Test a failed chunk counts as an error only until a retry succeeds"""
+        db, migration_id = migration
+        db.execute("""
+            CREATE FUNCTION pg_temp.reject_bf4() RETURNS trigger AS $$
+            BEGIN
+                IF NEW.commit_sha = 'bf-4' THEN
+                    RAISE EXCEPTION 'rejected bf-4';
+                END IF;
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        db.execute("""
+            CREATE TRIGGER reject_bf4 BEFORE INSERT ON pggit_audit.changes
+            FOR EACH ROW EXECUTE FUNCTION pg_temp.reject_bf4()
+        """)
+        db.execute("SELECT pggit_migration.start_v1_backfill(%s, 3)", migration_id)
+        while db.execute("SELECT pggit_migration.backfill_v1_chunk(%s)", migration_id)[0][0]:
+            pass
+
+        assert db.execute(
+            "SELECT status, errors FROM pggit_migration.migration_status WHERE migration_id = %s",
+            migration_id,
+        ) == [("COMPLETED_WITH_ERRORS", 1)]
+
+        db.execute("DROP TRIGGER reject_bf4 ON pggit_audit.changes")
+        assert db.execute("SELECT pggit_migration.start_v1_backfill(%s, 3)", migration_id) == [(1,)]
+        while db.execute("SELECT pggit_migration.backfill_v1_chunk(%s)", migration_id)[0][0]:
+            pass
+
+        assert len(_backfilled(db)) == len(HISTORY)
+        status, errors, total, completed = db.execute("""
+            SELECT status, errors, total_chunks, completed_chunks
+            FROM pggit_migration.migration_status WHERE migration_id = %s
+        """, migration_id)[0]
+        assert (status, errors) == ("COMPLETED", 0)
+        assert total == completed
+
+    def test_invalid_chunk_size_rejected(self, migration):
+        """Test a chunk size below one is refused"""
+        db, migration_id = migration
+        with pytest.raises(Exception, match="Chunk size must be positive"):
+            db.execute("SELECT pggit_migration.start_v1_backfill(%s, 0)", migration_id)
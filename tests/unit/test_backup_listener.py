@@ -0,0 +1,296 @@
+"""Unit tests for the backup listener's output handling.
+
+Tests size parsing, progress parsed from captured pgBackRest and Barman
+output, line streaming, progress reporting and the pgBackRest info lookup.
+"""
+
+import asyncio
+import importlib.machinery
+import importlib.util
+import json
+from collections import deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("asyncpg")
+
+LISTENER_PATH = Path(__file__).resolve().parents[2] / "bin" / "pggit-backup-listener"
+
+
+def _load_listener():
+    loader = importlib.machinery.SourceFileLoader("pggit_backup_listener", str(LISTENER_PATH))
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+listener = _load_listener()
+
+# pgbackrest --stanza=main --log-level-console=detail backup --type=full
+PGBACKREST_OUTPUT = """\
+2024-05-16 12:34:56.101 P00   INFO: backup command begin 2.51: --exec-id=4182-1b2c --log-level-console=detail --stanza=main --type=full
+2024-05-16 12:34:56.512 P00   INFO: execute non-exclusive backup start: backup begins after the next regular checkpoint completes
+2024-05-16 12:34:57.020 P00   INFO: backup start archive = 000000010000000000000003, lsn = 0/3000028
+2024-05-16 12:34:57.301 P01 DETAIL: backup file /var/lib/postgresql/16/main/base/5/1259 (112KB, 0.49%) checksum 8a0c3e3b6d4d4d8f0b8a2f1a2f9e4d7c1b2a3c4d
+2024-05-16 12:34:57.305 P01 DETAIL: backup file /var/lib/postgresql/16/main/base/5/2608 (bundle 1/0, 472KB, 2.55%) checksum 2b1d0e9f8a7c6b5d4e3f2a1b0c9d8e7f6a5b4c3d
+2024-05-16 12:34:57.311 P01 DETAIL: backup file /var/lib/postgresql/16/main/global/pg_control (bundle 1/472, 8KB->1.2KB, 2.58%) checksum 0f1e2d3c4b5a69788796a5b4c3d2e1f0a9b8c7d6
+2024-05-16 12:34:58.880 P00   INFO: execute non-exclusive backup stop and wait for all WAL segments to archive
+2024-05-16 12:34:59.104 P00   INFO: check archive for segment(s) 000000010000000000000003:000000010000000000000003
+2024-05-16 12:34:59.402 P00   INFO: new backup label = 20240516-123456F
+2024-05-16 12:34:59.460 P00   INFO: full backup size = 22.3MB, file total = 1280
+2024-05-16 12:34:59.461 P00   INFO: backup command end: completed successfully (3361ms)
+"""
+
+# pgbackrest --output=json info, for two stanzas
+PGBACKREST_INFO = [
+    {
+        "archive": [{"database": {"id": 1, "repo-key": 1}, "id": "16-1"}],
+        "backup": [
+            {
+                "archive": {"start": "000000010000000000000001", "stop": "000000010000000000000001"},
+                "backrest": {"format": 5, "version": "2.51"},
+                "database": {"id": 1, "repo-key": 1},
+                "info": {"delta": 23383040, "repository": {"delta": 2977342, "size": 2977342}, "size": 23383040},
+                "label": "20240515-120000F",
+                "timestamp": {"start": 1715774400, "stop": 1715774403},
+                "type": "full",
+            },
+            {
+                "archive": {"start": "000000010000000000000003", "stop": "000000010000000000000003"},
+                "backrest": {"format": 5, "version": "2.51"},
+                "database": {"id": 1, "repo-key": 1},
+                "info": {"delta": 23383040, "repository": {"delta": 2980001, "size": 2980001}, "size": 23383040},
+                "label": "20240516-123456F",
+                "timestamp": {"start": 1715862896, "stop": 1715862899},
+                "type": "full",
+            },
+            {
+                "archive": {"start": "000000010000000000000005", "stop": "000000010000000000000005"},
+                "backrest": {"format": 5, "version": "2.51"},
+                "database": {"id": 1, "repo-key": 1},
+                "info": {"delta": 1048576, "repository": {"delta": 131072, "size": 2990001}, "size": 23400000},
+                "label": "20240516-123456F_20240516-130000I",
+                "timestamp": {"start": 1715864400, "stop": 1715864401},
+                "type": "incr",
+            },
+        ],
+        "name": "main",
+        "status": {"code": 0, "message": "ok"},
+    },
+    {
+        "backup": [{"label": "20240516-123456F", "timestamp": {"start": 1, "stop": 2}}],
+        "name": "other",
+        "status": {"code": 0, "message": "ok"},
+    },
+]
+
+
+def _stream_lines(data: bytes, tail: deque, on_line=None):
+    """Run stream_lines over a stream that yields data, then EOF."""
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        await listener.BackupListener.stream_lines(reader, tail, on_line)
+
+    asyncio.run(run())
+
+
+class _Connection:
+    def __init__(self):
+        self.calls = []
+
+    async def execute(self, query, *args):
+        self.calls.append((" ".join(query.split()), args))
+
+
+class _Pool:
+    def __init__(self):
+        self.conn = _Connection()
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+class _Process:
+    def __init__(self, stdout: bytes, returncode: int = 0):
+        self.stdout = stdout
+        self.returncode = returncode
+
+    async def communicate(self):
+        return self.stdout, b""
+
+
+class TestParseSize:
+    """Sizes reported by backup tools."""
+
+    @pytest.mark.parametrize("value,expected", [
+        ("112KB", 112 * 1024),
+        ("1.5GB", int(1.5 * 1024 ** 3)),
+        ("33.0 MiB", 33 * 1024 ** 2),
+        ("8kb", 8 * 1024),
+        ("512B", 512),
+        (" 2TB ", 2 * 1024 ** 4),
+    ])
+    def test_units(self, value, expected):
+        """Sizes with and without binary prefixes should convert to bytes."""
+        assert listener.parse_size(value) == expected
+
+    @pytest.mark.parametrize("value", ["", "12", "KB", "12 parsecs", "1.5GB total"])
+    def test_unparseable(self, value):
+        """Anything but a single size should give None."""
+        assert listener.parse_size(value) is None
+
+
+class TestBackupProgress:
+    """Progress parsed from captured tool output."""
+
+    def test_pgbackrest_output(self):
+        """File sizes, percent, total size and label should come from pgBackRest output."""
+        progress = listener.BackupProgress("pgbackrest", "pgbackrest --stanza=main backup")
+        for line in PGBACKREST_OUTPUT.splitlines():
+            progress.feed(line)
+
+        assert progress.bytes_done == (112 + 472 + 8) * 1024
+        assert progress.percent == 2.58
+        assert progress.total_bytes == int(22.3 * 1024 ** 2)
+        assert progress.label == "20240516-123456F"
+
+        snapshot = progress.snapshot()
+        assert snapshot["bytes"] == progress.total_bytes
+        assert snapshot["output_lines"] == len(PGBACKREST_OUTPUT.splitlines())
+
+    def test_barman_output(self):
+        """The Barman size summary should set the total."""
+        progress = listener.BackupProgress("barman", "barman backup pg")
+        for line in [
+            "Starting backup using postgres method for server pg in /var/lib/barman/pg/base/20240516T123456",
+            "Backup start at LSN: 0/3000028 (000000010000000000000003, 00000028)",
+            "Backup size: 22.3 MiB",
+            "Backup end at LSN: 0/3000100 (000000010000000000000003, 00000100)",
+        ]:
+            progress.feed(line)
+
+        assert progress.total_bytes == int(22.3 * 1024 ** 2)
+        assert progress.label is None
+
+    def test_pg_dump_reads_output_file(self, tmp_path):
+        """pg_dump progress should be the size of its --file target."""
+        target = tmp_path / "dump.sql"
+        target.write_bytes(b"x" * 4096)
+        progress = listener.BackupProgress("pg_dump", f"pg_dump --file={target} app")
+
+        assert progress.snapshot()["bytes"] == 4096
+
+
+class TestStreamLines:
+    """Line splitting of streamed output."""
+
+    def test_lines_and_partial_tail(self):
+        """Lines should be split across chunks, keeping only the tail."""
+        tail = deque(maxlen=2)
+        seen = []
+        _stream_lines(b"one\r\ntwo\nthree\nfour", tail, seen.append)
+
+        assert seen == ["one", "two", "three", "four"]
+        assert list(tail) == ["three", "four"]
+
+    def test_long_line_truncated(self):
+        """A line over MAX_LINE_BYTES should be emitted once, truncated."""
+        tail = deque(maxlen=10)
+        long_line = b"x" * (listener.MAX_LINE_BYTES * 20)
+        _stream_lines(long_line + b"\nafter\n", tail)
+
+        assert [len(line) for line in tail] == [listener.MAX_LINE_BYTES, 5]
+        assert tail[1] == "after"
+
+    def test_invalid_utf8_replaced(self):
+        """Undecodable bytes should not break the stream."""
+        tail = deque(maxlen=10)
+        _stream_lines(b"ok \xff\n", tail)
+
+        assert list(tail) == ["ok �"]
+
+
+class TestReportProgress:
+    """Periodic progress updates."""
+
+    def test_writes_snapshots_until_cancelled(self):
+        """Progress should be written every interval until the job ends."""
+        worker = listener.BackupListener("postgresql://unused", progress_interval=0.01)
+        worker.pool = _Pool()
+        progress = listener.BackupProgress("pgbackrest", "pgbackrest backup")
+        progress.feed(PGBACKREST_OUTPUT.splitlines()[3])
+
+        async def run():
+            reporter = asyncio.create_task(worker.report_progress("b-1", progress))
+            await asyncio.sleep(0.05)
+            reporter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await reporter
+
+        asyncio.run(run())
+
+        calls = worker.pool.conn.calls
+        assert len(calls) >= 2
+        query, (backup_id, payload) = calls[-1]
+        assert query == "SELECT pggit.update_backup_progress($1, $2::jsonb)"
+        assert backup_id == "b-1"
+        assert json.loads(payload)["bytes"] == 112 * 1024
+
+
+class TestPgBackRestInfo:
+    """Matching the job's backup in pgBackRest info."""
+
+    def test_select_by_label(self):
+        """The backup with the job's label should be chosen, not the newest."""
+        backup = listener.select_pgbackrest_backup(PGBACKREST_INFO, "main", "20240516-123456F")
+
+        assert backup["label"] == "20240516-123456F"
+        assert backup["type"] == "full"
+
+    def test_unknown_label(self):
+        """A label missing from the stanza should select nothing."""
+        assert listener.select_pgbackrest_backup(PGBACKREST_INFO, "main", "20240517-000000F") is None
+        assert listener.select_pgbackrest_backup(PGBACKREST_INFO, "missing", "20240516-123456F") is None
+
+    def test_metadata_updated_for_label(self, monkeypatch):
+        """The labelled backup should be passed to update_pgbackrest_metadata."""
+        commands = []
+
+        async def fake_exec(*args, **kwargs):
+            commands.append(args)
+            return _Process(json.dumps(PGBACKREST_INFO).encode())
+
+        monkeypatch.setattr(listener.asyncio, "create_subprocess_exec", fake_exec)
+        worker = listener.BackupListener("postgresql://unused")
+        conn = _Connection()
+
+        asyncio.run(worker.parse_pgbackrest_output(
+            conn, "b-1", json.dumps({"stanza": "main"}), "20240516-123456F"
+        ))
+
+        assert commands == [(
+            "pgbackrest", "--stanza=main", "--set=20240516-123456F", "--output=json", "info"
+        )]
+        query, (backup_id, payload) = conn.calls[0]
+        assert query == "SELECT pggit.update_pgbackrest_metadata($1, $2::jsonb)"
+        assert backup_id == "b-1"
+        assert json.loads(payload)["label"] == "20240516-123456F"
+
+    def test_no_label_records_nothing(self, monkeypatch):
+        """Without a label from the output, pgBackRest should not be queried."""
+        async def fake_exec(*args, **kwargs):
+            raise AssertionError("pgbackrest info should not run")
+
+        monkeypatch.setattr(listener.asyncio, "create_subprocess_exec", fake_exec)
+        worker = listener.BackupListener("postgresql://unused")
+        conn = _Connection()
+
+        asyncio.run(worker.parse_pgbackrest_output(conn, "b-1", {"stanza": "main"}, None))
+
+        assert conn.calls == []